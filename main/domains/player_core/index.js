@@ -21,6 +21,7 @@ const { spawn } = require('child_process');
 const path = require('path');
 const { app, BrowserWindow } = require('electron');
 const fs = require('fs');
+const qtSession = require('./qt_session');
 
 let __initializedAt = Date.now();
 
@@ -58,10 +59,22 @@ const __state = {
   qtReturnWasFullscreen: false,
   qtRestoreFullscreenOnReturn: false,
   qtLastUiEventToken: '',
+  // Path of the last performance trace the player exported (perf_trace UI event)
+  qtLastPerfTrace: '',
+  // Persistent framed IPC session to the Qt player (qt_session.js); the progress file is the fallback
+  qtSession: null,
+  qtCommandSeq: 0,
+  qtLastStreamedProgress: null,
+  // Warm standby player ({ child, token, session }) the next cold launch is handed to
+  qtStandby: null,
+  qtStandbyTimer: null,
   // Player launcher mode: headless (no library window). Quit app when player exits.
   launcherMode: false,
 };
 
+// Delay before (re)starting the warm standby player after a launch.
+const QT_STANDBY_DELAY_MS = 5000;
+
 // Debounced/throttled progress writes (V1 foundation; not actively used until V1full routes events here)
 let __progressWriteTimer = null;
 let __pendingProgress = null;
@@ -307,6 +320,71 @@ async function stop(ctx, _evt, reason){
 }
 
 
+// How to start the Qt player: bundled exe when present, else the script under the best python.
+function __resolveQtPlayerLaunch(ctx) {
+  const appRoot = (ctx && ctx.APP_ROOT) ? String(ctx.APP_ROOT) : process.cwd();
+  const playerDir = path.join(appRoot, 'player_qt');
+  const playerScript = path.join(playerDir, 'run_player.py');
+
+  // Packaged builds: prefer a bundled, self-contained player exe (PyInstaller),
+  // so end-users don't need Python installed.
+  const isPackaged = !!app.isPackaged;
+  const bundledPlayerExe = (process.platform === 'win32')
+    ? (isPackaged
+        ? path.join(process.resourcesPath, 'player', 'TankobanPlayer', 'TankobanPlayer.exe')
+        : path.join(playerDir, 'dist', 'TankobanPlayer', 'TankobanPlayer.exe'))
+    : '';
+  // Dev + packaged parity: use bundled EXE whenever present (Python remains fallback).
+  // This avoids brittle local Python dependency issues in dev runs.
+  const canUseBundledExe = !!(bundledPlayerExe && fs.existsSync(bundledPlayerExe));
+
+  // Ensure libmpv DLL discovery is deterministic (Python player reads this env var).
+  const mpvDllDir = __resolveMpvDllDir(appRoot, isPackaged);
+
+  // Choose python binary (DEV BUILD RULES):
+  // Prefer the local venv created by install_qt_player.bat.
+  // This avoids silent failures when system python lacks PySide6/python-mpv.
+  let py = '';
+  try {
+    const venvPyWin = path.join(playerDir, '.venv', 'Scripts', 'python.exe');
+    const venvPyNix = path.join(playerDir, '.venv', 'bin', 'python');
+    const venvPy = (process.platform === 'win32') ? venvPyWin : venvPyNix;
+    if (fs.existsSync(venvPy)) py = venvPy;
+  } catch {}
+
+  if (!py) {
+    const envPy = process.env.PYTHON_BIN ? String(process.env.PYTHON_BIN) : '';
+    if (envPy && fs.existsSync(envPy)) py = envPy;
+  }
+
+  // On Windows, the Python launcher ("py") is common even when "python" is not on PATH.
+  if (!py) py = (process.platform === 'win32') ? 'py' : 'python';
+
+  return { playerDir, playerScript, bundledPlayerExe, canUseBundledExe, mpvDllDir, py };
+}
+
+// Keep stdio so errors show up in the terminal when running via "npm start".
+function __spawnQtPlayer(launch, argv) {
+  const env = { ...process.env };
+  try { if (launch.mpvDllDir) env.TANKOBAN_MPV_DLL_DIR = launch.mpvDllDir; } catch {}
+  const py = launch.py;
+  return launch.canUseBundledExe
+    ? spawn(launch.bundledPlayerExe, argv, {
+        cwd: path.dirname(launch.bundledPlayerExe),
+        detached: false,
+        windowsHide: false,
+        env,
+        stdio: ['ignore', 'pipe', 'pipe'],
+      })
+    : spawn(py === 'py' ? 'py' : py, py === 'py' ? ['-3', ...argv] : argv, {
+        cwd: launch.playerDir,
+        detached: false,
+        windowsHide: false,
+        env,
+        stdio: ['ignore', 'pipe', 'pipe'],
+      });
+}
+
 async function launchQt(_ctx, _evt, args){
   const a = (args && typeof args === 'object') ? args : {};
   const filePath = a.filePath ? String(a.filePath) : '';
@@ -374,16 +452,25 @@ try {
       playlistIds: Array.isArray(a.playlistIds) ? a.playlistIds : null,
       playlistIndex,
       ts: Date.now(),
+      ...__nextQtCommandStamp(),
     };
 
-    try { fs.writeFileSync(cmdPath, JSON.stringify(cmd, null, 2)); } catch {}
+    // Live session: push it. Otherwise the player's command-file watcher picks it up.
+    let viaSession = false;
+    try {
+      const sess = __state.qtSession;
+      viaSession = !!(sess && sess.isLive() && sess.send({ t: 'cmd', cmd }));
+    } catch { viaSession = false; }
+    if (!viaSession) {
+      try { fs.writeFileSync(cmdPath, JSON.stringify(cmd, null, 2)); } catch {}
+    }
 
     // Ensure we still provide a log path for debugging/toasts.
     const logDir = path.join(userData, 'qt_player_logs');
     const logPath = path.join(logDir, 'qt_player_spawn.log');
     try { fs.mkdirSync(logDir, { recursive: true }); } catch {}
     try { fs.appendFileSync(logPath, `
-[${new Date().toISOString()}] launchQt: forwarded open to running player session=${targetSessionId} file=${filePath}
+[${new Date().toISOString()}] launchQt: forwarded open to running player session=${targetSessionId} via=${viaSession ? 'session' : 'file'} file=${filePath}
 `); } catch {}
 
     return {
@@ -398,6 +485,7 @@ try {
 
   // Clear stale handle (defensive) so a finished child doesn't block future launches.
   if (p && p.exitCode !== null) {
+    try { __stopQtSession(); } catch {}
     __state.qtPlayerChild = null;
     __state.qtPlayerSessionId = null;
     __state.qtProgressFile = null;
@@ -482,44 +570,10 @@ try {
   const __appendLog = (s) => { try { fs.appendFileSync(logPath, String(s)); } catch {} };
   const __clearQtLaunching = () => { try { __state.qtLaunching = false; } catch {} };
 
-  const appRoot = (_ctx && _ctx.APP_ROOT) ? String(_ctx.APP_ROOT) : process.cwd();
-  const playerDir = path.join(appRoot, 'player_qt');
-  const playerScript = path.join(playerDir, 'run_player.py');
-
-  // Packaged builds: prefer a bundled, self-contained player exe (PyInstaller),
-  // so end-users don't need Python installed.
-  const isPackaged = !!app.isPackaged;
-  const bundledPlayerExe = (process.platform === 'win32')
-    ? (isPackaged
-        ? path.join(process.resourcesPath, 'player', 'TankobanPlayer', 'TankobanPlayer.exe')
-        : path.join(playerDir, 'dist', 'TankobanPlayer', 'TankobanPlayer.exe'))
-    : '';
-  // Dev + packaged parity: use bundled EXE whenever present (Python remains fallback).
-  // This avoids brittle local Python dependency issues in dev runs.
-  const canUseBundledExe = !!(bundledPlayerExe && fs.existsSync(bundledPlayerExe));
-
-  // Ensure libmpv DLL discovery is deterministic (Python player reads this env var).
-  const mpvDllDir = __resolveMpvDllDir(appRoot, isPackaged);
-
-  // Choose python binary (DEV BUILD RULES):
-  // Prefer the local venv created by install_qt_player.bat.
-  // This avoids silent failures when system python lacks PySide6/python-mpv.
-  let py = '';
-  try {
-    const venvPyWin = path.join(playerDir, '.venv', 'Scripts', 'python.exe');
-    const venvPyNix = path.join(playerDir, '.venv', 'bin', 'python');
-    const venvPy = (process.platform === 'win32') ? venvPyWin : venvPyNix;
-    if (fs.existsSync(venvPy)) py = venvPy;
-  } catch {}
-
-  if (!py) {
-    const envPy = process.env.PYTHON_BIN ? String(process.env.PYTHON_BIN) : '';
-    if (envPy && fs.existsSync(envPy)) py = envPy;
-  }
-
-  // On Windows, the Python launcher ("py") is common even when "python" is not on PATH.
-  if (!py) py = (process.platform === 'win32') ? 'py' : 'python';
+  const launch = __resolveQtPlayerLaunch(_ctx);
+  const { playerScript, bundledPlayerExe, canUseBundledExe, mpvDllDir, py } = launch;
 
+  let winPlacement = null;
   const commonArgs = [
     '--file', filePath,
     '--start', String(start),
@@ -543,6 +597,7 @@ try {
       } catch {}
       const out = ['--win-x', String(b.x), '--win-y', String(b.y), '--win-w', String(b.width), '--win-h', String(b.height)];
       if (__state.qtReturnWasFullscreen) out.push('--fullscreen');
+      winPlacement = { x: b.x, y: b.y, w: b.width, h: b.height, fullscreen: !!__state.qtReturnWasFullscreen };
       return out;
     } catch {
       return [];
@@ -566,10 +621,8 @@ try {
   }
 
   // BUILD23: Allow single-instance Qt player to switch files via a command file.
-  try {
-    const commandFile = path.join(sessionsDir, `command_${sessionId}.json`);
-    argv.push('--command-file', commandFile);
-  } catch {}
+  const commandFile = path.join(sessionsDir, `command_${sessionId}.json`);
+  argv.push('--command-file', commandFile);
 
   // Pass the main app exe path so the player can summon the library window.
   try {
@@ -577,6 +630,57 @@ try {
     if (appExe) argv.push('--app-exe', appExe);
   } catch {}
 
+  // TANKOBAN_QT_PROFILE_STARTUP=1: the player writes startup_<session>.json next to the session files.
+  if (process.env.TANKOBAN_QT_PROFILE_STARTUP === '1') argv.push('--profile-startup');
+
+  // Warm path: hand the launch to the parked standby player (same arguments, sent as one open).
+  const standby = __takeQtStandby();
+  if (standby) {
+    const cmd = {
+      cmd: 'open',
+      file: filePath,
+      start,
+      title: 'Tankoban Player',
+      session_id: sessionId,
+      progress_file: progressFile,
+      command_file: commandFile,
+      playlist_file: playlistFile,
+      playlist_index: playlistIndex,
+      video_id: videoId,
+      show_id: showId,
+      show_root_path: path.dirname(filePath),
+      pref_aid: (prefAid !== null && prefAid !== undefined) ? String(prefAid) : '',
+      pref_sid: (prefSid !== null && prefSid !== undefined) ? String(prefSid) : '',
+      pref_sub_visibility: (prefSubVisibility === null || prefSubVisibility === undefined) ? '' : (prefSubVisibility ? 'yes' : 'no'),
+      window: winPlacement,
+      ...__nextQtCommandStamp(),
+    };
+    let sent = false;
+    try { sent = !!standby.session.send({ t: 'cmd', cmd }); } catch { sent = false; }
+    if (sent) {
+      __stopQtSession();
+      __state.qtPlayerChild = standby.child;
+      __state.qtPlayerSessionId = sessionId;
+      __state.qtProgressFile = progressFile;
+      __state.qtVideoId = videoId || null;
+      __state.qtPlaylistFile = playlistFile || null;
+      __state.qtSession = standby.session;
+      __appendLog(`[${new Date().toISOString()}] launchQt: adopted standby ${standby.token} session=${sessionId} file=${filePath}\n`);
+      __clearQtLaunching();
+      try { __startQtProgressSync(_ctx); } catch {}
+      __scheduleQtStandby(_ctx);
+      return {
+        ok: true,
+        sessionId,
+        progressFile,
+        logPath,
+        keepLibraryVisible: !!__state.qtReturnWasFullscreen,
+      };
+    }
+    // Not reachable after all: retire it and take the cold path.
+    try { __retireQtStandby(standby); } catch {}
+  }
+
   // Emit a header before preflight so failures still produce a usable log file.
   __appendLog(`[${new Date().toISOString()}] launchQt: begin\n`);
   __appendLog(`  mode=${canUseBundledExe ? 'bundled-exe' : 'python'}\n`);
@@ -608,26 +712,8 @@ try {
       : `${py} ${argv.join(' ')}`;
     __log('QT_PLAYER_SPAWN', spawnCmd);
 
-    // Keep stdio so errors show up in the terminal when running via "npm start".
     // Also write stdout/stderr to a log file for easy debugging.
-    const env = { ...process.env };
-    try { if (mpvDllDir) env.TANKOBAN_MPV_DLL_DIR = mpvDllDir; } catch {}
-
-    const child = canUseBundledExe
-      ? spawn(bundledPlayerExe, argv, {
-          cwd: path.dirname(bundledPlayerExe),
-          detached: false,
-          windowsHide: false,
-          env,
-          stdio: ['ignore', 'pipe', 'pipe'],
-        })
-      : spawn(py === 'py' ? 'py' : py, py === 'py' ? ['-3', ...argv] : argv, {
-          cwd: playerDir,
-          detached: false,
-          windowsHide: false,
-          env,
-          stdio: ['ignore', 'pipe', 'pipe'],
-        });
+    const child = __spawnQtPlayer(launch, argv);
 
     const qtVerboseLogs = (process.env.TANKOBAN_QT_VERBOSE_LOGS === '1');
     const appendQtChildLog = (tag, d) => {
@@ -684,6 +770,7 @@ if (spawnErr) {
   try { fs.appendFileSync(logPath, `\n[spawn_failed] ${String(spawnErr && spawnErr.message ? spawnErr.message : spawnErr)}\n`); } catch {}
   // Clear Qt player tracking so we don't wedge in a "running" state.
   try {
+    __stopQtSession();
     __state.qtPlayerChild = null;
     __state.qtPlayerSessionId = null;
     __state.qtProgressFile = null;
@@ -705,6 +792,9 @@ if (spawnErr) {
 __clearQtLaunching();
 // BUILD20: Live-sync progress while Qt player is running (Build 3)
 try { __startQtProgressSync(_ctx); } catch {}
+try { __startQtSession(_ctx, sessionId, child); } catch {}
+// The next play after this one starts warm.
+__scheduleQtStandby(_ctx);
   } catch (e) {
     const msg = String(e && e.message ? e.message : e);
     __appendLog(`  [spawn exception] ${msg}\n`);
@@ -883,6 +973,14 @@ function __handleQtUiEvent(ctx, synced) {
     if (__state.qtLastUiEventToken === token) return;
     __state.qtLastUiEventToken = token;
 
+    if (uiEvent.type === 'perf_trace') {
+      if (typeof uiEvent.value === 'string' && uiEvent.value) {
+        __state.qtLastPerfTrace = uiEvent.value;
+        __log('QT_PERF_TRACE', uiEvent.value);
+      }
+      return;
+    }
+
     const win = __resolveReturnWindow(ctx);
     if (!win) return;
 
@@ -935,6 +1033,8 @@ function __startQtProgressSync(ctx) {
       (async () => {
         const child = __state.qtPlayerChild;
         if (!child || child.exitCode !== null) return;
+        // Live state arrives over the session; the file is only its crash checkpoint.
+        if (__state.qtSession && __state.qtSession.isLive()) return;
         const progressPath = __state.qtProgressFile;
         if (!progressPath) return;
 
@@ -962,6 +1062,182 @@ function __startQtProgressSync(ctx) {
   } catch {}
 }
 
+// Token-stamped UI event from the player (progress file or session frame; same token either way).
+function __normalizeQtUiEvent(rawEvt) {
+  try {
+    if (!rawEvt || typeof rawEvt !== 'object') return null;
+    const type = String(rawEvt.type || '').trim().toLowerCase();
+    if (!type) return null;
+    const idNum = Number(rawEvt.id);
+    const tsNum = Number(rawEvt.ts);
+    const hasId = Number.isFinite(idNum);
+    const hasTs = Number.isFinite(tsNum);
+    // Booleans for window events; short strings (e.g. a perf_trace file path) pass through as-is
+    const val = (rawEvt.value === true || rawEvt.value === false)
+      ? !!rawEvt.value
+      : (typeof rawEvt.value === 'string' && rawEvt.value.length <= 4096) ? rawEvt.value : null;
+    const token = hasId
+      ? `${type}:${idNum}`
+      : hasTs
+      ? `${type}:${tsNum}`
+      : `${type}:${val === null ? '' : (typeof val === 'string' ? val : (val ? '1' : '0'))}`;
+    return { type, value: val, token };
+  } catch {
+    return null;
+  }
+}
+
+// Commands to the player carry seq (microseconds, strictly increasing) and sentAt; the player
+// runs each seq once, so the same command may safely go down both channels.
+function __nextQtCommandStamp() {
+  const now = Date.now();
+  const seq = Math.max((Number(__state.qtCommandSeq) || 0) + 1, now * 1000);
+  __state.qtCommandSeq = seq;
+  return { seq, sentAt: now };
+}
+
+function __stopQtSession() {
+  try { if (__state.qtSession) __state.qtSession.close(); } catch {}
+  __state.qtSession = null;
+  __state.qtLastStreamedProgress = null;
+}
+
+function __startQtSession(ctx, sessionId, child) {
+  __stopQtSession();
+  const sess = qtSession.connect(sessionId, {
+    onOpen: () => __log('QT_SESSION', `open session=${sessionId}`),
+    onClose: () => __log('QT_SESSION', `closed session=${sessionId} (file channel)`),
+    onFrame: (frame) => __onQtSessionFrame(ctx, frame),
+  }, () => !!(child && child.exitCode === null && __state.qtPlayerChild === child));
+  __state.qtSession = sess;
+}
+
+function __onQtSessionFrame(ctx, frame) {
+  try {
+    const t = String(frame && frame.t || '');
+    if (t === 'progress') {
+      const q = (frame.progress && typeof frame.progress === 'object') ? frame.progress : null;
+      if (!q) return;
+      const synced = __syncProgressFromQtSession(ctx, q);
+      try { __handleQtUiEvent(ctx, synced); } catch {}
+      if (synced && synced.videoId) {
+        __state.qtLastStreamedProgress = { videoId: String(synced.videoId), progress: synced.progress || null };
+        __broadcastVideoProgressUpdated(String(synced.videoId), synced.progress || null);
+      }
+      return;
+    }
+    if (t === 'tick') {
+      // Position between progress frames: broadcast only; the progress frames persist it.
+      const last = __state.qtLastStreamedProgress;
+      const videoId = String(frame.videoId || (last && last.videoId) || __state.qtVideoId || '');
+      if (!videoId) return;
+      const base = (last && last.videoId === videoId && last.progress) ? last.progress : {};
+      const pos = Number(frame.position);
+      const dur = Number(frame.duration);
+      const progress = {
+        ...base,
+        positionSec: Number.isFinite(pos) ? pos : (base.positionSec || 0),
+        durationSec: (Number.isFinite(dur) && dur > 0) ? dur : (base.durationSec || null),
+        updatedAt: Date.now(),
+      };
+      __state.qtLastStreamedProgress = { videoId, progress };
+      __broadcastVideoProgressUpdated(videoId, progress);
+      return;
+    }
+    if (t === 'ui') {
+      const uiEvent = __normalizeQtUiEvent(frame.event);
+      if (uiEvent) __handleQtUiEvent(ctx, { uiEvent });
+      return;
+    }
+    if (t === 'ack' && frame.ok === false) {
+      __log('QT_SESSION', `command seq=${frame.seq} not applied`);
+    }
+  } catch {}
+}
+
+// Warm standby: a hidden player with Python, Qt and mpv already up, parked on its own session
+// name. The next cold launch sends it the open over that session instead of paying process
+// startup, and a replacement is started in the background. TANKOBAN_QT_STANDBY=0 disables it.
+function __scheduleQtStandby(ctx) {
+  if (process.env.TANKOBAN_QT_STANDBY === '0') return;
+  try { if (__state.qtStandbyTimer) clearTimeout(__state.qtStandbyTimer); } catch {}
+  // Let the player that was just opened have the machine to itself first.
+  __state.qtStandbyTimer = setTimeout(() => {
+    __state.qtStandbyTimer = null;
+    __spawnQtStandby(ctx);
+  }, QT_STANDBY_DELAY_MS);
+}
+
+function __spawnQtStandby(ctx) {
+  try {
+    const cur = __state.qtStandby;
+    if (cur && cur.child && cur.child.exitCode === null) return;
+    const launch = __resolveQtPlayerLaunch(ctx);
+    const token = `standby_${process.pid}_${Date.now()}`;
+    const args = ['--standby', '--session', token, '--title', 'Tankoban Player'];
+    if (process.env.TANKOBAN_QT_PROFILE_STARTUP === '1') args.push('--profile-startup');
+    const child = __spawnQtPlayer(launch, launch.canUseBundledExe ? args : [launch.playerScript, ...args]);
+    const entry = { child, token, session: null };
+    __state.qtStandby = entry;
+
+    let logPath = '';
+    try { logPath = path.join(app.getPath('userData'), 'qt_player_logs', 'qt_player_spawn.log'); } catch {}
+    const appendLog = (d) => { try { if (logPath) fs.appendFile(logPath, String(d || ''), () => {}); } catch {} };
+    try { child.stdout.on('data', appendLog); } catch {}
+    try { child.stderr.on('data', appendLog); } catch {}
+    appendLog(`[${new Date().toISOString()}] standby: spawned ${token}\n`);
+
+    const gone = (code, sig) => {
+      if (__state.qtStandby === entry) {
+        __state.qtStandby = null;
+        try { if (entry.session) entry.session.close(); } catch {}
+        appendLog(`\n[standby exit] ${token} code=${code} sig=${sig}\n`);
+        return;
+      }
+      // Adopted: it is the player now, so its exit is the player's exit.
+      if (__state.qtPlayerChild === child) {
+        appendLog(`\n[exit] code=${code} sig=${sig}\n`);
+        __restoreWindowAfterPlayerExit(ctx, code, sig);
+      }
+    };
+    child.on('error', (err) => gone(1, String(err && err.message ? err.message : err)));
+    child.on('exit', gone);
+
+    entry.session = qtSession.connect(token, {
+      onOpen: () => __log('QT_SESSION', `standby ready ${token}`),
+      onClose: () => __log('QT_SESSION', `closed standby ${token}`),
+      // Frames only count once the standby is the player.
+      onFrame: (frame) => { if (__state.qtSession === entry.session) __onQtSessionFrame(ctx, frame); },
+    }, () => !!(child.exitCode === null && (__state.qtStandby === entry || __state.qtPlayerChild === child)));
+  } catch (e) {
+    __log('QT_STANDBY', `spawn failed: ${String(e && e.message ? e.message : e)}`);
+  }
+}
+
+// The standby, if it is running and its session is up; it is no longer the standby afterwards.
+function __takeQtStandby() {
+  const entry = __state.qtStandby;
+  if (!entry) return null;
+  if (!(entry.child && entry.child.exitCode === null && entry.session && entry.session.isLive())) return null;
+  __state.qtStandby = null;
+  return entry;
+}
+
+function __retireQtStandby(entry) {
+  const e = entry || __state.qtStandby;
+  if (!e) return;
+  if (__state.qtStandby === e) __state.qtStandby = null;
+  try { if (e.session) e.session.close(); } catch {}
+  try { if (e.child && e.child.exitCode === null) e.child.kill(); } catch {}
+}
+
+// App quit: the standby has no window for the user to close.
+function forceKillStandby() {
+  try { if (__state.qtStandbyTimer) clearTimeout(__state.qtStandbyTimer); } catch {}
+  __state.qtStandbyTimer = null;
+  __retireQtStandby(null);
+}
+
 // BUILD16: Sync Qt player session progress into Tankoban's persisted progress store.
 // This is the key to "instant progress update on close" and "perfect resume" for Qt playback.
 function __syncProgressFromQtSession(ctx, qOverride) {
@@ -1005,26 +1281,7 @@ function __syncProgressFromQtSession(ctx, qOverride) {
       }
     } catch {}
 
-    let uiEvent = null;
-    try {
-      const rawEvt = q.uiEvent;
-      if (rawEvt && typeof rawEvt === 'object') {
-        const type = String(rawEvt.type || '').trim().toLowerCase();
-        if (type) {
-          const idNum = Number(rawEvt.id);
-          const tsNum = Number(rawEvt.ts);
-          const hasId = Number.isFinite(idNum);
-          const hasTs = Number.isFinite(tsNum);
-          const val = (rawEvt.value === true || rawEvt.value === false) ? !!rawEvt.value : null;
-          const token = hasId
-            ? `${type}:${idNum}`
-            : hasTs
-            ? `${type}:${tsNum}`
-            : `${type}:${val === null ? '' : (val ? '1' : '0')}`;
-          uiEvent = { type, value: val, token };
-        }
-      }
-    } catch {}
+    const uiEvent = __normalizeQtUiEvent(q.uiEvent);
 
     // Persist to the same progress store used by the renderer (Tanko.api.videoProgress.*)
     try {
@@ -1052,6 +1309,7 @@ function __restoreWindowAfterPlayerExit(ctx, exitCode, signal) {
 
     // BUILD20: Stop live sync timer first to avoid concurrent reads while restoring.
     try { __stopQtProgressSync(); } catch {}
+    try { __stopQtSession(); } catch {}
 
     // FIX19: Sync Qt session progress into Tankoban store immediately on exit/crash (best-effort).
     // Moved before window check so progress is saved even in headless launcher mode.
@@ -1214,6 +1472,7 @@ module.exports = {
   stop,
   getState,
   launchQt,
+  forceKillStandby,
   // BUILD14: State management exports
   saveReturnState,
   getReturnState,
@@ -0,0 +1,151 @@
+/*
+TankobanPro — Qt Player Host Session
+
+INTENT:
+- Persistent, framed, bidirectional channel to the running Qt player (player_qt/run_player.py).
+- Replaces polling the session progress file for live state; the file stays as the crash checkpoint.
+
+PROTOCOL (see HostSession in run_player.py):
+- Connect to the player's QLocalServer (TankobanPlayer_<session>), send MAGIC, then frames:
+  4-byte big-endian length + UTF-8 JSON object with a "t" type field.
+- host -> player: hello, cmd { cmd }, ping
+- player -> host: hello, ack { seq, ok }, prop { name, value }, tick { position, duration, paused },
+  progress { progress }, ui { event }, hb, pong
+- The player sends hb every 2 s; silence for STALE_MS drops the session (the file channel takes over).
+*/
+
+const net = require('net');
+const os = require('os');
+const path = require('path');
+
+const MAGIC = Buffer.from('TKP1', 'ascii');
+const VERSION = 1;
+const MAX_FRAME_BYTES = 8 * 1024 * 1024;
+const RETRY_MS = 250;
+const CONNECT_WINDOW_MS = 30000;
+const STALE_MS = 8000;
+
+// Mirrors _sanitize_ipc_name/_ipc_server_name in run_player.py.
+function serverName(sessionId) {
+  let sid = String(sessionId || '').trim();
+  sid = sid.replace(/[\\/:]/g, '_').replace(/[^A-Za-z0-9_.-]+/g, '_').slice(0, 80);
+  return sid ? `TankobanPlayer_${sid}` : 'TankobanPlayer';
+}
+
+// Where QLocalServer puts a name: a named pipe on Windows, a socket in the temp dir elsewhere.
+function serverPath(name) {
+  if (process.platform === 'win32') return `\\\\.\\pipe\\${name}`;
+  return path.join(os.tmpdir(), name);
+}
+
+function encodeFrame(obj) {
+  const body = Buffer.from(JSON.stringify(obj), 'utf8');
+  const head = Buffer.alloc(4);
+  head.writeUInt32BE(body.length, 0);
+  return Buffer.concat([head, body]);
+}
+
+/**
+ * Open a session to the player for sessionId and keep it open while isAlive() says the
+ * player process is running. handlers: { onFrame(frame), onOpen(), onClose() }.
+ * Returns { send(frame) -> bool, isLive() -> bool, close() }.
+ */
+function connect(sessionId, handlers, isAlive) {
+  const h = handlers || {};
+  const target = serverPath(serverName(sessionId));
+  const startedAt = Date.now();
+
+  let sock = null;
+  let live = false;
+  let closed = false;
+  let buf = Buffer.alloc(0);
+  let lastFrameAt = 0;
+  let retryTimer = null;
+  let staleTimer = null;
+
+  const alive = () => {
+    try { return typeof isAlive === 'function' ? !!isAlive() : true; } catch { return false; }
+  };
+
+  const drop = () => {
+    const wasLive = live;
+    live = false;
+    buf = Buffer.alloc(0);
+    try { if (staleTimer) clearInterval(staleTimer); } catch {}
+    staleTimer = null;
+    try { if (sock) sock.destroy(); } catch {}
+    sock = null;
+    if (wasLive) { try { if (h.onClose) h.onClose(); } catch {} }
+  };
+
+  const scheduleRetry = () => {
+    if (closed || retryTimer) return;
+    if (!alive()) return;
+    // Connected once and lost it: keep trying while the player runs. Never connected: give the
+    // player a startup window, then leave it on the file channel.
+    if (!lastFrameAt && (Date.now() - startedAt) > CONNECT_WINDOW_MS) return;
+    retryTimer = setTimeout(() => { retryTimer = null; open(); }, RETRY_MS);
+  };
+
+  const onData = (chunk) => {
+    buf = buf.length ? Buffer.concat([buf, chunk]) : chunk;
+    while (buf.length >= 4) {
+      const size = buf.readUInt32BE(0);
+      if (size > MAX_FRAME_BYTES) { drop(); scheduleRetry(); return; }
+      if (buf.length < 4 + size) return;
+      const body = buf.subarray(4, 4 + size);
+      buf = buf.subarray(4 + size);
+      let frame = null;
+      try { frame = JSON.parse(body.toString('utf8')); } catch { frame = null; }
+      if (!frame || typeof frame !== 'object') continue;
+      lastFrameAt = Date.now();
+      if (!live && frame.t === 'hello') {
+        live = true;
+        try { if (h.onOpen) h.onOpen(); } catch {}
+      }
+      try { if (h.onFrame) h.onFrame(frame); } catch {}
+    }
+  };
+
+  function open() {
+    if (closed || sock) return;
+    const s = net.createConnection(target);
+    sock = s;
+    s.on('connect', () => {
+      try {
+        s.write(MAGIC);
+        s.write(encodeFrame({ t: 'hello', v: VERSION, role: 'host', pid: process.pid }));
+      } catch {}
+      try { if (staleTimer) clearInterval(staleTimer); } catch {}
+      staleTimer = setInterval(() => {
+        if (live && (Date.now() - lastFrameAt) > STALE_MS) { drop(); scheduleRetry(); }
+      }, 1000);
+    });
+    s.on('data', onData);
+    s.on('error', () => {});
+    s.on('close', () => {
+      if (sock !== s) return;
+      drop();
+      scheduleRetry();
+    });
+  }
+
+  open();
+
+  return {
+    isLive: () => live && !closed,
+    // Host frames are rare (commands, pings); net.Socket buffers while the pipe is full.
+    send: (frame) => {
+      if (!live || closed || !sock) return false;
+      try { sock.write(encodeFrame(frame)); return true; } catch { return false; }
+    },
+    close: () => {
+      closed = true;
+      try { if (retryTimer) clearTimeout(retryTimer); } catch {}
+      retryTimer = null;
+      drop();
+    },
+  };
+}
+
+module.exports = { connect, serverName, serverPath, encodeFrame, MAGIC };
@@ -579,6 +579,13 @@ try {
   });
 } catch {}
 
+// Stop the hidden warm-standby Qt player on app quit
+try {
+  app.on('before-quit', function () {
+    try { playerCoreDomain.forceKillStandby(); } catch {}
+  });
+} catch {}
+
 __bLog('registerIpc: ALL DONE');
 
 }; // end registerIpc
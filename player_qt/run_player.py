@@ -14,10 +14,14 @@ Critical: Showing/hiding controls NEVER changes render host geometry.
 """
 
 import argparse
+import array
+import csv
 import ctypes
 import json
+import math
 import re
 import os
+import struct
 import subprocess
 import sys
 import time
@@ -25,7 +29,11 @@ import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from PySide6.QtCore import QEvent, QObject, QPropertyAnimation, QTimer, Qt, QEasingCurve, QUrl, Signal, QPoint, QRect
+# --profile-startup: the timeline starts here, ahead of the heavy imports
+_STARTUP_MARKS: List[Tuple[str, float]] = [("start", time.perf_counter())]
+_STARTUP_WALL0 = time.time()
+
+from PySide6.QtCore import QEvent, QFileSystemWatcher, QObject, QPropertyAnimation, QThread, QTimer, Qt, QEasingCurve, QUrl, Signal, QPoint, QRect
 from PySide6.QtGui import QAction, QWheelEvent, QDesktopServices, QClipboard, QPainter, QColor, QPen, QKeySequence, QIcon, QCursor, QGuiApplication, QPixmap
 from PySide6.QtWidgets import (
     QApplication,
@@ -59,6 +67,8 @@ from PySide6.QtWidgets import (
 
 from PySide6.QtNetwork import QLocalServer, QLocalSocket
 
+_STARTUP_MARKS.append(("qt_imported", time.perf_counter()))
+
 
 def _prepend_to_path(dir_path: Path) -> None:
     """Ensure the given directory is at the front of PATH for DLL discovery."""
@@ -94,18 +104,20 @@ def ensure_mpv_dll_on_path() -> None:
 
 
 ensure_mpv_dll_on_path()
+_STARTUP_MARKS.append(("mpv_dll_path", time.perf_counter()))
 
 try:
     import mpv
 except Exception as e:
     mpv = None
     IMPORT_ERR = e
+_STARTUP_MARKS.append(("mpv_imported", time.perf_counter()))
 
 
-def atomic_write_json(path: Path, obj: dict) -> None:
+def atomic_write_json(path: Path, obj: dict, indent: Optional[int] = 2) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + f".{int(time.time() * 1000)}.tmp")
-    tmp.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+    tmp.write_text(json.dumps(obj, indent=indent, separators=None if indent else (",", ":")), encoding="utf-8")
     tmp.replace(path)
 
 
@@ -118,6 +130,77 @@ def read_json(path: Path, default: Any) -> Any:
         return default
 
 
+def _process_created_at() -> Optional[float]:
+    """Epoch seconds this process was created (Windows exact, Linux to the second), else None."""
+    try:
+        if sys.platform.startswith("win"):
+            times = [ctypes.c_ulonglong() for _ in range(4)]  # FILETIMEs: creation, exit, kernel, user
+            k32 = ctypes.windll.kernel32
+            if not k32.GetProcessTimes(k32.GetCurrentProcess(), *[ctypes.byref(t) for t in times]):
+                return None
+            return times[0].value / 1e7 - 11644473600.0
+        if sys.platform.startswith("linux"):
+            ticks = int(Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()[19])
+            btime = next(int(line.split()[1]) for line in Path("/proc/stat").read_text().splitlines()
+                         if line.startswith("btime"))
+            return btime + ticks / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        pass
+    return None
+
+
+class StartupProfile:
+    """Named phase marks from process start to the first frame.
+
+    Marks are always taken (one list append each); with --profile-startup the
+    timeline is written as JSON once the first frame is up.
+    """
+
+    def __init__(self, marks: List[Tuple[str, float]], wall0: float):
+        self.marks = marks
+        self.wall0 = wall0
+        self.output: Optional[Path] = None
+        self.done = False
+
+    def mark(self, phase: str) -> None:
+        if not self.done and all(p != phase for p, _ in self.marks):
+            self.marks.append((phase, time.perf_counter()))
+
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        t0 = self.marks[0][1]
+        phases = []
+        prev = t0
+        for phase, t in self.marks:
+            phases.append({"phase": phase, "atMs": round((t - t0) * 1000.0, 1),
+                           "deltaMs": round((t - prev) * 1000.0, 1)})
+            prev = t
+        created = _process_created_at()
+        return {
+            "startedAt": self.wall0,
+            # Process creation to the first mark: interpreter start-up (coarse on Linux)
+            "interpreterMs": round(max(0.0, self.wall0 - created) * 1000.0, 1) if created else None,
+            "phases": phases,
+            **extra,
+        }
+
+    def finish(self, **extra: Any) -> None:
+        """Write the timeline (once) if profiling was asked for."""
+        if self.done:
+            return
+        self.done = True
+        if self.output is None:
+            return
+        data = self.report(**extra)
+        try:
+            atomic_write_json(self.output, data)
+        except Exception as e:
+            print(f"[player] startup profile write failed: {e}", flush=True)
+        print("[player] startup " + " ".join(f"{p['phase']}={p['atMs']:.0f}ms" for p in data["phases"]), flush=True)
+
+
+_STARTUP = StartupProfile(_STARTUP_MARKS, _STARTUP_WALL0)
+
+
 def _safe_mpv_log(level, prefix, text) -> None:
     """Best-effort mpv log sink that never throws on Windows cp1252 consoles."""
     try:
@@ -142,7 +225,7 @@ def _safe_mpv_log(level, prefix, text) -> None:
 
 def parse_args():
     p = argparse.ArgumentParser()
-    p.add_argument("--file", dest="file_path", required=True)
+    p.add_argument("--file", dest="file_path", default="")
     p.add_argument("--start", dest="start_seconds", type=float, default=0.0)
     p.add_argument("--session", dest="session_id", default="")
     p.add_argument("--progress-file", dest="progress_file", default="")
@@ -163,7 +246,13 @@ def parse_args():
     p.add_argument("--win-w", dest="win_w", type=int, default=None)
     p.add_argument("--win-h", dest="win_h", type=int, default=None)
     p.add_argument("--parent-hwnd", dest="parent_hwnd", type=int, default=0)
+    # Warm standby: start hidden with mpv up and no file; the host's first open adopts it
+    p.add_argument("--standby", dest="standby", action="store_true", default=False)
+    # Write the startup timeline as JSON (to PATH, or next to the session files)
+    p.add_argument("--profile-startup", dest="profile_startup", nargs="?", const="auto", default="")
     args, _unknown = p.parse_known_args()
+    if not args.file_path and not args.standby:
+        p.error("--file is required (or --standby)")
     return args
 
 
@@ -193,9 +282,23 @@ def _ipc_server_name(session_id: str = "") -> str:
     return base
 
 
+def _command_stamp() -> Dict[str, Any]:
+    """Sequence number + send time for a player command.
+
+    seq is the sender's wall clock in microseconds, so it increases across
+    processes (a relaunch, the main app) without shared state; the player
+    applies each seq once and ignores anything older than the last one it ran.
+    sentAt (epoch ms) anchors the send-to-first-frame latency metric.
+    """
+    now_us = time.time_ns() // 1000
+    return {"seq": now_us, "sentAt": now_us / 1000.0}
+
+
 def _try_send_ipc_open(server_name: str, payload: Dict[str, Any], timeout_ms: int = 250) -> bool:
     """Try to connect to an existing local server and send one JSON line."""
     try:
+        if "seq" not in payload:
+            payload = {**payload, **_command_stamp()}
         sock = QLocalSocket()
         sock.connectToServer(server_name)
         if not sock.waitForConnected(int(timeout_ms)):
@@ -267,6 +370,8 @@ def _attach_ipc_server_to_window(server: QLocalServer, window: "PlayerWindow") -
 
         def _drain_and_process(final: bool = False) -> None:
             try:
+                if sock.property("_ipc_mode") == "session":
+                    return
                 buf = b""
                 try:
                     buf = sock.property("_ipc_buf") or b""
@@ -281,6 +386,17 @@ def _attach_ipc_server_to_window(server: QLocalServer, window: "PlayerWindow") -
                 if chunk:
                     buf = (buf or b"") + chunk
 
+                # A host opening a persistent session says so in its first bytes;
+                # everything else is a one-shot JSON line from a second launch.
+                if buf[:1] == SESSION_MAGIC[:1]:
+                    if len(buf) < len(SESSION_MAGIC) and not final:
+                        sock.setProperty("_ipc_buf", buf)
+                        return
+                    if buf.startswith(SESSION_MAGIC):
+                        sock.setProperty("_ipc_mode", "session")
+                        window._attach_host_session(sock, buf[len(SESSION_MAGIC):])
+                        return
+
                 # Process first full line (JSON + '\n'); if no newline yet, wait unless final.
                 line = None
                 if b"\n" in (buf or b""):
@@ -313,7 +429,7 @@ def _attach_ipc_server_to_window(server: QLocalServer, window: "PlayerWindow") -
 
                 if isinstance(msg, dict):
                     try:
-                        window._handle_ipc_payload(msg)
+                        window._handle_command(msg, "ipc")
                     except Exception:
                         pass
             except Exception:
@@ -345,6 +461,209 @@ def _attach_ipc_server_to_window(server: QLocalServer, window: "PlayerWindow") -
     QTimer.singleShot(0, _on_new_connection)
 
 
+# ---- Host session: persistent framed IPC ------------------------------------
+#
+# The host (Tankoban main process) connects to the same local server, sends
+# SESSION_MAGIC, then both sides exchange frames: a 4-byte big-endian length
+# and a UTF-8 JSON object with a "t" type field.
+#
+#   host -> player: hello, cmd {cmd: {...open command, seq, sentAt}}, ping
+#   player -> host: hello, ack {seq, ok}, prop {name, value}, tick {position,
+#                   duration, paused}, progress {progress}, ui {event}, hb, pong
+#
+# tick/prop/progress are state, not events: under backpressure only the
+# latest of each is kept. The progress file stays as the crash checkpoint.
+
+SESSION_MAGIC = b"TKP1"
+SESSION_VERSION = 1
+_FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 8 * 1024 * 1024
+SESSION_HEARTBEAT_MS = 2000
+SESSION_HIGH_WATER = 256 * 1024
+
+
+def _encode_frame(obj: Dict[str, Any]) -> bytes:
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _FRAME_HEADER.pack(len(data)) + data
+
+
+class HostSession(QObject):
+    """One connected host. Frames in go to the window; state out is coalesced."""
+
+    closed = Signal()
+
+    def __init__(self, sock: QLocalSocket, window: "PlayerWindow", initial: bytes = b""):
+        super().__init__(window)
+        self._sock = sock
+        self._window = window
+        self._buf = bytearray(initial or b"")
+        self._held: Dict[str, Dict[str, Any]] = {}  # coalesce key -> latest frame
+        self._open = True
+        sock.setParent(self)
+        sock.readyRead.connect(self._on_ready_read)
+        sock.bytesWritten.connect(self._on_bytes_written)
+        sock.disconnected.connect(self._on_disconnected)
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.timeout.connect(lambda: self.send({"t": "hb", "ts": time.time()}))
+        self._heartbeat.start(SESSION_HEARTBEAT_MS)
+
+        if self._buf:
+            QTimer.singleShot(0, self._process)
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    def send(self, frame: Dict[str, Any], coalesce: str = "") -> bool:
+        """Queue one frame. With a coalesce key, a frame that can't be written
+        now replaces any older one under that key instead of piling up."""
+        if not self._open:
+            return False
+        try:
+            if coalesce and (self._held or self._sock.bytesToWrite() > SESSION_HIGH_WATER):
+                self._held[coalesce] = frame
+                return True
+            self._sock.write(_encode_frame(frame))
+            return True
+        except Exception:
+            self.close()
+            return False
+
+    def _on_bytes_written(self, _n: int) -> None:
+        try:
+            while self._held and self._sock.bytesToWrite() <= SESSION_HIGH_WATER:
+                key = next(iter(self._held))
+                self._sock.write(_encode_frame(self._held.pop(key)))
+        except Exception:
+            self.close()
+
+    def _on_ready_read(self) -> None:
+        try:
+            self._buf += bytes(self._sock.readAll())
+        except Exception:
+            self.close()
+            return
+        self._process()
+
+    def _process(self) -> None:
+        while self._open and len(self._buf) >= _FRAME_HEADER.size:
+            (size,) = _FRAME_HEADER.unpack_from(self._buf)
+            if size > MAX_FRAME_BYTES:
+                self.close()
+                return
+            end = _FRAME_HEADER.size + size
+            if len(self._buf) < end:
+                return
+            raw = bytes(self._buf[_FRAME_HEADER.size:end])
+            del self._buf[:end]
+            try:
+                frame = json.loads(raw.decode("utf-8"))
+            except Exception:
+                continue
+            if isinstance(frame, dict):
+                self._dispatch(frame)
+
+    def _dispatch(self, frame: Dict[str, Any]) -> None:
+        t = str(frame.get("t") or "")
+        if t == "hello":
+            self.send({"t": "hello", "v": SESSION_VERSION, "pid": os.getpid(),
+                       "sessionId": getattr(self._window, "_session_id", "")})
+            try:
+                self._window._write_progress("hello")
+            except Exception:
+                pass
+        elif t == "cmd":
+            cmd = frame.get("cmd")
+            ok = False
+            if isinstance(cmd, dict):
+                try:
+                    ok = bool(self._window._handle_command(cmd, "session"))
+                except Exception:
+                    ok = False
+            seq = cmd.get("seq") if isinstance(cmd, dict) else None
+            self.send({"t": "ack", "seq": seq, "ok": ok})
+        elif t == "ping":
+            self.send({"t": "pong", "ts": frame.get("ts")})
+
+    def _on_disconnected(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._open:
+            return
+        self._open = False
+        self._held.clear()
+        try:
+            self._heartbeat.stop()
+        except Exception:
+            pass
+        try:
+            self._sock.abort()
+        except Exception:
+            pass
+        self.closed.emit()
+        self.deleteLater()
+
+
+
+
+# ---- Progress checkpoints ---------------------------------------------------
+#
+# The progress file is rewritten only when it would say something new: never
+# while paused (the pause itself is flushed once), never when position, tracks
+# and flags are unchanged, densely for a while after a seek or track change,
+# sparsely in steady playback, and sparser still when a host session streams
+# the live state. close/eof/switch/episode_change/back are written at once.
+
+PROGRESS_TICK_MS = 2000
+CHECKPOINT_DENSE_S = 2.0
+CHECKPOINT_DENSE_WINDOW_S = 10.0
+CHECKPOINT_STEADY_S = 15.0
+CHECKPOINT_SESSION_S = 30.0
+SEEK_JUMP_S = 3.0
+
+# ---- Next-episode preload -----------------------------------------------------
+#
+# With auto-advance on, the next playlist item is appended to mpv's playlist
+# PRELOAD_LEAD_S before the end; prefetch-playlist opens and caches it while
+# the current file finishes, and mpv moves on by itself. Switch gaps (last
+# frame of one episode to first frame of the next) are kept per mode.
+
+PRELOAD_LEAD_S = 30.0
+SWITCH_SAMPLES = 20
+
+# ---- UI tick --------------------------------------------------------------------
+#
+# The HUD repaint timer runs only while something on screen shows playback
+# state (HUD or diagnostics), slower while paused, and not at all while the
+# window is hidden or minimized. Work that must go on regardless (host ticks,
+# the preload check) runs on a media tick raised by the time-pos observer each
+# time playback crosses a MEDIA_TICK_S boundary, so it stops with playback.
+
+UI_TICK_MS = 250
+UI_TICK_PAUSED_MS = 1000
+MEDIA_TICK_S = 0.5
+
+# ---- Playback diagnostics -------------------------------------------------------
+#
+# mpv pushes the watched properties to PerfRecorder as they change; a row is
+# sampled into fixed-size rings on every media tick (so only while playing),
+# covering the last PERF_WINDOW_S of playback. The diagnostics overlay draws
+# sparklines from the rings; "Export Performance Trace" writes them to
+# JSON and CSV next to the session files.
+
+PERF_WINDOW_S = 300.0
+PERF_PROPERTIES = (
+    "frame-drop-count",
+    "decoder-frame-drop-count",
+    "vo-delayed-frame-count",
+    "demuxer-cache-state",
+    "video-bitrate",
+    "avsync",
+    "hwdec-current",
+    "estimated-vf-fps",
+)
 
 
 def _fmt_time(seconds: Optional[float]) -> str:
@@ -362,12 +681,19 @@ def _fmt_time(seconds: Optional[float]) -> str:
     return f"{m:d}:{sec:02d}"
 
 
+VIDEO_EXTENSIONS = frozenset({
+    "mp4", "mkv", "avi", "mov", "m4v", "webm", "ts", "m2ts",
+    "wmv", "flv", "mpeg", "mpg", "3gp",
+})
+
+
+def _is_video_name(name: str) -> bool:
+    stem, _, ext = name.rpartition(".")
+    return bool(stem) and ext.lower() in VIDEO_EXTENSIONS
+
+
 def _is_video_file(path: str) -> bool:
-    ext = Path(path).suffix.lower().lstrip(".")
-    return ext in {
-        "mp4", "mkv", "avi", "mov", "m4v", "webm", "ts", "m2ts",
-        "wmv", "flv", "mpeg", "mpg", "3gp",
-    }
+    return _is_video_name(os.path.basename(path))
 
 
 def _finished(pos: Optional[float], dur: Optional[float], max_pos: Optional[float], watched: float, ended: bool) -> bool:
@@ -385,18 +711,207 @@ def _finished(pos: Optional[float], dur: Optional[float], max_pos: Optional[floa
         return False
 
 
+_NATURAL_SPLIT = re.compile(r'(\d+)')
+
+
 def _natural_sort_key(filename: str) -> List:
     """Natural sort key for filenames."""
-    import re
-    parts = []
-    for part in re.split(r'(\d+)', filename):
-        if part.isdigit():
-            parts.append(int(part))
-        else:
-            parts.append(part.lower())
+    parts = _NATURAL_SPLIT.split(filename.lower())
+    # split() alternates text/digits: odd slots are the digit runs
+    parts[1::2] = [int(p) for p in parts[1::2]]
     return parts
 
 
+class FolderPlaylistCache:
+    """Video files of a folder in natural order, cached per folder by directory mtime.
+
+    One os.scandir pass per (re)scan, extensions checked on the name before
+    the entry's type, each sort key built once. Adding, removing or renaming
+    a file bumps the folder's mtime, so a hit costs a single stat, which
+    makes reopening within the same season free even on a slow share.
+    """
+
+    MAX_FOLDERS = 8
+
+    def __init__(self):
+        self._folders: Dict[str, Tuple[int, List[str], Dict[str, int]]] = {}
+
+    def get(self, folder: Path) -> Tuple[List[str], Dict[str, int]]:
+        """(paths, path -> index) for folder; both shared, don't mutate."""
+        key = str(folder)
+        mtime = os.stat(key).st_mtime_ns
+        hit = self._folders.pop(key, None)
+        if hit is None or hit[0] != mtime:
+            hit = (mtime,) + self._scan(key)
+        self._folders[key] = hit  # most recently used last
+        while len(self._folders) > self.MAX_FOLDERS:
+            self._folders.pop(next(iter(self._folders)))
+        return hit[1], hit[2]
+
+    @staticmethod
+    def _scan(folder: str) -> Tuple[List[str], Dict[str, int]]:
+        files = []
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not _is_video_name(entry.name):
+                    continue
+                try:
+                    if entry.is_file():
+                        files.append((_natural_sort_key(entry.name), entry.path))
+                except OSError:
+                    continue
+        files.sort()
+        paths = [p for _, p in files]
+        return paths, {p: i for i, p in enumerate(paths)}
+
+
+_FOLDER_PLAYLISTS = FolderPlaylistCache()
+
+
+def _track_name(lang: str, title: str) -> str:
+    """'ENG · Commentary' style name; '' when the track has neither."""
+    bits = []
+    if lang:
+        bits.append(lang.upper())
+    if title and ((not lang) or (title.lower() != lang.lower())):
+        bits.append(title)
+    return ' · '.join(bits)
+
+
+class TrackModel:
+    """Audio and subtitle tracks of the playing file, fed by mpv's observers.
+
+    Rows are formatted once per change: "row" is the drawer text, "name" the
+    short label toasts, popovers and the context menu use. Nothing reads
+    track-list, aid or sid from libmpv on the UI thread. Update on the UI
+    thread only.
+    """
+
+    KINDS = ("audio", "sub")
+
+    def __init__(self):
+        self.rows: Dict[str, List[Dict[str, Any]]] = {"audio": [], "sub": []}
+
+    def update(self, track_list: Any) -> bool:
+        """Replace from an observed track-list; True when any row changed."""
+        rows: Dict[str, List[Dict[str, Any]]] = {"audio": [], "sub": []}
+        for t in track_list if isinstance(track_list, list) else ():
+            try:
+                if not isinstance(t, dict) or t.get('type') not in rows:
+                    continue
+                tid = int(t.get('id'))
+                lang = str(t.get('lang') or '').strip()
+                title = str(t.get('title') or '').strip()
+                row = f"Track {tid}: {lang or 'und'}" + (f" - {title}" if title else "")
+                rows[t['type']].append({"id": tid, "row": row, "name": _track_name(lang, title),
+                                        "selected": bool(t.get('selected'))})
+            except Exception:
+                continue
+        if rows == self.rows:
+            return False
+        self.rows = rows
+        return True
+
+    def select(self, kind: str, value: Any) -> bool:
+        """Apply an observed aid/sid (False/'no' = none); True when selection moved."""
+        try:
+            want = int(value) if value not in (None, False, 'no', 'auto', '') else None
+        except Exception:
+            want = None
+        changed = False
+        for r in self.rows.get(kind, ()):
+            sel = r["id"] == want
+            if r["selected"] != sel:
+                r["selected"] = sel
+                changed = True
+        return changed
+
+    def name(self, kind: str, tid: Any) -> str:
+        for r in self.rows.get(kind, ()):
+            if str(r["id"]) == str(tid):
+                return r["name"]
+        return ''
+
+    def current(self, kind: str) -> Optional[int]:
+        return next((r["id"] for r in self.rows.get(kind, ()) if r["selected"]), None)
+
+
+def _perf_num(value: Any, scale: float = 1.0) -> float:
+    try:
+        return float(value) * scale if value is not None else math.nan
+    except Exception:
+        return math.nan
+
+
+class PerfRecorder:
+    """Ring buffer of playback samples, one array('d') per field; NaN = not reported.
+
+    observe() is the mpv observer for PERF_PROPERTIES and only stores the
+    latest value (mpv thread). sample() turns those into a row on the UI
+    thread. drops/decoderDrops/voDelayed are mpv's running counters.
+    """
+
+    FIELDS = ("t", "pos", "fps", "drops", "decoderDrops", "voDelayed", "cacheS", "bitrateKbps", "avsyncMs")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(2, int(capacity))
+        self.rings = {f: array.array('d', [math.nan]) * self.capacity for f in self.FIELDS}
+        self.head = 0
+        self.count = 0
+        self.total = 0
+        self.latest: Dict[str, Any] = {}
+        self._t0 = time.monotonic()
+
+    def observe(self, name: str, value: Any) -> None:
+        self.latest[name] = value
+
+    def sample(self, pos: Optional[float]) -> None:
+        got = self.latest.get
+        cache = got("demuxer-cache-state")
+        row = (
+            time.monotonic() - self._t0,
+            _perf_num(pos),
+            _perf_num(got("estimated-vf-fps")),
+            _perf_num(got("frame-drop-count")),
+            _perf_num(got("decoder-frame-drop-count")),
+            _perf_num(got("vo-delayed-frame-count")),
+            _perf_num(cache.get("cache-duration") if isinstance(cache, dict) else None),
+            _perf_num(got("video-bitrate"), 0.001),
+            _perf_num(got("avsync"), 1000.0),
+        )
+        for f, v in zip(self.FIELDS, row):
+            self.rings[f][self.head] = v
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total += 1
+
+    def series(self, field: str) -> List[float]:
+        """Oldest first."""
+        r = self.rings[field]
+        if self.count < self.capacity:
+            return r[:self.count].tolist()
+        return (r[self.head:] + r[:self.head]).tolist()
+
+    def last(self, field: str) -> float:
+        return self.rings[field][self.head - 1] if self.count else math.nan
+
+    def export(self, base: Path, meta: Dict[str, Any]) -> Tuple[Path, Path]:
+        """Write base.json and base.csv; NaN becomes null / an empty cell."""
+        cols = [self.series(f) for f in self.FIELDS]
+        rows = [[None if math.isnan(v) else round(v, 4) for v in r] for r in zip(*cols)]
+        base.parent.mkdir(parents=True, exist_ok=True)
+        json_path = base.with_suffix(".json")
+        csv_path = base.with_suffix(".csv")
+        doc = dict(meta, fields=list(self.FIELDS), samples=rows)
+        doc["hwdec"] = self.latest.get("hwdec-current")
+        json_path.write_text(json.dumps(doc), encoding="utf-8")
+        with open(csv_path, "w", newline="", encoding="utf-8") as fh:
+            w = csv.writer(fh)
+            w.writerow(self.FIELDS)
+            w.writerows([["" if v is None else v for v in r] for r in rows])
+        return json_path, csv_path
+
+
 # ============================================================================
 # Build 13 UI Components
 # ============================================================================
@@ -1038,6 +1553,25 @@ class SeekSlider(QSlider):
         super().leaveEvent(event)
 
 
+def _sync_list_rows(lw: QListWidget, rows: List[Tuple[str, Any, bool]]) -> None:
+    """Bring lw to rows of (text, data, selected), touching only the rows that differ."""
+    for i, (text, data, selected) in enumerate(rows):
+        item = lw.item(i)
+        if item is None:
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, data)
+            lw.addItem(item)
+        else:
+            if item.text() != text:
+                item.setText(text)
+            if item.data(Qt.ItemDataRole.UserRole) != data:
+                item.setData(Qt.ItemDataRole.UserRole, data)
+        if item.isSelected() != bool(selected):
+            item.setSelected(bool(selected))
+    while lw.count() > len(rows):
+        lw.takeItem(lw.count() - 1)
+
+
 class TrackPopover(QFrame):
     """Small in-HUD popover for selecting audio/subtitle tracks (non-modal; does not block scrubbing)."""
 
@@ -1091,26 +1625,30 @@ class TrackPopover(QFrame):
 
         self.hide()
 
-    def open_for_button(self, btn: QWidget, items: List[Tuple[str, int, bool]]):
-        """Items: (label, id, selected)."""
+    def set_items(self, items: List[Tuple[str, int, bool]]):
+        """Items: (label, id, selected). Also used to update an open popover in place."""
         try:
-            self.list.clear()
-            selected_row = -1
-            for i, (label, tid, selected) in enumerate(items):
-                it = QListWidgetItem(label)
-                it.setData(Qt.ItemDataRole.UserRole, int(tid))
-                self.list.addItem(it)
-                if selected:
-                    selected_row = i
-
-            if self.list.count() == 0:
+            if not items:
+                self.list.clear()
                 it = QListWidgetItem("(no tracks)")
                 it.setFlags(Qt.ItemFlag.NoItemFlags)
                 self.list.addItem(it)
-                selected_row = -1
-
-            if selected_row >= 0:
+                self._placeholder = True
+                return
+            if getattr(self, "_placeholder", False):
+                self.list.clear()
+                self._placeholder = False
+            _sync_list_rows(self.list, [(label, int(tid), bool(sel)) for label, tid, sel in items])
+            selected_row = next((i for i, (_, _, sel) in enumerate(items) if sel), -1)
+            if selected_row >= 0 and self.list.currentRow() != selected_row:
                 self.list.setCurrentRow(selected_row)
+        except Exception:
+            pass
+
+    def open_for_button(self, btn: QWidget, items: List[Tuple[str, int, bool]]):
+        """Items: (label, id, selected)."""
+        try:
+            self.set_items(items)
 
             self.list.setMinimumWidth(260)
             self.list.setMaximumHeight(240)
@@ -1515,14 +2053,17 @@ class BottomHUDWidget(QWidget):
     def update_scrubber(self, pos: Optional[float], dur: Optional[float]):
         try:
             if self.scrub.isSliderDown():
+                self._scrub_px = None
                 return
             if dur and dur > 0 and pos is not None:
                 frac = max(0.0, min(1.0, pos / dur))
                 self.scrub.set_duration(dur)
-                try:
-                    self.scrub.set_chapters(getattr(self, '_chapters', []))
-                except Exception:
-                    pass
+                # Repaint only when the handle would land on a different pixel
+                w = max(1, self.scrub.width())
+                px = (int(frac * w), w)
+                if px == getattr(self, "_scrub_px", None):
+                    return
+                self._scrub_px = px
                 self.scrub.blockSignals(True)
                 self.scrub.setValue(int(frac * 1000))
                 self.scrub.blockSignals(False)
@@ -1531,8 +2072,12 @@ class BottomHUDWidget(QWidget):
 
     def update_time_labels(self, pos: Optional[float], dur: Optional[float]):
         try:
-            self.time_label.setText(_fmt_time(pos))
-            self.duration_label.setText(_fmt_time(dur))
+            texts = (_fmt_time(pos), _fmt_time(dur))
+            if texts == getattr(self, "_time_texts", None):
+                return
+            self._time_texts = texts
+            self.time_label.setText(texts[0])
+            self.duration_label.setText(texts[1])
         except Exception:
             pass
 
@@ -1939,8 +2484,48 @@ class PlaylistPanel(QDialog):
             pass
 
 
+class Sparkline(QWidget):
+    """Line of a numeric series scaled to its own min/max; NaN samples leave gaps."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(180, 24)
+        self._values: List[float] = []
+
+    def set_values(self, values: List[float]):
+        self._values = values
+        self.update()
+
+    def paintEvent(self, event):
+        try:
+            vals = [v for v in self._values if not math.isnan(v)]
+            if len(vals) < 2:
+                return
+            lo, hi = min(vals), max(vals)
+            span = (hi - lo) or 1.0
+            w, h = self.width() - 1, self.height() - 2
+            step = w / max(1, len(self._values) - 1)
+            p = QPainter(self)
+            p.setPen(QPen(QColor(120, 200, 255, 220), 1))
+            prev = None
+            for i, v in enumerate(self._values):
+                if math.isnan(v):
+                    prev = None
+                    continue
+                pt = QPoint(int(i * step), int(1 + h - (v - lo) / span * h))
+                if prev is not None:
+                    p.drawLine(prev, pt)
+                prev = pt
+            p.end()
+        except Exception:
+            return
+
+
 class DiagnosticsOverlay(QWidget):
     """Build 13 Diagnostics Overlay - Toggleable info display."""
+
+    SPARKLINES = (("fps", "FPS"), ("drops", "Drops"), ("cacheS", "Cache s"),
+                  ("avsyncMs", "A/V ms"), ("bitrateKbps", "kbps"))
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -1962,8 +2547,36 @@ class DiagnosticsOverlay(QWidget):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(6, 6, 6, 6)
         layout.addWidget(self.label)
+
+        grid = QGridLayout()
+        grid.setContentsMargins(0, 4, 0, 0)
+        grid.setHorizontalSpacing(8)
+        self.sparklines: Dict[str, Sparkline] = {}
+        for row, (field, caption) in enumerate(self.SPARKLINES):
+            cap = QLabel(caption, self)
+            cap.setStyleSheet("color: rgba(255, 255, 255, 0.7); background: transparent; border: none; padding: 0;")
+            grid.addWidget(cap, row, 0)
+            self.sparklines[field] = Sparkline(self)
+            grid.addWidget(self.sparklines[field], row, 1)
+        layout.addLayout(grid)
+        self._sparkline_total = -1
         
         self.hide()
+
+    def update_sparklines(self, rec: "PerfRecorder"):
+        """Redraw from the recorder when it has new samples; drops plot per-sample increments."""
+        try:
+            if rec.total == self._sparkline_total:
+                return
+            self._sparkline_total = rec.total
+            for field, line in self.sparklines.items():
+                values = rec.series(field)
+                if field == "drops":
+                    values = [max(0.0, b - a) if not (math.isnan(a) or math.isnan(b)) else math.nan
+                              for a, b in zip(values, values[1:])]
+                line.set_values(values)
+        except Exception:
+            pass
     
     def update_diagnostics(self, info: Dict[str, Any]):
         try:
@@ -2352,40 +2965,19 @@ class TracksDrawer(SlideDrawer):
         layout.addWidget(close_btn)
 
     def populate_audio_tracks(self, tracks: List[Dict]):
+        """Rows from TrackModel; unchanged rows are left alone."""
         try:
-            self.audio_list.clear()
-            for track in tracks:
-                label = f"Track {track['id']}: {track.get('lang', 'und')}"
-                if track.get('title'):
-                    label += f" - {track['title']}"
-                item = QListWidgetItem(label)
-                item.setData(Qt.ItemDataRole.UserRole, track['id'])
-                self.audio_list.addItem(item)
-                if track.get('selected'):
-                    item.setSelected(True)
+            _sync_list_rows(self.audio_list, [(t['row'], t['id'], t['selected']) for t in tracks])
         except Exception as e:
             print(f"TracksDrawer populate_audio_tracks error: {e}")
 
     def populate_subtitle_tracks(self, tracks: List[Dict]):
+        """Rows from TrackModel, after a "None" row; unchanged rows are left alone."""
         try:
-            self.subtitle_list.clear()
-            none_item = QListWidgetItem("None")
-            none_item.setData(Qt.ItemDataRole.UserRole, -1)
-            self.subtitle_list.addItem(none_item)
-
-            any_selected = False
-            for track in tracks:
-                label = f"Track {track['id']}: {track.get('lang', 'und')}"
-                if track.get('title'):
-                    label += f" - {track['title']}"
-                item = QListWidgetItem(label)
-                item.setData(Qt.ItemDataRole.UserRole, track['id'])
-                self.subtitle_list.addItem(item)
-                if track.get('selected'):
-                    item.setSelected(True)
-                    any_selected = True
-            if not any_selected:
-                none_item.setSelected(True)
+            any_selected = any(t['selected'] for t in tracks)
+            rows = [("None", -1, not any_selected)]
+            rows += [(t['row'], t['id'], t['selected']) for t in tracks]
+            _sync_list_rows(self.subtitle_list, rows)
         except Exception as e:
             print(f"TracksDrawer populate_subtitle_tracks error: {e}")
 
@@ -2586,6 +3178,7 @@ class PlayerWindow(QMainWindow):
         pref_aid: str = "",
         pref_sid: str = "",
         pref_sub_visibility: str = "",
+        standby: bool = False,
     ):
         super().__init__()
         
@@ -2606,6 +3199,9 @@ class PlayerWindow(QMainWindow):
         self._progress_file = Path(progress_file) if progress_file else None
         self._command_file = Path(command_file) if command_file else None
         self._session_id = session_id
+        # Warm standby: built and mpv initialized, hidden, no file until adopted
+        self._standby = bool(standby)
+        self._started_standby = bool(standby)
 
         # Command file: allows the main app to instruct this running player to load a new file.
         # If not explicitly provided, derive it from the session id / progress file path.
@@ -2616,7 +3212,26 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 self._command_file = None
 
-        self._command_last_mtime = 0.0
+        # Single-instance commands (IPC primary, command file fallback): last
+        # applied seq, file re-read attempts, and the send -> first frame metric.
+        self._command_seq = 0
+        self._command_watcher = None
+        self._command_read_retries = 0
+        self._command_latency: Optional[Dict[str, Any]] = None
+        self._first_frame_wait: Optional[Dict[str, Any]] = None
+        # Persistent host session (HostSession): streamed state, file as checkpoint
+        self._host_session: Optional[HostSession] = None
+        self._last_tick: Optional[Tuple[float, float, bool]] = None
+        self._last_checkpoint = 0.0
+        self._last_checkpoint_sig = None
+        self._last_streamed_sig = None
+        self._checkpoint_dense_until = 0.0
+        self._progress_stats = {"written": 0, "skippedPaused": 0, "skippedUnchanged": 0, "skippedThrottled": 0}
+        # Next-episode preload: {"index", "path", "ok", "manual", "prefs"} while one is appended
+        self._preload: Optional[Dict[str, Any]] = None
+        self._last_frame_at: Optional[float] = None
+        self._switch_wait: Optional[Dict[str, Any]] = None
+        self._switch_stats: Dict[str, List[float]] = {"preloaded": [], "cold": []}
         self._ui_event_seq = 0
         self._last_ui_event = None
         self._parent_hwnd = 0
@@ -2649,6 +3264,8 @@ class PlayerWindow(QMainWindow):
         self._last_aid = None
         self._last_sid = None
         self._last_sub_visibility = None
+        # Tracks of the playing file, fed by the track-list/aid/sid observers
+        self._tracks = TrackModel()
         self._respect_subtitle_styles = True
         
         # Build 19: Track last known position + reliable initial seek
@@ -2662,6 +3279,8 @@ class PlayerWindow(QMainWindow):
         
         # Build 13: Playlist
         self._playlist: List[str] = []
+        # (playlist list, path -> first index) for _playlist_position; rebuilt when the list is replaced
+        self._playlist_lookup: Optional[Tuple[List[str], Dict[str, int]]] = None
         self._playlist_ids: List[str] = []
         self._playlist_index = playlist_index
         if playlist_file and Path(playlist_file).exists():
@@ -2692,46 +3311,10 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
         
-        if not self._playlist:
-            self._build_folder_playlist()
-
-
-        # Build16: constrain playlist to the active folder (season folder), never the whole show tree
-        try:
-            root = Path(self._show_root_path) if self._show_root_path else self._file_path.parent
-            root = root.resolve()
-
-            has_ids = isinstance(self._playlist_ids, list) and len(self._playlist_ids) == len(self._playlist) and len(self._playlist_ids) > 0
-            filtered_paths = []
-            filtered_ids = []
-
-            for idx, item in enumerate(self._playlist):
-                try:
-                    pp = Path(str(item)).resolve()
-                    if pp.parent == root:
-                        filtered_paths.append(str(pp))
-                        if has_ids:
-                            try:
-                                filtered_ids.append(str(self._playlist_ids[idx]))
-                            except Exception:
-                                filtered_ids.append("")
-                except Exception:
-                    pass
-
-            if filtered_paths:
-                self._playlist = filtered_paths
-                self._playlist_ids = filtered_ids if has_ids else []
-
-                if str(self._file_path.resolve()) in self._playlist:
-                    self._playlist_index = self._playlist.index(str(self._file_path.resolve()))
-
-                # If we have aligned ids, keep the current videoId in sync with the current index.
-                if self._playlist_ids and 0 <= self._playlist_index < len(self._playlist_ids):
-                    vid = str(self._playlist_ids[self._playlist_index] or "")
-                    if vid:
-                        self._video_id = vid
-        except Exception:
-            pass
+        if not self._playlist and not self._standby:
+            self._build_folder_playlist()  # already scoped to the folder
+        elif self._playlist:
+            self._constrain_playlist_to_folder()
 
         # Build 13: Progress tracking
         self._max_position = 0.0
@@ -2739,8 +3322,12 @@ class PlayerWindow(QMainWindow):
         # Build 5: Watched-time accumulator state (media-time deltas; ignore seeks/scrubs)
         self._watch_last_pos = None
         self._watch_last_wall = time.monotonic()
-        self._last_progress_write = 0
         self._eof_signaled = False
+        # UI tick scheduler: current timer interval (0 = stopped), last media tick bucket
+        self._ui_tick_ms = 0
+        self._media_bucket = None
+        # Playback diagnostics, recorded whether or not the overlay is shown
+        self._perf = PerfRecorder(int(PERF_WINDOW_S / MEDIA_TICK_S))
         
         # Build 13: Volume state
         self._volume = 100
@@ -2775,8 +3362,10 @@ class PlayerWindow(QMainWindow):
         self._auto_advance = True
         
         # Build 13: UI setup
+        self._startup_first_frame = False
         self.setWindowTitle(self._title)
         self._setup_ui()
+        _STARTUP.mark("ui_built")
         try:
             self._set_controls_visible(False)
         except Exception:
@@ -2785,21 +3374,24 @@ class PlayerWindow(QMainWindow):
             self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
             if self.centralWidget():
                 self.centralWidget().setFocusPolicy(Qt.FocusPolicy.StrongFocus)
-            self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
-            self.activateWindow()
-            self.raise_()
-            self.grabKeyboard()
+            if not self._standby:
+                self.setFocus(Qt.FocusReason.ActiveWindowFocusReason)
+                self.activateWindow()
+                self.raise_()
+                self.grabKeyboard()
         except Exception:
             pass
         
         # Build 13: MPV initialization
         self._init_mpv()
+        _STARTUP.mark("mpv_init")
         
         # Build 13: Timers
         self._setup_timers()
         
-        # Build 13: Load file
-        self._load_file(self._file_path, self._start_seconds)
+        # Build 13: Load file (a standby loads nothing until it is adopted)
+        if not self._standby:
+            self._load_file(self._file_path, self._start_seconds)
     
     # ========== Persisted Settings (Volume/Mute/Subtitle Lift) ==========
 
@@ -2883,47 +3475,105 @@ class PlayerWindow(QMainWindow):
     def _build_folder_playlist(self):
         """Build folder-scoped playlist."""
         try:
-            folder = self._show_root_path
-            files = sorted(
-                [f for f in folder.glob("*") if f.is_file() and _is_video_file(str(f))],
-                key=lambda x: _natural_sort_key(x.name)
-            )
-            self._playlist = [str(f) for f in files]
-            
-            if str(self._file_path) in self._playlist:
-                self._playlist_index = self._playlist.index(str(self._file_path))
+            paths, index = _FOLDER_PLAYLISTS.get(self._show_root_path)
+            pos = index.get(str(self._file_path), -1)
+            if pos >= 0:
+                self._playlist = paths
+                self._playlist_lookup = (paths, index)
+                self._playlist_index = pos
             else:
-                self._playlist.insert(0, str(self._file_path))
+                self._playlist = [str(self._file_path)] + paths
                 self._playlist_index = 0
         except Exception as e:
             print(f"Build folder playlist error: {e}")
             self._playlist = [str(self._file_path)]
             self._playlist_index = 0
     
-    def _setup_ui(self):
-        """
-        Build 13 Stage-First UI Setup.
-        
-        Critical: The render host is placed first and its geometry is STABLE.
-        All controls are overlays that do not affect the render host.
+    def _constrain_playlist_to_folder(self) -> None:
+        """Build16: keep a host-supplied playlist to the active (season) folder, never the whole show tree.
+
+        Entries are compared by their parent path against the root resolved once;
+        only an entry that doesn't match as written is resolved (one stat per
+        link component, which adds up on a network share).
         """
-        # Central widget is the stage container
-        stage_container = QWidget()
-        self.setCentralWidget(stage_container)
-        
-        # Stage layout (no margins, no spacing)
-        stage_layout = QVBoxLayout(stage_container)
-        stage_layout.setContentsMargins(0, 0, 0, 0)
-        stage_layout.setSpacing(0)
-        
-                # Build 13: Render host (STABLE GEOMETRY) (STABLE GEOMETRY)
-        self.render_host = MpvRenderHost(stage_container)
-        self.render_host.wheel_volume_signal.connect(self._on_wheel_volume)
-        self.render_host.right_click_signal.connect(self._show_context_menu)
-        # Build 20.5: Mouse movement now handled directly in render host via _handle_mouse_move_for_hud
-        stage_layout.addWidget(self.render_host, stretch=1)
-        
-        # Build 13: Top strip (overlay position)
+        try:
+            given = str(self._show_root_path) if self._show_root_path else str(self._file_path.parent)
+            root = os.path.realpath(given)
+            roots = {given.rstrip("\\/") or given, root}
+
+            has_ids = isinstance(self._playlist_ids, list) and len(self._playlist_ids) == len(self._playlist) and len(self._playlist_ids) > 0
+            filtered_paths = []
+            filtered_ids = []
+
+            for idx, item in enumerate(self._playlist):
+                try:
+                    path = str(item)
+                    if os.path.dirname(path) not in roots:
+                        path = os.path.realpath(path)
+                        if os.path.dirname(path) != root:
+                            continue
+                    filtered_paths.append(path)
+                    if has_ids:
+                        try:
+                            filtered_ids.append(str(self._playlist_ids[idx]))
+                        except Exception:
+                            filtered_ids.append("")
+                except Exception:
+                    pass
+
+            if filtered_paths:
+                self._playlist = filtered_paths
+                self._playlist_ids = filtered_ids if has_ids else []
+
+                pos = self._playlist_position(self._file_path)
+                if pos < 0:
+                    pos = self._playlist_position(os.path.realpath(str(self._file_path)))
+                if pos >= 0:
+                    self._playlist_index = pos
+
+                # If we have aligned ids, keep the current videoId in sync with the current index.
+                if self._playlist_ids and 0 <= self._playlist_index < len(self._playlist_ids):
+                    vid = str(self._playlist_ids[self._playlist_index] or "")
+                    if vid:
+                        self._video_id = vid
+        except Exception:
+            pass
+
+    def _playlist_position(self, path) -> int:
+        """Index of path (compared as a string) in the playlist, or -1."""
+        pl = self._playlist
+        cached = self._playlist_lookup
+        if cached is None or cached[0] is not pl:
+            lookup: Dict[str, int] = {}
+            for i, item in enumerate(pl):
+                lookup.setdefault(str(item), i)
+            cached = self._playlist_lookup = (pl, lookup)
+        return cached[1].get(str(path), -1)
+
+    def _setup_ui(self):
+        """
+        Build 13 Stage-First UI Setup.
+        
+        Critical: The render host is placed first and its geometry is STABLE.
+        All controls are overlays that do not affect the render host.
+        """
+        # Central widget is the stage container
+        stage_container = QWidget()
+        self.setCentralWidget(stage_container)
+        
+        # Stage layout (no margins, no spacing)
+        stage_layout = QVBoxLayout(stage_container)
+        stage_layout.setContentsMargins(0, 0, 0, 0)
+        stage_layout.setSpacing(0)
+        
+                # Build 13: Render host (STABLE GEOMETRY) (STABLE GEOMETRY)
+        self.render_host = MpvRenderHost(stage_container)
+        self.render_host.wheel_volume_signal.connect(self._on_wheel_volume)
+        self.render_host.right_click_signal.connect(self._show_context_menu)
+        # Build 20.5: Mouse movement now handled directly in render host via _handle_mouse_move_for_hud
+        stage_layout.addWidget(self.render_host, stretch=1)
+        
+        # Build 13: Top strip (overlay position)
         self.top_strip = TopStripWidget(self._file_path.name if getattr(self, "_file_path", None) else "", stage_container)
         self.top_strip.minimize_clicked.connect(self.showMinimized)
         self.top_strip.fullscreen_clicked.connect(self._toggle_fullscreen)
@@ -2973,9 +3623,14 @@ class PlayerWindow(QMainWindow):
         # Build 13: Center flash
         self.center_flash = CenterFlashWidget(stage_container)
         
-        # Build 13: Diagnostics overlay
-        self.diagnostics = DiagnosticsOverlay(stage_container)
-        self.diagnostics.move(10, 10)
+        # Build 13: Diagnostics overlay, drawers and track popovers are built on first open
+        # (_ensure_diagnostics/_ensure_*_drawer/_ensure_track_popovers): most sessions never open them.
+        self.diagnostics = None
+        self.tracks_drawer = None
+        self.playlist_drawer = None
+        self.audio_popover = None
+        self.subtitle_popover = None
+        self._popover_dismiss_filter = None
         
         # Build 13+: Toast feedback (embedded-style)
         self.toast = ToastHUD(stage_container)
@@ -2989,42 +3644,64 @@ class PlayerWindow(QMainWindow):
 
 
 
-        # Build 13+: Compact popovers for quick track switching (do not block timeline scrubbing)
-        self.audio_popover = TrackPopover(stage_container, "Audio")
-        self.subtitle_popover = TrackPopover(stage_container, "Subtitles")
+        # Build 13: Context menu (will be created on-demand)
+        self._context_menu = None
+
+    # ========== Lazy Overlays ==========
+
+    def _ensure_track_popovers(self) -> None:
+        """Build 13+: Compact popovers for quick track switching (do not block timeline scrubbing)."""
+        if self.audio_popover is not None:
+            return
+        stage = self.centralWidget()
+        self.audio_popover = TrackPopover(stage, "Audio")
+        self.subtitle_popover = TrackPopover(stage, "Subtitles")
         self.audio_popover.track_selected.connect(self._select_audio_track)
         self.subtitle_popover.track_selected.connect(self._select_subtitle_track)
 
-        # Global click handler: close popovers on outside clicks without consuming the click
+        # Global click handler: close popovers on outside clicks without consuming the click.
+        # Installed with the popovers, so the app-wide filter costs nothing until then.
         try:
             self._popover_dismiss_filter = PopoverDismissFilter(self)
             QApplication.instance().installEventFilter(self._popover_dismiss_filter)
         except Exception:
             self._popover_dismiss_filter = None
 
+    def _ensure_tracks_drawer(self) -> "TracksDrawer":
+        """Build 13+: Embedded-style tracks drawer."""
+        if self.tracks_drawer is None:
+            d = TracksDrawer(self.centralWidget())
+            d.audio_selected.connect(self._select_audio_track)
+            d.subtitle_selected.connect(self._select_subtitle_track)
+            d.load_subtitle_requested.connect(self._load_external_subtitle)
+            d.audio_delay_changed.connect(self._set_audio_delay)
+            d.subtitle_delay_changed.connect(self._set_subtitle_delay)
+            d.aspect_changed.connect(self._set_aspect_ratio)
+            d.subtitle_style_respect_changed.connect(self._set_subtitle_style_respect)
+            d.subtitle_hud_lift_changed.connect(self._set_subtitle_hud_lift)
+            try:
+                d.set_subtitle_hud_lift_value(getattr(self, "_subtitle_hud_lift_px", 40))
+            except Exception:
+                pass
+            self.tracks_drawer = d
+            self._position_overlays()
+        return self.tracks_drawer
+
+    def _ensure_playlist_drawer(self) -> "PlaylistDrawer":
+        """Build 13+: Embedded-style playlist drawer."""
+        if self.playlist_drawer is None:
+            d = PlaylistDrawer(self.centralWidget())
+            d.episode_selected.connect(self._load_episode_at_index)
+            d.auto_advance_changed.connect(self._set_auto_advance)
+            self.playlist_drawer = d
+            self._position_overlays()
+        return self.playlist_drawer
 
-
-        # Build 13+: Embedded-style slide drawers
-        self.tracks_drawer = TracksDrawer(stage_container)
-        self.tracks_drawer.audio_selected.connect(self._select_audio_track)
-        self.tracks_drawer.subtitle_selected.connect(self._select_subtitle_track)
-        self.tracks_drawer.load_subtitle_requested.connect(self._load_external_subtitle)
-        self.tracks_drawer.audio_delay_changed.connect(self._set_audio_delay)
-        self.tracks_drawer.subtitle_delay_changed.connect(self._set_subtitle_delay)
-        self.tracks_drawer.aspect_changed.connect(self._set_aspect_ratio)
-        self.tracks_drawer.subtitle_style_respect_changed.connect(self._set_subtitle_style_respect)
-        self.tracks_drawer.subtitle_hud_lift_changed.connect(self._set_subtitle_hud_lift)
-        try:
-            self.tracks_drawer.set_subtitle_hud_lift_value(getattr(self, "_subtitle_hud_lift_px", 40))
-        except Exception:
-            pass
-
-        self.playlist_drawer = PlaylistDrawer(stage_container)
-        self.playlist_drawer.episode_selected.connect(self._load_episode_at_index)
-        self.playlist_drawer.auto_advance_changed.connect(self._set_auto_advance)
-        
-        # Build 13: Context menu (will be created on-demand)
-        self._context_menu = None
+    def _ensure_diagnostics(self) -> "DiagnosticsOverlay":
+        if self.diagnostics is None:
+            self.diagnostics = DiagnosticsOverlay(self.centralWidget())
+            self.diagnostics.move(10, 10)
+        return self.diagnostics
     
     def _position_overlays(self):
         """Position bottom HUD and drawers as overlays."""
@@ -3060,10 +3737,10 @@ class PlayerWindow(QMainWindow):
         # Drawers (do not affect render geometry)
         try:
             drawer_w = min(520, max(360, int(self.width() * 0.38)))
-            self.tracks_drawer.configure(width=drawer_w, top=0, bottom=bottom_height)
-            self.playlist_drawer.configure(width=drawer_w, top=0, bottom=bottom_height)
-            self.tracks_drawer.update_stage_geometry(self.width(), self.height())
-            self.playlist_drawer.update_stage_geometry(self.width(), self.height())
+            for drawer in (self.tracks_drawer, self.playlist_drawer):
+                if drawer is not None:
+                    drawer.configure(width=drawer_w, top=0, bottom=bottom_height)
+                    drawer.update_stage_geometry(self.width(), self.height())
         except Exception:
             pass
 
@@ -3203,6 +3880,11 @@ class PlayerWindow(QMainWindow):
                     self._apply_window_state(st, suppress_updates=True, force_show=False, restore_delay_ms=30, clear_delay_ms=240)
         except Exception:
             pass
+        try:
+            if event.type() == QEvent.Type.WindowStateChange:
+                QTimer.singleShot(0, self, self._reschedule_ui_tick)
+        except Exception:
+            pass
         return super().changeEvent(event)
 
     def showEvent(self, event):
@@ -3212,8 +3894,19 @@ class PlayerWindow(QMainWindow):
                 self._schedule_ensure_maximized(0)
         except Exception:
             pass
+        try:
+            QTimer.singleShot(0, self, self._reschedule_ui_tick)
+        except Exception:
+            pass
         return super().showEvent(event)
 
+    def hideEvent(self, event):
+        try:
+            QTimer.singleShot(0, self, self._reschedule_ui_tick)
+        except Exception:
+            pass
+        return super().hideEvent(event)
+
     def _schedule_ensure_maximized(self, delay_ms: int = 0):
         """Coalesce maximize enforcement (prevents rapid flicker on Windows)."""
         try:
@@ -3397,8 +4090,48 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
 
-    def _poll_command_file(self):
-        """Poll for command file updates (single-instance playback switching)."""
+    def _watch_command_file(self):
+        """Watch the command file's folder so a written command is picked up at once.
+
+        The local-socket server is the primary channel; the file stays for
+        writers that can't reach it. Only if the folder can't be watched does
+        the old 600 ms poll come back.
+        """
+        try:
+            old = getattr(self, "_command_watcher", None)
+            if old is not None:
+                self._command_watcher = None
+                old.deleteLater()
+            if getattr(self, "_command_timer", None) is not None:
+                self._command_timer.stop()
+                self._command_timer = None
+            cf = getattr(self, "_command_file", None)
+            if not cf:
+                return
+            folder = Path(cf).parent
+            try:
+                folder.mkdir(parents=True, exist_ok=True)
+            except Exception:
+                pass
+            watcher = QFileSystemWatcher(self)
+            if watcher.addPath(str(folder)):
+                # Writers that rename a temp file into place change the folder;
+                # ones that rewrite in place only change the file itself.
+                watcher.directoryChanged.connect(lambda _p: self._read_command_file())
+                watcher.fileChanged.connect(lambda _p: self._read_command_file())
+                self._command_watcher = watcher
+            else:
+                watcher.deleteLater()
+                self._command_timer = QTimer(self)
+                self._command_timer.timeout.connect(self._read_command_file)
+                self._command_timer.start(600)
+            # A command written before we were watching
+            QTimer.singleShot(0, self._read_command_file)
+        except Exception:
+            pass
+
+    def _read_command_file(self):
+        """Consume the command file: one command object or a list of them."""
         try:
             cf = getattr(self, "_command_file", None)
             if not cf:
@@ -3406,64 +4139,211 @@ class PlayerWindow(QMainWindow):
             cf = Path(cf)
             if not cf.exists():
                 return
+            watcher = getattr(self, "_command_watcher", None)
+            if watcher is not None and str(cf) not in watcher.files():
+                try:
+                    watcher.addPath(str(cf))
+                except Exception:
+                    pass
+
             try:
-                st = cf.stat()
-                mtime = float(st.st_mtime)
+                cmd = json.loads(cf.read_text(encoding="utf-8"))
             except Exception:
-                mtime = 0.0
-            if not mtime or mtime <= float(getattr(self, "_command_last_mtime", 0.0) or 0.0):
+                # Caught mid-write: read again shortly instead of dropping it
+                if self._command_read_retries < 5:
+                    self._command_read_retries += 1
+                    QTimer.singleShot(50, self._read_command_file)
                 return
-            self._command_last_mtime = mtime
-
-            cmd = read_json(cf, None)
+            self._command_read_retries = 0
             # Consume the command file to avoid replays.
             try:
                 cf.unlink(missing_ok=True)
             except Exception:
                 pass
 
-            if not isinstance(cmd, dict):
-                return
-            action = str(cmd.get("action") or "").lower().strip()
-            if action != "open":
-                return
+            for item in (cmd if isinstance(cmd, list) else [cmd]):
+                if isinstance(item, dict):
+                    self._handle_command(item, "file")
+        except Exception:
+            pass
 
-            file_path = str(cmd.get("filePath") or "").strip()
-            if not file_path:
-                return
+    def _handle_command(self, msg: Dict[str, Any], via: str = "ipc") -> bool:
+        """Apply one single-instance command (IPC line or command file entry).
 
+        Commands carrying a seq are idempotent: a seq at or below the last one
+        applied is a duplicate (the same command sent down both channels) or
+        stale, and is dropped. Commands without one are applied as before.
+        """
+        try:
+            if not isinstance(msg, dict):
+                return False
+            seq = msg.get("seq")
+            if isinstance(seq, (int, float)) and not isinstance(seq, bool):
+                if seq <= self._command_seq:
+                    return False
+                self._command_seq = seq
             try:
-                start = float(cmd.get("startSeconds") or 0.0)
+                sent_at = float(msg.get("sentAt")) if msg.get("sentAt") is not None else None
             except Exception:
-                start = 0.0
+                sent_at = None
+            now_ms = time.time() * 1000.0
+            self._command_latency = {
+                "seq": seq,
+                "via": via,
+                "sentAt": sent_at,
+                "receivedMs": round(now_ms - sent_at, 1) if sent_at else None,
+                "firstFrameMs": None,
+            }
+            if self._standby:
+                self._adopt_standby(msg)
+            self._handle_ipc_payload(msg)
+            self._standby = False
+            return True
+        except Exception:
+            return False
+
+    def _finish_startup_profile(self) -> None:
+        built = [n for n in ("tracks_drawer", "playlist_drawer", "diagnostics", "audio_popover")
+                 if getattr(self, n, None) is not None]
+        _STARTUP.finish(file=str(self._file_path), standby=bool(self._started_standby),
+                        overlaysBuilt=built)
+
+    def _arm_first_frame_metric(self):
+        """Time the load that was just started, for the command that started it."""
+        lat = getattr(self, "_command_latency", None)
+        if lat and lat.get("firstFrameMs") is None and lat.get("sentAt"):
+            # time-pos goes unset while mpv swaps files; the first value after
+            # that belongs to the new file.
+            self._first_frame_wait = {"latency": lat, "unset": False}
+        else:
+            self._first_frame_wait = None
+
+    def _note_first_frame(self, value):
+        """Called from the time-pos observer (mpv thread)."""
+        wait = self._first_frame_wait
+        if wait is None:
+            return
+        if value is None:
+            wait["unset"] = True
+            return
+        if not wait["unset"]:
+            return
+        self._first_frame_wait = None
+        lat = wait["latency"]
+        lat["firstFrameMs"] = round(time.time() * 1000.0 - float(lat["sentAt"]), 1)
+        print(f"[player] command seq={lat.get('seq')} via={lat.get('via')} "
+              f"received={lat.get('receivedMs')}ms first_frame={lat['firstFrameMs']}ms", flush=True)
 
-            video_id = str(cmd.get("videoId") or "").strip()
-            show_id = str(cmd.get("showId") or "").strip()
-            show_root = str(cmd.get("showRootPath") or "").strip()
+    # ========== Host Session ==========
 
-            playlist_paths = cmd.get("playlistPaths")
-            playlist_ids = cmd.get("playlistIds")
+    def _attach_host_session(self, sock: QLocalSocket, initial: bytes = b"") -> None:
+        """Adopt a host connection; a newer host replaces an older one."""
+        try:
+            old = self._host_session
+            session = HostSession(sock, self, initial)
+            session.closed.connect(lambda s=session: self._on_host_session_closed(s))
+            self._host_session = session
+            if old is not None:
+                old.close()
+        except Exception:
+            pass
+
+    def _on_host_session_closed(self, session: "HostSession") -> None:
+        if self._host_session is session:
+            self._host_session = None
+            self._last_tick = None
+            # The host is back on the file channel: bring it up to date now
             try:
-                playlist_index = int(cmd.get("playlistIndex")) if cmd.get("playlistIndex") is not None else -1
+                self._write_progress("session_lost")
             except Exception:
-                playlist_index = -1
+                pass
 
-            self._open_external(
-                file_path=file_path,
-                start_seconds=start,
-                video_id=video_id,
-                show_id=show_id,
-                show_root_path=show_root,
-                playlist_paths=playlist_paths if isinstance(playlist_paths, list) else None,
-                playlist_ids=playlist_ids if isinstance(playlist_ids, list) else None,
-                playlist_index=playlist_index,
-            )
+    def _host_live(self) -> bool:
+        s = self._host_session
+        return s is not None and s.is_open
+
+    def _host_send(self, frame: Dict[str, Any], coalesce: str = "") -> bool:
+        """Send a frame to the host; callable from mpv observer threads."""
+        s = self._host_session
+        if s is None:
+            return False
+        if QThread.currentThread() != self.thread():
+            QTimer.singleShot(0, self, lambda f=frame, c=coalesce: self._host_send(f, c))
+            return True
+        return bool(s.send(frame, coalesce))
+
+    def _publish_prop(self, name: str, value: Any) -> None:
+        """Forward an observed mpv property to the host."""
+        if self._host_session is not None:
+            self._host_send({"t": "prop", "name": name, "value": value}, coalesce="prop:" + name)
+
+    def _stream_tick(self, pos: Optional[float], dur: Optional[float], paused: bool) -> None:
+        """Position/pause for the host on every visible change (media tick cadence)."""
+        if not self._host_live() or pos is None:
+            return
+        try:
+            tick = (round(float(pos), 1), float(dur or 0.0), bool(paused))
+        except Exception:
+            return
+        last = self._last_tick
+        if last is not None and last[1:] == tick[1:] and abs(last[0] - tick[0]) < 0.5:
+            return
+        self._last_tick = tick
+        self._host_send({"t": "tick", "videoId": self._video_id, "position": tick[0],
+                         "duration": tick[1], "paused": tick[2]}, coalesce="tick")
+
+    def _adopt_standby(self, msg: Dict[str, Any]) -> None:
+        """Take on the launch a warm standby player was started without.
+
+        What a cold start gets on its command line arrives with the first
+        open instead: the session (and its IPC server name, so later opens
+        forwarded by a cold launcher find us), settings next to the progress
+        file, track preferences and window placement. The open itself then
+        runs as a normal switch.
+        """
+        _STARTUP.mark("adopted")
+        session_id = str(msg.get("session_id") or msg.get("sessionId") or "").strip()
+        if session_id and session_id != self._session_id:
+            self._session_id = session_id
+            server = _start_ipc_server(_ipc_server_name(session_id), parent=QApplication.instance())
+            if server is not None:
+                _attach_ipc_server_to_window(server, self)
+        pf = str(msg.get("progress_file") or msg.get("progressFile") or "").strip()
+        if pf:
+            self._progress_file = Path(pf)
             try:
-                self._bring_to_front(ensure_maximized=True)
+                self._settings_file = self._derive_settings_file()
+                self._load_player_settings()
+                self._mpv.volume = self._volume
+                self._mpv.mute = bool(self._muted)
             except Exception:
                 pass
+        for attr, keys in (("_pref_aid", ("pref_aid", "prefAid")),
+                           ("_pref_sid", ("pref_sid", "prefSid")),
+                           ("_pref_sub_visibility", ("pref_sub_visibility", "prefSubVisibility"))):
+            value = next((str(msg[k]) for k in keys if msg.get(k) not in (None, "")), None)
+            if value is not None:
+                setattr(self, attr, value)
+
+        win = msg.get("window") if isinstance(msg.get("window"), dict) else {}
+
+        def _int(v):
+            try:
+                return int(v) if v is not None else None
+            except Exception:
+                return None
+
+        parent_hwnd = _int(win.get("parentHwnd")) or 0
+        try:
+            if parent_hwnd > 0:
+                self.attach_to_parent_hwnd(parent_hwnd)
         except Exception:
             pass
+        _present_player_window(self, _int(win.get("x")), _int(win.get("y")), _int(win.get("w")),
+                               _int(win.get("h")), fullscreen=bool(win.get("fullscreen")),
+                               parent_hwnd=parent_hwnd)
+        if not bool(win.get("fullscreen")) or parent_hwnd > 0:
+            QTimer.singleShot(0, self, lambda: self._bring_to_front(ensure_maximized=False))
 
     def _open_external(
         self,
@@ -3478,10 +4358,11 @@ class PlayerWindow(QMainWindow):
     ):
         """Load a new file into the already-running player."""
         try:
-            try:
-                self._write_progress("switch")
-            except Exception:
-                pass
+            if not self._standby:
+                try:
+                    self._write_progress("switch")
+                except Exception:
+                    pass
 
             # Carry current track prefs forward (best-effort)
             try:
@@ -3531,8 +4412,7 @@ class PlayerWindow(QMainWindow):
                 if isinstance(playlist_index, int) and 0 <= playlist_index < len(self._playlist):
                     self._playlist_index = int(playlist_index)
                 else:
-                    pstr = str(new_path)
-                    self._playlist_index = self._playlist.index(pstr) if pstr in self._playlist else 0
+                    self._playlist_index = max(0, self._playlist_position(new_path))
             except Exception:
                 self._playlist_index = 0
 
@@ -3566,15 +4446,16 @@ class PlayerWindow(QMainWindow):
             self._load_file(new_path, float(start_seconds or 0.0))
 
             try:
-                if hasattr(self, 'playlist_drawer') and self.playlist_drawer.is_open():
+                if self.playlist_drawer is not None and self.playlist_drawer.is_open():
                     self._populate_playlist_drawer()
             except Exception:
                 pass
 
-            try:
-                self.toast.show_toast("Switched")
-            except Exception:
-                pass
+            if not self._standby:
+                try:
+                    self.toast.show_toast("Switched")
+                except Exception:
+                    pass
         except Exception:
             pass
     
@@ -3614,8 +4495,9 @@ class PlayerWindow(QMainWindow):
                 pass
             try:
                 cf = str(msg.get("command_file") or msg.get("commandFile") or "").strip()
-                if cf:
+                if cf and Path(cf) != self._command_file:
                     self._command_file = Path(cf)
+                    self._watch_command_file()
             except Exception:
                 pass
 
@@ -3626,21 +4508,25 @@ class PlayerWindow(QMainWindow):
             # Playlist context: accept either playlist_file or direct paths/ids
             playlist_file = str(msg.get("playlist_file") or msg.get("playlistFile") or "").strip()
             try:
-                playlist_index = int(msg.get("playlist_index") if msg.get("playlist_index") is not None else msg.get("playlistIndex") or -1)
+                raw_index = msg.get("playlist_index") if msg.get("playlist_index") is not None else msg.get("playlistIndex")
+                playlist_index = int(raw_index) if raw_index is not None else -1
             except Exception:
                 playlist_index = -1
 
             playlist_paths = None
             playlist_ids = None
 
-            if isinstance(msg.get("playlist_paths"), list):
+            # snake_case from the IPC launcher, camelCase from command files
+            raw_paths = msg.get("playlist_paths") if isinstance(msg.get("playlist_paths"), list) else msg.get("playlistPaths")
+            raw_ids = msg.get("playlist_ids") if isinstance(msg.get("playlist_ids"), list) else msg.get("playlistIds")
+            if isinstance(raw_paths, list):
                 try:
-                    playlist_paths = [str(x) for x in (msg.get("playlist_paths") or []) if x]
+                    playlist_paths = [str(x) for x in raw_paths if x]
                 except Exception:
                     playlist_paths = None
-            if isinstance(msg.get("playlist_ids"), list):
+            if isinstance(raw_ids, list):
                 try:
-                    playlist_ids = [str(x) for x in (msg.get("playlist_ids") or [])]
+                    playlist_ids = [str(x) for x in raw_ids]
                 except Exception:
                     playlist_ids = None
 
@@ -3815,9 +4701,25 @@ class PlayerWindow(QMainWindow):
                 pass
             self._mpv.observe_property('pause', self._on_pause_change)
             self._mpv.observe_property('eof-reached', self._on_eof)
+            for prop in PERF_PROPERTIES:
+                try:
+                    self._mpv.observe_property(prop, self._perf.observe)
+                except Exception:
+                    pass  # not known to this libmpv; its column stays empty
+            try:
+                # Older libmpv lacks prefetch-playlist; the appended entry still saves the
+                # reload, just not the open.
+                self._mpv['prefetch-playlist'] = 'yes'
+            except Exception:
+                pass
+            try:
+                self._mpv.observe_property('playlist-pos', self._on_playlist_pos)
+            except Exception:
+                pass
 
-            # Track/subtitle change toasts
+            # Track model and change toasts
             try:
+                self._mpv.observe_property('track-list', self._on_track_list)
                 self._mpv.observe_property('aid', self._on_aid_change)
                 self._mpv.observe_property('sid', self._on_sid_change)
                 self._mpv.observe_property('sub-visibility', self._on_sub_visibility_change)
@@ -3865,12 +4767,12 @@ class PlayerWindow(QMainWindow):
         # Progress write timer
         self._progress_timer = QTimer(self)
         self._progress_timer.timeout.connect(lambda: self._write_progress("periodic"))
-        self._progress_timer.start(5000)
+        self._progress_timer.start(PROGRESS_TICK_MS)
         
-        # UI update timer
+        # UI update timer: started/stopped by _reschedule_ui_tick
         self._ui_timer = QTimer(self)
         self._ui_timer.timeout.connect(self._update_ui)
-        self._ui_timer.start(250)
+        self._reschedule_ui_tick()
         
         # Controls hide timer
         self._hide_controls_timer = QTimer(self)
@@ -3887,20 +4789,36 @@ class PlayerWindow(QMainWindow):
         self._resume_timer.setSingleShot(True)
         self._resume_timer.timeout.connect(self._resume_after_buffer)
 
-        # Command polling timer (single-instance open requests)
-        self._command_timer = QTimer(self)
-        self._command_timer.timeout.connect(self._poll_command_file)
-        self._command_timer.start(600)
+        # Command file fallback (single-instance open requests): watched, not polled
+        self._command_timer = None
+        self._watch_command_file()
     
     # ========== MPV Property Observers ==========
     
     def _on_time_pos(self, _name, value):
         """Track playback position."""
         try:
+            if self._first_frame_wait is not None:
+                self._note_first_frame(value)
+            if self._switch_wait is not None:
+                self._note_switch_frame(value)
+            if value is not None:
+                self._last_frame_at = time.perf_counter()
+            if value is not None and not self._startup_first_frame:
+                self._startup_first_frame = True
+                _STARTUP.mark("first_frame")
+                QTimer.singleShot(0, self, self._finish_startup_profile)
             if value is not None:
                 v = float(value)
+                if abs(v - float(self._last_time_pos or 0.0)) > SEEK_JUMP_S:
+                    self._mark_progress_burst()
                 self._last_time_pos = v
                 self._max_position = max(self._max_position, v)
+                self._accumulate_watched(v)
+                bucket = int(v / MEDIA_TICK_S)
+                if bucket != self._media_bucket:
+                    self._media_bucket = bucket
+                    QTimer.singleShot(0, self, self._on_media_tick)
 
                 # Build 19: Ensure initial seek is applied after file load (best-effort, no new timers)
                 try:
@@ -3929,6 +4847,7 @@ class PlayerWindow(QMainWindow):
                 self._last_duration = None
             else:
                 self._last_duration = float(value)
+            self._publish_prop("duration", self._last_duration)
         except Exception:
             pass
 
@@ -3937,13 +4856,8 @@ class PlayerWindow(QMainWindow):
         try:
             self._track_toasts_armed = False
 
+            # _last_aid/_last_sid are kept current by the aid/sid observers
             def arm():
-                try:
-                    self._last_aid = getattr(self._mpv, 'aid', None)
-                    self._last_sid = getattr(self._mpv, 'sid', None)
-                except Exception:
-                    self._last_aid = None
-                    self._last_sid = None
                 self._track_toasts_armed = True
 
             QTimer.singleShot(800, self, arm)
@@ -3952,26 +4866,9 @@ class PlayerWindow(QMainWindow):
 
     def _format_audio_track_label(self, aid_value) -> str:
         try:
-            tl = self._mpv.track_list or []
-            for t in tl:
-                try:
-                    if t.get('type') == 'audio' and str(t.get('id')) == str(aid_value):
-                        lang = (t.get('lang') or '').strip()
-                        title = (t.get('title') or '').strip()
-                        bits = []
-                        if lang:
-                            bits.append(lang.upper())
-                        if title and ((not lang) or (title.lower() != lang.lower())):
-                            bits.append(title)
-                        if bits:
-                            return ' · '.join(bits)
-                        return f"#{aid_value}"
-                except Exception:
-                    continue
-        except Exception:
-            pass
-        try:
-            return f"#{aid_value}" if aid_value is not None else ''
+            if aid_value is None:
+                return ''
+            return self._tracks.name('audio', aid_value) or f"#{aid_value}"
         except Exception:
             return ''
 
@@ -3979,34 +4876,38 @@ class PlayerWindow(QMainWindow):
         try:
             if sid_value in (None, 'no', 0, '0', False):
                 return ''
-            tl = self._mpv.track_list or []
-            for t in tl:
-                try:
-                    if t.get('type') == 'sub' and str(t.get('id')) == str(sid_value):
-                        lang = (t.get('lang') or '').strip()
-                        title = (t.get('title') or '').strip()
-                        bits = []
-                        if lang:
-                            bits.append(lang.upper())
-                        if title and ((not lang) or (title.lower() != lang.lower())):
-                            bits.append(title)
-                        if bits:
-                            return ' · '.join(bits)
-                        return f"#{sid_value}"
-                except Exception:
-                    continue
+            return self._tracks.name('sub', sid_value) or f"#{sid_value}"
+        except Exception:
+            return ''
+
+    def _on_track_list(self, _name, value):
+        """mpv thread: hand the new track-list to the UI thread, where the model lives."""
+        try:
+            QTimer.singleShot(0, self, lambda v=value: self._apply_track_list(v))
         except Exception:
             pass
+
+    def _apply_track_list(self, value):
         try:
-            return f"#{sid_value}" if sid_value not in (None, 'no') else ''
+            if self._tracks.update(value):
+                self._refresh_track_lists()
         except Exception:
-            return ''
+            pass
+
+    def _apply_track_selection(self, kind: str, value):
+        try:
+            if self._tracks.select(kind, value):
+                self._refresh_track_lists()
+        except Exception:
+            pass
 
     def _on_aid_change(self, _name, value):
         try:
             # BUILD22: track current selection for persistence
             self._last_aid = value
-            QTimer.singleShot(0, self, lambda v=value: self._emit_aid_toast(v))
+            self._mark_progress_burst()
+            self._publish_prop("aid", value)
+            QTimer.singleShot(0, self, lambda v=value: self._on_aid_selected(v))
         except Exception:
             pass
 
@@ -4014,7 +4915,9 @@ class PlayerWindow(QMainWindow):
         try:
             # BUILD22: track current selection for persistence
             self._last_sid = value
-            QTimer.singleShot(0, self, lambda v=value: self._emit_sid_toast(v))
+            self._mark_progress_burst()
+            self._publish_prop("sid", value)
+            QTimer.singleShot(0, self, lambda v=value: self._on_sid_selected(v))
         except Exception:
             pass
 
@@ -4023,12 +4926,42 @@ class PlayerWindow(QMainWindow):
         try:
             # mpv reports yes/no (str) or bool depending on binding
             self._last_sub_visibility = bool(value) if value is not None else None
+            pre = self._preload
+            if pre is not None and value is not None:
+                pre["prefs"]["vis"] = self._last_sub_visibility
+            self._mark_progress_burst()
+            self._publish_prop("sub-visibility", self._last_sub_visibility)
         except Exception:
             try:
                 self._last_sub_visibility = None
             except Exception:
                 pass
 
+    def _on_aid_selected(self, value):
+        self._apply_track_selection('audio', value)
+        self._note_preload_pref('audio', 'aid', value)
+        self._emit_aid_toast(value)
+
+    def _on_sid_selected(self, value):
+        self._apply_track_selection('sub', value)
+        self._note_preload_pref('sub', 'sid', value)
+        self._emit_sid_toast(value)
+
+    def _note_preload_pref(self, kind: str, key: str, value) -> None:
+        """Keep the armed preload's carried prefs current while the old file still has tracks.
+
+        Unloading the finishing file empties track-list before it reports aid/sid as
+        False (track-list is observed first), so a selection seen with no rows is
+        transitional and must not replace what the user actually picked.
+        """
+        try:
+            pre = self._preload
+            if pre is None or not self._tracks.rows.get(kind):
+                return
+            pre["prefs"][key] = value
+        except Exception:
+            pass
+
     def _emit_aid_toast(self, value):
         try:
             if getattr(self, '_suppress_next_aid_toast', False):
@@ -4044,11 +4977,6 @@ class PlayerWindow(QMainWindow):
             label = self._format_audio_track_label(value)
             txt = f"♪ {label}" if label else '♪'
             self.toast.show_toast(txt)
-            try:
-                if self.tracks_drawer.is_open():
-                    self._refresh_track_lists()
-            except Exception:
-                pass
         except Exception:
             pass
 
@@ -4070,11 +4998,6 @@ class PlayerWindow(QMainWindow):
                 label = self._format_subtitle_track_label(value)
                 txt = f"CC {label}" if label else 'CC'
             self.toast.show_toast(txt)
-            try:
-                if self.tracks_drawer.is_open():
-                    self._refresh_track_lists()
-            except Exception:
-                pass
         except Exception:
             pass
 
@@ -4109,11 +5032,18 @@ class PlayerWindow(QMainWindow):
         """
         try:
             is_paused = bool(value)
+            was_paused = self._cached_paused
             self._cached_paused = is_paused
+            self._publish_prop("pause", is_paused)
+            # Checkpoint the position we stopped at; nothing is written while paused after that
+            if is_paused and not was_paused:
+                QTimer.singleShot(0, self, lambda: self._write_progress("pause"))
 
             # Ensure UI updates happen on the Qt thread
             try:
                 QTimer.singleShot(0, self, lambda p=is_paused: self.bottom_hud.set_play_pause_icon(not p))
+                QTimer.singleShot(0, self, self._on_media_tick)
+                QTimer.singleShot(0, self, self._reschedule_ui_tick)
             except Exception:
                 pass
         except Exception:
@@ -4122,10 +5052,15 @@ class PlayerWindow(QMainWindow):
     def _on_eof(self, _name, value):
         """Handle end of file."""
         try:
+            if value:
+                self._publish_prop("eof-reached", True)
             if value and not self._eof_signaled:
                 self._eof_signaled = True
                 self._write_progress("eof")
-                if self._auto_advance:
+                pre = self._preload
+                if self._auto_advance and pre is not None and pre.get("ok"):
+                    pass  # mpv moves on to the preloaded entry itself (_on_playlist_pos)
+                elif self._auto_advance:
                     QTimer.singleShot(500, self._next_episode)
                 else:
                     try:
@@ -4145,76 +5080,119 @@ class PlayerWindow(QMainWindow):
         """Update UI elements.
 
         Avoid polling libmpv properties from the Qt UI thread (can freeze the event loop if mpv blocks).
-        Use values cached by mpv observers instead.
+        Use values cached by mpv observers instead. Runs only while _ui_tick_wanted_ms says
+        something on screen shows playback state.
         """
         try:
             pos = getattr(self, "_last_time_pos", None)
             dur = getattr(self, "_last_duration", None)
 
-            self.bottom_hud.update_scrubber(pos, dur)
-            self.bottom_hud.update_time_labels(pos, dur)
+            if self._controls_visible:
+                self.bottom_hud.update_scrubber(pos, dur)
+                self.bottom_hud.update_time_labels(pos, dur)
 
-            # Build 5: Track watched time via media-time deltas, not wall clock.
-            # Ignore large jumps (seeks/scrubs) so "watched" means real playback.
-            is_paused = getattr(self, "_cached_paused", False)
-            try:
-                now_m = time.monotonic()
-            except Exception:
-                now_m = None
+            # Update diagnostics if visible (best-effort)
+            if self._info_visible:
+                self._update_diagnostics()
+        except Exception:
+            pass
 
-            try:
-                last_wall = getattr(self, "_watch_last_wall", None)
-                last_pos = getattr(self, "_watch_last_pos", None)
-            except Exception:
-                last_wall = None
-                last_pos = None
+    def _ui_tick_wanted_ms(self) -> int:
+        """Interval the HUD repaint timer should run at right now; 0 = stopped."""
+        try:
+            if self._standby or not self.isVisible() or self.isMinimized():
+                return 0
+            if not (self._controls_visible or self._info_visible):
+                return 0
+        except Exception:
+            return UI_TICK_MS
+        return UI_TICK_PAUSED_MS if self._cached_paused else UI_TICK_MS
 
-            if pos is not None and now_m is not None:
-                try:
-                    pos_f = float(pos)
-                except Exception:
-                    pos_f = None
+    def _reschedule_ui_tick(self) -> None:
+        """Apply _ui_tick_wanted_ms; called whenever visibility or pause state changes."""
+        try:
+            ms = self._ui_tick_wanted_ms()
+            if not ms:
+                if self._ui_timer.isActive():
+                    self._ui_timer.stop()
+                self._ui_tick_ms = 0
+                return
+            if ms != self._ui_tick_ms or not self._ui_timer.isActive():
+                was_stopped = not self._ui_timer.isActive()
+                self._ui_timer.start(ms)
+                self._ui_tick_ms = ms
+                if was_stopped:
+                    self._update_ui()  # don't show values up to a tick stale
+        except Exception:
+            pass
 
-                if pos_f is not None:
-                    if not is_paused and last_pos is not None and last_wall is not None:
-                        try:
-                            dt = float(now_m) - float(last_wall)
-                            dpos = float(pos_f) - float(last_pos)
-                            if dt > 0 and dpos > 0:
-                                sp = float(getattr(self, "_speed", 1.0) or 1.0)
-                                speed = sp if sp > 0 else 1.0
-                                max_count = max(3.0, (dt * speed * 1.75) + 1.0)
-                                # Large jumps are almost certainly seeks/scrubs — don't count as watched time.
-                                if dpos <= max_count:
-                                    self._watched_time += dpos
-                        except Exception:
-                            pass
+    def _on_media_tick(self):
+        """Playback crossed a MEDIA_TICK_S boundary (or pause flipped): work that runs with the HUD hidden."""
+        try:
+            pos = getattr(self, "_last_time_pos", None)
+            dur = getattr(self, "_last_duration", None)
+            self._maybe_preload_next(pos, dur)
+            self._stream_tick(pos, dur, self._cached_paused)
+            if not self._cached_paused:
+                self._perf.sample(pos)
+            # Paused: the slow UI tick would show a seek late
+            if self._cached_paused and self._ui_timer.isActive():
+                self._update_ui()
+        except Exception:
+            pass
 
-                    # Always update the accumulator anchors.
-                    try:
-                        self._watch_last_wall = float(now_m)
-                        self._watch_last_pos = float(pos_f)
-                    except Exception:
-                        pass
+    def _accumulate_watched(self, pos_f: float) -> None:
+        """Build 5: Track watched time via media-time deltas, not wall clock (time-pos observer).
 
-            # Update diagnostics if visible (best-effort)
-            if self._info_visible:
-                self._update_diagnostics()
+        Ignore large jumps (seeks/scrubs) so "watched" means real playback.
+        """
+        try:
+            now_m = time.monotonic()
+            last_wall = self._watch_last_wall
+            last_pos = self._watch_last_pos
+            if not self._cached_paused and last_pos is not None and last_wall is not None:
+                dt = float(now_m) - float(last_wall)
+                dpos = float(pos_f) - float(last_pos)
+                if dt > 0 and dpos > 0:
+                    sp = float(getattr(self, "_speed", 1.0) or 1.0)
+                    speed = sp if sp > 0 else 1.0
+                    max_count = max(3.0, (dt * speed * 1.75) + 1.0)
+                    # Large jumps are almost certainly seeks/scrubs — don't count as watched time.
+                    if dpos <= max_count:
+                        self._watched_time += dpos
+            # Always update the accumulator anchors.
+            self._watch_last_wall = float(now_m)
+            self._watch_last_pos = float(pos_f)
         except Exception:
             pass
     
     def _update_diagnostics(self):
         """Update diagnostics overlay."""
         try:
+            rec = self._perf
+            fmt = lambda field, spec: "-" if math.isnan(rec.last(field)) else format(rec.last(field), spec)
             info = {
                 "Position": _fmt_time(getattr(self, "_last_time_pos", None)),
                 "Duration": _fmt_time(getattr(self, "_last_duration", None)),
-                "FPS": f"{self._mpv.estimated_vf_fps or 0:.2f}",
-                "Drop Count": self._mpv.frame_drop_count or 0,
+                "FPS": fmt("fps", ".2f"),
+                "Drops (vo/decoder)": f"{fmt('drops', '.0f')} / {fmt('decoderDrops', '.0f')}",
+                "Delayed frames": fmt("voDelayed", ".0f"),
+                "Cache": f"{fmt('cacheS', '.1f')} s",
+                "Bitrate": f"{fmt('bitrateKbps', '.0f')} kbps",
+                "A/V sync": f"{fmt('avsyncMs', '+.1f')} ms",
+                "Hwdec": rec.latest.get("hwdec-current") or "no",
                 "Quality": self._quality_mode,
                 "Speed": f"{self._speed}x",
             }
-            self.diagnostics.update_diagnostics(info)
+            lat = getattr(self, "_command_latency", None)
+            if lat and lat.get("firstFrameMs") is not None:
+                info["Switch"] = f"{lat['firstFrameMs']:.0f} ms to first frame ({lat.get('via')})"
+            if self._switch_stats_text():
+                info["Episode switch"] = self._switch_stats_text()
+            info["Checkpoints"] = self._progress_stats_text()
+            info["Recorded"] = f"{rec.count * MEDIA_TICK_S:.0f} s of {PERF_WINDOW_S:.0f} s"
+            self._ensure_diagnostics().update_diagnostics(info)
+            self.diagnostics.update_sparklines(rec)
         except Exception:
             pass
     
@@ -4317,6 +5295,7 @@ class PlayerWindow(QMainWindow):
                         self.bottom_hud.hide()
                 except Exception:
                     pass
+                self._reschedule_ui_tick()
                 try:
                     self._apply_subtitle_safe_margin()
                 except Exception:
@@ -4324,6 +5303,7 @@ class PlayerWindow(QMainWindow):
                 return
 
             self._controls_visible = bool(visible)
+            self._reschedule_ui_tick()
 
             if visible:
                 try:
@@ -4405,6 +5385,8 @@ class PlayerWindow(QMainWindow):
     def _load_file(self, path: Path, start_at: float = 0.0):
         """Load video file."""
         try:
+            # A replace load clears mpv's playlist, preloaded next episode included
+            self._preload = None
             try:
                 self._chapter_times = []
                 self.bottom_hud.set_chapters([])
@@ -4414,7 +5396,9 @@ class PlayerWindow(QMainWindow):
             self._pending_initial_seek = float(start_at) if start_at and start_at > 0 else None
             self._initial_seek_attempts = 0
 
+            self._arm_first_frame_metric()
             self._mpv.loadfile(str(path))
+            _STARTUP.mark("loadfile")
             if start_at > 0:
                 try:
                     self._mpv.command('seek', str(start_at), 'absolute')
@@ -4424,7 +5408,20 @@ class PlayerWindow(QMainWindow):
                     except Exception:
                         pass
             self._mpv.pause = False
+            self._start_file_state(path, start_at)
+
+            # BUILD22: Apply persisted track preferences after load (best-effort)
+            try:
+                QTimer.singleShot(250, self, self._apply_track_prefs_after_load)
+            except Exception:
+                pass
             
+        except Exception as e:
+            print(f"Load file error: {e}")
+
+    def _start_file_state(self, path: Path, start_at: float = 0.0) -> None:
+        """Per-file tracking and UI for the file mpv is now playing."""
+        try:
             # Reset tracking
             self._max_position = start_at
             self._watched_time = 0.0
@@ -4432,6 +5429,7 @@ class PlayerWindow(QMainWindow):
             self._watch_last_pos = None
             self._watch_last_wall = time.monotonic()
             self._eof_signaled = False
+            self._media_bucket = None
             
             # Update UI
             self.bottom_hud.set_title(path.name)
@@ -4439,18 +5437,10 @@ class PlayerWindow(QMainWindow):
                 self.top_strip.set_title(path.name)
             except Exception:
                 pass
-            self._refresh_track_lists()
             try:
                 self._arm_track_toasts_after_load()
             except Exception:
                 pass
-
-            # BUILD22: Apply persisted track preferences after load (best-effort)
-            try:
-                QTimer.singleShot(250, self, self._apply_track_prefs_after_load)
-            except Exception:
-                pass
-            
         except Exception as e:
             print(f"Load file error: {e}")
 
@@ -4506,6 +5496,39 @@ class PlayerWindow(QMainWindow):
         try:
             if 0 <= index < len(self._playlist):
                 self._write_progress("episode_change")
+                pre = self._preload
+                if pre is not None and pre.get("ok") and pre["index"] == index:
+                    # Already open in mpv's playlist: step to it (_on_playlist_pos finishes the switch)
+                    pre["manual"] = True
+                    self._mpv.command('playlist-next', 'force')
+                    return
+                self._arm_switch_metric("cold")
+                self._switch_to_playlist_item(index)
+                self._load_file(self._file_path, 0.0)
+                
+                # Update playlist drawer if open
+                if self.playlist_drawer is not None and self.playlist_drawer.is_open():
+                    self._populate_playlist_drawer()
+        except Exception as e:
+            print(f"Load episode error: {e}")
+
+    def _track_prefs(self) -> dict:
+        """Snapshot the track selection to carry into the next episode."""
+        return {
+            "aid": getattr(self, '_last_aid', None),
+            "sid": getattr(self, '_last_sid', None),
+            "vis": getattr(self, '_last_sub_visibility', None),
+        }
+
+    def _switch_to_playlist_item(self, index: int, prefs: Optional[dict] = None) -> None:
+        """Move identity (index, videoId, path, carried track prefs) to a playlist item.
+
+        ``prefs`` is the selection captured before mpv moved on (preloaded path); the
+        cold path leaves it None and reads the live values, which still describe the
+        finished file because nothing new has been loaded yet.
+        """
+        try:
+            if 0 <= index < len(self._playlist):
                 self._playlist_index = index
 
                 # Keep videoId aligned to the playlist item (so the library can persist progress per-episode)
@@ -4521,21 +5544,122 @@ class PlayerWindow(QMainWindow):
                 self._file_path = new_path
                 # BUILD22: Carry user-selected track prefs across episode changes (best-effort)
                 try:
-                    if getattr(self, '_last_aid', None) is not None:
-                        self._pref_aid = str(getattr(self, '_last_aid'))
-                    if getattr(self, '_last_sid', None) is not None:
-                        self._pref_sid = str(getattr(self, '_last_sid'))
-                    if getattr(self, '_last_sub_visibility', None) is not None:
-                        self._pref_sub_visibility = 'yes' if bool(getattr(self, '_last_sub_visibility')) else 'no'
+                    if prefs is None:
+                        prefs = self._track_prefs()
+                    if prefs.get("aid") is not None:
+                        self._pref_aid = str(prefs["aid"])
+                    if prefs.get("sid") is not None:
+                        self._pref_sid = str(prefs["sid"])
+                    if prefs.get("vis") is not None:
+                        self._pref_sub_visibility = 'yes' if bool(prefs["vis"]) else 'no'
                 except Exception:
                     pass
-                self._load_file(new_path, 0.0)
-                
-                # Update playlist drawer if open
-                if hasattr(self, 'playlist_drawer') and self.playlist_drawer.is_open():
-                    self._populate_playlist_drawer()
+        except Exception:
+            pass
+
+    # ========== Next-Episode Preload ==========
+
+    def _maybe_preload_next(self, pos: Optional[float], dur: Optional[float]) -> None:
+        """Append the next episode to mpv's playlist once the current one is nearly over."""
+        if self._preload is not None or not self._auto_advance or pos is None or not dur:
+            return
+        try:
+            if float(dur) - float(pos) > PRELOAD_LEAD_S:
+                return
+            index = self._playlist_index + 1
+            if index >= len(self._playlist):
+                return
+            path = str(self._playlist[index])
+        except Exception:
+            return
+        self._preload = {"index": index, "path": path, "ok": False, "manual": False,
+                         "prefs": self._track_prefs()}
+        try:
+            self._mpv.command('loadfile', path, 'append')
+            self._preload["ok"] = True
+        except Exception as e:
+            # Left in place (not ok) so it is not retried every tick; EOF takes the cold path
+            print(f"Preload error: {e}")
+
+    def _drop_preload(self) -> None:
+        if self._preload is None:
+            return
+        ok = self._preload.get("ok")
+        self._preload = None
+        if ok:
+            try:
+                self._mpv.command('playlist-clear')  # everything but the current file
+            except Exception:
+                pass
+
+    def _on_playlist_pos(self, _name, value):
+        """mpv moved to the preloaded entry, on its own at EOF or by playlist-next (mpv thread)."""
+        try:
+            pre = self._preload
+            if pre is None or not pre.get("ok") or not isinstance(value, int) or value < 1:
+                return
+            self._arm_switch_metric("preloaded", unset=True)
+            prev_pos = self._last_time_pos
+            QTimer.singleShot(0, self, lambda p=prev_pos: self._enter_preloaded(p))
+        except Exception:
+            pass
+
+    def _enter_preloaded(self, prev_pos: Optional[float]) -> None:
+        pre = self._preload
+        self._preload = None
+        if pre is None:
+            return
+        try:
+            if not pre.get("manual") and not self._eof_signaled:
+                # eof-reached is cleared as soon as mpv moves on; it may never have read True
+                self._eof_signaled = True
+                if prev_pos is not None:
+                    self._last_time_pos = prev_pos
+                self._write_progress("eof")
+            self._switch_to_playlist_item(pre["index"], pre.get("prefs"))
+            self._pending_initial_seek = None
+            # Applied as soon as mpv moves on rather than after the cold path's 250 ms; a
+            # selection made before the tracks are read sets the option mpv selects by
+            self._apply_track_prefs_after_load()
+            # Keep the playing file at position 0 for the next append
+            try:
+                self._mpv.command('playlist-remove', '0')
+            except Exception:
+                pass
+            self._start_file_state(self._file_path, 0.0)
+            if self.playlist_drawer is not None and self.playlist_drawer.is_open():
+                self._populate_playlist_drawer()
         except Exception as e:
             print(f"Load episode error: {e}")
+
+    def _arm_switch_metric(self, mode: str, unset: bool = False) -> None:
+        """Time the gap from the last frame shown to the next file's first frame."""
+        self._switch_wait = {"mode": mode, "from": self._last_frame_at or time.perf_counter(), "unset": unset}
+
+    def _note_switch_frame(self, value) -> None:
+        """Called from the time-pos observer (mpv thread)."""
+        wait = self._switch_wait
+        if wait is None:
+            return
+        if value is None:
+            wait["unset"] = True
+            return
+        if not wait["unset"]:
+            return
+        self._switch_wait = None
+        gap = round((time.perf_counter() - wait["from"]) * 1000.0, 1)
+        samples = self._switch_stats.setdefault(wait["mode"], [])
+        samples.append(gap)
+        del samples[:-SWITCH_SAMPLES]
+        print(f"[player] episode switch mode={wait['mode']} gap={gap:.0f}ms", flush=True)
+
+    def _switch_stats_text(self) -> str:
+        parts = []
+        for mode, samples in self._switch_stats.items():
+            if samples:
+                med = sorted(samples)[len(samples) // 2]
+                parts.append(f"{mode} {med:.0f} ms (n={len(samples)})")
+        return ", ".join(parts)
     
     # ========== Playback Controls ==========
     
@@ -4701,10 +5825,11 @@ class PlayerWindow(QMainWindow):
         try:
             self._info_visible = not self._info_visible
             if self._info_visible:
-                self.diagnostics.show()
+                self._ensure_diagnostics().show()
                 self.diagnostics.raise_()
-            else:
+            elif self.diagnostics is not None:
                 self.diagnostics.hide()
+            self._reschedule_ui_tick()
         except Exception:
             pass
     
@@ -4775,9 +5900,10 @@ class PlayerWindow(QMainWindow):
                     self.subtitle_popover.close_popover()
             except Exception:
                 pass
+            self._ensure_tracks_drawer()
             self._refresh_track_lists()
             # Close other drawer for cleanliness
-            if hasattr(self, 'playlist_drawer') and self.playlist_drawer.is_open():
+            if self.playlist_drawer is not None and self.playlist_drawer.is_open():
                 self.playlist_drawer.close(self.width())
             self.tracks_drawer.toggle(self.width())
             try:
@@ -4802,8 +5928,9 @@ class PlayerWindow(QMainWindow):
                     self.subtitle_popover.close_popover()
             except Exception:
                 pass
+            self._ensure_playlist_drawer()
             self._populate_playlist_drawer()
-            if hasattr(self, 'tracks_drawer') and self.tracks_drawer.is_open():
+            if self.tracks_drawer is not None and self.tracks_drawer.is_open():
                 self.tracks_drawer.close(self.width())
             self.playlist_drawer.toggle(self.width())
             try:
@@ -4854,6 +5981,8 @@ class PlayerWindow(QMainWindow):
 
     def _populate_playlist_drawer(self):
         try:
+            if self.playlist_drawer is None:
+                return
             episodes = [{'path': p, 'name': Path(p).name} for p in self._playlist]
             self.playlist_drawer.populate_playlist(str(self._show_root_path), episodes, self._playlist_index)
             # Keep checkbox in sync
@@ -4992,6 +6121,7 @@ class PlayerWindow(QMainWindow):
                 pass
 
             # Toggle behavior
+            self._ensure_track_popovers()
             ap = getattr(self, 'audio_popover', None)
             if ap and ap.isVisible():
                 ap.close_popover()
@@ -5002,29 +6132,9 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
 
-            tl = self._mpv.track_list or []
-            cur = getattr(self._mpv, 'aid', None)
-            items: List[Tuple[str, int, bool]] = []
-            for t in tl:
-                try:
-                    if t.get('type') != 'audio':
-                        continue
-                    tid = int(t.get('id'))
-                    lang = (t.get('lang') or '').strip()
-                    title = (t.get('title') or '').strip()
-                    bits = []
-                    if lang:
-                        bits.append(lang.upper())
-                    if title and ((not lang) or (title.lower() != lang.lower())):
-                        bits.append(title)
-                    label = ' · '.join(bits) if bits else f"Track #{tid}"
-                    items.append((label, tid, str(tid) == str(cur)))
-                except Exception:
-                    continue
-
             btn = getattr(self.bottom_hud, 'audio_btn', None)
             if ap and btn:
-                ap.open_for_button(btn, items)
+                ap.open_for_button(btn, self._audio_popover_items())
                 self._set_controls_visible(True)
                 self._arm_controls_autohide()
         except Exception:
@@ -5042,6 +6152,7 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
 
+            self._ensure_track_popovers()
             sp = getattr(self, 'subtitle_popover', None)
             if sp and sp.isVisible():
                 sp.close_popover()
@@ -5052,42 +6163,29 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
 
-            tl = self._mpv.track_list or []
-            cur = getattr(self._mpv, 'sid', None)
-            items: List[Tuple[str, int, bool]] = []
-
-            # Off option
-            off_selected = (cur in (None, 'no', 0, '0', False))
-            items.append(("Off", -1, off_selected))
-
-            for t in tl:
-                try:
-                    if t.get('type') != 'sub':
-                        continue
-                    tid = int(t.get('id'))
-                    lang = (t.get('lang') or '').strip()
-                    title = (t.get('title') or '').strip()
-                    bits = []
-                    if lang:
-                        bits.append(lang.upper())
-                    if title and ((not lang) or (title.lower() != lang.lower())):
-                        bits.append(title)
-                    label = ' · '.join(bits) if bits else f"Sub #{tid}"
-                    items.append((label, tid, (not off_selected) and (str(tid) == str(cur))))
-                except Exception:
-                    continue
-
             btn = getattr(self.bottom_hud, 'subtitle_btn', None)
             if sp and btn:
-                sp.open_for_button(btn, items)
+                sp.open_for_button(btn, self._subtitle_popover_items())
                 self._set_controls_visible(True)
                 self._arm_controls_autohide()
         except Exception:
             pass
 
+    def _audio_popover_items(self) -> List[Tuple[str, int, bool]]:
+        return [(r['name'] or f"Track #{r['id']}", r['id'], r['selected'])
+                for r in self._tracks.rows['audio']]
+
+    def _subtitle_popover_items(self) -> List[Tuple[str, int, bool]]:
+        subs = self._tracks.rows['sub']
+        items = [("Off", -1, not any(r['selected'] for r in subs))]
+        items += [(r['name'] or f"Sub #{r['id']}", r['id'], r['selected']) for r in subs]
+        return items
+
     def _set_auto_advance(self, enabled: bool):
         try:
             self._auto_advance = bool(enabled)
+            if not self._auto_advance:
+                self._drop_preload()
             self.toast.show_toast("Auto-advance on" if self._auto_advance else "Auto-advance off")
         except Exception:
             pass
@@ -5152,42 +6250,24 @@ class PlayerWindow(QMainWindow):
             self._file_path = p
             self._show_root_path = new_root
 
-            idx_found = -1
-            try:
-                p_res = str(p.resolve())
-                for i, item in enumerate(self._playlist or []):
-                    try:
-                        if str(Path(item).resolve()) == p_res:
-                            idx_found = i
-                            break
-                    except Exception:
-                        if str(item) == str(p):
-                            idx_found = i
-                            break
-            except Exception:
-                idx_found = -1
+            # Playlist entries are absolute paths; match as given, then resolved (one stat chain, not one per entry)
+            idx_found = self._playlist_position(p)
+            if idx_found < 0:
+                try:
+                    idx_found = self._playlist_position(p.resolve())
+                except Exception:
+                    idx_found = -1
 
             if same_root and idx_found >= 0:
                 self._playlist_index = idx_found
             else:
+                # Sets _playlist_index for _file_path (p)
                 self._build_folder_playlist()
-                try:
-                    self._playlist_index = self._playlist.index(str(p))
-                except Exception:
-                    self._playlist_index = 0
-                    try:
-                        p_res = str(p.resolve())
-                        for i, item in enumerate(self._playlist):
-                            if str(Path(item).resolve()) == p_res:
-                                self._playlist_index = i
-                                break
-                    except Exception:
-                        pass
 
             self._load_file(p, 0.0)
 
             # If playlist drawer is open, refresh immediately
-            if hasattr(self, 'playlist_drawer') and self.playlist_drawer.is_open():
+            if self.playlist_drawer is not None and self.playlist_drawer.is_open():
                 self._populate_playlist_drawer()
 
             self.toast.show_toast("Loaded")
@@ -5199,9 +6279,10 @@ class PlayerWindow(QMainWindow):
     def _open_tracks_focus(self, target: str):
         """Open tracks drawer and focus a specific control."""
         try:
+            self._ensure_tracks_drawer()
             self._refresh_track_lists()
             # Close other drawer for cleanliness
-            if hasattr(self, 'playlist_drawer') and self.playlist_drawer.is_open():
+            if self.playlist_drawer is not None and self.playlist_drawer.is_open():
                 self.playlist_drawer.close(self.width())
 
             if not self.tracks_drawer.is_open():
@@ -5282,39 +6363,15 @@ class PlayerWindow(QMainWindow):
             pass
     
     def _refresh_track_lists(self):
-        """Refresh track lists from MPV."""
-        try:
-            # Audio tracks
-            audio_tracks = []
-            current_aid = self._mpv.aid
-            track_list = self._mpv.track_list or []
-            
-            for track in track_list:
-                if track.get('type') == 'audio':
-                    audio_tracks.append({
-                        'id': track.get('id'),
-                        'lang': track.get('lang', 'und'),
-                        'title': track.get('title', ''),
-                        'selected': track.get('id') == current_aid,
-                    })
-            
-            self.tracks_drawer.populate_audio_tracks(audio_tracks)
-            
-            # Subtitle tracks
-            subtitle_tracks = []
-            current_sid = self._mpv.sid
-            
-            for track in track_list:
-                if track.get('type') == 'sub':
-                    subtitle_tracks.append({
-                        'id': track.get('id'),
-                        'lang': track.get('lang', 'und'),
-                        'title': track.get('title', ''),
-                        'selected': track.get('id') == current_sid,
-                    })
-            
-            self.tracks_drawer.populate_subtitle_tracks(subtitle_tracks)
-            
+        """Push the track model into whichever track views exist (drawer, open popovers)."""
+        try:
+            if self.tracks_drawer is not None:
+                self.tracks_drawer.populate_audio_tracks(self._tracks.rows['audio'])
+                self.tracks_drawer.populate_subtitle_tracks(self._tracks.rows['sub'])
+            if self.audio_popover is not None and self.audio_popover.isVisible():
+                self.audio_popover.set_items(self._audio_popover_items())
+            if self.subtitle_popover is not None and self.subtitle_popover.isVisible():
+                self.subtitle_popover.set_items(self._subtitle_popover_items())
         except Exception as e:
             print(f"Refresh track lists error: {e}")
     
@@ -5331,10 +6388,6 @@ class PlayerWindow(QMainWindow):
                 self.toast.show_toast(f"♪ {label}" if label else '♪')
             except Exception:
                 pass
-            try:
-                self._refresh_track_lists()
-            except Exception:
-                pass
         except Exception:
             pass
     
@@ -5358,10 +6411,6 @@ class PlayerWindow(QMainWindow):
                     self.toast.show_toast(f"CC {label}" if label else 'CC')
                 except Exception:
                     pass
-            try:
-                self._refresh_track_lists()
-            except Exception:
-                pass
         except Exception:
             pass
     
@@ -5376,7 +6425,6 @@ class PlayerWindow(QMainWindow):
             )
             if file_path:
                 self._mpv.command('sub-add', file_path)
-                self._refresh_track_lists()
                 try:
                     self.toast.show_toast("Subtitle loaded")
                 except Exception:
@@ -5541,70 +6589,44 @@ class PlayerWindow(QMainWindow):
             video_m.addAction("Fullscreen").triggered.connect(self._toggle_fullscreen)
 
             # Audio/Subtitle quick pickers (text labels)
-            tl = getattr(self._mpv, 'track_list', None) or []
-            cur_aid = getattr(self._mpv, 'aid', None)
-            cur_sid = getattr(self._mpv, 'sid', None)
+            audio_items = self._audio_popover_items()
+            sub_items = self._subtitle_popover_items()
 
             audio_m = menu.addMenu("Audio")
             aud_m = audio_m.addMenu("Audio Track")
-            audio_tracks = [t for t in tl if isinstance(t, dict) and t.get('type') == 'audio']
-            if not audio_tracks:
+            if not audio_items:
                 na = aud_m.addAction("(No audio tracks)")
                 na.setEnabled(False)
             else:
-                for t in audio_tracks:
-                    try:
-                        tid = int(t.get('id'))
-                        lang = (t.get('lang') or '').strip()
-                        title = (t.get('title') or '').strip()
-                        parts = []
-                        if lang:
-                            parts.append(lang.upper())
-                        if title and ((not lang) or (title.lower() != lang.lower())):
-                            parts.append(title)
-                        txt = " · ".join(parts) if parts else f"Track #{tid}"
-                        a = aud_m.addAction(txt)
-                        a.setCheckable(True)
-                        a.setChecked(str(tid) == str(cur_aid))
-                        a.triggered.connect(lambda checked=False, x=tid: self._select_audio_track(x))
-                    except Exception:
-                        continue
+                for txt, tid, selected in audio_items:
+                    a = aud_m.addAction(txt)
+                    a.setCheckable(True)
+                    a.setChecked(selected)
+                    a.triggered.connect(lambda checked=False, x=tid: self._select_audio_track(x))
 
             subtitle_m = menu.addMenu("Subtitles")
             sub_m = subtitle_m.addMenu("Subtitle Track")
             off = sub_m.addAction("Off")
             off.setCheckable(True)
-            off.setChecked(cur_sid in (None, 'no', 0, '0', False))
+            off.setChecked(sub_items[0][2])
             off.triggered.connect(lambda: self._select_subtitle_track(-1))
 
-            sub_tracks = [t for t in tl if isinstance(t, dict) and t.get('type') == 'sub']
-            if not sub_tracks:
+            if len(sub_items) == 1:
                 ns = sub_m.addAction("(No subtitles)")
                 ns.setEnabled(False)
             else:
-                for t in sub_tracks:
-                    try:
-                        tid = int(t.get('id'))
-                        lang = (t.get('lang') or '').strip()
-                        title = (t.get('title') or '').strip()
-                        parts = []
-                        if lang:
-                            parts.append(lang.upper())
-                        if title and ((not lang) or (title.lower() != lang.lower())):
-                            parts.append(title)
-                        txt = " · ".join(parts) if parts else f"Sub #{tid}"
-                        a = sub_m.addAction(txt)
-                        a.setCheckable(True)
-                        a.setChecked(str(tid) == str(cur_sid))
-                        a.triggered.connect(lambda checked=False, x=tid: self._select_subtitle_track(x))
-                    except Exception:
-                        continue
+                for txt, tid, selected in sub_items[1:]:
+                    a = sub_m.addAction(txt)
+                    a.setCheckable(True)
+                    a.setChecked(selected)
+                    a.triggered.connect(lambda checked=False, x=tid: self._select_subtitle_track(x))
 
             adv_m = menu.addMenu("Filters / Advanced")
             info_a = adv_m.addAction("Show Info")
             info_a.setCheckable(True)
             info_a.setChecked(bool(getattr(self, '_info_visible', False)))
             info_a.triggered.connect(self._toggle_info)
+            adv_m.addAction("Export Performance Trace").triggered.connect(self._export_perf_trace)
 
             adv_m.addAction("Take Screenshot").triggered.connect(self._take_screenshot)
 
@@ -5646,6 +6668,28 @@ class PlayerWindow(QMainWindow):
         except Exception:
             pass
     
+    def _export_perf_trace(self):
+        """Write the recorded diagnostics to perf_<session>_<time>.json/.csv next to the session files."""
+        try:
+            name = f"perf_{_sanitize_ipc_name(self._session_id) or os.getpid()}_{time.strftime('%Y%m%d_%H%M%S')}"
+            folder = self._progress_file.parent if self._progress_file else Path.home() / ".tankoban"
+            meta = {
+                "file": str(self._file_path),
+                "videoId": self._video_id,
+                "sampleIntervalS": MEDIA_TICK_S,
+                "quality": self._quality_mode,
+                "exportedAt": time.time(),
+            }
+            json_path, _csv_path = self._perf.export(folder / name, meta)
+            self._emit_ui_event("perf_trace", str(json_path))
+            self.toast.show_toast(f"Trace saved: {json_path.name}")
+        except Exception as e:
+            print(f"Perf trace export error: {e}")
+            try:
+                self.toast.show_toast("Trace export failed")
+            except Exception:
+                pass
+
     def _take_screenshot(self):
         """Take screenshot."""
         try:
@@ -5663,7 +6707,8 @@ class PlayerWindow(QMainWindow):
             pass
 
     def _emit_ui_event(self, event_type: str, value=None):
-        """Publish lightweight UI events to the main app via the session progress file."""
+        """Publish lightweight UI events to the main app: pushed over the host
+        session when there is one, and carried in the progress file either way."""
         try:
             self._ui_event_seq = int(getattr(self, "_ui_event_seq", 0) or 0) + 1
             self._last_ui_event = {
@@ -5672,6 +6717,7 @@ class PlayerWindow(QMainWindow):
                 "value": value,
                 "ts": time.time(),
             }
+            self._host_send({"t": "ui", "event": self._last_ui_event})
         except Exception:
             pass
     
@@ -5705,18 +6751,42 @@ class PlayerWindow(QMainWindow):
     
     # ========== Progress Tracking ==========
     
+    def _mark_progress_burst(self) -> None:
+        """A seek or track change: checkpoint densely for a while (any thread)."""
+        self._checkpoint_dense_until = time.monotonic() + CHECKPOINT_DENSE_WINDOW_S
+
+    def _checkpoint_interval(self) -> float:
+        if time.monotonic() < self._checkpoint_dense_until:
+            return CHECKPOINT_DENSE_S
+        return CHECKPOINT_SESSION_S if self._host_live() else CHECKPOINT_STEADY_S
+
+    @staticmethod
+    def _progress_sig(progress: Dict[str, Any]) -> Tuple:
+        """What a checkpoint says, minus its timestamp: position to the second."""
+        ui = progress.get("uiEvent") or {}
+        return (
+            progress.get("videoId"), int(float(progress.get("position") or 0.0)),
+            round(float(progress.get("duration") or 0.0)), bool(progress.get("finished")),
+            progress.get("aid"), progress.get("sid"), progress.get("subVisibility"),
+            ui.get("id") if isinstance(ui, dict) else None, progress.get("windowFullscreen"),
+        )
+
+    def _progress_stats_text(self) -> str:
+        st = self._progress_stats
+        skipped = st["skippedPaused"] + st["skippedUnchanged"] + st["skippedThrottled"]
+        return (f"{st['written']} written, {skipped} skipped (paused {st['skippedPaused']}, "
+                f"unchanged {st['skippedUnchanged']}, throttled {st['skippedThrottled']})")
+
     def _write_progress(self, phase: str):
-        """Write progress to file."""
+        """Publish progress: streamed to the host session, checkpointed to file.
+
+        "periodic" (the PROGRESS_TICK_MS timer) is checkpointed only when the
+        CHECKPOINT_* policy allows it; every other phase is written at once.
+        """
         try:
-            if not self._progress_file:
-                return
-            
             now = time.time()
-            if phase == "periodic" and (now - self._last_progress_write) < 4.0:
-                return
-            
-            self._last_progress_write = now
-            
+            periodic = phase == "periodic"
+
             # Use cached values from mpv observers; avoid polling mpv properties on the Qt thread.
             pos = getattr(self, "_last_time_pos", None)
             dur = getattr(self, "_last_duration", None)
@@ -5776,7 +6846,26 @@ class PlayerWindow(QMainWindow):
             except Exception:
                 pass
             
-            atomic_write_json(self._progress_file, progress)
+            sig = self._progress_sig(progress)
+            if not periodic or sig != self._last_streamed_sig:
+                self._last_streamed_sig = sig
+                self._host_send({"t": "progress", "progress": progress}, coalesce="progress")
+            if not self._progress_file or phase == "hello":
+                return
+            if periodic:
+                if self._cached_paused:
+                    self._progress_stats["skippedPaused"] += 1
+                    return
+                if sig == self._last_checkpoint_sig:
+                    self._progress_stats["skippedUnchanged"] += 1
+                    return
+                if (now - self._last_checkpoint) < self._checkpoint_interval():
+                    self._progress_stats["skippedThrottled"] += 1
+                    return
+            self._last_checkpoint = now
+            self._last_checkpoint_sig = sig
+            atomic_write_json(self._progress_file, progress, indent=None)
+            self._progress_stats["written"] += 1
             
         except Exception as e:
             print(f"Write progress error: {e}")
@@ -5967,6 +7056,7 @@ class PlayerWindow(QMainWindow):
         # Best-effort progress write
         try:
             self._write_progress(phase="close")
+            print(f"[player] progress checkpoints: {self._progress_stats_text()}", flush=True)
         except Exception:
             pass
 
@@ -6067,9 +7157,53 @@ def _apply_taskbar_icon(w: QMainWindow, icon: QIcon, tries: int = 0) -> None:
 
 
 
+def _startup_profile_path(a: argparse.Namespace) -> Path:
+    """--profile-startup PATH, or startup_<session>.json next to the session files."""
+    if a.profile_startup != "auto":
+        return Path(a.profile_startup)
+    name = f"startup_{_sanitize_ipc_name(a.session_id) or os.getpid()}.json"
+    if a.progress_file:
+        return Path(a.progress_file).parent / name
+    return Path.home() / ".tankoban" / name
+
+
+def _present_player_window(w: "PlayerWindow", win_x: Optional[int], win_y: Optional[int],
+                           win_w: Optional[int], win_h: Optional[int], fullscreen: bool = False,
+                           parent_hwnd: int = 0) -> None:
+    """Place and show the player window (cold start, or a standby being adopted)."""
+    # Build16: start windowed by default and (if provided) match Tankoban window geometry
+    try:
+        if win_w and win_h:
+            w.setGeometry(int(win_x or 100), int(win_y or 100), int(win_w), int(win_h))
+        else:
+            w.resize(1100, 700)
+    except Exception:
+        try: w.resize(1100, 700)
+        except Exception: pass
+    try:
+        if parent_hwnd > 0:
+            w.show()
+        elif fullscreen:
+            w.showFullScreen()
+        else:
+            w.showMaximized()
+    except Exception:
+        w.show()
+
+    # Foreground pass for fullscreen launches (single deferred call to avoid startup flicker).
+    try:
+        if parent_hwnd <= 0 and fullscreen:
+            QTimer.singleShot(140, lambda: w._bring_to_front(ensure_maximized=False))
+    except Exception:
+        pass
+
+
 def main() -> int:
     """Build 13 main entry point."""
     a = parse_args()
+    _STARTUP.mark("args")
+    if a.profile_startup:
+        _STARTUP.output = _startup_profile_path(a)
     
     # Windows: set explicit AppUserModelID so the taskbar groups/icons correctly
     if sys.platform.startswith("win"):
@@ -6080,6 +7214,7 @@ def main() -> int:
             pass
 
     app = QApplication(sys.argv)
+    _STARTUP.mark("qapp")
     try:
         app.setApplicationName("Tankoban Player")
         app.setApplicationDisplayName("Tankoban Player")
@@ -6107,7 +7242,8 @@ def main() -> int:
         "pref_sub_visibility": getattr(a, "pref_sub_visibility", ""),
     }
 
-    if _try_send_ipc_open(_server_name, _ipc_payload):
+    # A standby listens under its own name; there is no player to forward to
+    if not a.standby and _try_send_ipc_open(_server_name, _ipc_payload):
         return 0
 
     _ipc_server = _start_ipc_server(_server_name, parent=app)
@@ -6141,7 +7277,9 @@ def main() -> int:
             pref_aid=getattr(a, 'pref_aid', ''),
             pref_sid=getattr(a, 'pref_sid', ''),
             pref_sub_visibility=getattr(a, 'pref_sub_visibility', ''),
+            standby=bool(a.standby),
         )
+        _STARTUP.mark("window_built")
         try:
             if int(getattr(a, "parent_hwnd", 0) or 0) > 0:
                 w.attach_to_parent_hwnd(int(a.parent_hwnd))
@@ -6162,31 +7300,12 @@ def main() -> int:
         except Exception:
             pass
 
-        # Build16: start windowed by default and (if provided) match Tankoban window geometry
-        try:
-            if a.win_w and a.win_h:
-                w.setGeometry(int(a.win_x or 100), int(a.win_y or 100), int(a.win_w), int(a.win_h))
-            else:
-                w.resize(1100, 700)
-        except Exception:
-            try: w.resize(1100, 700)
-            except Exception: pass
-        try:
-            if int(getattr(a, "parent_hwnd", 0) or 0) > 0:
-                w.show()
-            elif getattr(a, "start_fullscreen", False):
-                w.showFullScreen()
-            else:
-                w.showMaximized()
-        except Exception:
-            w.show()
-
-        # Foreground pass for fullscreen launches (single deferred call to avoid startup flicker).
-        try:
-            if int(getattr(a, "parent_hwnd", 0) or 0) <= 0 and bool(getattr(a, "start_fullscreen", False)):
-                QTimer.singleShot(140, lambda: w._bring_to_front(ensure_maximized=False))
-        except Exception:
-            pass
+        # A standby stays hidden until the host's first open adopts it
+        if not w._standby:
+            _present_player_window(w, a.win_x, a.win_y, a.win_w, a.win_h,
+                                   fullscreen=bool(getattr(a, "start_fullscreen", False)),
+                                   parent_hwnd=int(getattr(a, "parent_hwnd", 0) or 0))
+            _STARTUP.mark("shown")
 
 
         # Windows: make sure the taskbar picks up the icon (Qt sometimes needs the native handle)
@@ -0,0 +1,6 @@
+"""run_player.py is a script run from this folder; the tests import it the same way."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
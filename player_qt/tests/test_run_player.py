@@ -0,0 +1,111 @@
+"""Player helpers that don't need a window: folder playlists and the track model."""
+
+import os
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+import run_player  # noqa: E402
+
+
+def _touch(folder, *names):
+    for name in names:
+        with open(os.path.join(str(folder), name), "wb") as f:
+            f.write(b"x")
+
+
+@pytest.fixture
+def season(tmp_path):
+    _touch(tmp_path, "Show - 10.mkv", "Show - 2.mkv", "Show - 1.MP4", "notes.txt", ".mkv", "cover.jpg")
+    os.mkdir(tmp_path / "Extras.mkv")
+    return tmp_path
+
+
+def test_folder_playlist_is_naturally_ordered_videos(season):
+    paths, index = run_player.FolderPlaylistCache().get(season)
+    assert [os.path.basename(p) for p in paths] == ["Show - 1.MP4", "Show - 2.mkv", "Show - 10.mkv"]
+    assert index == {p: i for i, p in enumerate(paths)}
+
+
+def test_folder_playlist_rescans_only_when_the_folder_changes(season, monkeypatch):
+    cache = run_player.FolderPlaylistCache()
+    scans = []
+    real = cache._scan
+    monkeypatch.setattr(cache, "_scan", lambda folder: scans.append(folder) or real(folder))
+    first, _ = cache.get(season)
+    assert cache.get(season)[0] is first
+    assert len(scans) == 1
+    _touch(season, "Show - 3.mkv")
+    st = os.stat(season)
+    os.utime(season, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    paths, index = cache.get(season)
+    assert len(scans) == 2
+    assert os.path.basename(paths[2]) == "Show - 3.mkv"
+    assert index[paths[3]] == 3
+
+
+def test_folder_playlist_cache_drops_least_recently_used(tmp_path):
+    cache = run_player.FolderPlaylistCache()
+    folders = []
+    for i in range(cache.MAX_FOLDERS + 1):
+        d = tmp_path / f"s{i}"
+        d.mkdir()
+        _touch(d, "e1.mkv")
+        folders.append(d)
+    for d in folders[:cache.MAX_FOLDERS]:
+        cache.get(d)
+    cache.get(folders[0])  # refreshed, so s1 is now the oldest
+    cache.get(folders[-1])
+    assert len(cache._folders) == cache.MAX_FOLDERS
+    assert str(folders[0]) in cache._folders
+    assert str(folders[1]) not in cache._folders
+
+
+def test_missing_folder_raises(tmp_path):
+    with pytest.raises(OSError):
+        run_player.FolderPlaylistCache().get(tmp_path / "gone")
+
+
+TRACKS = [
+    {"type": "video", "id": 1, "selected": True},
+    {"type": "audio", "id": 1, "lang": "jpn", "selected": True},
+    {"type": "audio", "id": 2, "lang": "eng", "title": "Commentary"},
+    {"type": "sub", "id": 1, "lang": "eng", "title": "ENG"},
+    {"type": "sub", "id": 2, "title": "Signs"},
+    {"type": "sub", "id": "bad"},
+]
+
+
+def test_track_model_rows():
+    model = run_player.TrackModel()
+    assert model.update(TRACKS)
+    assert [r["row"] for r in model.rows["audio"]] == ["Track 1: jpn", "Track 2: eng - Commentary"]
+    assert [r["name"] for r in model.rows["sub"]] == ["ENG", "Signs"]
+    assert model.name("audio", "2") == "ENG · Commentary"
+    assert model.name("sub", 9) == ""
+    assert (model.current("audio"), model.current("sub")) == (1, None)
+
+
+def test_track_model_reports_only_changes():
+    model = run_player.TrackModel()
+    model.update(TRACKS)
+    rows = model.rows
+    assert not model.update([dict(t) for t in TRACKS])
+    assert model.rows is rows
+    assert model.update(TRACKS[:2])
+    assert model.rows["sub"] == []
+    assert model.update(None)
+    assert model.rows == {"audio": [], "sub": []}
+
+
+def test_track_model_selection():
+    model = run_player.TrackModel()
+    model.update(TRACKS)
+    assert model.select("sub", 2)
+    assert not model.select("sub", "2")
+    assert model.current("sub") == 2
+    assert model.select("sub", False)
+    assert model.current("sub") is None
+    assert not model.select("sub", "no")
+    assert model.select("audio", 2) and model.current("audio") == 2
@@ -0,0 +1,1032 @@
+"""
+Project Butterfly — Adblock Filter Engine
+
+Network filter engine for EasyList-style (Adblock Plus syntax) lists.
+Replaces the ||domain^-only parser ported from main/domains/webAdblock.
+
+Layout (same idea as uBlock Origin / Brave's adblock-rust):
+  - Plain hostname rules (||ads.example.com^, with or without options) live in
+    a dict keyed by hostname; a request host is matched by walking its suffixes.
+  - Every other rule is filed under one token: a run of [a-z0-9%] that must
+    appear intact in any URL the rule can match. Matching tokenizes the URL
+    once and only tests the rules filed under those tokens.
+  - Rules with no usable token go into a small fallback bucket tested always.
+  - Exceptions (@@) use a second index of the same shape and are consulted
+    only after a block rule hits ($important rules skip them).
+
+Supported options: third-party/3p, first-party/1p (and ~ forms), domain=/from=,
+resource types (script, image, stylesheet, xmlhttprequest, subdocument, ...,
+with ~negation), match-case, important, and $document exceptions on hostname
+rules (page-level allowlisting). Rules using anything else (redirect=, csp=,
+removeparam, ...) are dropped rather than applied half-way.
+
+Cosmetic filters (##, #@#, #?#, #$#) are skipped — this is the network layer.
+
+Compiled engines can be saved as a binary snapshot (write_snapshot) and
+memory-mapped back (load_snapshot): the hash tables are read in place and
+each rule is parsed only the first time a lookup lands on it, so startup
+costs an open() and a header check instead of parsing the lists.
+
+update_lists() refreshes subscriptions with conditional, concurrent fetches
+and parses only the lists that changed, in a worker process.
+
+Pure Python, no Qt. `python adblock.py --help` runs the replay benchmark.
+"""
+
+import json
+import mmap
+import os
+import re
+import sys
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+# ========== RESOURCE TYPES ==========
+
+TYPE_BITS = {
+    "other": 1 << 0,
+    "script": 1 << 1,
+    "image": 1 << 2,
+    "stylesheet": 1 << 3,
+    "object": 1 << 4,
+    "xmlhttprequest": 1 << 5,
+    "subdocument": 1 << 6,
+    "ping": 1 << 7,
+    "media": 1 << 8,
+    "font": 1 << 9,
+    "websocket": 1 << 10,
+    "document": 1 << 11,
+}
+_ALL_TYPES = 0
+for _bit in TYPE_BITS.values():
+    _ALL_TYPES |= _bit
+# A rule with no type options applies to everything except the page itself
+_DEFAULT_TYPES = _ALL_TYPES & ~TYPE_BITS["document"]
+
+_TYPE_ALIASES = {
+    "xhr": "xmlhttprequest",
+    "css": "stylesheet",
+    "frame": "subdocument",
+    "doc": "document",
+    "object-subrequest": "object",
+    "beacon": "ping",
+}
+
+# Cosmetic-only options: an exception carrying just these has no network effect
+_COSMETIC_OPTIONS = {"elemhide", "ehide", "generichide", "ghide", "specifichide", "shide", "genericblock"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9%]+")
+_HOST_RULE_RE = re.compile(r"^[a-z0-9.-]+\^?$")
+# Frequent in URLs, so a poor choice of bucket when a rule has anything better
+_BAD_TOKENS = frozenset([
+    "http", "https", "www", "com", "net", "org", "js", "css", "html", "php",
+    "jpg", "png", "gif", "static", "cdn", "api",
+])
+
+# Common second-level public suffixes; enough to tell first- from third-party
+# for the sites people actually visit without shipping the full PSL.
+_TWO_LEVEL_SUFFIXES = frozenset([
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp",
+    "co.kr", "or.kr", "co.nz", "org.nz", "co.in", "net.in", "org.in",
+    "co.za", "co.id", "co.il", "co.th",
+    "com.br", "net.br", "com.cn", "net.cn", "org.cn", "com.tw", "com.hk",
+    "com.mx", "com.ar", "com.tr", "com.sg", "com.my", "com.ph", "com.vn",
+    "com.ua", "com.pl", "com.ru", "com.sa", "com.eg", "com.pk", "com.ng",
+])
+
+
+@lru_cache(maxsize=4096)
+def base_domain(host: str) -> str:
+    """Approximate registrable domain (eTLD+1) of a lowercase hostname."""
+    if not host or host[-1].isdigit() or ":" in host:
+        return host  # IP literal
+    parts = host.rsplit(".", 3)
+    if len(parts) >= 3 and f"{parts[-2]}.{parts[-1]}" in _TWO_LEVEL_SUFFIXES:
+        return ".".join(parts[-3:])
+    return ".".join(parts[-2:])
+
+
+def host_from_url(url: str) -> str:
+    """Lowercase hostname of an absolute URL, without port/userinfo."""
+    i = url.find("://")
+    if i < 0:
+        return ""
+    start = i + 3
+    end = len(url)
+    for ch in "/?#":
+        j = url.find(ch, start)
+        if 0 <= j < end:
+            end = j
+    netloc = url[start:end]
+    at = netloc.rfind("@")
+    if at >= 0:
+        netloc = netloc[at + 1:]
+    if netloc.startswith("["):
+        return netloc[1:netloc.find("]")].lower()
+    colon = netloc.find(":")
+    if colon >= 0:
+        netloc = netloc[:colon]
+    return netloc.lower()
+
+
+def _host_suffixes(host: str):
+    """a.b.example.com -> a.b.example.com, b.example.com, example.com, com"""
+    probe = host
+    while probe:
+        yield probe
+        dot = probe.find(".")
+        if dot < 0:
+            return
+        probe = probe[dot + 1:]
+
+
+# ========== FILTERS ==========
+
+class NetworkFilter:
+    """One parsed network rule. Pattern regexes are compiled on first use."""
+
+    __slots__ = (
+        "raw", "exception", "pattern", "is_regex", "host_anchor", "left_anchor",
+        "right_anchor", "types", "party", "domains", "not_domains",
+        "important", "match_case", "_re",
+    )
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.exception = False
+        self.pattern = ""
+        self.is_regex = False
+        self.host_anchor = False
+        self.left_anchor = False
+        self.right_anchor = False
+        self.types = _DEFAULT_TYPES
+        self.party = 0  # 0 = any, 1 = first-party only, 3 = third-party only
+        self.domains = None
+        self.not_domains = None
+        self.important = False
+        self.match_case = False
+        self._re = None
+
+    def __repr__(self):
+        return f"NetworkFilter({self.raw!r})"
+
+    def _compile(self):
+        if self.is_regex:
+            flags = 0 if self.match_case else re.IGNORECASE
+            self._re = re.compile(self.pattern, flags)
+            return self._re
+        parts = []
+        if self.host_anchor:
+            parts.append(r"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?")
+        elif self.left_anchor:
+            parts.append("^")
+        for ch in self.pattern:
+            if ch == "*":
+                parts.append(".*")
+            elif ch == "^":
+                parts.append(r"(?:[^\w.%-]|$)")
+            else:
+                parts.append(re.escape(ch))
+        if self.right_anchor:
+            parts.append("$")
+        self._re = re.compile("".join(parts))
+        return self._re
+
+    def options_match(self, type_bit: int, source_host: str, third_party: bool) -> bool:
+        if not (self.types & type_bit):
+            return False
+        if self.party == 3 and not third_party:
+            return False
+        if self.party == 1 and third_party:
+            return False
+        if self.domains is not None or self.not_domains is not None:
+            if not source_host:
+                return self.domains is None
+            included = self.domains is None
+            for h in _host_suffixes(source_host):
+                if self.not_domains is not None and h in self.not_domains:
+                    return False
+                if not included and h in self.domains:
+                    included = True
+            if not included:
+                return False
+        return True
+
+    def pattern_match(self, url: str, url_lower: str) -> bool:
+        rx = self._re or self._compile()
+        return rx.search(url if self.match_case else url_lower) is not None
+
+
+def parse_filter(line: str) -> Optional[NetworkFilter]:
+    """Parse one list line into a NetworkFilter, or None if it isn't a
+    supported network rule (comment, cosmetic, unsupported option)."""
+    raw = line.strip()
+    if not raw or raw[0] in ("!", "["):
+        return None
+    if "##" in raw or "#@#" in raw or "#?#" in raw or "#$#" in raw or "#%#" in raw:
+        return None
+
+    f = NetworkFilter(raw)
+    body = raw
+    if body.startswith("@@"):
+        f.exception = True
+        body = body[2:]
+
+    # Options ($...) — a '$' inside a /regex/ is part of the pattern
+    opts = None
+    dollar = body.rfind("$")
+    if dollar >= 0 and not (body.startswith("/") and body.endswith("/")):
+        opts = body[dollar + 1:]
+        body = body[:dollar]
+    if opts is not None and not _apply_options(f, opts):
+        return None
+
+    if len(body) > 2 and body.startswith("/") and body.endswith("/"):
+        f.is_regex = True
+        f.pattern = body[1:-1]
+        try:
+            f._compile()
+        except re.error:
+            return None
+        return f
+
+    if body.startswith("||"):
+        f.host_anchor = True
+        body = body[2:]
+    elif body.startswith("|"):
+        f.left_anchor = True
+        body = body[1:]
+    if body.endswith("|"):
+        f.right_anchor = True
+        body = body[:-1]
+
+    # Leading/trailing '*' add nothing but cost regex time
+    while body.startswith("*") and not f.host_anchor:
+        body = body[1:]
+        f.left_anchor = False
+    while body.endswith("*"):
+        body = body[:-1]
+        f.right_anchor = False
+
+    if not f.match_case:
+        body = body.lower()
+    f.pattern = body
+    if not body and not (f.domains or f.exception):
+        return None  # would match every request
+    return f
+
+
+def _apply_options(f: NetworkFilter, opts: str) -> bool:
+    pos_types = 0
+    neg_types = 0
+    cosmetic_only = True
+    for opt in opts.split(","):
+        opt = opt.strip()
+        if not opt:
+            continue
+        negated = opt.startswith("~")
+        name = opt[1:] if negated else opt
+        value = None
+        eq = name.find("=")
+        if eq >= 0:
+            name, value = name[:eq], name[eq + 1:]
+        name = name.lower()
+        if name in _COSMETIC_OPTIONS:
+            continue
+        cosmetic_only = False
+        name = _TYPE_ALIASES.get(name, name)
+
+        if name in TYPE_BITS:
+            if negated:
+                neg_types |= TYPE_BITS[name]
+            else:
+                pos_types |= TYPE_BITS[name]
+        elif name in ("third-party", "3p"):
+            f.party = 1 if negated else 3
+        elif name in ("first-party", "1p"):
+            f.party = 3 if negated else 1
+        elif name in ("domain", "from") and value:
+            inc, exc = set(), set()
+            for d in value.lower().split("|"):
+                d = d.strip()
+                if d.startswith("~"):
+                    if d[1:]:
+                        exc.add(d[1:])
+                elif d:
+                    inc.add(d)
+            f.domains = frozenset(inc) if inc else None
+            f.not_domains = frozenset(exc) if exc else None
+        elif name == "match-case":
+            f.match_case = True
+        elif name == "important":
+            f.important = True
+        elif name == "all":
+            pos_types |= _ALL_TYPES
+        elif name == "popup":
+            return False  # popup blocking is not a network-layer concern
+        else:
+            return False  # redirect=, csp=, removeparam, badfilter, ...
+
+    if cosmetic_only and opts.strip():
+        return False
+    if pos_types:
+        f.types = pos_types & ~neg_types
+    elif neg_types:
+        f.types = _DEFAULT_TYPES & ~neg_types
+    return bool(f.types)
+
+
+def _best_token(f: NetworkFilter) -> str:
+    """Longest token guaranteed to appear whole in every matching URL."""
+    if f.is_regex:
+        return ""
+    pattern = f.pattern.lower()
+    n = len(pattern)
+    good = ""
+    bad = ""
+    for m in _TOKEN_RE.finditer(pattern):
+        s, e = m.span()
+        if s == 0:
+            if not (f.host_anchor or f.left_anchor):
+                continue
+        elif pattern[s - 1] == "*":
+            continue
+        if e == n:
+            if not f.right_anchor:
+                continue
+        elif pattern[e] == "*":
+            continue
+        tok = m.group()
+        if len(tok) < 2:
+            continue
+        if tok in _BAD_TOKENS:
+            if len(tok) > len(bad):
+                bad = tok
+        elif len(tok) > len(good):
+            good = tok
+    return good or bad
+
+
+# ========== INDEX ==========
+
+class _FilterIndex:
+    """Hostname dict + token buckets + fallback list for one rule polarity."""
+
+    __slots__ = ("hosts", "tokens", "fallback", "doc_hosts")
+
+    def __init__(self):
+        self.hosts = {}      # hostname -> [NetworkFilter]
+        self.tokens = {}     # token -> [NetworkFilter]
+        self.fallback = []
+        self.doc_hosts = {}  # hostname -> [NetworkFilter] ($document exceptions)
+
+    def add(self, f: NetworkFilter):
+        if f.host_anchor and not f.is_regex and _HOST_RULE_RE.match(f.pattern):
+            host = f.pattern.rstrip("^")
+            if host:
+                if f.exception and (f.types & TYPE_BITS["document"]):
+                    self.doc_hosts.setdefault(host, []).append(f)
+                self.hosts.setdefault(host, []).append(f)
+                return
+        tok = _best_token(f)
+        if tok:
+            self.tokens.setdefault(tok, []).append(f)
+        else:
+            self.fallback.append(f)
+
+    def find(self, url, url_lower, host, tokens, type_bit, source_host, third_party):
+        hosts = self.hosts
+        if hosts:
+            probe = host
+            while probe:
+                bucket = hosts.get(probe)
+                if bucket:
+                    for f in bucket:
+                        if f.options_match(type_bit, source_host, third_party):
+                            return f
+                dot = probe.find(".")
+                if dot < 0:
+                    break
+                probe = probe[dot + 1:]
+        get = self.tokens.get
+        for tok in tokens:
+            bucket = get(tok)
+            if bucket:
+                for f in bucket:
+                    if f.options_match(type_bit, source_host, third_party) and f.pattern_match(url, url_lower):
+                        return f
+        for f in self.fallback:
+            if f.options_match(type_bit, source_host, third_party) and f.pattern_match(url, url_lower):
+                return f
+        return None
+
+    def __bool__(self):
+        return bool(self.hosts or self.tokens or self.fallback)
+
+    def find_document(self, source_host):
+        if not self.doc_hosts or not source_host:
+            return None
+        for h in _host_suffixes(source_host):
+            bucket = self.doc_hosts.get(h)
+            if bucket:
+                return bucket[0]
+        return None
+
+
+class FilterEngine:
+    """Compiled network filter lists. Build once, then match() per request."""
+
+    def __init__(self):
+        self._block = _FilterIndex()
+        self._allow = _FilterIndex()
+        self._important = _FilterIndex()
+        self.filter_count = 0
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "FilterEngine":
+        engine = cls()
+        for line in lines:
+            engine.add_filter(line)
+        return engine
+
+    def add_filter(self, line: str) -> bool:
+        f = parse_filter(line)
+        if f is None:
+            return False
+        if f.exception:
+            self._allow.add(f)
+        elif f.important:
+            self._important.add(f)
+        else:
+            self._block.add(f)
+        self.filter_count += 1
+        return True
+
+    def add_list(self, text: str) -> int:
+        added = 0
+        for line in str(text or "").splitlines():
+            if self.add_filter(line):
+                added += 1
+        return added
+
+    def check(self, url: str, host: str = "", source_host: str = "",
+              resource_type: str = "other") -> Optional[NetworkFilter]:
+        """Return the rule that blocks this request, or None if it may load."""
+        url_lower = url.lower()
+        if not host:
+            host = host_from_url(url_lower)
+        type_bit = TYPE_BITS.get(resource_type, TYPE_BITS["other"])
+        third_party = bool(source_host) and base_domain(host) != base_domain(source_host)
+        tokens = set(_TOKEN_RE.findall(url_lower))
+
+        if self._important:
+            hit = self._important.find(url, url_lower, host, tokens, type_bit, source_host, third_party)
+            if hit is not None:
+                return hit
+        allow = self._allow
+        if allow.find_document(source_host) is not None:
+            return None
+        hit = self._block.find(url, url_lower, host, tokens, type_bit, source_host, third_party)
+        if hit is None:
+            return None
+        if allow and allow.find(url, url_lower, host, tokens, type_bit, source_host, third_party) is not None:
+            return None
+        return hit
+
+    def match(self, url: str, host: str = "", source_host: str = "",
+              resource_type: str = "other") -> bool:
+        return self.check(url, host, source_host, resource_type) is not None
+
+
+def extract_network_filters(text: str) -> List[str]:
+    """Supported network rules from a list body, normalized (stripped), in order."""
+    out = []
+    for line in str(text or "").splitlines():
+        line = line.strip()
+        if parse_filter(line) is not None:
+            out.append(line)
+    return out
+
+
+# ========== SNAPSHOT ==========
+#
+# Native-endian u32 words throughout, every section padded to 4 bytes:
+#   "TKADSNAP" version byte_order filter_count meta_len meta(JSON)
+#   rule_count rule_offsets[rule_count + 1] blob_len blob(UTF-8 rule text)
+#   then for block, allow, important: hosts, tokens, doc_hosts, fallback
+#   tables, each  slot_count offsets[slot_count + 1] rule_ids[...]
+# A table files a key's rule ids under crc32(key) & (slot_count - 1). Keys
+# can share a slot, so every candidate is re-checked against the host (host
+# tables) or its indexing token (token tables) when the slot is resolved.
+
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_MAGIC = b"TKADSNAP"
+_BYTE_ORDER_MARK = 0x01020304
+_BUCKET_MEMO_MAX = 32768
+
+
+def _key_hash(key: str) -> int:
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def _rule_host(f: NetworkFilter) -> str:
+    return f.pattern.rstrip("^")
+
+
+def _pack_table(words: array, buckets: dict, rule_ids: dict, slots: int = 0):
+    if not slots:
+        slots = 1
+        while slots < len(buckets) * 2:
+            slots <<= 1
+    runs = [[] for _ in range(slots)]
+    for key, bucket in buckets.items():
+        runs[_key_hash(key) & (slots - 1)].extend(rule_ids[id(f)] for f in bucket)
+    words.append(slots)
+    words.append(0)
+    total = 0
+    for run in runs:
+        total += len(run)
+        words.append(total)
+    for run in runs:
+        words.extend(run)
+
+
+def _padded(data: bytes, fill: bytes) -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def write_snapshot(engine: FilterEngine, path: str, meta: Optional[dict] = None):
+    """Save a built FilterEngine for load_snapshot(). Atomic (tmp + rename)."""
+    indexes = (engine._block, engine._allow, engine._important)
+    rules = []
+    rule_ids = {}
+    for index in indexes:
+        for buckets in (index.hosts.values(), index.tokens.values(), (index.fallback,)):
+            for bucket in buckets:
+                for f in bucket:
+                    if id(f) not in rule_ids:
+                        rule_ids[id(f)] = len(rules)
+                        rules.append(f.raw.encode("utf-8"))
+
+    meta_bytes = json.dumps(meta or {}).encode("utf-8")
+    head = array("I", [SNAPSHOT_VERSION, _BYTE_ORDER_MARK, engine.filter_count, len(meta_bytes)])
+    offsets = array("I", [len(rules), 0])
+    total = 0
+    for raw in rules:
+        total += len(raw)
+        offsets.append(total)
+    offsets.append(total)  # blob_len
+    tables = array("I")
+    for index in indexes:
+        _pack_table(tables, index.hosts, rule_ids)
+        _pack_table(tables, index.tokens, rule_ids)
+        _pack_table(tables, index.doc_hosts, rule_ids)
+        _pack_table(tables, {"": index.fallback}, rule_ids, slots=1)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_SNAPSHOT_MAGIC)
+        f.write(head.tobytes())
+        f.write(_padded(meta_bytes, b" "))
+        f.write(offsets.tobytes())
+        f.write(_padded(b"".join(rules), b"\0"))
+        f.write(tables.tobytes())
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: str) -> Optional["SnapshotEngine"]:
+    """Map a write_snapshot() file, or None if it is missing, damaged, or
+    from another SNAPSHOT_VERSION / byte order (the caller rebuilds)."""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return SnapshotEngine(mm, path)
+    except (ValueError, IndexError, TypeError):
+        pass
+    # Unmapped only here: inside the except the failed parse's views still hold mm
+    mm.close()
+    return None
+
+
+class _SnapshotRules:
+    """Rule texts of a mapped snapshot; rule i is parsed the first time it is
+    asked for. Shared by the engine and its tables and refers to neither, so
+    dropping the engine frees the mapping without waiting for the gc."""
+
+    __slots__ = ("offsets", "blob", "parsed")
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self.parsed = {}
+
+    def __call__(self, i: int) -> Optional[NetworkFilter]:
+        try:
+            return self.parsed[i]
+        except KeyError:
+            pass
+        f = parse_filter(str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8"))
+        self.parsed[i] = f
+        return f
+
+
+class _SnapshotTable:
+    """One mapped key -> rule ids table. bucket() resolves a key to its parsed
+    rules the first time it is asked for and memoizes the answer."""
+
+    __slots__ = ("mask", "offsets", "ids", "end", "rule", "key_of", "memo")
+
+    def __init__(self, words, pos: int, rule, key_of):
+        slots = words[pos]
+        if not slots or slots & (slots - 1):
+            raise ValueError("bad slot count")
+        self.mask = slots - 1
+        self.offsets = words[pos + 1:pos + 2 + slots]
+        start = pos + 2 + slots
+        self.end = start + self.offsets[slots]
+        self.ids = words[start:self.end]
+        self.rule = rule
+        self.key_of = key_of
+        self.memo = {}
+
+    def bucket(self, key: str) -> tuple:
+        hit = self.memo.get(key)
+        if hit is None:
+            slot = _key_hash(key) & self.mask
+            rules = (self.rule(i) for i in self.ids[self.offsets[slot]:self.offsets[slot + 1]])
+            # Drop rules that only share the slot, not the key
+            hit = tuple(f for f in rules if f is not None and self.key_of(f) == key)
+            if len(self.memo) >= _BUCKET_MEMO_MAX:
+                self.memo.clear()
+            self.memo[key] = hit
+        return hit
+
+    def __bool__(self):
+        return len(self.ids) > 0
+
+
+def _no_key(f: NetworkFilter) -> str:
+    return ""
+
+
+class _SnapshotIndex:
+    """_FilterIndex lookalike over mapped tables."""
+
+    __slots__ = ("hosts", "tokens", "docs", "fallback")
+
+    def __init__(self, hosts, tokens, docs, fallback):
+        # Empty tables become None so the per-request checks are plain tests
+        self.hosts = hosts or None
+        self.tokens = tokens or None
+        self.docs = docs or None
+        self.fallback = fallback or None
+
+    def find(self, url, url_lower, host, tokens, type_bit, source_host, third_party):
+        hosts = self.hosts
+        if hosts is not None:
+            probe = host
+            while probe:
+                for f in hosts.bucket(probe):
+                    if f.options_match(type_bit, source_host, third_party):
+                        return f
+                dot = probe.find(".")
+                if dot < 0:
+                    break
+                probe = probe[dot + 1:]
+        table = self.tokens
+        if table is not None:
+            for tok in tokens:
+                for f in table.bucket(tok):
+                    if f.options_match(type_bit, source_host, third_party) and f.pattern_match(url, url_lower):
+                        return f
+        if self.fallback is not None:
+            for f in self.fallback.bucket(""):
+                if f.options_match(type_bit, source_host, third_party) and f.pattern_match(url, url_lower):
+                    return f
+        return None
+
+    def __bool__(self):
+        return self.hosts is not None or self.tokens is not None or self.fallback is not None
+
+    def find_document(self, source_host):
+        if self.docs is None or not source_host:
+            return None
+        for h in _host_suffixes(source_host):
+            bucket = self.docs.bucket(h)
+            if bucket:
+                return bucket[0]
+        return None
+
+
+class SnapshotEngine(FilterEngine):
+    """Read-only FilterEngine answered from a mapped write_snapshot() file.
+
+    Nothing is deserialized up front; a rule's text is parsed the first time
+    a lookup reaches its slot, and each key's resolved bucket is memoized.
+    close() unmaps the file (Windows keeps a mapped file from being replaced
+    or deleted); otherwise the mapping goes when the engine is dropped.
+    """
+
+    def __init__(self, mm: mmap.mmap, path: str = ""):
+        if mm[:8] != _SNAPSHOT_MAGIC:
+            raise ValueError("not an adblock snapshot")
+        words = memoryview(mm).cast("I")
+        version, order, filter_count, meta_len = words[2:6]
+        if version != SNAPSHOT_VERSION or order != _BYTE_ORDER_MARK:
+            raise ValueError("snapshot version mismatch")
+        pos = 6
+        self.meta = json.loads(mm[pos * 4:pos * 4 + meta_len] or b"{}")
+        pos += (meta_len + 3) // 4
+        count = words[pos]
+        offsets = words[pos + 1:pos + 2 + count]
+        blob_len = words[pos + 2 + count]
+        pos += count + 3
+        blob = memoryview(mm)[pos * 4:pos * 4 + blob_len]
+        pos += (blob_len + 3) // 4
+        self._rules = _SnapshotRules(offsets, blob)
+        self._views = [words, offsets, blob]
+        indexes = []
+        for _ in range(3):
+            tables = []
+            for key_of in (_rule_host, _best_token, _rule_host, _no_key):
+                table = _SnapshotTable(words, pos, self._rules, key_of)
+                pos = table.end
+                tables.append(table)
+                self._views += (table.offsets, table.ids)
+            indexes.append(_SnapshotIndex(*tables))
+        if pos != len(words):
+            raise ValueError("snapshot truncated")
+        self._block, self._allow, self._important = indexes
+        self._mm = mm
+        self.path = path
+        self.filter_count = filter_count
+
+    def rule(self, i: int) -> Optional[NetworkFilter]:
+        return self._rules(i)
+
+    def close(self):
+        """Unmap the snapshot; the engine matches nothing afterwards. Only call
+        once no other thread can still be inside a lookup on it."""
+        if self._mm is None:
+            return
+        self._block, self._allow, self._important = _FilterIndex(), _FilterIndex(), _FilterIndex()
+        self._rules.parsed.clear()
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mm.close()
+        self._mm = None
+
+    def add_filter(self, line: str) -> bool:
+        raise TypeError("snapshot engines are read-only; rebuild with FilterEngine")
+
+
+# ========== LIST UPDATES ==========
+
+_USER_AGENT = "Tankoban-Max/Adblock"
+_FETCH_WORKERS = 4
+
+
+def fetch_list(url: str, source: Optional[dict] = None, timeout: float = 30) -> dict:
+    """Conditional GET of one list.
+
+    source is the entry from the previous update; its "etag"/"lastModified"
+    become If-None-Match/If-Modified-Since. Returns {"url", "status", "text",
+    "etag", "lastModified", "error"} with status 200, 304, or 0 on failure.
+    """
+    import gzip
+    import urllib.error
+    import urllib.request
+
+    source = source or {}
+    headers = {"User-Agent": _USER_AGENT, "Accept-Encoding": "gzip"}
+    if source.get("etag"):
+        headers["If-None-Match"] = source["etag"]
+    if source.get("lastModified"):
+        headers["If-Modified-Since"] = source["lastModified"]
+    out = {"url": url, "status": 0, "text": "", "etag": "", "lastModified": "", "error": ""}
+    try:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            body = resp.read()
+            if (resp.headers.get("Content-Encoding") or "").lower() == "gzip":
+                body = gzip.decompress(body)
+            out["status"] = 200
+            out["text"] = body.decode("utf-8", errors="replace")
+            out["etag"] = resp.headers.get("ETag") or ""
+            out["lastModified"] = resp.headers.get("Last-Modified") or ""
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            out["status"] = 304
+            out["etag"] = e.headers.get("ETag") or source.get("etag", "")
+            out["lastModified"] = e.headers.get("Last-Modified") or source.get("lastModified", "")
+        else:
+            out["error"] = f"HTTP {e.code}"
+    except Exception as e:
+        out["error"] = str(e) or type(e).__name__
+    return out
+
+
+@contextmanager
+def worker_pool(max_workers: int = 2):
+    """Process pool for parsing and compiling, or None where child processes
+    can't be used (frozen builds); run_in_pool() then runs the work inline."""
+    pool = None
+    if not getattr(sys, "frozen", False):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            # spawn: forking a process that runs Qt/Chromium threads is unsafe
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        except (OSError, ValueError, NotImplementedError):
+            pool = None
+    try:
+        yield pool
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_in_pool(pool, fn, *args):
+    """fn(*args) in pool, falling back to this thread if the pool is missing or broken."""
+    if pool is not None:
+        try:
+            return pool.submit(fn, *args).result()
+        except (OSError, RuntimeError):  # RuntimeError covers BrokenProcessPool
+            pass
+    return fn(*args)
+
+
+def update_lists(urls: Iterable[str], sources: Optional[list] = None,
+                 timeout: float = 30, pool=None) -> tuple:
+    """Refresh the lists at urls against the entries of the previous update.
+
+    Fetches run concurrently and conditionally; only bodies that came back
+    200 are parsed (in pool). A list answering 304, or failing, keeps its
+    previous filters. Returns (entries, report): entries holds one
+    {"url", "etag", "lastModified", "fetchedAt", "filters"} per list that has
+    filters, in urls order; report counts "fetched", "notModified" and
+    "failed", lists "errors", and sets "changed" when the combined filters
+    differ from sources.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    previous = {}
+    for entry in sources or []:
+        if isinstance(entry, dict) and entry.get("url"):
+            previous[entry["url"]] = entry
+    targets = []
+    for url in urls:
+        url = str(url or "").strip()
+        if url.startswith(("http://", "https://")) and url not in targets:
+            targets.append(url)
+
+    results = []
+    if targets:
+        with ThreadPoolExecutor(max_workers=min(_FETCH_WORKERS, len(targets)), thread_name_prefix="adblock-fetch") as ex:
+            results = list(ex.map(lambda u: fetch_list(u, previous.get(u), timeout), targets))
+
+    changed_bodies = [r["text"] for r in results if r["status"] == 200]
+    parsed = iter(run_in_pool(pool, extract_network_filters_many, changed_bodies) if changed_bodies else ())
+
+    now = int(time.time() * 1000)
+    entries = []
+    report = {"fetched": 0, "notModified": 0, "failed": 0, "errors": {}, "changed": False}
+    for r in results:
+        old = previous.get(r["url"])
+        if r["status"] == 200:
+            report["fetched"] += 1
+            entry = {"url": r["url"], "etag": r["etag"], "lastModified": r["lastModified"],
+                     "fetchedAt": now, "filters": next(parsed)}
+        elif r["status"] == 304 and old is not None:
+            report["notModified"] += 1
+            entry = dict(old, etag=r["etag"], lastModified=r["lastModified"])
+        else:
+            report["failed"] += 1
+            report["errors"][r["url"]] = r["error"] or "not modified, but nothing cached"
+            entry = old
+        if entry is not None and entry.get("filters"):
+            entries.append(entry)
+    report["changed"] = combine_filters(entries) != combine_filters(previous.values())
+    return entries, report
+
+
+def extract_network_filters_many(texts: List[str]) -> List[List[str]]:
+    """extract_network_filters() over several bodies in one worker round trip."""
+    return [extract_network_filters(t) for t in texts]
+
+
+def combine_filters(entries: Iterable[dict]) -> List[str]:
+    """Filters of every entry, de-duplicated, first occurrence wins."""
+    combined = {}
+    for entry in entries:
+        for line in entry.get("filters") or ():
+            combined[line] = None
+    return list(combined)
+
+
+def compile_snapshot(filters: List[str], path: str, meta: Optional[dict] = None) -> int:
+    """Build an engine from filters and save it to path; returns the rule count."""
+    engine = FilterEngine.from_lines(filters)
+    write_snapshot(engine, path, meta)
+    return engine.filter_count
+
+
+# ========== BENCHMARK ==========
+
+def _load_request_log(path: str):
+    """Recorded requests: JSON lines {"url", "sourceUrl"|"firstParty", "type"},
+    or tab-separated url/source/type, or bare URLs."""
+    reqs = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    o = json.loads(line)
+                except ValueError:
+                    continue
+                url = str(o.get("url", "") or "")
+                src = str(o.get("sourceUrl", "") or o.get("firstParty", "") or o.get("frameUrl", "") or "")
+                rtype = str(o.get("type", "") or o.get("cpt", "") or "other")
+            else:
+                cols = line.split("\t")
+                url = cols[0]
+                src = cols[1] if len(cols) > 1 else ""
+                rtype = cols[2] if len(cols) > 2 else "other"
+            if url.startswith(("http://", "https://", "ws://", "wss://")):
+                reqs.append((url, host_from_url(url), host_from_url(src), _TYPE_ALIASES.get(rtype, rtype)))
+    return reqs
+
+
+def _replay(engine, reqs, rounds):
+    blocked = 0
+    best = None
+    for _ in range(max(1, rounds)):
+        blocked = 0
+        t0 = time.perf_counter()
+        for url, host, src, rtype in reqs:
+            if engine.match(url, host, src, rtype):
+                blocked += 1
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return blocked, best
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    p = argparse.ArgumentParser(description="Replay a recorded request log against filter lists.")
+    p.add_argument("--list", dest="lists", action="append", required=True, help="filter list file (repeatable)")
+    p.add_argument("--log", dest="log", required=True, help="request log (JSON lines, TSV or bare URLs)")
+    p.add_argument("--rounds", type=int, default=3)
+    p.add_argument("--snapshot", help="also write a snapshot here and replay against the mapped copy")
+    args = p.parse_args(argv)
+
+    t0 = time.perf_counter()
+    lines = []
+    for path in args.lists:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines.extend(f.read().splitlines())
+    engine = FilterEngine.from_lines(lines)
+    build_s = time.perf_counter() - t0
+
+    reqs = _load_request_log(args.log)
+    if not reqs:
+        print("no requests in log")
+        return 1
+
+    blocked, best = _replay(engine, reqs, args.rounds)
+    print(f"filters:   {engine.filter_count} (from {len(lines)} lines, built in {build_s * 1000:.0f} ms)")
+    print(f"requests:  {len(reqs)}, blocked {blocked} ({blocked * 100.0 / len(reqs):.1f}%)")
+    print(f"matching:  {len(reqs) / best:,.0f} req/s, {best * 1e6 / len(reqs):.2f} us/req (best of {args.rounds})")
+
+    if args.snapshot:
+        write_snapshot(engine, args.snapshot)
+        t0 = time.perf_counter()
+        mapped = load_snapshot(args.snapshot)
+        load_s = time.perf_counter() - t0
+        if mapped is None:
+            print("snapshot:  failed to load")
+            return 1
+        snap_blocked, cold = _replay(mapped, reqs, 1)
+        snap_blocked, best = _replay(mapped, reqs, args.rounds)
+        print(f"snapshot:  {os.path.getsize(args.snapshot) / 1024:,.0f} KB, mapped in {load_s * 1000:.2f} ms, "
+              f"blocked {snap_blocked}{'' if snap_blocked == blocked else ' (MISMATCH)'}")
+        print(f"matching:  {len(reqs) / best:,.0f} req/s warm, {cold * 1e6 / len(reqs):.2f} us/req first pass")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
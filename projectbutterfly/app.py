@@ -17,7 +17,7 @@ Handles:
 Does NOT yet handle:
   - QWebChannel bridge (see bridge.py — Phase 1 next step)
   - Domain modules (see domains/ — Phase 2)
-  - Web browser session/permissions/adblock (Phase 3)
+  - Web browser session (Phase 3)
 """
 
 import argparse
@@ -34,6 +34,7 @@ from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile, QWebEngineSettings
 
 import storage
+import library_scan
 import bridge as bridge_module
 
 # ---------------------------------------------------------------------------
@@ -272,6 +273,12 @@ class TankobanWindow(QMainWindow):
         # --- QWebChannel bridge (replaces Electron preload + ipcMain) ---
         self._bridge = bridge_module.setup_bridge(self._web_view, self)
 
+        # Feature permission requests resolve against the compiled rule table
+        self._bridge.webPermissions.attach_page(self._web_page)
+
+        # Ad/tracker requests are dropped at the network layer, before fetch
+        self._bridge.webAdblock.install_interceptor(self._profile)
+
         # --- MpvRenderHost placeholder (layer 1) ---
         # Will be added in Phase 1 when player.py integrates the mpv widget
         # from player_qt/run_player.py. For now, just the web view.
@@ -297,6 +304,8 @@ class TankobanWindow(QMainWindow):
         if ok:
             self.show()
             self.showMaximized()
+            # Unfinished direct downloads resume once the renderer can answer pickers
+            self._bridge.webSources.start_downloads()
         else:
             print(f"[butterfly] Failed to load renderer: {INDEX_HTML}")
             self.show()
@@ -347,6 +356,9 @@ class TankobanWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Flush all pending writes before quitting."""
+        self._bridge.webSources.shutdown_downloads()
+        self._bridge.video.shutdown_workers()
+        library_scan.shutdown()
         storage.flush_all_writes()
         # TODO Phase 3: honor web privacy clear-on-exit settings
         super().closeEvent(event)
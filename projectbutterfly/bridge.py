@@ -23,13 +23,27 @@ import json
 import os
 import subprocess
 import sys
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any
 
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal, Slot
 from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtWebEngineCore import QWebEngineUrlRequestInfo, QWebEngineUrlRequestInterceptor
 from PySide6.QtWebEngineWidgets import QWebEngineView
 
+import adblock
+import downloads
+import library_scan
+import library_watch
+import media_probe
+import opds_feed
+import opds_http
+import opds_index
 import storage
+import video_index
+import video_posters
 
 
 # ---------------------------------------------------------------------------
@@ -109,6 +123,115 @@ class JsonCrudMixin:
         return _ok()
 
 
+class LibraryScanMixin:
+    """
+    Cached index + background scans for one library domain (library_scan.py),
+    kept current between scans by a LibraryWatcher on every folder the last
+    scan listed. Subclass must set _scan_name, _scan_build, _index_file, _updated_signal and
+    _progress_keys, define a queued ``_scanEvent = Signal(object)``, call
+    _scan_init() from __init__, and implement _read_config(), _load_index(raw),
+    _scan_job(state) -> (job, key, total) and _snapshot(state=None).
+    """
+
+    _scan_name: str = ""
+    _scan_build = None
+    _index_file: str = ""
+    _updated_signal: str = ""
+    _progress_keys = ("foldersDone", "foldersTotal", "currentFolder")
+    _scan_status_extra: dict = {}
+
+    def _scan_init(self):
+        self._idx = None
+        self._scanner = None
+        self._watcher = None
+        self._scanEvent.connect(self._on_scan_event)
+
+    def _ensure_scanner(self):
+        if self._scanner is None:
+            self._scanner = library_scan.ScanRunner(
+                self._scan_name, self._scan_build, storage.data_path(self._index_file),
+                post=self._scanEvent.emit,
+                status=lambda payload: self.scanStatus.emit(json.dumps(payload)),
+                done=self._on_scan_finished,
+                failed=self._on_scan_failed,
+                progress_keys=self._progress_keys, extra=self._scan_status_extra,
+                begin=self._on_scan_begin,
+            )
+        return self._scanner
+
+    def _ensure_watcher(self):
+        if self._watcher is None:
+            self._watcher = library_watch.LibraryWatcher(self._on_watch_flush, parent=self)
+        return self._watcher
+
+    def _on_scan_begin(self, quiet: bool) -> frozenset:
+        # Any scan covers the pending changes; only a watcher refresh may skip the stats
+        trusted = self._ensure_watcher().begin_scan()
+        return trusted if quiet else frozenset()
+
+    def _on_watch_flush(self, dirty) -> bool:
+        sc = self._ensure_scanner()
+        if sc.scanning:
+            return False
+        self._ensure_idx()
+        job, key, total = self._scan_job(self._read_config())
+        sc.start(job, key, total=total, force=True, quiet=True)
+        return True
+
+    def _on_scan_finished(self, idx, meta):
+        w = self._ensure_watcher()
+        w.set_dirs(meta.get("dirs") or ())
+        w.recheck(meta.get("unsettled") or ())
+        # A watcher refresh that found nothing new stays silent (the scan thread
+        # compared the serialized index; _load_index has side effects)
+        if not (self._scanner.quiet and meta.get("changed") is False):
+            self._on_scan_done(idx, meta)
+        w.kick()
+
+    def _on_scan_failed(self, _msg):
+        self._emit_updated()
+        self._ensure_watcher().kick()
+
+    def _on_scan_event(self, ev):
+        self._ensure_scanner().handle(ev)
+
+    def _ensure_idx(self) -> dict:
+        if self._idx is None:
+            self._idx = self._load_index(storage.read_json(storage.data_path(self._index_file), None))
+        return self._idx
+
+    def _start_scan(self, state: dict, force: bool = False, deep: bool = False) -> bool:
+        self._ensure_idx()
+        job, key, total = self._scan_job(state)
+        return self._ensure_scanner().start(job, key, total=total, force=force, deep=deep)
+
+    @staticmethod
+    def _deep_scan(opts) -> bool:
+        """scan({"deep": true}): re-stat every media file (files rewritten in place)."""
+        try:
+            o = json.loads(opts) if opts else {}
+        except ValueError:
+            return False
+        return isinstance(o, dict) and bool(o.get("deep"))
+
+    def _on_scan_done(self, idx, meta):
+        self._idx = self._load_index(idx)
+        self._emit_updated()
+
+    def _scan_state(self) -> dict:
+        sc = self._ensure_scanner()
+        return {"scanning": sc.scanning, "lastScanAt": sc.last_scan_at, "error": sc.error}
+
+    def _emit_updated(self):
+        getattr(self, self._updated_signal).emit(json.dumps(self._snapshot()))
+
+    def _cancel_scan(self) -> dict:
+        if not self._ensure_scanner().cancel():
+            return {"ok": False}
+        self._emit_updated()
+        return _ok()
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # NAMESPACE QOBJECTS
 # One class per preload namespace. @Slot methods match the JS API surface.
@@ -604,26 +727,117 @@ class StubNamespace(QObject):
     pass
 
 
-class LibraryBridge(StubNamespace):
-    """Stub: library scan/state. Needs: main/domains/library port."""
+_LIBRARY_CONFIG_LISTS = ("seriesFolders", "rootFolders", "ignoredSeries", "scanIgnore",
+                         "videoFolders", "videoShowFolders", "videoHiddenShowIds", "videoFiles")
+
+
+def _read_library_config() -> dict:
+    """library_state.json, shared by the comic and video domains."""
+    state = storage.read_json(storage.data_path("library_state.json"), {}) or {}
+    if "folders" in state and "seriesFolders" not in state:
+        state["seriesFolders"] = state["folders"]
+    state.pop("folders", None)
+    for k in _LIBRARY_CONFIG_LISTS:
+        if not isinstance(state.get(k), list):
+            state[k] = []
+    return state
+
+
+def _write_library_config(state: dict):
+    storage.write_json_sync(storage.data_path("library_state.json"),
+                            {k: state.get(k) or [] for k in _LIBRARY_CONFIG_LISTS})
+
+
+def _uniq(items) -> list:
+    return list(dict.fromkeys(x for x in items if x))
+
+
+class LibraryBridge(QObject, LibraryScanMixin):
+    """Comic library: config, cached index and background scans (library_scan.py).
+    Folder pickers and series management are still stubs."""
     libraryUpdated = Signal(str)
     scanStatus = Signal(str)
+    _scanEvent = Signal(object)  # scan thread -> GUI thread (queued)
+
+    _scan_name = "library"
+    _scan_build = staticmethod(library_scan.build_comic_index)
+    _index_file = "library_index.json"
+    _updated_signal = "libraryUpdated"
+    _progress_keys = ("seriesDone", "seriesTotal", "currentSeries")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._auto_series = []
+        self._scan_init()
+
+    def _read_config(self):
+        return _read_library_config()
+
+    def _load_index(self, raw):
+        if isinstance(raw, dict) and isinstance(raw.get("series"), list) and isinstance(raw.get("books"), list):
+            return {"series": raw["series"], "books": raw["books"]}
+        return {"series": [], "books": []}
+
+    def _effective_series(self, state):
+        ignored = set(state["ignoredSeries"])
+        auto = [f for f in self._auto_series if f not in ignored]
+        return auto, _uniq(state["seriesFolders"] + auto)
+
+    def _scan_job(self, state):
+        job = {
+            "seriesFolders": state["seriesFolders"],
+            "rootFolders": state["rootFolders"],
+            "ignoredSeries": state["ignoredSeries"],
+            "rules": library_scan.IgnoreRules(substrings=library_scan.sanitize_ignore(state["scanIgnore"])),
+        }
+        key = json.dumps([state[k] for k in ("seriesFolders", "rootFolders", "ignoredSeries", "scanIgnore")])
+        return job, key, len(self._effective_series(state)[1])
+
+    def _on_scan_done(self, idx, meta):
+        # The scan lists the roots, so it owns the auto-discovered series folders
+        self._auto_series = list(meta.get("autoSeriesFolders") or [])
+        super()._on_scan_done(idx, meta)
+
+    def _snapshot(self, state=None):
+        s = state or self._read_config()
+        idx = self._ensure_idx()
+        auto, effective = self._effective_series(s)
+        return {
+            "seriesFolders": s["seriesFolders"],
+            "rootFolders": s["rootFolders"],
+            "ignoredSeries": s["ignoredSeries"],
+            "scanIgnore": s["scanIgnore"],
+            "autoSeriesFolders": auto,
+            "effectiveSeriesFolders": effective,
+            "series": idx["series"],
+            "books": idx["books"],
+            **self._scan_state(),
+        }
 
     @Slot(result=str)
     def getState(self):
-        return json.dumps(_err("not_implemented"))
+        # Cached index right away; one background refresh per run (same config = no rescan)
+        state = self._read_config()
+        self._start_scan(state)
+        return json.dumps(self._snapshot(state))
 
     @Slot(str, result=str)
     def scan(self, opts):
-        return json.dumps(_stub())
+        self._start_scan(self._read_config(), force=True, deep=self._deep_scan(opts))
+        return json.dumps(_ok())
 
     @Slot(result=str)
     def cancelScan(self):
-        return json.dumps(_stub())
+        return json.dumps(self._cancel_scan())
 
     @Slot(str, result=str)
     def setScanIgnore(self, patterns):
-        return json.dumps(_stub())
+        state = self._read_config()
+        state["scanIgnore"] = library_scan.sanitize_ignore(json.loads(patterns) if patterns else [])
+        _write_library_config(state)
+        self._start_scan(state, force=True)
+        self._emit_updated()
+        return json.dumps(_ok({"state": self._snapshot(state)}))
 
     @Slot(result=str)
     def addRootFolder(self):
@@ -658,26 +872,71 @@ class LibraryBridge(StubNamespace):
         return json.dumps(_stub())
 
 
-class BooksBridge(StubNamespace):
-    """Stub: books library scan/state."""
+class BooksBridge(QObject, LibraryScanMixin):
+    """Books library: config, cached index and background scans (library_scan.py).
+    Folder/file pickers are still stubs."""
     booksUpdated = Signal(str)
     scanStatus = Signal(str)
+    _scanEvent = Signal(object)  # scan thread -> GUI thread (queued)
+
+    _CONFIG_FILE = "books_library_state.json"
+    _scan_name = "books"
+    _scan_build = staticmethod(library_scan.build_books_index)
+    _index_file = "books_library_index.json"
+    _updated_signal = "booksUpdated"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._needs_folder_backfill = False
+        self._scan_init()
+
+    def _read_config(self):
+        raw = storage.read_json(storage.data_path(self._CONFIG_FILE), {}) or {}
+        state = {k: library_scan.uniq_paths(raw.get(k)) for k in ("bookRootFolders", "bookSeriesFolders", "bookSingleFiles")}
+        state["scanIgnore"] = library_scan.sanitize_ignore(raw.get("scanIgnore"))
+        return state
+
+    def _load_index(self, raw):
+        if isinstance(raw, dict) and isinstance(raw.get("series"), list) and isinstance(raw.get("books"), list):
+            # Indexes from before the folder tree existed get rebuilt on first getState
+            self._needs_folder_backfill = not isinstance(raw.get("folders"), list)
+            return {"series": raw["series"], "books": raw["books"], "folders": raw.get("folders") or []}
+        return {"series": [], "books": [], "folders": []}
+
+    def _scan_job(self, state):
+        job = dict(state, rules=library_scan.IgnoreRules(substrings=state["scanIgnore"]))
+        total = len(state["bookRootFolders"]) + len(state["bookSeriesFolders"])
+        return job, json.dumps(state, sort_keys=True), total
+
+    def _snapshot(self, state=None):
+        s = state or self._read_config()
+        idx = self._ensure_idx()
+        return dict(s, series=idx["series"], books=idx["books"], folders=idx["folders"], **self._scan_state())
 
     @Slot(result=str)
     def getState(self):
-        return json.dumps(_stub())
+        state = self._read_config()
+        self._ensure_idx()
+        self._start_scan(state, force=self._needs_folder_backfill)
+        return json.dumps(self._snapshot(state))
 
     @Slot(str, result=str)
     def scan(self, opts):
-        return json.dumps(_stub())
+        self._start_scan(self._read_config(), force=True, deep=self._deep_scan(opts))
+        return json.dumps(_ok())
 
     @Slot(result=str)
     def cancelScan(self):
-        return json.dumps(_stub())
+        return json.dumps(self._cancel_scan())
 
     @Slot(str, result=str)
     def setScanIgnore(self, p):
-        return json.dumps(_stub())
+        state = self._read_config()
+        state["scanIgnore"] = library_scan.sanitize_ignore(json.loads(p) if p else [])
+        storage.write_json_sync(storage.data_path(self._CONFIG_FILE), state)
+        self._start_scan(state, force=True)
+        self._emit_updated()
+        return json.dumps(_ok({"state": self._snapshot(state)}))
 
     @Slot(result=str)
     def addRootFolder(self):
@@ -745,8 +1004,13 @@ class BooksTtsEdgeBridge(StubNamespace):
 
 
 class BooksOpdsBridge(QObject):
-    """OPDS feeds storage + HTTP fetch proxy for Books mode."""
+    """OPDS feeds storage + catalog fetch/parse for Books mode (opds_http.py, opds_feed.py),
+    plus the offline search index built by the background crawler (opds_index.py)."""
     feedsUpdated = Signal(str)
+    catalogFetched = Signal(str)
+    crawlProgress = Signal(str)
+    _fetchDone = Signal(object)  # fetch worker -> GUI thread (queued)
+    _crawlEvent = Signal(object)  # crawl thread -> GUI thread (queued)
 
     _CONFIG_FILE = "books_opds_feeds.json"
     _MAX_FEEDS = 100
@@ -754,6 +1018,18 @@ class BooksOpdsBridge(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._cache = None
+        self._client = None
+        self._executor = None
+        self._fetch_seq = 0
+        self._pages = opds_feed.PageCache()
+        self._cursors = OrderedDict()  # requested url -> FeedCursor
+        self._fetchDone.connect(self._on_fetch_done)
+        self._index = None
+        self._crawler = None
+        self._crawl_thread = None
+        self._crawl_feeds = {}  # feedId -> latest progress of the running crawl
+        self._crawl_emit_at = 0.0
+        self._crawlEvent.connect(self._on_crawl_event)
 
     def _ensure_cache(self):
         if self._cache is not None:
@@ -833,6 +1109,8 @@ class BooksOpdsBridge(QObject):
             next_url = self._norm_url(payload["url"])
             if not next_url:
                 return json.dumps(_err("Invalid feed URL"))
+            if next_url != found.get("url"):
+                self._drop_from_index(fid)
             found["url"] = next_url
         if payload.get("name") is not None:
             found["name"] = str(payload["name"] or "").strip()
@@ -857,54 +1135,554 @@ class BooksOpdsBridge(QObject):
         import time
         c["updatedAt"] = int(time.time() * 1000)
         self._write()
+        self._drop_from_index(fid)
         self._emit_updated()
         return json.dumps(_ok())
 
+    # --- Catalog fetch ---
+
+    _ACCEPT = ", ".join([
+        "application/opds+json", "application/opds-publication+json",
+        "application/atom+xml", "application/xml", "text/xml",
+        "application/json", "text/html", "*/*",
+    ])
+    _CACHE_DIR = "opds_http_cache"
+    _FETCH_WORKERS = 4
+    _FETCH_TIMEOUT_S = 30
+    _CURSOR_MAX = 16
+    _WINDOW_DEFAULT = 200
+    _WINDOW_MAX = 1000
+
+    def _ensure_client(self):
+        if self._client is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._client = opds_http.OpdsHttpClient(storage.data_path(self._CACHE_DIR))
+            self._executor = ThreadPoolExecutor(max_workers=self._FETCH_WORKERS, thread_name_prefix="opds-fetch")
+        return self._client
+
+    @staticmethod
+    def _catalog_result(res):
+        return dict(res, ok=200 <= res["status"] < 300)
+
     @Slot(str, result=str)
     def fetchCatalog(self, payload_json):
+        """Fresh cache hits answer inline; anything needing the network returns
+        {pending, requestId} and completes through catalogFetched.
+
+        With {parse: true} the reply carries a parsed `page` window
+        (offset/limit over the feed and its next pages) instead of the raw body.
+        """
         payload = json.loads(payload_json) if payload_json else {}
         url = self._norm_url(payload.get("url"))
         if not url:
             return json.dumps(_err("Invalid URL"))
-        accept = ", ".join([
-            "application/opds+json", "application/opds-publication+json",
-            "application/atom+xml", "application/xml", "text/xml",
-            "application/json", "text/html", "*/*",
-        ])
+        client = self._ensure_client()
+        refresh = bool(payload.get("refresh", False))
+        if payload.get("parse"):
+            return self._fetch_page_window(payload, url, refresh)
+        if not refresh:
+            hit = client.cached(url)
+            if hit is not None:
+                return json.dumps(self._catalog_result(hit))
+        rid = self._next_request_id()
+        self._executor.submit(self._fetch_worker, rid, url, refresh)
+        return json.dumps(_ok({"pending": True, "requestId": rid}))
+
+    def _next_request_id(self):
+        import time
+        self._fetch_seq += 1
+        return f"opds_{int(time.time() * 1000)}_{self._fetch_seq}"
+
+    def _load_page(self, url, refresh):
+        """Fetch + parse one catalog page (worker thread)."""
+        res = self._client.fetch(url, self._ACCEPT, self._FETCH_TIMEOUT_S, refresh, text=False)
+        if not 200 <= res["status"] < 300:
+            raise ValueError(f"HTTP {res['status']}")
+        return self._pages.parse(res["url"], res["body"], res["contentType"])
+
+    def _fetch_page_window(self, payload, url, refresh):
         try:
-            import urllib.request
-            req = urllib.request.Request(url, headers={
-                "Accept": accept,
-                "User-Agent": "Tankoban-Max/OPDS (+Butterfly)",
-            })
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                body = resp.read().decode("utf-8", errors="replace")
-                ct = resp.headers.get("Content-Type", "")
-                etag = resp.headers.get("ETag", "")
-                lm = resp.headers.get("Last-Modified", "")
-                return json.dumps({
-                    "ok": True, "status": resp.status, "statusText": resp.reason or "",
-                    "url": resp.url or url, "contentType": ct, "body": body,
-                    "headers": {"etag": etag, "lastModified": lm},
-                })
+            offset = max(0, int(payload.get("offset", 0) or 0))
+            limit = min(self._WINDOW_MAX, max(1, int(payload.get("limit", 0) or self._WINDOW_DEFAULT)))
+        except (TypeError, ValueError):
+            return json.dumps(_err("Invalid offset/limit"))
+        cursor = None if refresh else self._cursors.get(url)
+        if cursor is not None:
+            self._cursors.move_to_end(url)
+            # Already loaded far enough: answer inline unless a worker is mid-fetch on it
+            if cursor.covers(offset + limit) and cursor.lock.acquire(blocking=False):
+                try:
+                    return json.dumps(self._window_result(cursor, offset, limit))
+                finally:
+                    cursor.lock.release()
+        else:
+            cursor = opds_feed.FeedCursor(opds_feed.iter_pages(lambda u: self._load_page(u, refresh), url))
+            self._cursors[url] = cursor
+            while len(self._cursors) > self._CURSOR_MAX:
+                self._cursors.popitem(last=False)
+        rid = self._next_request_id()
+        self._executor.submit(self._window_worker, rid, url, cursor, offset, limit)
+        return json.dumps(_ok({"pending": True, "requestId": rid}))
+
+    @staticmethod
+    def _window_result(cursor, offset, limit):
+        page = cursor.window(offset, limit)
+        return {"ok": True, "status": 200, "url": page["url"], "page": page}
+
+    def _window_worker(self, rid, url, cursor, offset, limit):
+        try:
+            res = self._window_result(cursor, offset, limit)
         except Exception as e:
-            return json.dumps(_err(str(e)))
+            res = _err(str(e) or type(e).__name__)
+            res["_drop"] = (url, cursor)  # nothing loaded; let the next call retry
+        res["requestId"] = rid
+        self._fetchDone.emit(res)
+
+    def _fetch_worker(self, rid, url, refresh):
+        try:
+            res = self._catalog_result(self._client.fetch(url, self._ACCEPT, self._FETCH_TIMEOUT_S, refresh))
+        except Exception as e:
+            res = _err(str(e) or type(e).__name__)
+        res["requestId"] = rid
+        self._fetchDone.emit(res)
+
+    def _on_fetch_done(self, res):
+        drop = res.pop("_drop", None)
+        if drop and self._cursors.get(drop[0]) is drop[1]:
+            del self._cursors[drop[0]]
+        self.catalogFetched.emit(json.dumps(res))
+
+    # --- Offline search index ---
+
+    _INDEX_FILE = "opds_index.sqlite"
+    _SEARCH_LIMIT_MAX = 500
+    _CRAWL_PROGRESS_INTERVAL_S = 0.5
+
+    def _ensure_index(self):
+        if self._index is None:
+            self._index = opds_index.OpdsIndex(storage.data_path(self._INDEX_FILE))
+        return self._index
+
+    def _drop_from_index(self, feed_id):
+        # A running crawl may still write this feed; _on_crawl_event sweeps that up
+        if self._index is not None or os.path.exists(storage.data_path(self._INDEX_FILE)):
+            try:
+                self._ensure_index().remove_feed(feed_id)
+            except Exception:
+                pass
+
+    def _crawl_running(self):
+        return self._crawl_thread is not None and self._crawl_thread.is_alive()
+
+    @Slot(str, result=str)
+    def crawlFeeds(self, payload_json):
+        """Index feeds in the background ({feedIds?, full?}); progress and the
+        final report arrive through crawlProgress."""
+        payload = json.loads(payload_json) if payload_json else {}
+        if self._crawl_running():
+            return json.dumps(_ok({"pending": True, "running": True}))
+        wanted = payload.get("feedIds")
+        feeds = [{"id": str(f.get("id", "")), "url": str(f.get("url", ""))}
+                 for f in self._ensure_cache()["feeds"]
+                 if f.get("url") and (not isinstance(wanted, list) or f.get("id") in wanted)]
+        if not feeds:
+            return json.dumps(_err("No feeds to index"))
+        import threading
+        self._crawler = opds_index.Crawler(
+            storage.data_path(self._INDEX_FILE),
+            progress=lambda p: self._crawlEvent.emit({"progress": p}),
+        )
+        self._crawl_feeds = {f["id"]: {"feedId": f["id"], "pages": 0, "entries": 0, "done": False} for f in feeds}
+        self._crawl_thread = threading.Thread(
+            target=self._run_crawl, args=(self._crawler, feeds, bool(payload.get("full", False))),
+            name="opds-crawl", daemon=True,
+        )
+        self._crawl_thread.start()
+        return json.dumps(_ok({"pending": True, "running": True}))
+
+    def _run_crawl(self, crawler, feeds, full):
+        try:
+            report = crawler.run(feeds, full)
+            result = {"ok": True, "report": report}
+        except Exception as e:
+            result = _err(str(e) or type(e).__name__)
+        self._crawlEvent.emit({"done": result})
+
+    def _on_crawl_event(self, ev):
+        import time
+        if "progress" in ev:
+            p = ev["progress"]
+            self._crawl_feeds[p["feedId"]] = p
+            now = time.monotonic()
+            # Pages can land many times a second; the renderer only needs a ticker
+            if not p["done"] and now - self._crawl_emit_at < self._CRAWL_PROGRESS_INTERVAL_S:
+                return
+            self._crawl_emit_at = now
+            self.crawlProgress.emit(json.dumps({"running": True, "feeds": list(self._crawl_feeds.values())}))
+            return
+        result = ev["done"]
+        self._crawler = None
+        self._crawl_thread = None
+        try:
+            self._ensure_index().retain({f.get("id"): f.get("url") for f in self._ensure_cache()["feeds"]})
+        except Exception:
+            pass
+        report = result.get("report") or {}
+        self.crawlProgress.emit(json.dumps({
+            "running": False, "ok": result.get("ok", False), "error": result.get("error", ""),
+            "cancelled": report.get("cancelled", False),
+            "feeds": report.get("feeds", list(self._crawl_feeds.values())),
+        }))
+
+    @Slot(result=str)
+    def cancelCrawl(self):
+        if not self._crawl_running():
+            return json.dumps(_ok({"running": False}))
+        self._crawler.cancel()
+        return json.dumps(_ok({"running": True}))
+
+    @Slot(result=str)
+    def getIndexStatus(self):
+        try:
+            feeds = self._ensure_index().feed_stats()
+        except Exception as e:
+            return json.dumps(_err(str(e) or type(e).__name__))
+        return json.dumps(_ok({
+            "running": self._crawl_running(), "feeds": feeds,
+            "entries": sum(f["entries"] for f in feeds),
+            "progress": list(self._crawl_feeds.values()) if self._crawl_running() else [],
+        }))
+
+    @Slot(str, result=str)
+    def searchIndex(self, payload_json):
+        """Local full-text search over every indexed feed: {query, limit?, offset?, feedId?}."""
+        payload = json.loads(payload_json) if payload_json else {}
+        query = str(payload.get("query", "") or "").strip()
+        try:
+            limit = min(self._SEARCH_LIMIT_MAX, max(1, int(payload.get("limit", 0) or 50)))
+            offset = max(0, int(payload.get("offset", 0) or 0))
+        except (TypeError, ValueError):
+            return json.dumps(_err("Invalid offset/limit"))
+        try:
+            index = self._ensure_index()
+            res = index.search(query, limit, offset, str(payload.get("feedId", "") or ""))
+            indexed = len(index.feed_stats())
+        except Exception as e:
+            return json.dumps(_err(str(e) or type(e).__name__))
+        names = {f.get("id"): f.get("name") or f.get("url", "") for f in self._ensure_cache()["feeds"]}
+        for item in res["items"]:
+            item["feedName"] = names.get(item["feedId"], "")
+        return json.dumps(_ok(dict(res, query=query, indexedFeeds=indexed, running=self._crawl_running())))
 
 
-class VideoBridge(StubNamespace):
-    """Stub: video library scan/state."""
+class VideoBridge(QObject, LibraryScanMixin):
+    """Video library: cached index, state snapshots, background scans
+    (library_scan.py) and episode metadata (media_probe.py). Folder
+    management, posters and episode lookups are still stubs."""
     videoUpdated = Signal(str)
     scanStatus = Signal(str)
     shellPlay = Signal(str)
     folderThumbnailUpdated = Signal(str)
+    mediaInfoReady = Signal(str)
+    showThumbnailGenerated = Signal(str)
+    _scanEvent = Signal(object)  # scan thread -> GUI thread (queued)
+    _mediaInfoDone = Signal(object)  # probe worker -> GUI thread (queued)
+    _posterDone = Signal(object)  # poster worker -> GUI thread (queued)
+
+    _scan_name = "video"
+    _scan_build = staticmethod(library_scan.build_video_index)
+    _index_file = "video_index.json"
+    _updated_signal = "videoUpdated"
+    _scan_status_extra = {"phase": "scan"}
+
+    _ADDED_FILES_ROOT_ID = "__added_files__"
+    _ADDED_FILES_SHOW_ID = "__added_files_show__"
+    _ADDED_FILES_ROOT_NAME = "Added Files"
+    _LITE_EPISODES_MAX = 60
+    _MEDIA_FIELDS = ("durationSec", "width", "height", "videoCodec", "audioTracks", "subtitleTracks")
+    _POSTER_EMIT_DELAY_MS = 1500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._prober = None
+        self._posters = None
+        self._poster_waiters = {}  # showId -> [requestId]
+        self._poster_settled = set()  # showIds the sweep already handled this session
+        self._poster_emit_pending = False
+        self._lookup = None
+        self._probe_seq = 0
+        self._mediaInfoDone.connect(self._on_media_info)
+        self._posterDone.connect(self._on_poster_done)
+        self._scan_init()
+
+    def _read_config(self):
+        return _read_library_config()
+
+    def _load_index(self, raw):
+        self._lookup = None
+        if isinstance(raw, dict) and all(isinstance(raw.get(k), list) for k in ("roots", "shows", "episodes")):
+            # Probed metadata lives in its own cache; the index file keeps the
+            # JS worker's shape (durationSec feeds its rename signatures)
+            self._apply_cached_meta(raw["episodes"])
+            return {"roots": raw["roots"], "shows": raw["shows"], "episodes": raw["episodes"]}
+        # Legacy {folders, videos} indexes are rebuilt by the next scan
+        return {"roots": [], "shows": [], "episodes": []}
+
+    def _ensure_prober(self):
+        if self._prober is None:
+            self._prober = media_probe.Prober(storage.data_path(media_probe.CACHE_FILE))
+        return self._prober
+
+    @staticmethod
+    def _probe_key(ep):
+        return media_probe.sig_key(ep.get("ext"), ep.get("size"), ep.get("mtimeMs"))
+
+    @staticmethod
+    def _apply_meta(ep, meta):
+        for k in ("durationSec", "width", "height"):
+            if meta.get(k):
+                ep[k] = meta[k]
+
+    def _apply_cached_meta(self, episodes):
+        prober = self._ensure_prober()
+        for ep in episodes:
+            if isinstance(ep, dict) and ep.get("durationSec") is None:
+                meta = prober.cached(self._probe_key(ep))
+                if meta and not meta.get("failed"):
+                    self._apply_meta(ep, meta)
+
+    def _episodes(self):
+        """Lookups over the loaded index (video_index.py), rebuilt once per load."""
+        if self._lookup is None:
+            self._lookup = video_index.EpisodeIndex(self._ensure_idx())
+        return self._lookup
+
+    def _episode_for_path(self, path):
+        return self._episodes().by_path(path)
+
+    def _media_info(self, meta):
+        return _ok({k: meta.get(k) for k in self._MEDIA_FIELDS})
+
+    def shutdown_workers(self):
+        if self._prober is not None:
+            self._prober.shutdown()
+        if self._posters is not None:
+            self._posters.shutdown()
+
+    # -- posters (video_posters.py) -------------------------------------------
+
+    def _ensure_posters(self):
+        if self._posters is None:
+            self._posters = video_posters.PosterService(
+                lambda sid, path, generated: self._posterDone.emit((sid, path, generated)))
+        return self._posters
+
+    def _poster_sources(self, sid):
+        """(episode paths, middle one first; its duration) for a show's poster frame."""
+        eps = [ep for ep in self._episodes().for_show(sid) if ep.get("path")]
+        if not eps:
+            return [], None
+        mid = eps[len(eps) // 2]
+        rest = [ep for ep in eps if ep is not mid]
+        return [mid["path"]] + [ep["path"] for ep in rest], mid.get("durationSec")
+
+    def _queue_poster(self, show, priority, force=False) -> bool:
+        episodes, duration = self._poster_sources(show["id"])
+        if not episodes:
+            return False
+        self._ensure_posters().request(show["id"], episodes, duration, priority, force)
+        return True
+
+    def _sweep_posters(self):
+        """Queue a poster for every show without one, behind any explicit request.
+        Shows already handled (poster found, made, or not possible) aren't retried."""
+        for show in self._ensure_idx()["shows"]:
+            if isinstance(show, dict) and show.get("id") and not show.get("thumbPath") \
+                    and show["id"] not in self._poster_settled:
+                self._queue_poster(show, video_posters.PRIORITY_SWEEP)
+
+    def _on_poster_done(self, ev):
+        sid, path, generated = ev
+        self._poster_settled.add(sid)
+        show = self._episodes().show(sid)
+        if generated and show is not None:
+            show["thumbPath"] = path
+            self.folderThumbnailUpdated.emit(json.dumps({
+                "showId": sid, "folderPath": show.get("path") or "", "thumbPath": path,
+                "timestamp": int(time.time() * 1000),
+            }))
+            # One snapshot for a burst of finished posters
+            if not self._poster_emit_pending:
+                self._poster_emit_pending = True
+                QTimer.singleShot(self._POSTER_EMIT_DELAY_MS, self._flush_poster_updates)
+        for rid in self._poster_waiters.pop(sid, []):
+            if generated:
+                res = _ok({"generated": True, "path": path})
+            elif path:
+                res = _ok({"generated": False, "reason": "user_poster_exists", "path": path})
+            else:
+                res = _ok({"generated": False, "reason": "generation_failed"})
+            res["requestId"] = rid
+            self.showThumbnailGenerated.emit(json.dumps(res))
+
+    def _flush_poster_updates(self):
+        self._poster_emit_pending = False
+        self._emit_updated(full=True)
+
+    def _scan_job(self, state):
+        job = {
+            "videoFolders": state["videoFolders"],
+            "showFolders": state["videoShowFolders"],
+            "hiddenShowIds": [str(x) for x in state["videoHiddenShowIds"] if x],
+            "rules": library_scan.IgnoreRules(substrings=library_scan.sanitize_ignore(state["scanIgnore"])),
+            "indexPath": storage.data_path(self._index_file),
+        }
+        key = json.dumps({"folders": state["videoFolders"], "showFolders": state["videoShowFolders"]})
+        return job, key, len(state["videoFolders"]) + len(state["videoShowFolders"])
+
+    def _on_scan_done(self, idx, meta):
+        self._idx = self._load_index(idx)
+        self._emit_updated(full=True)
+        self._sweep_posters()
+
+    def _emit_updated(self, full=False):
+        self.videoUpdated.emit(json.dumps(self._snapshot(lite=not full)))
+
+    def _added_files(self, state, hidden):
+        """Virtual "Added Files" root/show/episodes for individually added videos."""
+        files = _uniq(str(f) for f in state["videoFiles"])
+        if not files or self._ADDED_FILES_SHOW_ID in hidden:
+            return None, None, []
+        rid, sid, name = self._ADDED_FILES_ROOT_ID, self._ADDED_FILES_SHOW_ID, self._ADDED_FILES_ROOT_NAME
+        episodes = []
+        for fp in files:
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            if not os.path.isfile(fp):
+                continue
+            mtime = library_scan.mtime_ms(st)
+            episodes.append({
+                "id": library_scan.video_id_for_path(fp, st.st_size, mtime),
+                "title": library_scan.VIDEO_EXT_RE.sub("", os.path.basename(fp)),
+                "rootId": rid, "rootName": name, "showId": sid, "showName": name, "showRootPath": "",
+                "folderRelPath": "", "folderKey": library_scan.folder_key_for(sid, ""),
+                "folderId": rid, "folderName": name, "path": fp, "size": st.st_size, "mtimeMs": mtime,
+                "ext": os.path.splitext(fp)[1][1:].upper(),
+                "durationSec": None, "width": None, "height": None, "thumbPath": None,
+            })
+        if not episodes:
+            return None, None, []
+        self._apply_cached_meta(episodes)
+        root = {"id": rid, "name": name, "path": "", "displayPath": "Added files"}
+        show = {"id": sid, "rootId": rid, "name": name, "path": "", "displayPath": "Added files",
+                "isLoose": True, "thumbPath": None, "folders": []}
+        return root, show, episodes
+
+    def _snapshot(self, state=None, lite=False):
+        s = state or self._read_config()
+        idx = self._ensure_idx()
+        hidden = self._hidden(s)
+
+        # Configured folders are the source of truth for roots; the index only
+        # contributes shows/episodes of roots that are still configured.
+        roots = [{"id": library_scan.root_id_for_path(fp), "name": os.path.basename(fp) or fp,
+                  "path": fp, "displayPath": fp.replace("\\", "/")} for fp in s["videoFolders"]]
+        if s["videoShowFolders"]:
+            roots.append({"id": library_scan.ADDED_SHOW_FOLDERS_ROOT_ID,
+                          "name": library_scan.ADDED_SHOW_FOLDERS_ROOT_NAME, "path": "", "displayPath": ""})
+        live_roots = {r["id"] for r in roots}
+        added_root, added_show, added_eps = self._added_files(s, hidden)
+        if added_root:
+            roots.append(added_root)
+            live_roots.add(added_root["id"])
+
+        shows = [sh for sh in idx["shows"]
+                 if str(sh.get("id", "")) not in hidden and str(sh.get("rootId", "")) in live_roots]
+        episodes = [ep for ep in idx["episodes"]
+                    if str(ep.get("showId", "")) not in hidden and str(ep.get("rootId", "")) in live_roots]
+        if added_show:
+            shows.append(added_show)
+            episodes = episodes + added_eps
+
+        counts = {}
+        for ep in episodes:
+            sid = str(ep.get("showId", ""))
+            if sid:
+                counts[sid] = counts.get(sid, 0) + 1
+
+        if lite:
+            # Full episode lists come from getEpisodesFor*; lite snapshots carry
+            # only what Continue Watching needs (most recently played first)
+            prog = storage.read_json(storage.data_path("video_progress.json"), {}) or {}
+            recent = sorted(prog, key=lambda k: -float((prog[k] or {}).get("updatedAt") or 0)
+                            if isinstance(prog[k], dict) else 0)[:self._LITE_EPISODES_MAX]
+            want = set(recent)
+            episodes = [ep for ep in episodes if str(ep.get("id", "")) in want][:len(want)]
+
+        return {
+            "videoFolders": s["videoFolders"],
+            "videoShowFolders": s["videoShowFolders"],
+            "roots": roots,
+            "shows": [dict(sh, episodeCount=counts[str(sh.get("id", ""))])
+                      for sh in shows if counts.get(str(sh.get("id", "")))],
+            "episodes": episodes,
+            "episodeCounts": counts,
+            **self._scan_state(),
+        }
 
     @Slot(str, result=str)
     def getState(self, opts=""):
-        return json.dumps(_stub())
+        o = json.loads(opts) if opts else {}
+        state = self._read_config()
+        self._start_scan(state)
+        return json.dumps(self._snapshot(state, lite=bool(isinstance(o, dict) and o.get("lite"))))
 
     @Slot(str, result=str)
     def scan(self, opts=""):
-        return json.dumps(_stub())
+        state = self._read_config()
+        # A manual rescan brings back shows the user removed
+        if state["videoHiddenShowIds"]:
+            state["videoHiddenShowIds"] = []
+            _write_library_config(state)
+            self._emit_updated()
+        self._start_scan(state, force=True, deep=self._deep_scan(opts))
+        return json.dumps(_ok())
+
+    @Slot(str, result=str)
+    def getMediaInfo(self, p):
+        """Duration, resolution, codecs and tracks of one video file.
+
+        Cached results answer inline; otherwise ffprobe runs off the GUI thread
+        and the reply is {pending, requestId}, completed through mediaInfoReady.
+        null when there is no ffprobe, so the renderer uses its own probe.
+        """
+        path = str(p or "").strip()
+        if not path:
+            return json.dumps(_err("Missing path"))
+        prober = self._ensure_prober()
+        ep = self._episode_for_path(path)
+        key = self._probe_key(ep) if ep else None
+        hit = prober.cached(key) if key else None
+        if hit is not None:
+            return json.dumps(None if hit.get("failed") else self._media_info(hit))
+        if not prober.available:
+            return json.dumps(None)
+        self._probe_seq += 1
+        rid = f"probe_{int(time.time() * 1000)}_{self._probe_seq}"
+        prober.request(path, key, lambda meta: self._mediaInfoDone.emit((rid, path, meta)))
+        return json.dumps(_ok({"pending": True, "requestId": rid}))
+
+    def _on_media_info(self, ev):
+        rid, path, meta = ev
+        res = self._media_info(meta) if meta else _err("Probe failed")
+        if meta:
+            ep = self._episode_for_path(path)
+            if ep is not None:
+                self._apply_meta(ep, meta)
+        res["requestId"] = rid
+        self.mediaInfoReady.emit(json.dumps(res))
 
     @Slot(str, result=str)
     def scanShow(self, p):
@@ -912,11 +1690,34 @@ class VideoBridge(StubNamespace):
 
     @Slot(str, str, result=str)
     def generateShowThumbnail(self, show_id, opts=""):
-        return json.dumps(_stub())
+        """Poster for one show from a frame of its middle episode. Answers inline
+        when there is nothing to do, else {pending, requestId} completed through
+        showThumbnailGenerated; the job jumps ahead of the post-scan sweep."""
+        sid = str(show_id or "")
+        if not sid:
+            return json.dumps({"ok": False, "reason": "invalid_show_id"})
+        o = json.loads(opts) if opts else {}
+        force = bool(isinstance(o, dict) and o.get("force"))
+        show = self._episodes().show(sid)
+        if show is None:
+            return json.dumps({"ok": False, "reason": "show_not_found"})
+        if not force:
+            folder_poster = str(show.get("thumbPath") or "")
+            if folder_poster and video_posters.non_empty(folder_poster):
+                return json.dumps(_ok({"generated": False, "reason": "folder_poster_exists", "path": folder_poster}))
+            existing = video_posters.existing_poster(sid)
+            if existing:
+                return json.dumps(_ok({"generated": False, "reason": "user_poster_exists", "path": existing}))
+        if not self._queue_poster(show, video_posters.PRIORITY_USER, force):
+            return json.dumps(_ok({"generated": False, "reason": "no_episode_file"}))
+        self._probe_seq += 1
+        rid = f"poster_{int(time.time() * 1000)}_{self._probe_seq}"
+        self._poster_waiters.setdefault(sid, []).append(rid)
+        return json.dumps(_ok({"pending": True, "requestId": rid}))
 
     @Slot(result=str)
     def cancelScan(self):
-        return json.dumps(_stub())
+        return json.dumps(self._cancel_scan())
 
     @Slot(result=str)
     def addFolder(self):
@@ -966,17 +1767,55 @@ class VideoBridge(StubNamespace):
     def restoreHiddenShowsForRoot(self, root_id):
         return json.dumps(_stub())
 
+    @staticmethod
+    def _hidden(state):
+        return {str(x) for x in state["videoHiddenShowIds"] if x}
+
     @Slot(str, result=str)
     def getEpisodesForShow(self, show_id):
-        return json.dumps(_stub())
+        sid = str(show_id or "")
+        state = self._read_config()
+        hidden = self._hidden(state)
+        if sid == self._ADDED_FILES_SHOW_ID:
+            return json.dumps(_ok({"episodes": self._added_files(state, hidden)[2]}))
+        episodes = [] if sid in hidden else self._episodes().for_show(sid)
+        return json.dumps(_ok({"episodes": episodes}))
 
     @Slot(str, result=str)
     def getEpisodesForRoot(self, root_id):
-        return json.dumps(_stub())
+        rid = str(root_id or "")
+        state = self._read_config()
+        hidden = self._hidden(state)
+        if rid == self._ADDED_FILES_ROOT_ID:
+            return json.dumps(_ok({"episodes": self._added_files(state, hidden)[2]}))
+        return json.dumps(_ok({"episodes": self._episodes().for_root(rid, skip=hidden)}))
 
     @Slot(str, result=str)
     def getEpisodesByIds(self, ids_json):
-        return json.dumps(_stub())
+        """Episodes for saved ids (progress, Continue Watching) in request order,
+        matching renamed files by alias id, under the snapshot's visibility rules."""
+        try:
+            ids = json.loads(ids_json) if ids_json else []
+        except ValueError:
+            ids = []
+        want = [str(x) for x in ids if x] if isinstance(ids, list) else []
+        if not want:
+            return json.dumps(_ok({"episodes": []}))
+        state = self._read_config()
+        hidden = self._hidden(state)
+        live_roots = {library_scan.root_id_for_path(fp) for fp in state["videoFolders"]}
+        if state["videoShowFolders"]:
+            live_roots.add(library_scan.ADDED_SHOW_FOLDERS_ROOT_ID)
+        added = {ep["id"]: ep for ep in self._added_files(state, hidden)[2]}
+        lookup = self._episodes()
+        episodes = []
+        for eid in want:
+            ep = added.get(eid) or lookup.episode(eid)
+            if ep is None or (eid not in added and (str(ep.get("rootId") or "") not in live_roots
+                                                    or str(ep.get("showId") or "") in hidden)):
+                continue
+            episodes.append(ep)
+        return json.dumps(_ok({"episodes": episodes}))
 
 
 class VideoPosterBridge(QObject):
@@ -986,18 +1825,8 @@ class VideoPosterBridge(QObject):
         super().__init__(parent)
 
     @staticmethod
-    def _safe_id(show_id):
-        import re
-        return re.sub(r'[^a-zA-Z0-9_-]', '_', str(show_id or 'unknown'))
-
-    @staticmethod
-    def _poster_dir():
-        return storage.data_path("video_posters")
-
-    def _poster_paths(self, show_id):
-        sid = self._safe_id(show_id)
-        d = self._poster_dir()
-        return {"dir": d, "jpg": os.path.join(d, f"{sid}.jpg"), "png": os.path.join(d, f"{sid}.png")}
+    def _poster_paths(show_id):
+        return video_posters.poster_paths(show_id)
 
     def _existing_path(self, show_id):
         p = self._poster_paths(show_id)
@@ -1496,18 +2325,26 @@ class HolyGrailBridge(StubNamespace):
         return json.dumps({"ok": False, "error": "holy_grail_not_available_in_butterfly"})
 
 
-class AudiobooksBridge(QObject):
-    """Audiobooks: scanner stubs + working progress/pairing CRUD."""
+class AudiobooksBridge(QObject, LibraryScanMixin):
+    """Audiobooks: background scans (library_scan.py), folder stubs, and
+    working progress/pairing CRUD."""
     audiobookUpdated = Signal(str)
     scanStatus = Signal(str)
+    _scanEvent = Signal(object)  # scan thread -> GUI thread (queued)
 
     _PROGRESS_FILE = "audiobook_progress.json"
     _PAIRINGS_FILE = "audiobook_pairings.json"
+    _CONFIG_FILE = "audiobook_config.json"
+    _scan_name = "audiobooks"
+    _scan_build = staticmethod(library_scan.build_audiobook_index)
+    _index_file = "audiobook_index.json"
+    _updated_signal = "audiobookUpdated"
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._progress_cache = None
         self._pairings_cache = None
+        self._scan_init()
 
     def _ensure_progress(self):
         if self._progress_cache is not None:
@@ -1521,15 +2358,41 @@ class AudiobooksBridge(QObject):
         self._pairings_cache = storage.read_json(storage.data_path(self._PAIRINGS_FILE), {})
         return self._pairings_cache
 
-    # --- Scanner stubs (need worker) ---
+    # --- Scanner ---
+
+    def _read_config(self):
+        raw = storage.read_json(storage.data_path(self._CONFIG_FILE), {}) or {}
+        return {"audiobookRootFolders": library_scan.uniq_paths(raw.get("audiobookRootFolders"))}
+
+    def _load_index(self, raw):
+        if isinstance(raw, dict) and isinstance(raw.get("audiobooks"), list):
+            return {"audiobooks": raw["audiobooks"]}
+        return {"audiobooks": []}
+
+    def _scan_job(self, state):
+        # Book roots are scanned too, so audiobooks kept with the books are found
+        books = storage.read_json(storage.data_path("books_library_state.json"), {}) or {}
+        book_roots = books.get("bookRootFolders") if isinstance(books.get("bookRootFolders"), list) else []
+        roots = library_scan.uniq_paths(state["audiobookRootFolders"] + book_roots)
+        job = {"audiobookRootFolders": roots, "rules": library_scan.IgnoreRules()}
+        return job, json.dumps({"audiobookRootFolders": roots}), len(roots)
+
+    def _snapshot(self, state=None):
+        s = state or self._read_config()
+        return dict(s, audiobooks=self._ensure_idx()["audiobooks"], **self._scan_state())
 
     @Slot(result=str)
     def getState(self):
-        return json.dumps(_stub())
+        state = self._read_config()
+        self._start_scan(state)
+        return json.dumps(self._snapshot(state))
 
     @Slot(result=str)
     def scan(self):
-        return json.dumps(_stub())
+        self._start_scan(self._read_config(), force=True)
+        return json.dumps(_ok())
+
+    # --- Folder stubs ---
 
     @Slot(str, result=str)
     def addRootFolder(self, p):
@@ -1623,7 +2486,9 @@ class AudiobooksBridge(QObject):
 # Web/Browser stubs (large surface — Phase 3)
 # ---------------------------------------------------------------------------
 
-class WebSourcesBridge(StubNamespace):
+class WebSourcesBridge(QObject):
+    """Web sources (stubs) + direct downloads (downloads.py) with the
+    destination picker round trip through the renderer."""
     sourcesUpdated = Signal(str)
     downloadStarted = Signal(str)
     downloadProgress = Signal(str)
@@ -1631,6 +2496,20 @@ class WebSourcesBridge(StubNamespace):
     downloadsUpdated = Signal(str)
     popupOpen = Signal(str)
     destinationPickerRequest = Signal(str)
+    _downloadEvent = Signal(object)  # download workers -> GUI thread (queued)
+
+    _HISTORY_FILE = "web_download_history.json"
+    _PICKER_TIMEOUT_S = 5 * 60
+    _BOOK_EXTS = (".epub", ".txt", ".mobi", ".azw3")
+    _COMIC_EXTS = (".cbz", ".cbr", ".pdf")
+    _VIDEO_EXTS = (".mp4", ".mkv", ".avi", ".mov", ".m4v", ".webm", ".ts", ".m2ts", ".wmv", ".flv",
+                   ".mpeg", ".mpg", ".3gp")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._downloads = None
+        self._pickers = {}  # requestId -> {"event", "result"}
+        self._downloadEvent.connect(self._on_download_event)
 
     @Slot(result=str)
     def get(self): return json.dumps(_stub())
@@ -1642,30 +2521,232 @@ class WebSourcesBridge(StubNamespace):
     def update(self, p): return json.dumps(_stub())
     @Slot(str, result=str)
     def routeDownload(self, p): return json.dumps(_stub())
-    @Slot(result=str)
-    def getDestinations(self): return json.dumps(_stub())
     @Slot(str, result=str)
-    def downloadFromUrl(self, p): return json.dumps(_stub())
-    @Slot(result=str)
-    def getDownloadHistory(self): return json.dumps(_err("not_implemented"))
-    @Slot(result=str)
-    def clearDownloadHistory(self): return json.dumps(_stub())
+    def pickDestinationFolder(self, p): return json.dumps(_stub())
     @Slot(str, result=str)
-    def removeDownloadHistory(self, p): return json.dumps(_stub())
+    def pickSaveFolder(self, p): return json.dumps(_stub())
+
+    # --- Library destinations ---
+
+    @staticmethod
+    def _library_roots():
+        books = storage.read_json(storage.data_path("books_library_state.json"), {}) or {}
+        lib = storage.read_json(storage.data_path("library_state.json"), {}) or {}
+        clean = lambda v: [str(x) for x in v if x] if isinstance(v, list) else []
+        return {"books": clean(books.get("bookRootFolders")), "comics": clean(lib.get("rootFolders")),
+                "videos": clean(lib.get("videoFolders"))}
+
+    @staticmethod
+    def _is_within(parent, target):
+        try:
+            p, t = os.path.abspath(parent), os.path.abspath(target)
+            return os.path.commonpath([p, t]) == p
+        except ValueError:
+            return False
+
+    def _library_for(self, folder):
+        roots = self._library_roots()
+        for mode in ("books", "comics", "videos"):
+            if any(self._is_within(r, folder) for r in roots[mode]):
+                return mode
+        return ""
+
+    def _mode_for_filename(self, filename):
+        ext = os.path.splitext(filename)[1].lower()
+        for mode, exts in (("books", self._BOOK_EXTS), ("comics", self._COMIC_EXTS), ("videos", self._VIDEO_EXTS)):
+            if ext in exts:
+                return mode
+        return ""
+
+    @Slot(result=str)
+    def getDestinations(self):
+        roots = self._library_roots()
+        return json.dumps(_ok({
+            "books": roots["books"][0] if roots["books"] else None,
+            "comics": roots["comics"][0] if roots["comics"] else None,
+            "videos": roots["videos"][0] if roots["videos"] else None,
+            "allBooks": roots["books"], "allComics": roots["comics"], "allVideos": roots["videos"],
+        }))
+
     @Slot(str, result=str)
-    def pauseDownload(self, p): return json.dumps(_stub())
+    def listDestinationFolders(self, payload_json):
+        payload = json.loads(payload_json) if payload_json else {}
+        mode = str(payload.get("mode", "") or "").strip().lower()
+        if mode not in ("books", "comics", "videos"):
+            return json.dumps(_err("Invalid mode"))
+        roots = self._library_roots()[mode]
+        raw = str(payload.get("path", "") or "").strip()
+        if not raw:
+            folders = [{"name": os.path.basename(os.path.abspath(r)) or os.path.abspath(r), "path": os.path.abspath(r)}
+                       for r in roots]
+            return json.dumps(_ok({"mode": mode, "folders": folders}))
+        path = os.path.abspath(raw)
+        if not any(self._is_within(r, path) for r in roots):
+            return json.dumps(_err("Path outside allowed roots"))
+        if not os.path.isdir(path):
+            return json.dumps(_err("Folder not found"))
+        try:
+            folders = [{"name": e.name, "path": e.path} for e in os.scandir(path) if e.is_dir()]
+        except OSError:
+            folders = []
+        folders.sort(key=lambda f: f["name"].lower())
+        return json.dumps(_ok({"mode": mode, "folders": folders}))
+
+    def _resolve_destination(self, filename, request):
+        """Download worker thread: ask the renderer's picker and wait for the answer."""
+        import random, string, threading
+        mode_hint = self._mode_for_filename(filename)
+        rid = f"wdpick_{int(time.time() * 1000)}_{''.join(random.choices(string.ascii_lowercase + string.digits, k=6))}"
+        waiter = {"event": threading.Event(), "result": None}
+        self._pickers[rid] = waiter
+        self._downloadEvent.emit(("picker", {
+            "requestId": rid, "kind": "direct", "suggestedFilename": filename,
+            "modeHint": mode_hint, "roots": self._library_roots(), "senderWebContentsId": None,
+        }))
+        answered = waiter["event"].wait(self._PICKER_TIMEOUT_S)
+        self._pickers.pop(rid, None)
+        raw = waiter["result"] if answered else {"cancelled": True, "error": "Destination picker timed out"}
+        if not raw or raw.get("cancelled") or raw.get("ok") is False:
+            return {"ok": False, "cancelled": bool(raw and raw.get("cancelled")),
+                    "error": str((raw or {}).get("error") or "Cancelled")}
+        mode = str(raw.get("mode", "") or "").strip().lower()
+        mode = mode if mode in ("books", "comics", "videos") else mode_hint
+        folder = os.path.abspath(str(raw.get("folderPath", "") or "")) if raw.get("folderPath") else ""
+        if not folder:
+            return {"ok": False, "error": "Invalid destination folder"}
+        # Library picks must stay inside that library; non-library files may go anywhere picked
+        if mode and not any(self._is_within(r, folder) for r in self._library_roots()[mode]):
+            return {"ok": False, "error": "Destination outside allowed library folders"}
+        os.makedirs(folder, exist_ok=True)
+        return {"ok": True, "destination": os.path.join(folder, filename), "library": self._library_for(folder)}
+
+    @Slot(str, result=str)
+    def resolveDestinationPicker(self, payload_json):
+        payload = json.loads(payload_json) if payload_json else {}
+        rid = str(payload.get("requestId", "") or "")
+        if not rid:
+            return json.dumps(_err("Missing requestId"))
+        waiter = self._pickers.pop(rid, None)
+        if waiter is None:
+            return json.dumps(_err("Unknown requestId"))
+        waiter["result"] = payload
+        waiter["event"].set()
+        return json.dumps(_ok())
+
+    # --- Direct downloads ---
+
+    def _ensure_downloads(self):
+        if self._downloads is None:
+            self._downloads = downloads.DownloadManager(
+                storage.data_path(self._HISTORY_FILE),
+                emit=lambda kind, entry: self._downloadEvent.emit((kind, entry)),
+                resolve=self._resolve_destination,
+            )
+            self._downloads.start()
+        return self._downloads
+
+    def start_downloads(self):
+        """Resume downloads left running by the previous session."""
+        self._ensure_downloads()
+
+    def shutdown_downloads(self):
+        if self._downloads is not None:
+            self._downloads.shutdown()
+
+    @staticmethod
+    def _public(entry):
+        return {k: v for k, v in entry.items() if k not in ("resume", "request")}
+
+    def _on_download_event(self, ev):
+        kind, entry = ev
+        if kind == "picker":
+            self.destinationPickerRequest.emit(json.dumps(entry))
+        elif kind == "updated":
+            self.downloadsUpdated.emit(json.dumps(
+                {"downloads": [self._public(d) for d in self._ensure_downloads().history()]}))
+        elif kind == "started":
+            self.downloadStarted.emit(json.dumps(self._public(entry)))
+        elif kind == "progress":
+            self.downloadProgress.emit(json.dumps(self._public(entry)))
+        elif kind == "completed":
+            out = self._public(entry)
+            if entry.get("state") == "completed":
+                out["ok"] = True
+                self._trigger_library_rescan(entry.get("library", ""))
+            self.downloadCompleted.emit(json.dumps(out))
+
+    def _trigger_library_rescan(self, library):
+        """Hand a finished file to its library (same mapping as library_bridge.js)."""
+        ns = {"books": "books", "comics": "library", "videos": "video"}.get(library)
+        target = getattr(self.parent(), ns, None) if ns else None
+        if target is not None and hasattr(target, "scan"):
+            try:
+                target.scan("{}")
+            except Exception:
+                pass
+
     @Slot(str, result=str)
-    def resumeDownload(self, p): return json.dumps(_stub())
+    def downloadFromUrl(self, payload_json):
+        payload = json.loads(payload_json) if payload_json else {}
+        url = str(payload.get("url", "") or "").strip()
+        import random, string
+        dl_id = f"wdl_{int(time.time() * 1000)}_{''.join(random.choices(string.ascii_lowercase + string.digits, k=6))}"
+        if not url.lower().startswith(("http://", "https://")):
+            return json.dumps(_err("Invalid URL"))
+        request = {k: str(payload[k]) for k in ("url", "referer", "suggestedFilename", "title") if payload.get(k)}
+        request["url"] = url
+        self._ensure_downloads().add(dl_id, request)
+        return json.dumps(_ok({"id": dl_id, "queued": True}))
+
+    @Slot(result=str)
+    def getDownloadHistory(self):
+        return json.dumps(_ok({"downloads": [self._public(d) for d in self._ensure_downloads().history()]}))
+
+    @Slot(result=str)
+    def clearDownloadHistory(self):
+        self._ensure_downloads().clear_history()
+        return json.dumps(_ok())
+
     @Slot(str, result=str)
-    def cancelDownload(self, p): return json.dumps(_stub())
+    def removeDownloadHistory(self, payload_json):
+        payload = json.loads(payload_json) if payload_json else {}
+        dl_id = str(payload.get("id", "") or "")
+        if not dl_id:
+            return json.dumps(_err("Missing id"))
+        if not self._ensure_downloads().remove(dl_id):
+            return json.dumps(_err("Not found"))
+        return json.dumps(_ok())
+
+    def _control(self, payload_json, op):
+        payload = json.loads(payload_json) if payload_json else {}
+        dl_id = str(payload.get("id", "") or "")
+        if not dl_id:
+            return json.dumps(_err("Missing id"))
+        error = op(self._ensure_downloads(), dl_id)
+        return json.dumps(_err(error) if error else _ok())
+
     @Slot(str, result=str)
-    def pickDestinationFolder(self, p): return json.dumps(_stub())
+    def pauseDownload(self, payload_json):
+        return self._control(payload_json, downloads.DownloadManager.pause)
+
     @Slot(str, result=str)
-    def listDestinationFolders(self, p): return json.dumps(_stub())
+    def resumeDownload(self, payload_json):
+        return self._control(payload_json, downloads.DownloadManager.resume)
+
     @Slot(str, result=str)
-    def resolveDestinationPicker(self, p): return json.dumps(_stub())
+    def cancelDownload(self, payload_json):
+        return self._control(payload_json, downloads.DownloadManager.cancel)
+
     @Slot(str, result=str)
-    def pickSaveFolder(self, p): return json.dumps(_stub())
+    def setDownloadSpeedLimit(self, payload_json):
+        """Cap combined direct-download bandwidth: {bytesPerSec} (0 = unlimited)."""
+        payload = json.loads(payload_json) if payload_json else {}
+        try:
+            rate = max(0, int(payload.get("bytesPerSec", 0) or 0))
+        except (TypeError, ValueError):
+            return json.dumps(_err("Invalid bytesPerSec"))
+        self._ensure_downloads().set_speed_limit(rate)
+        return json.dumps(_ok({"bytesPerSec": rate}))
 
 
 class WebBrowserSettingsBridge(QObject, JsonCrudMixin):
@@ -2112,32 +3193,71 @@ class WebDataBridge(StubNamespace):
     def usage(self): return json.dumps(_stub())
 
 
+@lru_cache(maxsize=1024)
+def _normalize_web_origin(raw):
+    """scheme://host[:port] (lowercase) for http(s) URLs, else ''. Memoized —
+    WebEngine asks about the same handful of origins over and over."""
+    if not raw:
+        return ""
+    try:
+        from urllib.parse import urlparse
+        u = urlparse(raw)
+        if u.scheme not in ("http", "https"):
+            return ""
+        return f"{u.scheme}://{u.netloc}".lower() if u.netloc else ""
+    except Exception:
+        return ""
+
+
 class WebPermissionsBridge(QObject):
-    """Per-origin web permission overrides — rules array with origin normalization."""
+    """Per-origin web permission overrides — rules array with origin normalization.
+
+    Rules are compiled into a (origin, permission) -> decision table, rebuilt
+    only when set()/reset() change them. A rule origin of the form
+    "https://*.example.com" matches example.com and every subdomain on any port.
+    """
     permissionsUpdated = Signal(str)
     permissionPrompt = Signal(str)
 
     _PERMISSIONS_FILE = "web_permissions.json"
     _VALID_DECISIONS = {"allow", "deny", "ask"}
+    _DECISION_MEMO_MAX = 4096
+    _PROMPT_TIMEOUT_MS = 20000
+
+    # Mirrors promptablePermissions in main/index.js
+    _PROMPTABLE = {
+        "media", "camera", "microphone", "audioCapture", "videoCapture",
+        "geolocation", "notifications", "midi", "midiSysex",
+        "clipboard-read", "clipboard-sanitized-write",
+    }
+
+    # QWebEnginePage.Feature name -> Electron permission key used by the rules.
+    # Resolved against the installed Qt lazily (enum members vary by version).
+    _FEATURE_NAMES = {
+        "Notifications": "notifications",
+        "Geolocation": "geolocation",
+        "MediaAudioCapture": "audioCapture",
+        "MediaVideoCapture": "videoCapture",
+        "MediaAudioVideoCapture": "media",
+        "DesktopVideoCapture": "media",
+        "DesktopAudioVideoCapture": "media",
+        "MouseLock": "pointerLock",
+        "ClipboardReadWrite": "clipboard-read",
+    }
+    _feature_keys = None
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._cache = None
+        self._rule_index = None     # {(origin, permission): rule}
+        self._table = None          # {(origin, permission): decision}
+        self._decision_memo = {}    # {(origin, permission): resolved decision}
+        self._pending_prompts = {}  # {requestId: (page, QUrl origin, feature)}
+        self._prompt_seq = 0
 
     @staticmethod
     def _normalize_origin(value):
-        raw = str(value or "").strip()
-        if not raw:
-            return ""
-        try:
-            from urllib.parse import urlparse
-            u = urlparse(raw)
-            if u.scheme not in ("http", "https"):
-                return ""
-            origin = f"{u.scheme}://{u.netloc}".lower() if u.netloc else ""
-            return origin
-        except Exception:
-            return ""
+        return _normalize_web_origin(str(value or "").strip())
 
     @classmethod
     def _decision_from_value(cls, value):
@@ -2153,8 +3273,25 @@ class WebPermissionsBridge(QObject):
             self._cache = {"rules": raw["rules"], "updatedAt": raw.get("updatedAt", 0) or 0}
         else:
             self._cache = {"rules": [], "updatedAt": 0}
+        self._rebuild_table()
         return self._cache
 
+    def _rebuild_table(self):
+        """Compile rules into lookup dicts. First rule wins, like the old linear scan."""
+        index = {}
+        table = {}
+        for r in self._cache["rules"]:
+            if not r:
+                continue
+            key = (str(r.get("origin", "")), str(r.get("permission", "")))
+            if key in index:
+                continue
+            index[key] = r
+            table[key] = self._decision_from_value(r.get("decision"))
+        self._rule_index = index
+        self._table = table
+        self._decision_memo = {}
+
     def _write(self):
         storage.write_json_sync(storage.data_path(self._PERMISSIONS_FILE), self._ensure_cache())
 
@@ -2167,12 +3304,109 @@ class WebPermissionsBridge(QObject):
         p = str(permission or "").strip()
         if not o or not p:
             return None
-        for r in self._ensure_cache()["rules"]:
-            if not r:
-                continue
-            if str(r.get("origin", "")) == o and str(r.get("permission", "")) == p:
-                return r
-        return None
+        self._ensure_cache()
+        return self._rule_index.get((o, p))
+
+    def _lookup_decision(self, origin, permission):
+        table = self._table
+        d = table.get((origin, permission))
+        if d is not None:
+            return d
+        # Wildcard rules: walk host labels, https://a.b.example.com:8443 tries
+        # https://*.a.b.example.com, https://*.b.example.com, https://*.example.com ...
+        scheme, _, netloc = origin.partition("://")
+        host = netloc.rsplit(":", 1)[0] if not netloc.endswith("]") else netloc
+        while host:
+            d = table.get((f"{scheme}://*.{host}", permission))
+            if d is not None:
+                return d
+            dot = host.find(".")
+            if dot < 0:
+                break
+            host = host[dot + 1:]
+        return "ask"
+
+    def decision_for(self, origin, permission):
+        """Resolved decision ('allow' | 'deny' | 'ask') for an origin/permission pair."""
+        o = self._normalize_origin(origin)
+        p = str(permission or "").strip()
+        if not o or not p:
+            return "ask"
+        self._ensure_cache()
+        key = (o, p)
+        d = self._decision_memo.get(key)
+        if d is None:
+            d = self._lookup_decision(o, p)
+            if len(self._decision_memo) >= self._DECISION_MEMO_MAX:
+                self._decision_memo.clear()
+            self._decision_memo[key] = d
+        return d
+
+    def should_allow(self, origin, permission):
+        """Secure default: denied unless explicitly allowed by a rule."""
+        return self.decision_for(origin, permission) == "allow"
+
+    # --- QWebEnginePage integration ---
+
+    @classmethod
+    def _feature_permission_key(cls, feature):
+        if cls._feature_keys is None:
+            from PySide6.QtWebEngineCore import QWebEnginePage
+            keys = {}
+            for name, key in cls._FEATURE_NAMES.items():
+                member = getattr(QWebEnginePage.Feature, name, None)
+                if member is not None:
+                    keys[member] = key
+            cls._feature_keys = keys
+        return cls._feature_keys.get(feature, "")
+
+    def attach_page(self, page):
+        """Answer featurePermissionRequested from the compiled rules, in-process."""
+        page.featurePermissionRequested.connect(
+            lambda origin, feature, pg=page: self._on_feature_permission_requested(pg, origin, feature)
+        )
+
+    def _on_feature_permission_requested(self, page, security_origin, feature):
+        key = self._feature_permission_key(feature)
+        origin = self._normalize_origin(security_origin.toString())
+        decision = self.decision_for(origin, key) if key and origin else "deny"
+        if decision == "ask" and key in self._PROMPTABLE:
+            self._prompt(page, security_origin, feature, origin, key)
+            return
+        self._apply_feature_permission(page, security_origin, feature, decision == "allow")
+
+    @staticmethod
+    def _apply_feature_permission(page, security_origin, feature, allow):
+        from PySide6.QtWebEngineCore import QWebEnginePage
+        policy = QWebEnginePage.PermissionPolicy
+        try:
+            page.setFeaturePermission(
+                security_origin, feature,
+                policy.PermissionGrantedByUser if allow else policy.PermissionDeniedByUser,
+            )
+        except RuntimeError:
+            pass  # page already destroyed
+
+    def _prompt(self, page, security_origin, feature, origin, permission):
+        import time
+        from PySide6.QtCore import QTimer
+        now = int(time.time() * 1000)
+        self._prompt_seq += 1
+        rid = f"permreq_{now}_{self._prompt_seq}"
+        self._pending_prompts[rid] = (page, security_origin, feature)
+        QTimer.singleShot(self._PROMPT_TIMEOUT_MS, lambda: self._settle_prompt(rid, False))
+        self.permissionPrompt.emit(json.dumps({
+            "requestId": rid, "permission": permission, "origin": origin,
+            "requestedAt": now, "details": {},
+        }))
+
+    def _settle_prompt(self, request_id, allow):
+        pending = self._pending_prompts.pop(request_id, None)
+        if not pending:
+            return False
+        page, security_origin, feature = pending
+        self._apply_feature_permission(page, security_origin, feature, allow)
+        return True
 
     @Slot(result=str)
     def list(self):
@@ -2200,6 +3434,7 @@ class WebPermissionsBridge(QObject):
             found["decision"] = decision
             found["updatedAt"] = now
         c["updatedAt"] = now
+        self._rebuild_table()
         self._write()
         self._emit_updated()
         return json.dumps(_ok({"rule": found}))
@@ -2224,14 +3459,19 @@ class WebPermissionsBridge(QObject):
             c["rules"] = [r for r in c["rules"] if keep(r)]
         import time
         c["updatedAt"] = int(time.time() * 1000)
+        self._rebuild_table()
         self._write()
         self._emit_updated()
         return json.dumps(_ok())
 
     @Slot(str, result=str)
     def resolvePrompt(self, payload_json):
-        # Needs QWebEngineView session API — stays stub for now
-        return json.dumps(_stub())
+        payload = json.loads(payload_json) if payload_json else {}
+        rid = str(payload.get("requestId", "") or "").strip()
+        decision = str(payload.get("decision", "") or "").strip().lower()
+        if not self._settle_prompt(rid, decision in ("allow", "granted", "true")):
+            return json.dumps(_err("not_found"))
+        return json.dumps(_ok())
 
 
 class WebUserscriptsBridge(StubNamespace):
@@ -2249,11 +3489,22 @@ class WebUserscriptsBridge(StubNamespace):
 
 
 class WebAdblockBridge(QObject):
-    """Network-level ad blocker — domain blocklist from EasyList, config CRUD."""
+    """Network-level ad blocker — EasyList filter engine (see adblock.py), config CRUD.
+
+    updateLists() refreshes subscriptions on a background thread (conditional
+    fetches, parsing in a worker process) and compiles them into a memory-mapped
+    snapshot; startup maps it instead of re-parsing. Every compile writes a new
+    web_adblock_engine.<stamp>.bin, so a file that is mapped is never replaced
+    (Windows refuses), and a swapped-out snapshot is unmapped and deleted once
+    the IO thread can no longer be inside a lookup on it.
+    """
     adblockUpdated = Signal(str)
+    _listsUpdateDone = Signal(object)  # update thread -> GUI thread (queued)
 
     _CFG_FILE = "web_adblock.json"
     _LISTS_FILE = "web_adblock_lists.json"
+    _SNAPSHOT_FILE = "web_adblock_engine.bin"
+    _SNAPSHOT_RETIRE_MS = 5000
     _DEFAULT_LIST_URLS = [
         "https://easylist.to/easylist/easylist.txt",
         "https://easylist.to/easylist/easyprivacy.txt",
@@ -2267,7 +3518,14 @@ class WebAdblockBridge(QObject):
         super().__init__(parent)
         self._cfg = None
         self._lists = None
-        self._domain_set = None
+        self._engine = None
+        self._retiring = 0  # swapped-out snapshots still mapped (see _swap_engine)
+        self._allow_hosts = frozenset()
+        self._interceptor = None
+        self._flush_timer = None
+        self._flushed_blocked = 0
+        self._update_thread = None
+        self._listsUpdateDone.connect(self._finish_list_update)
 
     def _ensure_cfg(self):
         if self._cfg is not None:
@@ -2290,39 +3548,160 @@ class WebAdblockBridge(QObject):
                 "enabled": True, "siteAllowlist": [], "updatedAt": int(time.time() * 1000),
                 "blockedCount": 0, "lastListUpdateAt": 0, "listUrls": list(self._DEFAULT_LIST_URLS),
             }
+        self._allow_hosts = frozenset(
+            h for h in (self._normalize_host(a) for a in self._cfg["siteAllowlist"]) if h
+        )
         return self._cfg
 
     def _ensure_lists(self):
         if self._lists is not None:
             return self._lists
-        raw = storage.read_json(storage.data_path(self._LISTS_FILE), None)
-        if isinstance(raw, dict) and isinstance(raw.get("domains"), list):
+        engine = self._load_snapshot()
+        if engine is not None:
+            # Cold start: map the compiled engine, never touch the list text
             self._lists = {
-                "domains": raw["domains"],
-                "updatedAt": int(raw.get("updatedAt", 0) or 0),
-                "sourceCount": int(raw.get("sourceCount", 0) or 0),
+                "updatedAt": int(engine.meta.get("updatedAt", 0) or 0),
+                "sourceCount": int(engine.meta.get("sourceCount", 0) or 0),
             }
+            self._engine = engine
+            self._prune_snapshots()  # leftovers of a run that quit before retiring them
+            return self._lists
+        raw = storage.read_json(storage.data_path(self._LISTS_FILE), None)
+        if isinstance(raw, dict) and isinstance(raw.get("sources"), list):
+            filters = adblock.combine_filters(s for s in raw["sources"] if isinstance(s, dict))
+        elif isinstance(raw, dict) and isinstance(raw.get("filters"), list):
+            filters = raw["filters"]
+        elif isinstance(raw, dict) and isinstance(raw.get("domains"), list):
+            # Pre-engine format: bare blocked hostnames
+            filters = [f"||{d}^" for d in raw["domains"] if d]
         else:
-            self._lists = {"domains": [], "updatedAt": 0, "sourceCount": 0}
-        self._domain_set = set(self._lists["domains"])
+            raw, filters = {}, []
+        self._lists = {
+            "updatedAt": int(raw.get("updatedAt", 0) or 0),
+            "sourceCount": int(raw.get("sourceCount", 0) or 0),
+        }
+        self._engine = adblock.FilterEngine.from_lines(filters)
+        if filters:
+            self._write_snapshot(self._engine)
         return self._lists
 
+    def _snapshot_files(self):
+        """[(stamp, path)] of the snapshots in the data dir, newest first; the
+        unversioned web_adblock_engine.bin of older builds counts as stamp 0."""
+        folder, name = os.path.split(storage.data_path(self._SNAPSHOT_FILE))
+        stem, ext = os.path.splitext(name)
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return []
+        found = []
+        for n in names:
+            if n == name:
+                found.append((0, os.path.join(folder, n)))
+            elif n.startswith(stem + ".") and n.endswith(ext) and n[len(stem) + 1:-len(ext)].isdigit():
+                found.append((int(n[len(stem) + 1:-len(ext)]), os.path.join(folder, n)))
+        return sorted(found, reverse=True)
+
+    def _new_snapshot_path(self, stamp):
+        """A snapshot name no existing (possibly mapped) file has."""
+        files = self._snapshot_files()
+        stamp = max(int(stamp), files[0][0] + 1 if files else 0)
+        stem, ext = os.path.splitext(self._SNAPSHOT_FILE)
+        return storage.data_path(f"{stem}.{stamp}{ext}")
+
+    def _load_snapshot(self):
+        """Mapped newest snapshot, or None if there is none, it is from another
+        format version, or older than the lists file it was compiled from."""
+        files = self._snapshot_files()
+        if not files:
+            return None
+        snap = files[0][1]
+        try:
+            if os.path.getmtime(snap) < os.path.getmtime(storage.data_path(self._LISTS_FILE)):
+                return None
+        except OSError:
+            pass
+        return adblock.load_snapshot(snap)
+
+    def _write_snapshot(self, engine):
+        """Persist engine for the next cold start and switch to the mapped copy,
+        which releases the parsed rule objects."""
+        lists = self._lists
+        path = self._new_snapshot_path(time.time() * 1000)
+        try:
+            adblock.write_snapshot(engine, path, {
+                "updatedAt": lists["updatedAt"], "sourceCount": lists["sourceCount"],
+            })
+        except OSError as e:
+            print(f"[adblock] snapshot write failed: {e}")
+            return
+        mapped = adblock.load_snapshot(path)
+        if mapped is not None:
+            self._swap_engine(mapped)
+
+    def _swap_engine(self, engine):
+        """Make engine live; a mapped predecessor is retired after a grace period
+        (interceptRequest reads self._engine once per request on the IO thread)."""
+        old, self._engine = self._engine, engine
+        if isinstance(old, adblock.SnapshotEngine) and old is not engine:
+            self._retiring += 1
+            QTimer.singleShot(self._SNAPSHOT_RETIRE_MS, self, lambda: self._retire_snapshot(old))
+        elif not self._retiring:
+            self._prune_snapshots()
+
+    def _retire_snapshot(self, engine):
+        """Unmap a swapped-out snapshot; once none is pending, drop the old files."""
+        engine.close()
+        self._retiring -= 1
+        if not self._retiring:
+            self._prune_snapshots()
+
+    def _prune_snapshots(self):
+        """Delete the snapshot files older than the live one. Newer ones are
+        left alone: one may be a compile the update worker has yet to hand over."""
+        live = getattr(self._engine, "path", "")
+        files = self._snapshot_files()
+        live_stamp = next((stamp for stamp, path in files if path == live), None)
+        if live_stamp is None:
+            return
+        for stamp, path in files:
+            if stamp >= live_stamp:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"[adblock] could not remove old snapshot {path}: {e}")
+
     def _write_cfg(self):
         storage.write_json_sync(storage.data_path(self._CFG_FILE), self._ensure_cfg())
 
-    def _write_lists(self):
-        storage.write_json_sync(storage.data_path(self._LISTS_FILE), self._ensure_lists())
-        self._domain_set = set(self._ensure_lists()["domains"])
+    def _set_filters(self, filters, source_count):
+        """Replace the active lists; the engine is built first and swapped in one assignment.
 
-    def _emit_updated(self):
+        The filter text is kept in the lists file as the rebuild source; the
+        snapshot is what later startups load.
+        """
+        import time
+        engine = adblock.FilterEngine.from_lines(filters)
+        lists = self._ensure_lists()
+        lists["updatedAt"] = int(time.time() * 1000)
+        lists["sourceCount"] = source_count
+        self._swap_engine(engine)
+        storage.write_json_sync(storage.data_path(self._LISTS_FILE), dict(lists, filters=filters))
+        self._write_snapshot(engine)
+
+    def _emit_updated(self, update=None):
         cfg = self._ensure_cfg()
         lists = self._ensure_lists()
-        self.adblockUpdated.emit(json.dumps({
+        info = {
             "enabled": cfg["enabled"], "blockedCount": cfg["blockedCount"],
             "siteAllowlist": cfg["siteAllowlist"],
             "listUpdatedAt": lists["updatedAt"],
-            "domainCount": len(lists["domains"]),
-        }))
+            "domainCount": self._engine.filter_count,
+        }
+        if update is not None:
+            info["update"] = update
+        self.adblockUpdated.emit(json.dumps(info))
 
     @staticmethod
     def _normalize_host(raw):
@@ -2332,52 +3711,19 @@ class WebAdblockBridge(QObject):
             return ""
         return host
 
-    @staticmethod
-    def _parse_domains_from_list_text(text):
-        domains = set()
-        for line in str(text or "").splitlines():
-            line = line.strip()
-            if not line or line[0] in ("!", "["):
-                continue
-            if "##" in line or "#@#" in line:
-                continue
-            if not line.startswith("||"):
-                continue
-            rule = line[2:]
-            import re
-            m = re.search(r'[\^/$*]', rule)
-            if m:
-                rule = rule[:m.start()]
-            if not rule:
-                continue
-            host = WebAdblockBridge._normalize_host(rule)
-            if host:
-                domains.add(host)
-        return domains
-
     def ensure_initial_lists(self):
         """Ensure fallback domains exist if no lists loaded yet."""
-        lists = self._ensure_lists()
-        if lists["domains"]:
+        self._ensure_lists()
+        if self._engine.filter_count:
             return
-        import time
-        lists["domains"] = list(self._FALLBACK_DOMAINS)
-        lists["updatedAt"] = int(time.time() * 1000)
-        lists["sourceCount"] = 0
-        self._domain_set = set(lists["domains"])
-        self._write_lists()
+        self._set_filters([f"||{d}^" for d in self._FALLBACK_DOMAINS], 0)
 
-    def host_matches_blocked(self, hostname):
-        """Check if hostname is in blocklist (hierarchical matching)."""
-        host = self._normalize_host(hostname)
-        if not host:
-            return False
-        self._ensure_lists()
-        if not self._domain_set:
-            return False
+    @staticmethod
+    def _host_in(host, hosts):
+        """Hierarchical match: a.b.example.com hits example.com in hosts."""
         probe = host
         while probe:
-            if probe in self._domain_set:
+            if probe in hosts:
                 return True
             dot = probe.find(".")
             if dot < 0:
@@ -2385,38 +3731,90 @@ class WebAdblockBridge(QObject):
             probe = probe[dot + 1:]
         return False
 
+    def host_matches_blocked(self, hostname):
+        """Check if a bare hostname is blocked by the lists (any rule, no context)."""
+        host = self._normalize_host(hostname)
+        if not host:
+            return False
+        self._ensure_lists()
+        return self._engine.match(f"https://{host}/", host)
+
+    def is_blocked(self, url, host, first_party_host="", resource_type="other"):
+        """Hot-path match on a pre-split request. No parsing, no bookkeeping.
+
+        Called from the WebEngine IO thread by AdblockRequestInterceptor, so it
+        only reads state that is swapped wholesale on the GUI thread.
+        """
+        if not self._cfg["enabled"] or not host:
+            return False
+        if first_party_host and self._allow_hosts and self._host_in(first_party_host, self._allow_hosts):
+            return False
+        return self._engine.match(url, host, first_party_host, resource_type)
+
     def should_block_request(self, url, first_party_url=""):
         """Internal: check if a request URL should be blocked."""
-        cfg = self._ensure_cfg()
-        if not cfg["enabled"]:
-            return False
-        # Check site allowlist
-        try:
-            from urllib.parse import urlparse
-            top = self._normalize_host(urlparse(str(first_party_url or "")).hostname or "")
-            if top:
-                for a in cfg["siteAllowlist"]:
-                    ah = self._normalize_host(a)
-                    if ah and (top == ah or top.endswith("." + ah)):
-                        return False
-        except Exception:
-            pass
+        self._ensure_cfg()
+        self._ensure_lists()
         try:
             from urllib.parse import urlparse
             u = urlparse(str(url or ""))
             if u.scheme not in ("http", "https"):
                 return False
-            if not self.host_matches_blocked(u.hostname or ""):
+            top = self._normalize_host(urlparse(str(first_party_url or "")).hostname or "")
+            if not self.is_blocked(str(url), self._normalize_host(u.hostname or ""), top):
                 return False
-            import time
-            cfg["blockedCount"] = cfg["blockedCount"] + 1
-            cfg["updatedAt"] = int(time.time() * 1000)
-            if cfg["blockedCount"] % 25 == 0:
-                self._write_cfg()
+            self.record_blocked(1)
             return True
         except Exception:
             return False
 
+    def record_blocked(self, count):
+        """Fold blocked requests into the persisted counter (debounced write)."""
+        if count <= 0:
+            return
+        import time
+        cfg = self._ensure_cfg()
+        cfg["blockedCount"] = cfg["blockedCount"] + count
+        cfg["updatedAt"] = int(time.time() * 1000)
+        storage.write_json_debounced(storage.data_path(self._CFG_FILE), cfg, 1000)
+
+    # --- Network-layer blocking ---
+
+    _FLUSH_INTERVAL_MS = 2000
+
+    def install_interceptor(self, profile):
+        """Block ad/tracker requests on profile before they are fetched."""
+        self._ensure_cfg()
+        self.ensure_initial_lists()
+        self._interceptor = AdblockRequestInterceptor(self, self)
+        profile.setUrlRequestInterceptor(self._interceptor)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(self._FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush_interceptor_counts)
+        self._flush_timer.start()
+        return self._interceptor
+
+    def _flush_interceptor_counts(self):
+        # The interceptor only ever increments; take the delta since last flush.
+        if not self._interceptor:
+            return
+        blocked = self._interceptor.blocked
+        delta = blocked - self._flushed_blocked
+        if delta > 0:
+            self._flushed_blocked = blocked
+            self.record_blocked(delta)
+
+    def _interceptor_stats(self):
+        i = self._interceptor
+        if not i:
+            return None
+        n = i.requests
+        return {
+            "requests": n, "blocked": i.blocked,
+            "avgMicros": round(i.total_ns / n / 1000, 2) if n else 0,
+            "maxMicros": round(i.max_ns / 1000, 2),
+        }
+
     @Slot(result=str)
     def get(self):
         cfg = self._ensure_cfg()
@@ -2425,7 +3823,7 @@ class WebAdblockBridge(QObject):
             "enabled": cfg["enabled"], "siteAllowlist": cfg["siteAllowlist"],
             "blockedCount": cfg["blockedCount"],
             "listUpdatedAt": lists["updatedAt"],
-            "domainCount": len(lists["domains"]),
+            "domainCount": self._engine.filter_count,
         }))
 
     @Slot(str, result=str)
@@ -2439,42 +3837,86 @@ class WebAdblockBridge(QObject):
         self._emit_updated()
         return json.dumps(_ok({"enabled": cfg["enabled"]}))
 
+    # --- List updates ---
+
+    _LIST_TIMEOUT_S = 30
+
     @Slot(result=str)
     def updateLists(self):
+        """Refresh subscriptions in the background; adblockUpdated reports the outcome."""
         cfg = self._ensure_cfg()
-        urls = cfg["listUrls"] if cfg["listUrls"] else list(self._DEFAULT_LIST_URLS)
-        combined = set()
-        source_count = 0
-        import urllib.request
-        for target in urls:
-            target = str(target or "").strip()
-            if not target.startswith(("http://", "https://")):
-                continue
-            try:
-                req = urllib.request.Request(target, headers={"User-Agent": "Tankoban-Max/Adblock"})
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    txt = resp.read().decode("utf-8", errors="replace")
-                parsed = self._parse_domains_from_list_text(txt)
-                combined.update(parsed)
-                source_count += 1
-            except Exception:
-                pass
-        if combined:
-            lists = self._ensure_lists()
-            import time
-            lists["domains"] = list(combined)
-            lists["updatedAt"] = int(time.time() * 1000)
-            lists["sourceCount"] = source_count
-            self._domain_set = set(lists["domains"])
-            self._write_lists()
-            cfg["lastListUpdateAt"] = lists["updatedAt"]
+        self._ensure_lists()
+        if self._update_thread is not None and self._update_thread.is_alive():
+            return json.dumps(_ok({"pending": True}))
+        urls = [str(u or "").strip() for u in (cfg["listUrls"] or self._DEFAULT_LIST_URLS)]
+        urls = [u for u in urls if u.startswith(("http://", "https://"))]
+        if not urls:
+            return json.dumps(_err("No lists loaded"))
+        import threading
+        self._update_thread = threading.Thread(
+            target=self._run_list_update, args=(urls,), name="adblock-update", daemon=True,
+        )
+        self._update_thread.start()
+        return json.dumps(_ok({"pending": True}))
+
+    def _run_list_update(self, urls):
+        """Worker thread: fetch, parse and compile; never touches the live engine."""
+        result = {"ok": False, "error": "No lists loaded"}
+        try:
+            lists_path = storage.data_path(self._LISTS_FILE)
+            raw = storage.read_json(lists_path, None)
+            sources = raw.get("sources") if isinstance(raw, dict) and isinstance(raw.get("sources"), list) else []
+            with adblock.worker_pool() as pool:
+                entries, report = adblock.update_lists(urls, sources, self._LIST_TIMEOUT_S, pool)
+                result.update(report)
+                if entries:
+                    result.update(ok=True, error="")
+                if entries and report["changed"]:
+                    now = int(time.time() * 1000)
+                    # Source list first: a snapshot older than it is treated as stale
+                    storage.write_json_sync(lists_path, {
+                        "updatedAt": now, "sourceCount": len(entries), "sources": entries,
+                    })
+                    fresh = self._new_snapshot_path(now)
+                    result["filterCount"] = adblock.run_in_pool(
+                        pool, adblock.compile_snapshot, adblock.combine_filters(entries), fresh,
+                        {"updatedAt": now, "sourceCount": len(entries)},
+                    )
+                    result.update(snapshot=fresh, updatedAt=now, sourceCount=len(entries))
+        except Exception as e:
+            result.update(ok=False, error=str(e) or type(e).__name__)
+        self._listsUpdateDone.emit(result)
+
+    def _finish_list_update(self, result):
+        """GUI thread: map the new snapshot and swap it in with one assignment.
+
+        The worker compiled it under its final (new) name, so there is nothing
+        to rename; the previous snapshot is unmapped and deleted by _swap_engine.
+        """
+        cfg = self._ensure_cfg()
+        lists = self._ensure_lists()
+        fresh = result.pop("snapshot", None)
+        if fresh:
+            engine = adblock.load_snapshot(fresh)
+            if engine is None:
+                result.update(ok=False, error=f"snapshot failed to load: {fresh}")
+                try:
+                    os.remove(fresh)
+                except OSError:
+                    pass
+            else:
+                self._swap_engine(engine)
+                lists["updatedAt"] = result["updatedAt"]
+                lists["sourceCount"] = result["sourceCount"]
+                cfg["lastListUpdateAt"] = result["updatedAt"]
+        if result.get("ok"):
             cfg["updatedAt"] = int(time.time() * 1000)
             self._write_cfg()
-            self._emit_updated()
-            return json.dumps(_ok({
-                "updatedAt": lists["updatedAt"], "domains": len(lists["domains"]), "sources": source_count,
-            }))
-        return json.dumps(_err("No lists loaded"))
+        self._emit_updated({
+            "ok": result.get("ok", False), "error": result.get("error", ""),
+            "changed": result.get("changed", False), "fetched": result.get("fetched", 0),
+            "notModified": result.get("notModified", 0), "failed": result.get("failed", 0),
+        })
 
     @Slot(result=str)
     def stats(self):
@@ -2482,12 +3924,78 @@ class WebAdblockBridge(QObject):
         lists = self._ensure_lists()
         return json.dumps(_ok({"stats": {
             "enabled": cfg["enabled"], "blockedCount": cfg["blockedCount"],
-            "domainCount": len(lists["domains"]), "listUpdatedAt": lists["updatedAt"],
+            "domainCount": self._engine.filter_count, "filterCount": self._engine.filter_count,
+            "listUpdatedAt": lists["updatedAt"],
             "sourceCount": lists["sourceCount"],
             "siteAllowlistCount": len(cfg["siteAllowlist"]),
+            "interceptor": self._interceptor_stats(),
         }}))
 
 
+class AdblockRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    """Profile-wide request filter backed by WebAdblockBridge.is_blocked().
+
+    interceptRequest() runs on the WebEngine IO thread for every subresource,
+    so it keeps to plain counters (single writer) and never touches the disk
+    or emits signals; the bridge folds the counters in on the GUI thread.
+    """
+
+    def __init__(self, adblock, parent=None):
+        super().__init__(parent)
+        self._adblock = adblock
+        self._main_frame = QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame
+        self._encoded = QUrl.ComponentFormattingOption.FullyEncoded
+        self._types = self._resource_type_names()
+        self.requests = 0
+        self.blocked = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    # QWebEngineUrlRequestInfo.ResourceType member -> filter-list type name
+    _TYPE_NAMES = {
+        "ResourceTypeSubFrame": "subdocument",
+        "ResourceTypeStylesheet": "stylesheet",
+        "ResourceTypeScript": "script",
+        "ResourceTypeImage": "image",
+        "ResourceTypeFavicon": "image",
+        "ResourceTypeFontResource": "font",
+        "ResourceTypeObject": "object",
+        "ResourceTypePluginResource": "object",
+        "ResourceTypeMedia": "media",
+        "ResourceTypeXhr": "xmlhttprequest",
+        "ResourceTypePing": "ping",
+        "ResourceTypeCspReport": "ping",
+        "ResourceTypeWebSocket": "websocket",
+    }
+
+    @classmethod
+    def _resource_type_names(cls):
+        names = {}
+        for name, type_name in cls._TYPE_NAMES.items():
+            member = getattr(QWebEngineUrlRequestInfo.ResourceType, name, None)
+            if member is not None:
+                names[member] = type_name
+        return names
+
+    def interceptRequest(self, info):
+        t0 = time.perf_counter_ns()
+        rtype = info.resourceType()
+        if rtype != self._main_frame:
+            url = info.requestUrl()
+            if url.scheme() in ("http", "https", "ws", "wss"):
+                host = url.host(self._encoded)
+                top = info.firstPartyUrl().host(self._encoded)
+                href = bytes(url.toEncoded()).decode("ascii", "replace")
+                if self._adblock.is_blocked(href, host, top, self._types.get(rtype, "other")):
+                    info.block(True)
+                    self.blocked += 1
+        dt = time.perf_counter_ns() - t0
+        self.requests += 1
+        self.total_ns += dt
+        if dt > self.max_ns:
+            self.max_ns = dt
+
+
 class WebFindBridge(StubNamespace):
     findResult = Signal(str)
     @Slot(str, result=str)
@@ -2793,6 +4301,37 @@ BRIDGE_SHIM_JS = r"""
       };
     }
 
+    // Helper: wrap a @Slot that may finish later — a {pending, requestId} reply
+    // resolves when `signal` delivers the result carrying the same requestId
+    function wrapAsync(fn, ctx, signal) {
+      var waiting = {};
+      var early = {};
+      signal.connect(function(jsonStr) {
+        var r;
+        try { r = JSON.parse(jsonStr); } catch(e) { return; }
+        if (!r || !r.requestId) return;
+        if (waiting[r.requestId]) {
+          var done = waiting[r.requestId];
+          delete waiting[r.requestId];
+          done(r);
+        } else {
+          early[r.requestId] = r;
+        }
+      });
+      var call = wrap(fn, ctx);
+      return function() {
+        return call.apply(null, arguments).then(function(r) {
+          if (!r || !r.pending || !r.requestId) return r;
+          if (early[r.requestId]) {
+            var got = early[r.requestId];
+            delete early[r.requestId];
+            return got;
+          }
+          return new Promise(function(resolve) { waiting[r.requestId] = resolve; });
+        });
+      };
+    }
+
     // Helper: wrap binary-returning @Slot — decodes base64 .data field to ArrayBuffer
     function wrapBinary(fn, ctx) {
       return function() {
@@ -2924,7 +4463,12 @@ BRIDGE_SHIM_JS = r"""
         addFeed:      wrap(b.booksOpds.addFeed, b.booksOpds),
         updateFeed:   wrap(b.booksOpds.updateFeed, b.booksOpds),
         removeFeed:   wrap(b.booksOpds.removeFeed, b.booksOpds),
-        fetchCatalog: wrap(b.booksOpds.fetchCatalog, b.booksOpds),
+        fetchCatalog: wrapAsync(b.booksOpds.fetchCatalog, b.booksOpds, b.booksOpds.catalogFetched),
+        crawlFeeds:   wrap(b.booksOpds.crawlFeeds, b.booksOpds),
+        cancelCrawl:  wrap(b.booksOpds.cancelCrawl, b.booksOpds),
+        getIndexStatus: wrap(b.booksOpds.getIndexStatus, b.booksOpds),
+        searchIndex:  wrap(b.booksOpds.searchIndex, b.booksOpds),
+        onCrawlProgress: onEvent(b.booksOpds.crawlProgress),
         onFeedsUpdated: onEvent(b.booksOpds.feedsUpdated),
       },
 
@@ -2987,7 +4531,7 @@ BRIDGE_SHIM_JS = r"""
         getState:              wrap(b.video.getState, b.video),
         scan:                  wrap(b.video.scan, b.video),
         scanShow:              wrap(b.video.scanShow, b.video),
-        generateShowThumbnail: wrap(b.video.generateShowThumbnail, b.video),
+        generateShowThumbnail: wrapAsync(b.video.generateShowThumbnail, b.video, b.video.showThumbnailGenerated),
         cancelScan:            wrap(b.video.cancelScan, b.video),
         addFolder:             wrap(b.video.addFolder, b.video),
         addShowFolder:         wrap(b.video.addShowFolder, b.video),
@@ -3004,6 +4548,7 @@ BRIDGE_SHIM_JS = r"""
         getEpisodesForShow:    wrap(b.video.getEpisodesForShow, b.video),
         getEpisodesForRoot:    wrap(b.video.getEpisodesForRoot, b.video),
         getEpisodesByIds:      wrap(b.video.getEpisodesByIds, b.video),
+        getMediaInfo:          wrapAsync(b.video.getMediaInfo, b.video, b.video.mediaInfoReady),
         onUpdated:             onEvent(b.video.videoUpdated),
         onShellPlay:           onEvent(b.video.shellPlay),
         onScanStatus:          onEvent(b.video.scanStatus),
@@ -3166,6 +4711,7 @@ BRIDGE_SHIM_JS = r"""
         listDestinationFolders: wrap(b.webSources.listDestinationFolders, b.webSources),
         resolveDestinationPicker: wrap(b.webSources.resolveDestinationPicker, b.webSources),
         pickSaveFolder:         wrap(b.webSources.pickSaveFolder, b.webSources),
+        setDownloadSpeedLimit:  wrap(b.webSources.setDownloadSpeedLimit, b.webSources),
         onUpdated:              onEvent(b.webSources.sourcesUpdated),
         onDownloadStarted:      onEvent(b.webSources.downloadStarted),
         onDownloadProgress:     onEvent(b.webSources.downloadProgress),
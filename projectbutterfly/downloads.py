@@ -0,0 +1,635 @@
+"""
+Project Butterfly — Direct Download Engine
+
+Backs WebSourcesBridge.downloadFromUrl / pauseDownload / resumeDownload /
+cancelDownload (OPDS acquisitions, direct links):
+
+  - Bodies stream to "<destination>.part" CHUNK_SIZE bytes at a time and the
+    part file is renamed into place when complete; nothing holds a whole body.
+  - Resume uses Range with If-Range (ETag, else Last-Modified), so a paused or
+    interrupted download continues where it stopped and starts over cleanly
+    if the file changed on the server.
+  - Files of SEGMENT_MIN_BYTES or more on servers that accept ranges are
+    fetched as up to SEGMENTS parallel byte ranges into a preallocated file.
+  - One token bucket caps the combined bandwidth of all downloads.
+  - The queue is the download history file (same record shape as the Electron
+    build plus a "resume" block); unfinished records are re-queued on start.
+
+Pure Python (http.client), no Qt. Callbacks run on worker threads.
+"""
+
+import http.client
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+from urllib.parse import unquote, urljoin, urlsplit
+
+import opds_http
+import storage
+
+CHUNK_SIZE = 256 * 1024
+SEGMENTS = 4
+SEGMENT_MIN_BYTES = 16 * 1024 * 1024
+MAX_ACTIVE = 3
+MAX_HISTORY = 1000
+RETRIES = 3
+TIMEOUT_S = 30
+PROGRESS_INTERVAL_S = 0.25
+PERSIST_INTERVAL_S = 1.0
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 8
+_ACTIVE_STATES = ("downloading", "paused")
+
+_MIME_EXT = {
+    "application/epub+zip": ".epub", "application/pdf": ".pdf",
+    "application/x-cbr": ".cbr", "application/vnd.comicbook-rar": ".cbr",
+    "application/vnd.comicbook+zip": ".cbz", "application/x-cbz": ".cbz", "application/zip": ".cbz",
+    "text/plain": ".txt", "application/x-mobipocket-ebook": ".mobi",
+    "audio/mp4": ".m4a", "audio/x-m4a": ".m4a", "audio/mpeg": ".mp3", "audio/flac": ".flac",
+    "audio/wav": ".wav", "audio/x-wav": ".wav", "video/mp4": ".mp4", "video/x-matroska": ".mkv",
+}
+
+
+class _Stopped(Exception):
+    """A pause, cancel or shutdown request reached a transfer loop."""
+
+
+class _Restart(Exception):
+    """The server ignored If-Range, or a stream without range support broke."""
+
+
+class _ServerBusy(http.client.HTTPException):
+    """A 5xx or 429 answer to a range request; retried like a dropped connection."""
+
+
+# ========== FILENAMES (same rules as webSources/index.js) ==========
+
+def sanitize_filename(name) -> str:
+    s = re.sub(r'[\\/:*?"<>|]+', "_", str(name or "").strip())
+    s = re.sub(r"\s+", " ", s).strip() or "download"
+    return s[:180].strip()
+
+
+def _filename_from_disposition(value: str) -> str:
+    m = re.search(r"filename\*=UTF-8''([^;]+)", value or "", re.I)
+    if m:
+        return sanitize_filename(unquote(m.group(1)))
+    m = re.search(r'filename="([^"]+)"', value or "", re.I) or re.search(r"filename=([^;]+)", value or "", re.I)
+    return sanitize_filename(m.group(1).strip()) if m else ""
+
+
+def _filename_from_url(url: str) -> str:
+    base = os.path.basename(unquote(urlsplit(url or "").path or ""))
+    return sanitize_filename(base) if base else ""
+
+
+def suggested_filename(request: dict, headers: dict, final_url: str) -> str:
+    base = (sanitize_filename(request.get("suggestedFilename")) if request.get("suggestedFilename") else "") \
+        or _filename_from_disposition(headers.get("content-disposition", "")) \
+        or _filename_from_url(final_url) or _filename_from_url(request.get("url", "")) \
+        or (sanitize_filename(request.get("title")) if request.get("title") else "") or "download"
+    if not os.path.splitext(base)[1]:
+        base += _MIME_EXT.get(headers.get("content-type", "").split(";")[0].strip().lower(), "")
+    return sanitize_filename(base)
+
+
+def unique_destination(folder: str, filename: str) -> str:
+    name = sanitize_filename(filename)
+    stem, ext = os.path.splitext(name)
+    dest = os.path.join(folder, name)
+    n = 1
+    while os.path.exists(dest) or os.path.exists(dest + ".part"):
+        dest = os.path.join(folder, f"{stem} ({n}){ext}")
+        n += 1
+    return dest
+
+
+# ========== TRANSFER ==========
+
+class RateLimiter:
+    """Token bucket shared by every stream; rate 0 means unlimited."""
+
+    def __init__(self, rate: int = 0):
+        self._rate = max(0, int(rate))
+        self._tokens = float(self._rate)
+        self._at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def set_rate(self, rate: int):
+        with self._lock:
+            self._rate = max(0, int(rate))
+            self._tokens = min(self._tokens, float(self._rate))
+
+    def consume(self, n: int, stop: threading.Event):
+        with self._lock:
+            if self._rate <= 0:
+                return
+            now = time.monotonic()
+            self._tokens = min(float(self._rate), self._tokens + (now - self._at) * self._rate)
+            self._at = now
+            self._tokens -= n
+            delay = -self._tokens / self._rate if self._tokens < 0 else 0
+        if delay > 0:
+            stop.wait(delay)
+
+
+def _open(url: str, headers: dict, timeout: float):
+    """GET following redirects; returns (connection, response, final url).
+    The caller reads the body and closes the connection."""
+    for _ in range(_MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError("Invalid URL")
+        cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        conn = cls(parts.hostname, parts.port, timeout=timeout)
+        target = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        try:
+            conn.request("GET", target, headers=headers)
+            resp = conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+        location = resp.getheader("Location")
+        if resp.status in _REDIRECTS and location:
+            conn.close()
+            url = urljoin(url, location)
+            continue
+        return conn, resp, url
+    raise http.client.HTTPException("Too many redirects")
+
+
+def plan_segments(total: int, ranges: bool) -> list:
+    """[[start, end (inclusive, -1 = until EOF), next byte to write]]"""
+    if total <= 0:
+        return [[0, -1, 0]]
+    if not ranges or total < SEGMENT_MIN_BYTES:
+        return [[0, total - 1, 0]]
+    size = -(-total // SEGMENTS)
+    return [[s, min(total, s + size) - 1, s] for s in range(0, total, size)]
+
+
+class _Task:
+    """Runtime side of one download (the persisted record is the entry dict)."""
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self.reason = ""
+        self.thread = None
+        self.first = None  # (connection, response) left open by the first request
+        self.lock = threading.Lock()
+
+
+# ========== MANAGER ==========
+
+class DownloadManager:
+    """Queue, workers and history for direct downloads.
+
+    emit(kind, entry) — kind in "started", "progress", "completed", "updated";
+        entry is a snapshot dict (for "updated", None: the history changed).
+    resolve(filename, request) — called on a worker thread once the filename
+        is known; returns {"ok", "destination", "library"} or {"ok": False,
+        "cancelled", "error"}. May block (destination picker).
+    """
+
+    def __init__(self, history_path: str, emit: Callable[[str, Optional[dict]], None],
+                 resolve: Callable[[str, dict], dict], max_active: int = MAX_ACTIVE):
+        self._path = history_path
+        self._emit = emit
+        self._resolve = resolve
+        self._max_active = max_active
+        self._lock = threading.RLock()
+        self._entries = []
+        self._queue = deque()
+        self._tasks = {}  # id -> _Task (running)
+        self._closing = False
+        self._persist_at = 0.0
+        self.limiter = RateLimiter()
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        raw = storage.read_json(self._path, None)
+        raw = raw if isinstance(raw, dict) else {}
+        self._entries = [d for d in raw.get("downloads", []) if isinstance(d, dict) and d.get("id")]
+        self.limiter.set_rate(int(raw.get("speedLimit", 0) or 0))
+
+    def _persist(self):
+        with self._lock:
+            del self._entries[MAX_HISTORY:]
+            data = {"downloads": [dict(d) for d in self._entries], "updatedAt": int(time.time() * 1000),
+                    "speedLimit": self.limiter.rate}
+            self._persist_at = time.monotonic()
+        storage.write_json_sync(self._path, data)
+
+    def _find(self, dl_id: str) -> Optional[dict]:
+        for d in self._entries:
+            if str(d.get("id")) == dl_id:
+                return d
+        return None
+
+    def _update(self, entry: dict, emit: str = "", persist: bool = True, **patch):
+        with self._lock:
+            entry.update(patch, updatedAt=int(time.time() * 1000))
+            snapshot = dict(entry)
+        if persist:
+            self._persist()
+        if emit:
+            self._emit(emit, snapshot)
+        if persist and emit != "progress":
+            self._emit("updated", None)
+
+    def start(self):
+        """Re-queue downloads that were running when the app last exited."""
+        with self._lock:
+            for d in reversed(self._entries):
+                if d.get("state") == "downloading":
+                    self._queue.appendleft(d["id"])
+            self._pump()
+
+    def shutdown(self):
+        """Stop transfers but leave them queued for the next start."""
+        with self._lock:
+            self._closing = True
+            tasks = list(self._tasks.values())
+            for t in tasks:
+                t.reason = t.reason or "shutdown"
+                t.stop.set()
+        for t in tasks:
+            if t.thread is not None:
+                t.thread.join(timeout=2)
+        self._persist()
+
+    # --- Public API ---
+
+    def history(self) -> list:
+        with self._lock:
+            return [dict(d) for d in self._entries]
+
+    def set_speed_limit(self, bytes_per_sec: int):
+        self.limiter.set_rate(bytes_per_sec)
+        self._persist()
+
+    def add(self, dl_id: str, request: dict) -> dict:
+        now = int(time.time() * 1000)
+        entry = {
+            "id": dl_id, "filename": sanitize_filename(request.get("suggestedFilename") or request.get("title")),
+            "destination": "", "library": "", "state": "downloading", "queued": True,
+            "startedAt": now, "finishedAt": None, "error": "",
+            "pageUrl": str(request.get("referer") or ""), "downloadUrl": str(request.get("url") or ""),
+            "totalBytes": 0, "receivedBytes": 0, "progress": None, "bytesPerSec": 0,
+            "transport": "direct", "canPause": True, "canResume": True, "canCancel": True,
+            "request": request,
+        }
+        with self._lock:
+            self._entries.insert(0, entry)
+            self._queue.append(dl_id)
+            self._pump()
+        self._persist()
+        self._emit("updated", None)
+        return dict(entry)
+
+    def pause(self, dl_id: str) -> Optional[str]:
+        """Returns an error string, or None on success."""
+        with self._lock:
+            entry = self._find(dl_id)
+            if entry is None or entry.get("state") not in _ACTIVE_STATES:
+                return "Download not active"
+            if entry["state"] == "paused":
+                return None
+            task = self._tasks.get(dl_id)
+            if task is not None:
+                task.reason = "pause"
+                task.stop.set()  # the worker records the final positions
+            if dl_id in self._queue:
+                self._queue.remove(dl_id)
+        self._update(entry, state="paused", queued=False, bytesPerSec=0)
+        return None
+
+    def resume(self, dl_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._find(dl_id)
+            if entry is None or entry.get("state") != "paused":
+                return "Download not paused" if entry is not None else "Download not active"
+            entry.update(state="downloading", queued=True, error="")
+            if dl_id not in self._tasks:  # else _finish_task re-queues it once the old worker exits
+                self._queue.append(dl_id)
+                self._pump()
+        self._update(entry)
+        return None
+
+    def cancel(self, dl_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._find(dl_id)
+            if entry is None or entry.get("state") not in _ACTIVE_STATES:
+                return "Download not active"
+            task = self._tasks.get(dl_id)
+            if task is not None:
+                task.reason = "cancel"
+                task.stop.set()
+                return None
+            if dl_id in self._queue:
+                self._queue.remove(dl_id)
+        self._discard_part(entry)
+        self._update(entry, emit="completed", state="cancelled", queued=False, finishedAt=int(time.time() * 1000),
+                     error="", bytesPerSec=0)
+        return None
+
+    def clear_history(self):
+        with self._lock:
+            self._entries = [d for d in self._entries if d.get("state") in _ACTIVE_STATES]
+        self._persist()
+        self._emit("updated", None)
+
+    def remove(self, dl_id: str) -> bool:
+        with self._lock:
+            entry = self._find(dl_id)
+            if entry is None or entry.get("state") in _ACTIVE_STATES:
+                return False
+            self._entries.remove(entry)
+        self._persist()
+        self._emit("updated", None)
+        return True
+
+    # --- Scheduling ---
+
+    def _pump(self):
+        with self._lock:
+            while self._queue and len(self._tasks) < self._max_active and not self._closing:
+                dl_id = self._queue.popleft()
+                entry = self._find(dl_id)
+                if entry is None or entry.get("state") != "downloading":
+                    continue
+                task = _Task()
+                self._tasks[dl_id] = task
+                task.thread = threading.Thread(target=self._run, args=(entry, task),
+                                               name=f"download-{dl_id}", daemon=True)
+                task.thread.start()
+
+    def _finish_task(self, entry):
+        with self._lock:
+            self._tasks.pop(entry["id"], None)
+            requeue = entry.get("state") == "downloading" and entry.get("queued")
+            if requeue:
+                self._queue.append(entry["id"])  # resumed while it was stopping
+            self._pump()
+
+    @staticmethod
+    def _discard_part(entry):
+        dest = entry.get("destination")
+        if dest:
+            try:
+                os.unlink(dest + ".part")
+            except OSError:
+                pass
+
+    # --- Worker ---
+
+    def _headers(self, entry, extra=None):
+        h = {"User-Agent": opds_http.USER_AGENT, "Accept": "*/*", "Accept-Encoding": "identity"}
+        req = entry.get("request") or {}
+        if req.get("referer"):
+            h["Referer"] = str(req["referer"])
+        if extra:
+            h.update(extra)
+        return h
+
+    def _run(self, entry, task):
+        try:
+            if not entry.get("destination"):
+                self._begin(entry, task)
+            else:
+                self._update(entry, emit="started", queued=False)
+            self._transfer(entry, task)
+            self._complete(entry)
+        except _Stopped:
+            self._stopped(entry, task)
+        except Exception as e:
+            self._fail(entry, str(e) or type(e).__name__)
+        finally:
+            self._finish_task(entry)
+
+    def _begin(self, entry, task):
+        """First request: learn name/size/validators, pick a destination, plan segments.
+        The open response becomes the stream for the first segment."""
+        req = entry.get("request") or {}
+        url = str(req.get("url") or entry.get("downloadUrl") or "")
+        conn, resp, final_url = _open(url, self._headers(entry), TIMEOUT_S)
+        try:
+            if not 200 <= resp.status < 300:
+                raise ValueError(f"HTTP {resp.status}" + (f" {resp.reason}" if resp.reason else ""))
+            hdrs = {k.lower(): v for k, v in resp.getheaders()}
+            filename = suggested_filename(req, hdrs, final_url)
+            self._update(entry, persist=False, filename=filename, downloadUrl=final_url)
+            route = self._resolve(filename, req)
+            if task.stop.is_set():
+                raise _Stopped()
+            if not route.get("ok"):
+                if route.get("cancelled"):
+                    task.reason = "cancel"
+                    raise _Stopped()
+                raise ValueError(route.get("error") or "No destination")
+            dest = unique_destination(os.path.dirname(route["destination"]), os.path.basename(route["destination"]))
+            total = 0
+            if "content-encoding" not in hdrs:
+                try:
+                    total = max(0, int(hdrs.get("content-length", "0")))
+                except ValueError:
+                    total = 0
+            ranges = hdrs.get("accept-ranges", "").lower() == "bytes"
+            segments = plan_segments(total, ranges)
+            with open(dest + ".part", "wb") as fh:
+                if len(segments) > 1:
+                    fh.truncate(total)
+            self._update(entry, emit="started", filename=os.path.basename(dest), destination=dest,
+                         library=route.get("library", ""), queued=False, totalBytes=total, receivedBytes=0,
+                         progress=0 if total else None,
+                         resume={"url": final_url, "validator": hdrs.get("etag") or hdrs.get("last-modified", ""),
+                                 "ranges": ranges, "segments": segments})
+            task.first = (conn, resp)
+            conn = None  # handed over to the first segment
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _transfer(self, entry, task):
+        """Run the unfinished segments in parallel, reporting progress until done."""
+        resume = entry["resume"]
+        first, task.first = task.first, None
+        errors = []
+        restarts = 0
+        while True:
+            segments = [s for s in resume["segments"] if s[1] < 0 or s[2] <= s[1]]
+            threads = []
+            for seg in segments:
+                stream = None
+                if first is not None and seg[0] == 0 and seg[2] == 0:
+                    stream, first = first, None
+                t = threading.Thread(target=self._segment, args=(entry, task, seg, stream, errors),
+                                     name=f"download-seg-{seg[0]}", daemon=True)
+                t.start()
+                threads.append(t)
+            if first is not None:
+                first[0].close()
+                first = None
+            self._watch(entry, task, threads)
+            failures = [e for e in errors if not isinstance(e, _Restart)]
+            if failures:
+                raise failures[0]
+            if task.stop.is_set():
+                raise _Stopped()
+            if errors:
+                # Content changed under us, or a non-resumable stream broke: start over
+                restarts += 1
+                if restarts > RETRIES:
+                    raise ValueError("Download kept restarting")
+                errors.clear()
+                with open(entry["destination"] + ".part", "wb"):
+                    pass
+                resume.update(segments=[[0, -1, 0]], ranges=False)
+                self._update(entry, receivedBytes=0, totalBytes=0, progress=None)
+                continue
+            break
+        total = entry.get("totalBytes") or 0
+        got = os.path.getsize(entry["destination"] + ".part")
+        if total and got != total:
+            raise ValueError(f"Size mismatch ({got} of {total} bytes)")
+
+    def _watch(self, entry, task, threads):
+        """Progress/persistence ticker for a running transfer (worker thread)."""
+        last_at, last_bytes = time.monotonic(), self._received(entry)
+        speed = 0
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(PROGRESS_INTERVAL_S)
+                if t.is_alive():
+                    break
+            now = time.monotonic()
+            received = self._received(entry)
+            if now - last_at >= PROGRESS_INTERVAL_S:
+                speed = int((received - last_bytes) / (now - last_at))
+                last_at, last_bytes = now, received
+            total = entry.get("totalBytes") or 0
+            self._update(entry, emit="progress", persist=now - self._persist_at >= PERSIST_INTERVAL_S,
+                         receivedBytes=received, bytesPerSec=speed,
+                         progress=min(1.0, received / total) if total else None)
+
+    @staticmethod
+    def _received(entry):
+        return sum(max(0, s[2] - s[0]) for s in entry["resume"]["segments"])
+
+    def _segment(self, entry, task, seg, stream, errors):
+        """Stream one byte range into the part file, reopening with Range on errors."""
+        resume = entry["resume"]
+        attempts = 0
+        try:
+            with open(entry["destination"] + ".part", "r+b") as fh:
+                while seg[1] < 0 or seg[2] <= seg[1]:
+                    if task.stop.is_set():
+                        return
+                    try:
+                        # Inside the retry block: a reconnect that times out,
+                        # resets or gets a 5xx counts as an attempt and backs off
+                        if stream is None:
+                            stream = self._open_range(entry, seg)
+                        conn, resp = stream
+                        fh.seek(seg[2])
+                        while seg[1] < 0 or seg[2] <= seg[1]:
+                            want = CHUNK_SIZE
+                            if self.limiter.rate:
+                                want = max(16 * 1024, min(want, self.limiter.rate // 8))
+                            if seg[1] >= 0:
+                                want = min(want, seg[1] - seg[2] + 1)
+                            chunk = resp.read(want)
+                            if not chunk:
+                                if seg[1] < 0:
+                                    seg[1] = seg[2] - 1  # unknown length: EOF ends it
+                                    break
+                                raise http.client.IncompleteRead(b"", seg[1] - seg[2] + 1)
+                            self.limiter.consume(len(chunk), task.stop)
+                            fh.write(chunk)
+                            with task.lock:
+                                seg[2] += len(chunk)
+                            if task.stop.is_set():
+                                return
+                        attempts = 0
+                    except (OSError, http.client.HTTPException):
+                        attempts += 1
+                        if task.stop.is_set():
+                            return
+                        if not resume.get("ranges"):
+                            raise _Restart()  # cannot continue mid-stream
+                        if attempts > RETRIES:
+                            raise
+                        task.stop.wait(min(8, 2 ** attempts))
+                    finally:
+                        if stream is not None:
+                            stream[0].close()
+                        stream = None
+        except Exception as e:
+            errors.append(e)
+            if not isinstance(e, _Restart):
+                task.stop.set()  # one broken range fails the download
+
+    def _open_range(self, entry, seg):
+        resume = entry["resume"]
+        total = entry.get("totalBytes") or 0
+        extra = {}
+        if seg[2] > 0 or (seg[1] >= 0 and seg[1] != total - 1):
+            if not resume.get("ranges"):
+                raise _Restart()
+            extra["Range"] = f"bytes={seg[2]}-" + (str(seg[1]) if seg[1] >= 0 else "")
+            if resume.get("validator"):
+                extra["If-Range"] = resume["validator"]
+        conn, resp, _ = _open(resume.get("url") or entry["downloadUrl"], self._headers(entry, extra), TIMEOUT_S)
+        if "Range" in extra and resp.status == 200:
+            conn.close()
+            raise _Restart()
+        if resp.status >= 500 or resp.status == 429:
+            conn.close()
+            raise _ServerBusy(f"HTTP {resp.status}")
+        if not 200 <= resp.status < 300:
+            conn.close()
+            raise ValueError(f"HTTP {resp.status}")
+        if seg[1] < 0 and resp.status == 200 and not resp.getheader("Content-Encoding"):
+            length = int(resp.getheader("Content-Length") or 0)
+            if length > 0:
+                seg[1] = length - 1
+                self._update(entry, persist=False, totalBytes=length)
+        return conn, resp
+
+    def _complete(self, entry):
+        dest = entry["destination"]
+        final = dest if not os.path.exists(dest) else unique_destination(os.path.dirname(dest), os.path.basename(dest))
+        os.replace(dest + ".part", final)
+        received = self._received(entry)
+        self._update(entry, emit="completed", state="completed", destination=final,
+                     filename=os.path.basename(final), finishedAt=int(time.time() * 1000), error="",
+                     receivedBytes=received, totalBytes=entry.get("totalBytes") or received, progress=1,
+                     bytesPerSec=0, canPause=False, canResume=False, resume=None, request=None)
+
+    def _stopped(self, entry, task):
+        if task.reason == "cancel":
+            self._discard_part(entry)
+            self._update(entry, emit="completed", state="cancelled", queued=False,
+                         finishedAt=int(time.time() * 1000), error="", bytesPerSec=0,
+                         canPause=False, canResume=False, resume=None)
+        elif task.reason == "shutdown":
+            self._update(entry, queued=True, bytesPerSec=0)  # stays "downloading": start() re-queues it
+        else:
+            # Paused (state already set by pause(), or back to downloading if resumed meanwhile)
+            self._update(entry, bytesPerSec=0,
+                         receivedBytes=self._received(entry) if entry.get("resume") else 0)
+
+    def _fail(self, entry, error):
+        self._discard_part(entry)
+        self._update(entry, emit="completed", state="failed", queued=False, finishedAt=int(time.time() * 1000),
+                     error=error, bytesPerSec=0, canPause=False, canResume=False, resume=None)
@@ -0,0 +1,1509 @@
+"""
+Project Butterfly — Library Scanner
+
+Python port of workers/{library,books,video,audiobook}_scan_worker_impl.js.
+Builds the same library_index.json / books_library_index.json /
+video_index.json / audiobook_index.json shapes the renderer already reads,
+so the Electron and Butterfly shells can share one data dir.
+
+  - Directories are listed with os.scandir (file type comes from the
+    directory entry, one stat per matching file) on a shared thread pool,
+    one task per series / show / top-level subtree. scandir and stat release
+    the GIL, so a walk over network storage keeps every worker busy.
+  - Task results are merged on the scan thread in the order the JS workers
+    visit them, so dedupe, alias matching and tie ordering are unchanged.
+  - Listings are kept in DirCache between scans: a directory whose mtime
+    hasn't moved is served from it with a single stat, so a rescan of a
+    mostly static library re-reads only the folders that changed. A
+    user-requested scan still stats every media file (a file rewritten in
+    place leaves its directory's mtime alone); watcher refreshes don't.
+  - Progress is throttled to PROGRESS_INTERVAL_S. A cancelled scan stops
+    its queued tasks and never writes the index.
+  - Ids are the JS ones byte for byte (mtimeMs is formatted like a JS
+    number), so progress keyed by book or episode id survives a shell switch.
+
+ScanRunner owns one domain's scan lifecycle (one at a time, latest request
+queued behind it), mirroring startLibraryScan & co. in main/domains.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+import storage
+
+WORKERS = min(32, (os.cpu_count() or 4) * 2)
+PROGRESS_INTERVAL_S = 0.25
+
+DEFAULT_SCAN_IGNORE_DIRNAMES = (
+    "__macosx",
+    "node_modules",
+    ".git",
+    ".svn",
+    ".hg",
+    "@eadir",
+    "$recycle.bin",
+    "system volume information",
+)
+
+COMIC_EXT_RE = re.compile(r"\.(cbz|cbr)$", re.I)
+BOOK_EXT_RE = re.compile(r"\.(epub|pdf|txt|mobi|fb2)$", re.I)
+VIDEO_EXT_RE = re.compile(r"\.(mp4|mkv|avi|mov|webm|m4v|mpg|mpeg|ts)$", re.I)
+AUDIO_EXT_RE = re.compile(r"\.(mp3|m4a|m4b|ogg|opus|flac|wav|aac|wma)$", re.I)
+_IMAGE_EXT_RE = re.compile(r"\.(jpg|jpeg|png)$", re.I)
+
+STREAMABLE_MANIFEST_FILE = ".tanko_torrent_stream.json"
+ADDED_SHOW_FOLDERS_ROOT_ID = "__added_show_folders__"
+ADDED_SHOW_FOLDERS_ROOT_NAME = "Folders"
+
+_POSTER_CANDIDATES = ("poster", "folder", "cover", "fanart")
+_POSTER_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+_AUDIO_COVER_NAMES = ("cover.jpg", "cover.png", "folder.jpg", "front.jpg")
+_BOOK_FORMATS = {".epub": "epub", ".pdf": "pdf", ".mobi": "mobi", ".fb2": "fb2"}
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+class Cancelled(Exception):
+    """Raised inside a scan once it has been cancelled or the app is closing."""
+
+
+# ---------------------------------------------------------------------------
+# Ids (workers/shared/ids.js)
+# ---------------------------------------------------------------------------
+
+def js_number(x) -> str:
+    """Format a number like JS String(n) for the ranges stat values take."""
+    if isinstance(x, float) and x.is_integer() and abs(x) < 1e21:
+        return str(int(x))
+    return repr(x) if isinstance(x, float) else str(x)
+
+
+def mtime_ms(st) -> float:
+    """fs.Stats.mtimeMs: computed from (sec, nsec) exactly as Node does."""
+    sec, nsec = divmod(st.st_mtime_ns, 1_000_000_000)
+    return sec * 1000 + nsec / 1e6
+
+
+def base64url(s: str) -> str:
+    return base64.urlsafe_b64encode(str(s or "").encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def sha1_base64url(s: str) -> str:
+    digest = hashlib.sha1(str(s or "").encode("utf-8")).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+def series_id_for_folder(folder: str) -> str:
+    return base64url(folder)
+
+
+def book_id_for_path(path: str, size: int, mtime: float) -> str:
+    return base64url(f"{path}::{size}::{js_number(mtime)}")
+
+
+def video_id_for_path(path: str, size: int, mtime: float) -> str:
+    return sha1_base64url(f"{path}::{size}::{js_number(mtime)}")
+
+
+def show_id_for_path(path: str) -> str:
+    return base64url(path)
+
+
+def root_id_for_path(path: str) -> str:
+    return base64url(path)
+
+
+def loose_show_id_for_root(root: str) -> str:
+    return sha1_base64url(f"{root or ''}::LOOSE_FILES")
+
+
+def folder_key_for(show_id: str, folder_rel_path: str) -> str:
+    return sha1_base64url(f"{show_id or ''}::{folder_rel_path or ''}")
+
+
+# ---------------------------------------------------------------------------
+# Ignore rules (workers/shared/ignore.js) + path helpers
+# ---------------------------------------------------------------------------
+
+class IgnoreRules:
+    """Hidden directories, well-known junk directory names and the user's
+    case-insensitive path substrings (setScanIgnore)."""
+
+    def __init__(self, dir_names=DEFAULT_SCAN_IGNORE_DIRNAMES, substrings=()):
+        self.dir_names = {str(s).lower() for s in dir_names if s}
+        self.substrings = [str(s).lower() for s in substrings if s]
+
+    def skip(self, full: str, name: str, is_dir: bool) -> bool:
+        if is_dir and (name.startswith(".") or name.lower() in self.dir_names):
+            return True
+        if self.substrings:
+            p = full.lower()
+            return any(sub in p for sub in self.substrings)
+        return False
+
+
+def sanitize_ignore(patterns) -> list:
+    """Strings only, trimmed, de-duped case-insensitively, capped at 200."""
+    out, seen = [], set()
+    for p in patterns if isinstance(patterns, list) else []:
+        s = str(p or "").strip()
+        if not s or s.lower() in seen:
+            continue
+        seen.add(s.lower())
+        out.append(s)
+        if len(out) >= 200:
+            break
+    return out
+
+
+def path_key(p: str) -> str:
+    """Case-folded absolute path with forward slashes (normalizePath in the workers)."""
+    try:
+        return os.path.abspath(str(p or "")).replace("\\", "/").lower()
+    except (TypeError, ValueError):
+        return str(p or "").replace("\\", "/").lower()
+
+
+def uniq_paths(paths) -> list:
+    out, seen = [], set()
+    for p in paths if isinstance(paths, list) else []:
+        s = str(p or "").strip()
+        k = path_key(s) if s else ""
+        if not k or k in seen:
+            continue
+        seen.add(k)
+        out.append(s)
+    return out
+
+
+def basename(p: str) -> str:
+    return os.path.basename(str(p or "").rstrip("/\\"))
+
+
+def collate_key(s: str):
+    """Rough String.localeCompare order: punctuation, then digits, then
+    letters, ignoring case."""
+    return [(0 if not c.isalnum() else 1 if c.isdigit() else 2, c.casefold()) for c in str(s or "")]
+
+
+def natural_key(s: str):
+    """localeCompare(..., {numeric: true, sensitivity: 'base'}) approximation."""
+    return [(0, int(t)) if t.isdigit() else (1, collate_key(t)) for t in _DIGITS_RE.split(str(s or "")) if t]
+
+
+def _rel_path(root: str, target: str) -> str:
+    try:
+        rel = os.path.relpath(target, root)
+    except ValueError:
+        return ""
+    return "" if rel == "." else rel.replace("\\", "/")
+
+
+def _is_within(child: str, parent: str) -> bool:
+    c, p = path_key(child), path_key(parent)
+    return bool(c and p) and (c == p or c.startswith(p.rstrip("/") + "/"))
+
+
+def _scandir(path: str) -> list:
+    """Entries of path in name order (what fs.readdirSync returns via libuv),
+    from the directory cache while a scan holds it."""
+    scan = getattr(_local, "scan", None)
+    if scan is not None:
+        scan.dirs.add(path)
+    cache = _dir_cache
+    if cache is not None and cache.active:
+        return cache.listing(path, trusted=scan is not None and path in scan.trusted,
+                             restat=scan is not None and scan.restat)
+    try:
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
+
+
+def _is_dir(entry, follow: bool) -> bool:
+    try:
+        return entry.is_dir(follow_symlinks=follow)
+    except OSError:
+        return False
+
+
+def _is_file(entry, follow: bool) -> bool:
+    try:
+        return entry.is_file(follow_symlinks=follow)
+    except OSError:
+        return False
+
+
+def _stat_file(entry):
+    """(size, mtimeMs) of a regular file entry, following links; None if gone."""
+    try:
+        st = entry.stat()
+    except OSError:
+        return None
+    return st.st_size, mtime_ms(st)
+
+
+def _stat_path(p: str):
+    try:
+        return os.stat(p)
+    except (OSError, ValueError):
+        return None
+
+
+def _real_key(d: str) -> str:
+    try:
+        return os.path.realpath(d).lower()
+    except (OSError, ValueError):
+        return ""
+
+
+# ---------------------------------------------------------------------------
+# Directory cache: listings reused across scans while a directory is unchanged
+# ---------------------------------------------------------------------------
+
+DIR_CACHE_FILE = "library_dir_cache.json"
+DIR_CACHE_VERSION = 1
+DIR_SETTLE_S = 300
+DIR_CACHE_TTL_DAYS = 30
+
+# Files any builder stats; their (size, mtime) is kept with the listing
+_STAT_EXT_RE = re.compile("|".join(r.pattern for r in (COMIC_EXT_RE, BOOK_EXT_RE, VIDEO_EXT_RE, AUDIO_EXT_RE)), re.I)
+_DIR, _DIR_L, _FILE, _FILE_L = 1, 2, 4, 8  # _L: following symlinks
+
+
+class _FileStat:
+    __slots__ = ("st_size", "st_mtime_ns")
+
+    def __init__(self, size: int, mtime_ns: int):
+        self.st_size = size
+        self.st_mtime_ns = mtime_ns
+
+
+class _CachedEntry:
+    """Stands in for os.DirEntry: type bits and, for media files, the stat
+    taken when the directory was listed."""
+
+    __slots__ = ("name", "path", "_flags", "_stat")
+
+    def __init__(self, d: str, name: str, flags: int, st: Optional[_FileStat] = None):
+        self.name = name
+        self.path = os.path.join(d, name)
+        self._flags = flags
+        self._stat = st
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return bool(self._flags & (_DIR_L if follow_symlinks else _DIR))
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return bool(self._flags & (_FILE_L if follow_symlinks else _FILE))
+
+    def stat(self):
+        return self._stat if self._stat is not None else os.stat(self.path)
+
+
+def _entry_flags(e) -> int:
+    flags = 0
+    for bit, test, follow in ((_DIR, e.is_dir, False), (_DIR_L, e.is_dir, True),
+                              (_FILE, e.is_file, False), (_FILE_L, e.is_file, True)):
+        try:
+            if test(follow_symlinks=follow):
+                flags |= bit
+        except OSError:
+            pass
+    return flags
+
+
+class DirCache:
+    """
+    Listings of every directory the scanners visit, persisted to
+    DIR_CACHE_FILE and shared by all four domains.
+
+    A record is [mtime_ns, ino, day, entries] where entries is the JSON of
+    [name, flags(, size, mtime_ns)] rows, kept as a string so a large
+    library costs about its file size in memory. While a directory's
+    (mtime_ns, ino) still match, listing() serves the record: one stat of
+    the directory instead of a readdir plus a stat per media file. Directory mtimes only move when entries are added, removed
+    or renamed, so each directory is still stat'ed, but nothing below an
+    unchanged one is listed or probed again.
+
+    Listings whose directory or files changed within DIR_SETTLE_S are not
+    kept (a file still being written doesn't change its directory's mtime,
+    and coarse timestamps can hide a change made right after listing).
+    Records unused for DIR_CACHE_TTL_DAYS are dropped on save.
+
+    A file rewritten in place doesn't move its directory's mtime either, so
+    a deep rescan (scan({"deep": true})) passes restat=True: the listing
+    still comes from the record but each media file is stat'ed again, as
+    without the cache. Other scans rely on the recorded file stats.
+
+    A scan may also pass trusted=True for a directory a watcher has seen no
+    event for (library_watch.py); its record is then served without even
+    the stat.
+
+    Scans bracket their build with acquire()/release(); the cache is loaded
+    on the first acquire and written (if anything changed) and released from
+    memory on the last.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._users = 0
+        self._dirs = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def active(self) -> bool:
+        return self._users > 0
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+            if self._dirs is None:
+                self._dirs = self._load()
+                self._dirty = False
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users > 0 or self._dirs is None:
+                return
+            dirs, dirty = self._dirs, self._dirty
+            self._dirs = None
+            if dirty:
+                self._save(dirs)
+
+    def _load(self) -> dict:
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != DIR_CACHE_VERSION:
+            return {}
+        dirs = data.get("dirs")
+        if not isinstance(dirs, dict):
+            return {}
+        return {d: rec for d, rec in dirs.items() if isinstance(rec, list) and len(rec) == 4}
+
+    def _save(self, dirs: dict):
+        cutoff = _today() - DIR_CACHE_TTL_DAYS
+        kept = {d: rec for d, rec in dirs.items() if rec[2] >= cutoff}
+        tmp = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": DIR_CACHE_VERSION, "dirs": kept}, f, separators=(",", ":"))
+            os.replace(tmp, self._path)
+        except OSError:
+            pass
+
+    def unsettled(self, dirs) -> list:
+        """Those of dirs without a record (listed too recently to be kept)."""
+        with self._lock:
+            known = self._dirs or {}
+            return [d for d in dirs if d not in known]
+
+    def listing(self, d: str, trusted: bool = False, restat: bool = False) -> list:
+        st = None
+        if not trusted:
+            try:
+                st = os.stat(d)
+            except (OSError, ValueError):
+                return []
+        rows = None
+        with self._lock:
+            dirs = self._dirs
+            rec = dirs.get(d) if dirs is not None else None
+            if rec is not None and (st is None or (rec[0] == st.st_mtime_ns and rec[1] == st.st_ino)):
+                self.hits += 1
+                if rec[2] != _today():
+                    rec[2] = _today()
+                    self._dirty = True
+                rows = json.loads(rec[3])
+            else:
+                self.misses += 1
+        if rows is not None:
+            if restat:
+                self._restat(d, rows)
+            return [_CachedEntry(d, *row[:2], _FileStat(*row[2:]) if len(row) > 2 else None)
+                    for row in rows]
+
+        if st is None:
+            try:
+                st = os.stat(d)
+            except (OSError, ValueError):
+                return []
+        rows, entries = [], []
+        newest = st.st_mtime_ns
+        try:
+            with os.scandir(d) as it:
+                listed = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return []
+        for e in listed:
+            flags = _entry_flags(e)
+            fst = None
+            if flags & _FILE_L and _STAT_EXT_RE.search(e.name):
+                try:
+                    s = e.stat()
+                    fst = _FileStat(s.st_size, s.st_mtime_ns)
+                    newest = max(newest, s.st_mtime_ns)
+                except OSError:
+                    pass
+            rows.append([e.name, flags] + ([fst.st_size, fst.st_mtime_ns] if fst else []))
+            entries.append(_CachedEntry(d, e.name, flags, fst))
+
+        settled = newest < time.time_ns() - DIR_SETTLE_S * 1_000_000_000
+        with self._lock:
+            dirs = self._dirs
+            if dirs is None:
+                return entries
+            if settled:
+                body = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+                dirs[d] = [st.st_mtime_ns, st.st_ino, _today(), body]
+                self._dirty = True
+            elif dirs.pop(d, None) is not None:
+                self._dirty = True
+        return entries
+
+    def _restat(self, d: str, rows: list):
+        """Refresh the (size, mtime) of a served record's media rows in place,
+        and the record with them; a file that is gone loses its stat (the
+        builder's own stat then finds it missing)."""
+        changed = False
+        newest = 0
+        for row in rows:
+            if len(row) <= 2:
+                continue
+            try:
+                s = os.stat(os.path.join(d, row[0]))
+            except (OSError, ValueError):
+                del row[2:]
+                changed = True
+                continue
+            newest = max(newest, s.st_mtime_ns)
+            if row[2] != s.st_size or row[3] != s.st_mtime_ns:
+                row[2:] = [s.st_size, s.st_mtime_ns]
+                changed = True
+        if not changed:
+            return
+        with self._lock:
+            dirs = self._dirs
+            if dirs is None or d not in dirs:
+                return
+            if newest < time.time_ns() - DIR_SETTLE_S * 1_000_000_000:
+                dirs[d][3] = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+            else:
+                del dirs[d]  # still being written: list it again next time
+            self._dirty = True
+
+
+def _today() -> int:
+    return int(time.time() // 86400)
+
+
+_dir_cache: Optional[DirCache] = None
+
+
+def dir_cache() -> DirCache:
+    """The process-wide directory cache (in the data dir)."""
+    global _dir_cache
+    if _dir_cache is None:
+        _dir_cache = DirCache(storage.data_path(DIR_CACHE_FILE))
+    return _dir_cache
+
+
+# ---------------------------------------------------------------------------
+# Scan context: shared pool, cancellation, throttled progress
+# ---------------------------------------------------------------------------
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_closing = threading.Event()
+_local = threading.local()  # .scan: the Scan a thread is working for
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="library-scan")
+        return _pool
+
+
+def shutdown():
+    """Abandon every running scan and drop queued walk tasks (window close)."""
+    _closing.set()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+
+
+class Scan:
+    """What a build function gets: check() for cancellation, progress()
+    for the status ticker, map() to fan tasks out on the pool, and meta
+    for anything besides the index the bridge wants back. dirs collects
+    every directory listed; trusted ones may be served from DirCache
+    without a stat. restat (deep rescans) has DirCache stat media
+    files again instead of trusting the recorded size and mtime."""
+
+    def __init__(self, cancel: threading.Event, report: Callable[[int, int, str], None]):
+        self.cancel = cancel
+        self.meta = {}
+        self.dirs = set()
+        self.trusted = frozenset()
+        self.restat = False
+        self._report = report
+        self._last = 0.0
+
+    def check(self):
+        if self.cancel.is_set() or _closing.is_set():
+            raise Cancelled()
+
+    def progress(self, done: int, total: int, current: str = "", force: bool = False):
+        now = time.monotonic()
+        if not force and done < total and now - self._last < PROGRESS_INTERVAL_S:
+            return
+        self._last = now
+        self._report(done, total, current)
+
+    def map(self, fn: Callable, items: list, label: Callable = None, done: int = 0, total: int = 0) -> list:
+        """fn(item) for every item on the pool; results in item order.
+        Each completion advances progress by one (labelled by label(item))."""
+        if not items:
+            return []
+        self.check()
+
+        def guarded(item):
+            self.check()
+            _local.scan = self
+            try:
+                return fn(item)
+            finally:
+                _local.scan = None
+
+        try:
+            futures = [_executor().submit(guarded, item) for item in items]
+        except RuntimeError:  # pool shut down while this scan was starting
+            raise Cancelled()
+        order = {f: i for i, f in enumerate(futures)}
+        results = [None] * len(items)
+        total = total or done + len(items)
+        try:
+            for f in as_completed(futures):
+                self.check()
+                i = order[f]
+                results[i] = f.result()
+                done += 1
+                self.progress(done, total, label(items[i]) if label else "")
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+        return results
+
+
+# ---------------------------------------------------------------------------
+# Comics (library_scan_worker_impl.js)
+# ---------------------------------------------------------------------------
+
+def _comic_files(folder: str, rules: IgnoreRules, check: Callable, recursive: bool = True) -> list:
+    out = []
+    stack = [folder]
+    while stack:
+        check()
+        d = stack.pop()
+        for e in _scandir(d):
+            is_dir = _is_dir(e, False)
+            if rules.skip(e.path, e.name, is_dir):
+                continue
+            if is_dir:
+                if recursive:
+                    stack.append(e.path)
+            elif _is_file(e, False) and COMIC_EXT_RE.search(e.name):
+                st = _stat_file(e)
+                if st is not None:
+                    out.append((e.path,) + st)
+    return out
+
+
+def comic_auto_series(root_folders: list, ignored_series: list, rules: IgnoreRules) -> list:
+    """Immediate subfolders of every root (computeAutoSeries in main/domains/library)."""
+    ignored = set(ignored_series or [])
+    out, seen = [], set()
+    for root in root_folders or []:
+        for e in _scandir(root):
+            if not _is_dir(e, False) or e.path in ignored or e.path in seen:
+                continue
+            if rules.skip(e.path, e.name, True):
+                continue
+            seen.add(e.path)
+            out.append(e.path)
+    return out
+
+
+def _comic_book(path, size, mtime, sid, series_name):
+    return {
+        "id": book_id_for_path(path, size, mtime),
+        "title": COMIC_EXT_RE.sub("", basename(path)),
+        "seriesId": sid,
+        "series": series_name,
+        "path": path,
+        "size": size,
+        "mtimeMs": mtime,
+    }
+
+
+def build_comic_index(job: dict, scan: Scan) -> dict:
+    """job: seriesFolders, rootFolders, ignoredSeries, rules.
+    meta gets autoSeriesFolders / effectiveSeriesFolders for the state snapshot."""
+    rules = job["rules"]
+    roots = list(job.get("rootFolders") or [])
+    auto = comic_auto_series(roots, job.get("ignoredSeries"), rules)
+    folders, seen = [], set()
+    for f in list(job.get("seriesFolders") or []) + auto:
+        if f and f not in seen:
+            seen.add(f)
+            folders.append(f)
+    scan.meta.update(autoSeriesFolders=auto, effectiveSeriesFolders=folders)
+
+    scan.progress(0, len(folders), "", force=True)
+    results = scan.map(lambda f: _comic_files(f, rules, scan.check), folders, basename)
+
+    series, books = [], []
+    for folder, files in zip(folders, results):
+        sid = series_id_for_folder(folder)
+        name = basename(folder)
+        series_books = [_comic_book(p, size, mtime, sid, name) for p, size, mtime in files]
+        books.extend(series_books)
+        series.append({
+            "id": sid,
+            "name": name,
+            "path": folder,
+            "count": len(series_books),
+            "newestMtimeMs": max((b["mtimeMs"] for b in series_books), default=0),
+        })
+
+    # Loose .cbz/.cbr directly inside a root go to its "Uncategorized" series
+    known = {b["path"] for b in books}
+    for root in roots:
+        scan.check()
+        sid = series_id_for_folder(root + "/__uncategorized")
+        loose = []
+        for p, size, mtime in _comic_files(root, rules, scan.check, recursive=False):
+            if p in known:
+                continue
+            known.add(p)
+            loose.append(_comic_book(p, size, mtime, sid, "Uncategorized"))
+        if loose:
+            books.extend(loose)
+            series.append({
+                "id": sid,
+                "name": "Uncategorized",
+                "path": root,
+                "count": len(loose),
+                "newestMtimeMs": max(b["mtimeMs"] for b in loose),
+            })
+
+    series.sort(key=lambda s: (-(s["newestMtimeMs"] or 0), collate_key(s["name"])))
+    books.sort(key=lambda b: -(b["mtimeMs"] or 0))
+    return {"series": series, "books": books}
+
+
+# ---------------------------------------------------------------------------
+# Books (books_scan_worker_impl.js)
+# ---------------------------------------------------------------------------
+
+def _book_dir(d: str, rules: IgnoreRules):
+    """(dir, realKey, sortedChildDirs, [(path, size, mtime)]) or None."""
+    if not os.path.isdir(d):
+        return None
+    dirs, files = [], []
+    for e in _scandir(d):
+        is_dir = _is_dir(e, True)
+        if rules.skip(e.path, e.name, is_dir):
+            continue
+        if is_dir:
+            dirs.append(e.path)
+        elif BOOK_EXT_RE.search(e.name) and _is_file(e, True):
+            st = _stat_file(e)
+            if st is not None:
+                files.append((e.path,) + st)
+    dirs.sort(key=natural_key)
+    return d, _real_key(d), dirs, files
+
+
+def _book_subtree(top: str, root_key: str, rules: IgnoreRules, check: Callable) -> list:
+    """Preorder walk below one child of a root. Link loops are cut here; the
+    merge re-applies the target-wide visited set the JS worker keeps."""
+    out = []
+    seen = {root_key} if root_key else set()
+    stack = [top]
+    while stack:
+        check()
+        d = stack.pop()
+        rk = _real_key(d)
+        if rk:
+            if rk in seen:
+                continue
+            seen.add(rk)
+        rec = _book_dir(d, rules)
+        if rec is None:
+            continue
+        out.append(rec)
+        stack.extend(reversed(rec[2]))
+    return out
+
+
+def _book_folder_key(root_id: str, rel: str) -> str:
+    return f"{root_id or ''}:{rel or '.'}"
+
+
+def _book_record(path, size, mtime, **o):
+    return {
+        "id": book_id_for_path(path, size, mtime),
+        "title": BOOK_EXT_RE.sub("", basename(path)),
+        "path": path,
+        "size": size,
+        "mtimeMs": mtime,
+        "format": _BOOK_FORMATS.get(os.path.splitext(path)[1].lower(), "txt"),
+        "mediaType": "book",
+        "sourceKind": o.get("sourceKind") or ("series" if o.get("seriesId") else "single"),
+        "seriesId": o.get("seriesId") or None,
+        "series": o.get("seriesName") or None,
+        "seriesPath": o.get("seriesPath") or None,
+        "rootPath": o.get("rootPath") or None,
+        "rootId": o.get("rootId") or None,
+        "folderRelPath": o.get("folderRelPath") or "",
+        "folderKey": o.get("folderKey") or None,
+    }
+
+
+class _BooksMerge:
+    def __init__(self, forced_singles: set):
+        self.forced = forced_singles
+        self.series, self.books, self.folders = [], [], []
+        self.book_seen, self.folder_seen = set(), set()
+
+    def add_target(self, target: dict, recs: list):
+        root_path, root_id = target["rootPath"], target["rootId"]
+        dir_seen = set()
+        for d, rk, child_dirs, files in recs:
+            if rk:
+                if rk in dir_seen:
+                    continue
+                dir_seen.add(rk)
+            rel = _rel_path(root_path, d)
+            fkey = _book_folder_key(root_id, rel)
+            included = []
+            for p, size, mtime in files:
+                k = path_key(p)
+                if k and k not in self.forced and k not in self.book_seen:
+                    included.append((p, size, mtime, k))
+            is_root = not rel
+            if fkey not in self.folder_seen:
+                self.folder_seen.add(fkey)
+                self.folders.append({
+                    "rootId": root_id,
+                    "rootPath": root_path,
+                    "relPath": rel,
+                    "parentRelPath": rel.rpartition("/")[0] if rel else None,
+                    "name": (basename(d) or rel) if rel else (target["name"] or basename(root_path) or root_path),
+                    "folderKey": fkey,
+                    "childFolderCount": len(child_dirs),
+                    "seriesCount": len(included) if is_root else (1 if included else 0),
+                    "bookCount": len(included),
+                    "newestMtimeMs": max((f[2] for f in included), default=0),
+                })
+            if not included:
+                continue
+            common = dict(seriesPath=d, rootPath=root_path, rootId=root_id,
+                          folderRelPath=rel, folderKey=fkey, sourceKind="series")
+            if is_root:
+                # Each root-level file is its own one-book series (one tile per file)
+                for p, size, mtime, k in included:
+                    self.book_seen.add(k)
+                    sid, name = series_id_for_folder(p), BOOK_EXT_RE.sub("", basename(p))
+                    rec = _book_record(p, size, mtime, seriesId=sid, seriesName=name, **common)
+                    self.books.append(rec)
+                    self.series.append(self._series(sid, name, d, target, rel, fkey, 1, mtime))
+            else:
+                sid, name = series_id_for_folder(d), basename(d) or d
+                for p, size, mtime, k in included:
+                    self.book_seen.add(k)
+                    self.books.append(_book_record(p, size, mtime, seriesId=sid, seriesName=name, **common))
+                self.series.append(self._series(sid, name, d, target, rel, fkey, len(included),
+                                                max(f[2] for f in included)))
+
+    @staticmethod
+    def _series(sid, name, path, target, rel, fkey, count, newest):
+        return {
+            "id": sid,
+            "name": name,
+            "path": path,
+            "mediaType": "bookSeries",
+            "rootPath": target["rootPath"] or None,
+            "rootId": target["rootId"] or None,
+            "folderRelPath": rel,
+            "folderKey": fkey,
+            "count": count,
+            "newestMtimeMs": newest,
+        }
+
+    def add_single(self, p: str, st, targets: list):
+        k = path_key(p)
+        if not k or k in self.book_seen:
+            return
+        owner = max((t for t in targets if _is_within(p, t["rootPath"])),
+                    key=lambda t: len(path_key(t["rootPath"])), default=None)
+        root_id = owner["rootId"] if owner else "single-files"
+        root_path = owner["rootPath"] if owner else None
+        d = os.path.dirname(p)
+        rel = _rel_path(owner["rootPath"], d) if owner else ""
+        fkey = _book_folder_key(root_id, rel)
+        mtime = mtime_ms(st)
+        if not owner and _book_folder_key(root_id, "") not in self.folder_seen:
+            self.folder_seen.add(_book_folder_key(root_id, ""))
+            self.folders.append({
+                "rootId": root_id, "rootPath": None, "relPath": "", "parentRelPath": None,
+                "name": "Single files", "folderKey": _book_folder_key(root_id, ""),
+                "childFolderCount": 0, "seriesCount": 0, "bookCount": 0, "newestMtimeMs": 0,
+            })
+        if fkey not in self.folder_seen:
+            self.folder_seen.add(fkey)
+            if rel:
+                name = basename(d) or rel
+            else:
+                name = (owner["name"] or basename(owner["rootPath"]) or owner["rootPath"]) if owner else "Single files"
+            self.folders.append({
+                "rootId": root_id, "rootPath": root_path, "relPath": rel,
+                "parentRelPath": rel.rpartition("/")[0] if rel else None,
+                "name": name, "folderKey": fkey, "childFolderCount": 0,
+                "seriesCount": 0, "bookCount": 1, "newestMtimeMs": mtime,
+            })
+        self.book_seen.add(k)
+        self.books.append(_book_record(p, st.st_size, mtime, sourceKind="single", rootPath=root_path,
+                                       rootId=root_id, folderRelPath=rel, folderKey=fkey))
+
+
+def build_books_index(job: dict, scan: Scan) -> dict:
+    """job: bookRootFolders, bookSeriesFolders, bookSingleFiles, rules."""
+    rules = job["rules"]
+    singles = []
+    for p in uniq_paths(job.get("bookSingleFiles")):
+        st = _stat_path(p)
+        if st is not None and os.path.isfile(p) and BOOK_EXT_RE.search(p):
+            singles.append((p, st))
+
+    targets = []
+    for root in uniq_paths(job.get("bookRootFolders")):
+        if os.path.isdir(root):
+            targets.append({"rootId": "root:" + series_id_for_folder(root), "rootPath": root,
+                            "name": basename(root) or root})
+    # Explicit series folders outside every root are scanned as pseudo roots
+    for sf in uniq_paths(job.get("bookSeriesFolders")):
+        if os.path.isdir(sf) and not any(_is_within(sf, t["rootPath"]) for t in targets):
+            targets.append({"rootId": "series:" + series_id_for_folder(sf), "rootPath": sf,
+                            "name": basename(sf) or sf})
+
+    # Each root is listed here; everything below its children fans out on the pool
+    tops, subtrees = [], []
+    for t in targets:
+        scan.check()
+        rk = _real_key(t["rootPath"])
+        rec = _book_dir(t["rootPath"], rules)
+        tops.append(rec)
+        for child in (rec[2] if rec else []):
+            subtrees.append((child, rk))
+    scan.progress(0, len(subtrees), "", force=True)
+    walked = scan.map(lambda s: _book_subtree(s[0], s[1], rules, scan.check), subtrees,
+                      lambda s: basename(s[0]))
+
+    merge = _BooksMerge({path_key(p) for p, _ in singles})
+    it = iter(walked)
+    for t, top in zip(targets, tops):
+        if top is None:
+            continue
+        recs = [top]
+        for _ in top[2]:
+            recs.extend(next(it))
+        merge.add_target(t, recs)
+    for p, st in singles:
+        merge.add_single(p, st, targets)
+
+    merge.series.sort(key=lambda s: (-(s["newestMtimeMs"] or 0), natural_key(s["name"])))
+    merge.books.sort(key=lambda b: (-(b["mtimeMs"] or 0), natural_key(b["title"])))
+    merge.folders.sort(key=lambda f: (natural_key(f["rootId"]), natural_key(f["relPath"])))
+    return {"series": merge.series, "books": merge.books, "folders": merge.folders}
+
+
+# ---------------------------------------------------------------------------
+# Video (video_scan_worker_impl.js)
+# ---------------------------------------------------------------------------
+
+def _display_path(p: str) -> str:
+    return str(p or "").replace("\\", "/")
+
+
+def _abs_key(p: str) -> str:
+    try:
+        return os.path.abspath(str(p or "")).replace("\\", "/").lower()
+    except (TypeError, ValueError):
+        return ""
+
+
+def _js_num_or_none(v):
+    try:
+        n = float(v)
+    except (TypeError, ValueError):
+        return None
+    if n != n or n in (float("inf"), float("-inf")):
+        return None
+    return int(n) if n.is_integer() else n
+
+
+def _parse_stream_manifest(manifest_path: str) -> dict:
+    """absKey -> torrent stream metadata from one .tanko_torrent_stream.json."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("streamable") is not True or not isinstance(data.get("files"), list):
+        return {}
+    base = os.path.dirname(manifest_path)
+    meta = {k: str(data.get(k) or "") for k in ("torrentId", "infoHash", "magnetUri")}
+    out = {}
+    for f in data["files"]:
+        rel = str((f or {}).get("relativePath") or "").replace("\\", "/").lstrip("/")
+        key = _abs_key(os.path.join(base, rel)) if rel else ""
+        if key:
+            out[key] = dict(meta, fileIndex=_js_num_or_none(f.get("fileIndex")))
+    return out
+
+
+def _file_names(entries: list) -> dict:
+    return {e.name.lower(): e.name for e in entries if _is_file(e, False)}
+
+
+def _find_poster(names: dict, folder: str):
+    for stem in _POSTER_CANDIDATES:
+        for ext in _POSTER_EXTS:
+            hit = names.get(stem + ext)
+            if hit:
+                full = os.path.join(folder, hit)
+                st = _stat_path(full)
+                if st is not None and os.path.isfile(full) and st.st_size > 0:
+                    return full
+    return None
+
+
+def _video_show(show_path: str, rules: IgnoreRules, check: Callable) -> dict:
+    """One walk of a show folder: video files, stream manifests, poster."""
+    files, stream = [], {}
+    poster = None
+    seen = set()
+    stack = [show_path]
+    first = True
+    while stack:
+        check()
+        d = stack.pop()
+        rk = _real_key(d)
+        if rk:
+            if rk in seen:
+                continue
+            seen.add(rk)
+        entries = _scandir(d)
+        if first:
+            first = False
+            poster = _find_poster(_file_names(entries), show_path)
+        for e in entries:
+            is_dir = _is_dir(e, True)
+            if rules.skip(e.path, e.name, is_dir):
+                continue
+            if is_dir:
+                stack.append(e.path)
+            elif not _is_file(e, True):
+                continue
+            elif e.name.lower() == STREAMABLE_MANIFEST_FILE:
+                stream.update(_parse_stream_manifest(e.path))
+            elif VIDEO_EXT_RE.search(e.name):
+                st = _stat_file(e)
+                if st is not None:
+                    files.append((e.path,) + st)
+    return {"files": files, "stream": stream, "poster": poster}
+
+
+class _AliasMatcher:
+    """Carry ids across rename/move: an episode whose (ext, size, mtime,
+    duration) matches exactly one episode of the previous index inherits
+    that id as an alias, so its progress is kept."""
+
+    def __init__(self, index_path: str):
+        self._by_sig = {}
+        self._used = set()
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                prev = json.load(f)
+        except (OSError, ValueError):
+            return
+        for ep in prev.get("episodes") or [] if isinstance(prev, dict) else []:
+            eid = str((ep or {}).get("id") or "")
+            if eid:
+                sig = self._sig(ep.get("ext"), ep.get("size"), ep.get("mtimeMs"), ep.get("durationSec"))
+                self._by_sig.setdefault(sig, []).append(eid)
+
+    @staticmethod
+    def _sig(ext, size, mtime, duration):
+        try:
+            d = float(duration)
+            d = round(d) if d > 0 else 0
+        except (TypeError, ValueError):
+            d = 0
+        try:
+            m = int(float(mtime or 0) + 0.5)
+        except (TypeError, ValueError):
+            m = 0
+        return f"{str(ext or '').lower()}::{js_number(size or 0)}::{m}::{d or ''}"
+
+    def aliases(self, ext, size, mtime, new_id):
+        ids = self._by_sig.get(self._sig(ext, size, mtime, None))
+        if not ids or len(ids) != 1 or ids[0] == new_id or ids[0] in self._used:
+            return None
+        self._used.add(ids[0])
+        return [ids[0]]
+
+
+def _episode(path, size, mtime, show, root_id, root_name, rel, aliases):
+    ep = {
+        "id": video_id_for_path(path, size, mtime),
+        "title": VIDEO_EXT_RE.sub("", basename(path)),
+        "rootId": root_id,
+        "rootName": root_name,
+        "showId": show["id"],
+        "showName": show["name"],
+        "showRootPath": show["path"],
+        "folderRelPath": rel,
+        "folderKey": folder_key_for(show["id"], rel),
+        "folderId": root_id,
+        "folderName": root_name,
+        "path": path,
+        "size": size,
+        "mtimeMs": mtime,
+        "ext": os.path.splitext(path)[1][1:].upper(),
+        "durationSec": None,
+        "width": None,
+        "height": None,
+        "thumbPath": None,
+    }
+    alias = aliases.aliases(ep["ext"], size, mtime, ep["id"])
+    if alias:
+        ep["aliasIds"] = alias
+    return ep
+
+
+def _add_show_episodes(show, walked, root_id, root_name, episodes, aliases):
+    folders = {}
+    for p, size, mtime in walked["files"]:
+        rel = _rel_path(show["path"], os.path.dirname(p))
+        if rel.startswith(".."):
+            rel = ""
+        meta = walked["stream"].get(_abs_key(p))
+        if meta:
+            show["torrentStreamable"] = True
+            show["sourceKind"] = "torrent_stream"
+            show.setdefault("torrentId", meta["torrentId"])
+            show.setdefault("torrentInfoHash", meta["infoHash"])
+            show.setdefault("torrentMagnetUri", meta["magnetUri"])
+        ep = _episode(p, size, mtime, show, root_id, root_name, rel, aliases)
+        ep.update(
+            sourceKind="torrent_stream" if meta else "local",
+            torrentStreamable=bool(meta),
+            torrentId=meta["torrentId"] if meta else "",
+            torrentInfoHash=meta["infoHash"] if meta else "",
+            torrentMagnetUri=meta["magnetUri"] if meta else "",
+            torrentFileIndex=meta["fileIndex"] if meta else None,
+        )
+        episodes.append(ep)
+        group = folders.get(ep["folderKey"])
+        if group:
+            group["episodeCount"] += 1
+        else:
+            folders[ep["folderKey"]] = {"folderKey": ep["folderKey"], "folderRelPath": rel, "episodeCount": 1,
+                                        "watchedCount": 0, "inProgressCount": 0, "percentComplete": 0}
+    show["folders"] = sorted(folders.values(), key=lambda f: natural_key(f["folderRelPath"]))
+
+
+def _show_record(sid, root_id, name, path, poster, loose=False):
+    show = {
+        "id": sid,
+        "rootId": root_id,
+        "name": name,
+        "path": path,
+        "displayPath": _display_path(path),
+        "isLoose": loose,
+        "thumbPath": poster or None,
+    }
+    if not loose:
+        show.update(torrentStreamable=False, sourceKind="local")
+    show["folders"] = []
+    return show
+
+
+def build_video_index(job: dict, scan: Scan) -> dict:
+    """job: videoFolders, showFolders, hiddenShowIds, rules, indexPath (previous index, for aliases)."""
+    rules = job["rules"]
+    hidden = {str(x) for x in job.get("hiddenShowIds") or [] if x}
+    aliases = _AliasMatcher(job.get("indexPath") or "")
+
+    roots, plan, seen_shows = [], [], []
+    for root in job.get("videoFolders") or []:
+        scan.check()
+        rid, rname = root_id_for_path(root), basename(root) or root
+        roots.append({"id": rid, "name": rname, "path": root, "displayPath": _display_path(root)})
+        entries = _scandir(root)
+        shows = []
+        for e in entries:
+            if _is_dir(e, False) and not rules.skip(e.path, e.name, True):
+                seen_shows.append(e.path)
+                if show_id_for_path(e.path) not in hidden:
+                    shows.append(e.path)
+        loose = [e.path for e in entries if _is_file(e, False) and VIDEO_EXT_RE.search(e.name)]
+        plan.append((rid, rname, root, shows, loose, _file_names(entries) if loose else {}))
+
+    explicit = []
+    for sp in job.get("showFolders") or []:
+        sp = str(sp or "")
+        if not sp or not os.path.isdir(sp) or sp in seen_shows:
+            continue
+        if any(sp.startswith(other + os.sep) for other in seen_shows):
+            continue
+        seen_shows.append(sp)
+        if show_id_for_path(sp) not in hidden:
+            explicit.append(sp)
+
+    show_paths = [sp for _, _, _, shows, _, _ in plan for sp in shows] + explicit
+    scan.progress(0, len(show_paths), "", force=True)
+    walked = iter(scan.map(lambda sp: _video_show(sp, rules, scan.check), show_paths, basename))
+
+    shows_out, episodes = [], []
+    for rid, rname, root, shows, loose, names in plan:
+        for sp in shows:
+            w = next(walked)
+            show = _show_record(show_id_for_path(sp), rid, basename(sp), sp, w["poster"])
+            shows_out.append(show)
+            _add_show_episodes(show, w, rid, rname, episodes, aliases)
+        loose_id = loose_show_id_for_root(root)
+        if not loose or loose_id in hidden:
+            continue
+        show = _show_record(loose_id, rid, "Loose files", root, _find_poster(names, root), loose=True)
+        shows_out.append(show)
+        key = folder_key_for(loose_id, "")
+        count = 0
+        for p in loose:
+            st = _stat_path(p)
+            if st is not None:
+                episodes.append(_episode(p, st.st_size, mtime_ms(st), show, rid, rname, "", aliases))
+                count += 1
+        if count:
+            show["folders"] = [{"folderKey": key, "folderRelPath": "", "episodeCount": count,
+                                "watchedCount": 0, "inProgressCount": 0, "percentComplete": 0}]
+
+    if job.get("showFolders"):
+        roots.append({"id": ADDED_SHOW_FOLDERS_ROOT_ID, "name": ADDED_SHOW_FOLDERS_ROOT_NAME,
+                      "path": "", "displayPath": ""})
+        for sp in explicit:
+            w = next(walked)
+            show = _show_record(show_id_for_path(sp), ADDED_SHOW_FOLDERS_ROOT_ID, basename(sp) or sp, sp, w["poster"])
+            shows_out.append(show)
+            _add_show_episodes(show, w, ADDED_SHOW_FOLDERS_ROOT_ID, ADDED_SHOW_FOLDERS_ROOT_NAME, episodes, aliases)
+
+    roots.sort(key=lambda r: collate_key(r["name"]))
+    shows_out.sort(key=lambda s: (collate_key(s["rootId"]), collate_key(s["name"])))
+    episodes.sort(key=lambda e: (-(e["mtimeMs"] or 0), collate_key(e["title"])))
+    return {"roots": roots, "shows": shows_out, "episodes": episodes}
+
+
+# ---------------------------------------------------------------------------
+# Audiobooks (audiobook_scan_worker_impl.js)
+# ---------------------------------------------------------------------------
+
+def _has_audio(entries: list) -> bool:
+    return any(_is_file(e, False) and AUDIO_EXT_RE.search(e.name) for e in entries)
+
+
+def _audio_dirs(top: str, root_key: str, rules: IgnoreRules, check: Callable) -> list:
+    """Breadth-first walk from a root's child: [(depth, dir)] of every folder
+    holding audio files (depth 1 = the child itself)."""
+    out, queue, head = [], [(top, 1)], 0
+    seen = {root_key} if root_key else set()
+    while head < len(queue):
+        check()
+        d, level = queue[head]
+        head += 1
+        rk = _real_key(d)
+        if rk:
+            if rk in seen:
+                continue
+            seen.add(rk)
+        entries = _scandir(d)
+        if _has_audio(entries):
+            out.append((level, d))
+        queue.extend((e.path, level + 1) for e in entries
+                     if _is_dir(e, True) and not rules.skip(e.path, e.name, True))
+    return out
+
+
+def audio_duration(path: str) -> float:
+    """Seconds of audio in path; 0 when unknown (what the JS worker records
+    when music-metadata can't read a file)."""
+    return 0
+
+
+def _audiobook(candidate: tuple, check: Callable):
+    folder, root_path, root_id = candidate
+    entries = _scandir(folder)
+    audio = []
+    for e in entries:
+        if _is_file(e, False) and AUDIO_EXT_RE.search(e.name):
+            st = _stat_file(e)
+            if st is not None:
+                audio.append((e.name, e.path) + st)
+    if not audio:
+        return None
+    audio.sort(key=lambda a: natural_key(a[0]))
+    names = [e.name for e in entries]
+    cover = next((os.path.join(folder, n) for want in _AUDIO_COVER_NAMES for n in names if n.lower() == want), None)
+    if cover is None:
+        cover = next((os.path.join(folder, n) for n in names if _IMAGE_EXT_RE.search(n)), None)
+
+    chapters, total = [], 0
+    for name, p, size, _ in audio:
+        check()
+        duration = audio_duration(p)
+        total += duration
+        chapters.append({"file": name, "title": AUDIO_EXT_RE.sub("", name).strip(),
+                         "path": p, "size": size, "duration": duration})
+    total_size = sum(a[2] for a in audio)
+    latest = max(a[3] for a in audio)
+    return {
+        "id": base64url(f"{folder}::{total_size}::{js_number(latest)}"),
+        "title": basename(folder) or folder,
+        "path": folder,
+        "chapters": chapters,
+        "totalDuration": round(total * 100) / 100 if total else 0,
+        "coverPath": cover,
+        "rootPath": root_path,
+        "rootId": root_id,
+    }
+
+
+def build_audiobook_index(job: dict, scan: Scan) -> dict:
+    """job: audiobookRootFolders, rules."""
+    rules = job["rules"]
+    roots = list(job.get("audiobookRootFolders") or [])
+
+    # Discovery: each root's own folder here, its subfolders on the pool;
+    # a stable sort by depth restores the single-queue BFS order per root.
+    per_root, subtrees = [], []
+    for root in roots:
+        scan.check()
+        entries = _scandir(root)
+        found = [(0, root)] if _has_audio(entries) else []
+        children = [e.path for e in entries if _is_dir(e, True) and not rules.skip(e.path, e.name, True)]
+        per_root.append((root, found, len(children)))
+        rk = _real_key(root)
+        subtrees.extend((child, rk) for child in children)
+    scan.progress(0, len(subtrees), "", force=True)
+    walked = iter(scan.map(lambda s: _audio_dirs(s[0], s[1], rules, scan.check), subtrees,
+                           lambda s: basename(s[0])))
+
+    candidates, seen = [], set()
+    for root, found, n in per_root:
+        dirs = list(found)
+        for _ in range(n):
+            dirs.extend(next(walked))
+        dirs.sort(key=lambda x: x[0])
+        root_id = "abroot:" + base64url(root)
+        for _, d in dirs:
+            norm = d.replace("\\", "/").rstrip("/").lower()
+            if norm not in seen:
+                seen.add(norm)
+                candidates.append((d, root, root_id))
+
+    done = len(subtrees)
+    built = scan.map(lambda c: _audiobook(c, scan.check), candidates, lambda c: basename(c[0]),
+                     done=done, total=done + len(candidates))
+    return {"audiobooks": [a for a in built if a]}
+
+
+# ---------------------------------------------------------------------------
+# Scan lifecycle
+# ---------------------------------------------------------------------------
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _file_digest(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return _digest(f.read())
+    except OSError:
+        return b""
+
+
+class ScanRunner:
+    """One domain's scans: at most one running, the latest request queued
+    behind it, a repeat of the last completed config skipped unless forced.
+
+    Everything but the scan thread runs on the GUI thread. The thread talks
+    back through ``post`` (a queued Qt signal) whose receiver calls handle();
+    ``status`` gets scanStatus payloads, ``done(idx, meta)`` the new index
+    (already written to index_path), ``failed(message)`` errors. ``begin``,
+    called as a scan actually starts, returns the directories it may trust
+    (see Scan); meta comes back with the ``dirs`` listed, those still
+    ``unsettled``, and ``changed``: False when the index came out
+    byte-identical to the one last written (decided on the scan thread, so
+    a quiet refresh that found nothing costs the GUI a flag test).
+
+    A quiet scan (a watcher refresh) sends no scanStatus; a loud request
+    arriving while one runs makes it loud and runs again after it. A deep
+    scan re-stats every media file (Scan.restat) to catch in-place rewrites.
+    """
+
+    def __init__(self, name: str, build: Callable[[dict, Scan], dict], index_path: str,
+                 post: Callable[[tuple], None], status: Callable[[dict], None],
+                 done: Callable[[dict, dict], None], failed: Callable[[str], None],
+                 progress_keys=("foldersDone", "foldersTotal", "currentFolder"), extra: dict = None,
+                 begin: Callable[[bool], frozenset] = None):
+        self.name = name
+        self.scanning = False
+        self.quiet = False
+        self.last_scan_at = 0
+        self.error = None
+        self._build = build
+        self._index_path = index_path
+        self._post = post
+        self._status = status
+        self._done = done
+        self._failed = failed
+        self._begin = begin
+        self._keys = progress_keys
+        self._extra = dict(extra or {})
+        self._key = ""
+        self._scan_id = 0
+        self._cancel = None
+        self._queued = None
+        self._joined = False
+        self._digest = None  # of the index file as last written; scan thread only
+
+    def _progress(self, done, total, current):
+        return dict(self._extra, scanning=True,
+                    progress={self._keys[0]: done, self._keys[1]: total, self._keys[2]: current or ""})
+
+    def start(self, job: dict, key: str, total: int = 0, force: bool = False, quiet: bool = False,
+              deep: bool = False) -> bool:
+        if self.scanning:
+            deep = deep or bool(self._queued and self._queued[4])
+            self._queued = (job, key, total, quiet, deep)
+            if self.quiet and not quiet:
+                self.quiet = False
+                self._joined = True
+                self._status(self._progress(0, total, ""))
+            return False
+        if not force and self.last_scan_at > 0 and key == self._key:
+            return False
+        self._key = key
+        self.scanning = True
+        self.quiet = quiet
+        self._joined = False
+        self.error = None
+        self._scan_id += 1
+        self._cancel = threading.Event()
+        trusted = self._begin(quiet) if self._begin else frozenset()
+        if not quiet:
+            self._status(self._progress(0, total, ""))
+        threading.Thread(target=self._run, args=(self._scan_id, self._cancel, job, trusted, deep),
+                         name=f"{self.name}-scan", daemon=True).start()
+        return True
+
+    def cancel(self) -> bool:
+        if not self.scanning:
+            return False
+        self._cancel.set()
+        self._scan_id += 1
+        self.scanning = False
+        self.error = None
+        self._queued = None
+        if not self.quiet:
+            self._status({"scanning": False, "progress": None, "canceled": True})
+        return True
+
+    def _run(self, scan_id: int, cancel: threading.Event, job: dict, trusted: frozenset, restat: bool):
+        scan = Scan(cancel, lambda d, t, c: self._post(("progress", scan_id, d, t, c)))
+        scan.trusted = trusted
+        scan.restat = restat
+        cache = dir_cache()
+        cache.acquire()
+        _local.scan = scan
+        try:
+            idx = self._build(job, scan)
+            scan.check()
+            scan.meta.update(dirs=scan.dirs, unsettled=cache.unsettled(scan.dirs))
+        except Cancelled:
+            return
+        except Exception as e:
+            self._post(("failed", scan_id, str(e) or type(e).__name__))
+            return
+        finally:
+            _local.scan = None
+            cache.release()
+        text = storage.dump_json(idx)
+        digest = _digest(text.encode("utf-8"))
+        if self._digest is None:
+            self._digest = _file_digest(self._index_path)
+        scan.meta["changed"] = digest != self._digest
+        if scan.meta["changed"]:
+            try:
+                storage.write_text_sync(self._index_path, text)
+                self._digest = digest
+            except Exception:
+                pass
+        self._post(("done", scan_id, idx, scan.meta))
+
+    def handle(self, ev: tuple):
+        """GUI thread: apply one event posted by the scan thread."""
+        kind, scan_id = ev[0], ev[1]
+        if scan_id != self._scan_id or not self.scanning:
+            return
+        if kind == "progress":
+            if not self.quiet:
+                self._status(self._progress(*ev[2:]))
+            return
+        ok = kind == "done"
+        was_quiet = self.quiet
+        self.scanning = False
+        if ok:
+            self.last_scan_at = int(time.time() * 1000)
+            self._done(ev[2], ev[3])
+        else:
+            self.error = ev[2]
+            self._failed(ev[2])
+        queued, self._queued = self._queued, None
+        if queued and (queued[1] != self._key or self._joined or queued[4]):
+            self.start(*queued[:3], force=True, quiet=queued[3], deep=queued[4])
+            if self.scanning and not self.quiet:
+                return
+        if not was_quiet:
+            self._status({"scanning": False, "progress": None})
@@ -0,0 +1,201 @@
+"""
+Project Butterfly — Library Watcher
+
+Keeps a library domain's index current between scans (LibraryScanMixin):
+
+  - Every directory the last scan listed is watched: QFileSystemWatcher
+    (inotify / ReadDirectoryChangesW / kqueue) on local disks, a stat of the
+    directory every POLL_INTERVAL_MS for network shares and for anything
+    the native watcher refuses (e.g. inotify watch limits).
+  - Change events only mark their directory dirty. A batch is flushed
+    DEBOUNCE_MS after the last event (at most MAX_DELAY_MS after the first),
+    so copying a season in produces one refresh, not hundreds.
+  - The flush runs a quiet rescan in which every watched directory without
+    an event is trusted: DirCache serves it with no I/O at all, so only the
+    dirty folders are listed again.
+  - Directories whose listing was too fresh to cache (a file still being
+    copied) are marked dirty again after SETTLE_RECHECK_MS.
+
+Qt objects live on the GUI thread; polling stats run on a worker thread.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Iterable
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QStorageInfo, QTimer, Signal
+
+DEBOUNCE_MS = 1500
+MAX_DELAY_MS = 10000
+POLL_INTERVAL_MS = 60000
+SETTLE_RECHECK_MS = 60000
+
+NETWORK_FS_TYPES = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "afpfs", "9p", "davfs",
+    "fuse.sshfs", "fuse.rclone", "fuse.smbnetfs", "webdav",
+}
+
+
+def _dir_sig(d: str):
+    try:
+        st = os.stat(d)
+    except (OSError, ValueError):
+        return None
+    return st.st_mtime_ns, st.st_ino
+
+
+class LibraryWatcher(QObject):
+    """
+    Watch a set of directories and report batches of changed ones.
+
+    ``flush(dirty)`` is called on the GUI thread with the dirty set; it
+    returns False when it can't act yet (a scan is running), and the batch
+    is kept until kick(). begin_scan() hands a starting scan the trusted
+    directories and clears what that scan will cover.
+    """
+
+    _polled = Signal(object)
+
+    def __init__(self, flush: Callable[[set], bool], parent=None):
+        super().__init__(parent)
+        self._flush_cb = flush
+        self._fs = QFileSystemWatcher(self)
+        self._fs.directoryChanged.connect(self._touch)
+        self._dirs = set()
+        self._native = set()
+        self._poll = {}  # dir -> (mtime_ns, ino) at the last poll, None until then
+        self._unvalidated = set()
+        self._dirty = set()
+        self._first_dirty = 0.0
+        self._recheck = set()
+        self._polling = False
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._flush)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._start_poll)
+        self._recheck_timer = QTimer(self)
+        self._recheck_timer.setSingleShot(True)
+        self._recheck_timer.timeout.connect(self._fire_recheck)
+        self._polled.connect(self._on_polled)
+
+    # -- watch set -----------------------------------------------------------
+
+    def set_dirs(self, dirs: Iterable[str]):
+        """Watch exactly dirs (what the last scan listed)."""
+        dirs = set(dirs)
+        gone = self._dirs - dirs
+        new = dirs - self._dirs
+        if gone:
+            native_gone = [d for d in gone if d in self._native]
+            if native_gone:
+                self._fs.removePaths(native_gone)
+                self._native.difference_update(native_gone)
+            for d in gone:
+                self._poll.pop(d, None)
+            self._dirty -= gone
+            self._unvalidated -= gone
+            self._recheck -= gone
+        if new:
+            remote = self._network_mounts()
+            native = [d for d in new if not self._is_remote(d, remote)]
+            failed = set(self._fs.addPaths(native)) if native else set()
+            self._native.update(d for d in native if d not in failed)
+            for d in new:
+                if d not in self._native:
+                    self._poll[d] = None
+            # Changes between the scan's listing and now went unseen: the
+            # next scan checks these by stat instead of trusting them
+            self._unvalidated |= new
+        self._dirs = dirs
+        if self._poll and not self._poll_timer.isActive():
+            self._poll_timer.start()
+        elif not self._poll:
+            self._poll_timer.stop()
+
+    def stop(self):
+        self.set_dirs(())
+        self._debounce.stop()
+        self._recheck_timer.stop()
+
+    @staticmethod
+    def _network_mounts() -> list:
+        out = []
+        for vol in QStorageInfo.mountedVolumes():
+            fs = bytes(vol.fileSystemType()).decode("ascii", "replace").lower()
+            if fs in NETWORK_FS_TYPES:
+                out.append(vol.rootPath().rstrip("/") + "/")
+        return out
+
+    @staticmethod
+    def _is_remote(d: str, remote: list) -> bool:
+        if d.startswith(("\\\\", "//")):
+            return True
+        probe = d.replace("\\", "/").rstrip("/") + "/"
+        return any(probe.startswith(root) for root in remote)
+
+    # -- scans ---------------------------------------------------------------
+
+    def begin_scan(self) -> frozenset:
+        """Directories a scan starting now may serve from its cache unseen."""
+        trusted = frozenset(self._dirs - self._dirty - self._unvalidated)
+        self._dirty.clear()
+        self._unvalidated.clear()
+        self._debounce.stop()
+        return trusted
+
+    def recheck(self, dirs: Iterable[str]):
+        """Mark dirs dirty again in SETTLE_RECHECK_MS (listings still settling)."""
+        self._recheck.update(d for d in dirs if d in self._dirs)
+        if self._recheck and not self._recheck_timer.isActive():
+            self._recheck_timer.start(SETTLE_RECHECK_MS)
+
+    def kick(self):
+        """Flush a batch held back while a scan was running."""
+        if self._dirty and not self._debounce.isActive():
+            self._debounce.start(DEBOUNCE_MS)
+
+    # -- events --------------------------------------------------------------
+
+    def _touch(self, d: str):
+        if d not in self._dirs:
+            return
+        now = time.monotonic()
+        if not self._dirty:
+            self._first_dirty = now
+        self._dirty.add(d)
+        waited_ms = (now - self._first_dirty) * 1000
+        self._debounce.start(int(max(0, min(DEBOUNCE_MS, MAX_DELAY_MS - waited_ms))))
+
+    def _flush(self):
+        if self._dirty:
+            self._flush_cb(set(self._dirty))
+
+    def _fire_recheck(self):
+        pending, self._recheck = self._recheck, set()
+        for d in pending:
+            self._touch(d)
+
+    def _start_poll(self):
+        if self._polling or not self._poll:
+            return
+        self._polling = True
+        snapshot = dict(self._poll)
+
+        def run():
+            self._polled.emit({d: _dir_sig(d) for d in snapshot})
+
+        threading.Thread(target=run, name="library-watch-poll", daemon=True).start()
+
+    def _on_polled(self, sigs: dict):
+        self._polling = False
+        for d, sig in sigs.items():
+            if d not in self._poll:
+                continue
+            before = self._poll[d]
+            self._poll[d] = sig
+            if before is not None and sig != before:
+                self._touch(d)
@@ -0,0 +1,253 @@
+"""
+Project Butterfly — Video Metadata Probe
+
+Duration, resolution, codecs and track lists for VideoBridge episodes,
+without loading anything into the player or blocking the GUI thread:
+
+  - ffprobe runs in at most MAX_PROCS processes at once, each killed after
+    PROBE_TIMEOUT_S. The binary is the one on PATH, else the ffprobe-static
+    copy a with-static-media build ships in node_modules (ffmpeg_path()
+    does the same for the poster grabber).
+  - Results persist in CACHE_FILE keyed by the (ext, size, mtime) part of
+    the signature the video scan matches episodes by, so a renamed or moved
+    file keeps its metadata and a changed one is probed again. Failures are
+    cached too (timeouts aren't), so a broken file isn't re-run on every view.
+  - Probing is lazy: the renderer asks for the episodes it is showing, and
+    the scan only fills in what the cache already knows.
+
+Pure Python (subprocess), no Qt. Callbacks run on worker threads.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import library_scan
+import storage
+
+MAX_PROCS = max(2, min(4, (os.cpu_count() or 2) // 2))
+PROBE_TIMEOUT_S = 20
+CACHE_FILE = "video_meta_cache.json"
+CACHE_VERSION = 1
+CACHE_MAX_ENTRIES = 100000
+SAVE_DELAY_MS = 2000
+
+_ARCH = {"x86_64": "x64", "amd64": "x64", "arm64": "arm64", "aarch64": "arm64",
+         "i386": "ia32", "i686": "ia32", "x86": "ia32"}
+
+
+def _bundled(*parts) -> Optional[str]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    p = os.path.join(root, "node_modules", *parts)
+    return p if os.path.isfile(p) else None
+
+
+def _exe(name: str) -> str:
+    return name + ".exe" if sys.platform == "win32" else name
+
+
+def ffprobe_path() -> Optional[str]:
+    arch = _ARCH.get(platform.machine().lower(), platform.machine().lower())
+    return shutil.which("ffprobe") or _bundled("ffprobe-static", "bin", sys.platform, arch, _exe("ffprobe"))
+
+
+def ffmpeg_path() -> Optional[str]:
+    return shutil.which("ffmpeg") or _bundled("ffmpeg-static", _exe("ffmpeg"))
+
+
+def sig_key(ext, size, mtime) -> str:
+    """(ext, size, mtime) as the video scan's alias signature renders them."""
+    try:
+        m = int(float(mtime or 0) + 0.5)
+    except (TypeError, ValueError):
+        m = 0
+    return f"{str(ext or '').lower()}::{library_scan.js_number(size or 0)}::{m}"
+
+
+def _num(v) -> Optional[float]:
+    try:
+        n = float(v)
+    except (TypeError, ValueError):
+        return None
+    return n if n > 0 else None
+
+
+def _track(s: dict, tid: int) -> dict:
+    tags = s.get("tags") or {}
+    out = {
+        "id": tid,
+        "codec": s.get("codec_name") or "",
+        "lang": tags.get("language") or "",
+        "title": tags.get("title") or "",
+        "default": bool((s.get("disposition") or {}).get("default")),
+    }
+    if s.get("codec_type") == "audio":
+        out["channels"] = s.get("channels") or 0
+    return out
+
+
+def parse_ffprobe(data: dict) -> dict:
+    """ffprobe -show_format -show_streams JSON -> episode metadata.
+    Track ids count per type from 1, the way mpv numbers aid/sid."""
+    fmt = data.get("format") or {}
+    streams = [s for s in data.get("streams") or [] if isinstance(s, dict)]
+    video = [s for s in streams if s.get("codec_type") == "video"
+             and not (s.get("disposition") or {}).get("attached_pic")]
+    audio = [s for s in streams if s.get("codec_type") == "audio"]
+    subs = [s for s in streams if s.get("codec_type") == "subtitle"]
+    v = video[0] if video else {}
+    duration = _num(fmt.get("duration")) or _num(v.get("duration"))
+    return {
+        "durationSec": round(duration, 3) if duration else None,
+        "width": int(v["width"]) if _num(v.get("width")) else None,
+        "height": int(v["height"]) if _num(v.get("height")) else None,
+        "videoCodec": v.get("codec_name") or "",
+        "audioTracks": [_track(s, i) for i, s in enumerate(audio, 1)],
+        "subtitleTracks": [_track(s, i) for i, s in enumerate(subs, 1)],
+    }
+
+
+class Prober:
+    """
+    Cached, bounded ffprobe runs.
+
+    cached(key) answers from the cache; request(path, key, done) probes on
+    the pool (one run per key however many callers wait on it) and calls
+    done(meta) on a worker thread, meta None when the file can't be probed
+    or ffprobe isn't installed. key None means stat the file first.
+    """
+
+    def __init__(self, cache_path: str):
+        self._cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._waiters = {}  # key -> [done]
+        self._procs = set()
+        self._closed = False
+        self._exe = None
+        self._pool = ThreadPoolExecutor(max_workers=MAX_PROCS, thread_name_prefix="media-probe")
+
+    @property
+    def available(self) -> bool:
+        if self._exe is None:
+            self._exe = ffprobe_path() or ""
+        return bool(self._exe)
+
+    def _ensure(self) -> dict:
+        if self._entries is None:
+            raw = storage.read_json(self._cache_path, None)
+            ok = isinstance(raw, dict) and raw.get("version") == CACHE_VERSION and isinstance(raw.get("entries"), dict)
+            self._entries = raw["entries"] if ok else {}
+        return self._entries
+
+    def cached(self, key: str) -> Optional[dict]:
+        """The stored result for key ({"failed": True} for a file that
+        couldn't be probed), or None if it was never probed."""
+        with self._lock:
+            return self._ensure().get(key)
+
+    def request(self, path: str, key: Optional[str], done: Callable[[Optional[dict]], None]):
+        if key is not None:
+            hit = self.cached(key)
+            if hit is not None:
+                done(None if hit.get("failed") else hit)
+                return
+        if self._closed or not self.available:
+            done(None)
+            return
+        wait_key = key or "path:" + path
+        with self._lock:
+            if wait_key in self._waiters:
+                self._waiters[wait_key].append(done)
+                return
+            self._waiters[wait_key] = [done]
+        try:
+            self._pool.submit(self._run, path, key, wait_key)
+        except RuntimeError:  # shut down
+            self._finish(wait_key, None)
+
+    def _run(self, path: str, key: Optional[str], wait_key: str):
+        meta = None
+        try:
+            if key is None:
+                st = os.stat(path)
+                key = sig_key(os.path.splitext(path)[1][1:], st.st_size, library_scan.mtime_ms(st))
+            meta = self.cached(key)
+            if meta is None:
+                meta = self._probe(path)
+                if self._closed:
+                    return
+                self._store(key, meta or {"failed": True})
+            elif meta.get("failed"):
+                meta = None
+        except (OSError, subprocess.TimeoutExpired):
+            # Timeouts aren't remembered: a busy disk or share may answer next time
+            meta = None
+        finally:
+            self._finish(wait_key, meta)
+
+    def _probe(self, path: str) -> Optional[dict]:
+        args = [self._exe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
+        try:
+            proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL,
+                                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except OSError:
+            return None
+        with self._lock:
+            self._procs.add(proc)
+        try:
+            out, _ = proc.communicate(timeout=PROBE_TIMEOUT_S)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+        if proc.returncode != 0:
+            return None
+        try:
+            meta = parse_ffprobe(json.loads(out.decode("utf-8", "replace")))
+        except ValueError:
+            return None
+        return meta if meta["durationSec"] or meta["width"] else None
+
+    def _store(self, key: str, meta: dict):
+        with self._lock:
+            entries = self._ensure()
+            entries[key] = dict(meta, probedAt=int(time.time() * 1000))
+            if len(entries) > CACHE_MAX_ENTRIES:
+                oldest = sorted(entries, key=lambda k: entries[k].get("probedAt", 0))
+                for k in oldest[:len(entries) - CACHE_MAX_ENTRIES]:
+                    del entries[k]
+            snapshot = {"version": CACHE_VERSION, "entries": dict(entries)}
+        storage.write_json_debounced(self._cache_path, snapshot, SAVE_DELAY_MS)
+
+    def _finish(self, wait_key: str, meta: Optional[dict]):
+        with self._lock:
+            waiters = self._waiters.pop(wait_key, [])
+        for done in waiters:
+            try:
+                done(meta)
+            except Exception:
+                pass
+
+    def shutdown(self):
+        """Stop queued probes and kill running ffprobe processes (window close)."""
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
@@ -0,0 +1,495 @@
+"""
+Project Butterfly — OPDS Feed Parser
+
+Port of the parsers in src/domains/books/books_opds.js (parseOpdsAtom,
+parseOpdsJson, parseOpdsHtml), run in Python so the renderer receives a
+compact page model instead of raw XML/JSON:
+
+  page: {"type", "url", "title", "subtitle", "updated", "items",
+         "feedLinks", "next", "totalResults", "itemsPerPage", "startIndex"}
+  item: {"id", "kind", "title", "authors", "series", "summary", "published",
+         "updated", "language", "cover", "thumbnail", "navigationLinks",
+         "acquisitionLinks", "externalLinks"}
+  link: {"href", "rel", "type", "title"}
+
+Atom is streamed with iterparse and each <entry> is dropped once converted,
+so a 5,000-entry feed never exists as a full tree. Summaries are reduced to
+plain text and capped; links are resolved against the page URL.
+
+iter_pages() follows rel="next" lazily and FeedCursor serves windows over
+the concatenated entries, so callers pull only as far as they scroll.
+PageCache keeps parsed pages keyed by body digest, so revisits skip parsing.
+"""
+
+import hashlib
+import io
+import json
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Callable, Iterator, Optional
+from urllib.parse import urljoin
+
+_SUMMARY_MAX = 400
+_HTML_ITEMS_MAX = 80
+_MAX_PAGES = 500
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+
+# ========== HELPERS ==========
+
+def _abs(base: str, href: str) -> str:
+    href = str(href or "").strip()
+    if not href:
+        return ""
+    try:
+        return urljoin(base or "", href)
+    except ValueError:
+        return ""
+
+
+def _clean(text) -> str:
+    return _WS_RE.sub(" ", str(text or "")).strip()
+
+
+def _summary(text) -> str:
+    s = _clean(_TAG_RE.sub(" ", str(text or "")))
+    if len(s) > _SUMMARY_MAX:
+        s = s[:_SUMMARY_MAX].rstrip() + "…"
+    return s
+
+
+def link_kind(link: dict) -> str:
+    """Same classification as opdsLinkKind() in books_opds.js."""
+    rel = link.get("rel", "").lower()
+    typ = link.get("type", "").lower()
+    if "image" in rel or "thumbnail" in rel:
+        return "image"
+    if "acquisition" in rel:
+        return "acquisition"
+    if "application/epub+zip" in typ or "application/pdf" in typ or "comic" in typ:
+        return "acquisition"
+    if "atom+xml" in typ or "opds+json" in typ:
+        return "navigation"
+    if "subsection" in rel or "collection" in rel or rel in ("start", "up", "contents"):
+        return "navigation"
+    if "html" in typ:
+        return "html"
+    return ""
+
+
+def _make_item(item_id, title, links, authors=(), series="", summary="", published="",
+               updated="", language="", images_are_covers=False):
+    nav, acq, ext = [], [], []
+    cover = thumb = ""
+    for ln in links:
+        kind = link_kind(ln)
+        if kind == "image":
+            if not thumb:
+                thumb = ln["href"]
+            if images_are_covers or "thumbnail" not in ln["rel"].lower():
+                cover = cover or ln["href"]
+        elif kind == "acquisition":
+            acq.append(ln)
+        elif kind == "navigation":
+            nav.append(ln)
+        elif kind == "html":
+            ext.append(ln)
+    if acq:
+        kind = "publication"
+    elif nav:
+        kind = "navigation"
+    elif ext:
+        kind = "external"
+    else:
+        kind = "unknown"
+    return {
+        "id": item_id, "kind": kind, "title": title or "Untitled",
+        "authors": list(authors), "series": series, "summary": summary,
+        "published": published, "updated": updated, "language": language,
+        "cover": cover or thumb, "thumbnail": thumb,
+        "navigationLinks": nav, "acquisitionLinks": acq, "externalLinks": ext,
+    }
+
+
+def _new_page(kind: str, url: str) -> dict:
+    return {
+        "type": kind, "url": url, "title": "", "subtitle": "", "updated": "",
+        "items": [], "feedLinks": [], "next": "",
+        "totalResults": None, "itemsPerPage": None, "startIndex": None,
+    }
+
+
+def _int_or_none(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+# ========== ATOM (OPDS 1.x) ==========
+
+def _local(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _text(el) -> str:
+    return _clean("".join(el.itertext()))
+
+
+def _atom_link(el, base: str) -> Optional[dict]:
+    href = _abs(base, el.get("href"))
+    if not href:
+        return None
+    return {"href": href, "rel": el.get("rel") or "", "type": el.get("type") or "", "title": el.get("title") or ""}
+
+
+def _atom_entry(el, base: str, index: int) -> dict:
+    fields = {}
+    links = []
+    authors = []
+    for child in el:
+        name = _local(child.tag)
+        if name == "link":
+            ln = _atom_link(child, base)
+            if ln:
+                links.append(ln)
+        elif name == "author":
+            for sub in child:
+                if _local(sub.tag) == "name":
+                    nm = _text(sub)
+                    if nm:
+                        authors.append(nm)
+                    break
+        elif name not in fields:
+            fields[name] = child
+    title = _text(fields["title"]) if "title" in fields else ""
+    summary = ""
+    for name in ("summary", "content", "description"):
+        if name in fields:
+            summary = _summary("".join(fields[name].itertext()))
+            if summary:
+                break
+    updated = _text(fields["updated"]) if "updated" in fields else ""
+    published = updated or (_text(fields["published"]) if "published" in fields else "")
+    item_id = _text(fields["id"]) if "id" in fields else ""
+    return _make_item(
+        item_id or f"entry_{index}_{title or 'Untitled'}", title, links, authors,
+        series=_text(fields["series"]) if "series" in fields else "",
+        summary=summary, published=published, updated=updated,
+        language=_text(fields["language"]) if "language" in fields else "",
+    )
+
+
+def parse_atom(data: bytes, base_url: str) -> dict:
+    """Stream an Atom/OPDS 1.x feed. Raises ET.ParseError on malformed XML."""
+    page = _new_page("atom", base_url)
+    depth = 0
+    root = None
+    for event, el in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = el
+            continue
+        if depth == 2:
+            name = _local(el.tag)
+            if name == "entry":
+                page["items"].append(_atom_entry(el, base_url, len(page["items"])))
+                root.clear()  # done with this entry and any feed-level siblings before it
+            elif name == "link":
+                ln = _atom_link(el, base_url)
+                if ln:
+                    if "next" in ln["rel"].split():
+                        page["next"] = page["next"] or ln["href"]
+                    if link_kind(ln) == "navigation":
+                        page["feedLinks"].append(ln)
+            elif name == "title" and not page["title"]:
+                page["title"] = _text(el)
+            elif name in ("subtitle", "tagline") and not page["subtitle"]:
+                page["subtitle"] = _text(el)
+            elif name == "updated":
+                page["updated"] = _text(el)
+            elif name in ("totalresults", "itemsperpage", "startindex"):
+                key = {"totalresults": "totalResults", "itemsperpage": "itemsPerPage", "startindex": "startIndex"}[name]
+                page[key] = _int_or_none(_text(el))
+        depth -= 1
+    if root is None or _local(root.tag) != "feed":
+        raise ET.ParseError("not an Atom feed")
+    page["title"] = page["title"] or "OPDS"
+    return page
+
+
+# ========== JSON (OPDS 2.0) ==========
+
+def _json_links(arr, base: str) -> list:
+    out = []
+    if not isinstance(arr, list):
+        return out
+    for x in arr:
+        if not isinstance(x, dict):
+            continue
+        href = _abs(base, x.get("href"))
+        if not href:
+            continue
+        rel = x.get("rel")
+        out.append({
+            "href": href, "rel": " ".join(str(r) for r in rel) if isinstance(rel, list) else str(rel or ""),
+            "type": str(x.get("type") or ""), "title": str(x.get("title") or ""),
+        })
+    return out
+
+
+def _names(value) -> list:
+    vals = value if isinstance(value, list) else ([value] if value else [])
+    out = []
+    for v in vals:
+        if isinstance(v, str):
+            out.append(v)
+        elif isinstance(v, dict) and v.get("name"):
+            name = v["name"]
+            if isinstance(name, dict):  # localized: {"en": ..., "fr": ...}
+                name = next(iter(name.values()), "")
+            out.append(str(name))
+    return out
+
+
+def _list(value) -> list:
+    return value if isinstance(value, list) else []
+
+
+def _json_publication(p, base: str, idx) -> dict:
+    p = p if isinstance(p, dict) else {}
+    md = p.get("metadata") if isinstance(p.get("metadata"), dict) else {}
+    images = [dict(x, rel=x.get("rel") or "http://opds-spec.org/image")
+              for x in _list(p.get("images")) if isinstance(x, dict)]
+    links = _json_links(_list(p.get("links")) + images, base)
+    lang = md.get("language")
+    series = ""
+    belongs = md.get("belongsTo") if isinstance(md.get("belongsTo"), dict) else {}
+    if belongs.get("series"):
+        names = _names(belongs["series"])
+        series = names[0] if names else ""
+    title = md.get("title")
+    if isinstance(title, dict):
+        title = next(iter(title.values()), "")
+    return _make_item(
+        str(md.get("identifier") or f"pub_{idx}_{title or ''}"), str(title or ""), links,
+        _names(md.get("author")), series=series,
+        summary=_summary(md.get("description")), published=str(md.get("published") or ""),
+        updated=str(md.get("modified") or ""),
+        language=str((lang[0] if lang else "") if isinstance(lang, list) else (lang or "")),
+    )
+
+
+def _json_navigation(n, base: str, idx) -> dict:
+    n = n if isinstance(n, dict) else {}
+    links = _json_links(n["links"] if isinstance(n.get("links"), list) else [n], base)
+    item = _make_item(f"nav_{idx}_{n.get('title') or ''}", str(n.get("title") or ""), links,
+                      summary=_summary(n.get("description")), images_are_covers=True)
+    # Navigation entries never offer downloads (parseNavItem ignores them too)
+    item["acquisitionLinks"] = []
+    if item["kind"] == "publication":
+        item["kind"] = "navigation" if item["navigationLinks"] else ("external" if item["externalLinks"] else "unknown")
+    return item
+
+
+def parse_json(data: bytes, base_url: str) -> dict:
+    doc = json.loads(data)
+    if not isinstance(doc, dict):
+        raise ValueError("not an OPDS 2 feed")
+    page = _new_page("json", base_url)
+    md = doc.get("metadata") if isinstance(doc.get("metadata"), dict) else {}
+    page["title"] = str(md.get("title") or doc.get("title") or "OPDS")
+    page["subtitle"] = str(md.get("subtitle") or md.get("description") or "")
+    page["updated"] = str(md.get("modified") or "")
+    page["totalResults"] = _int_or_none(md.get("numberOfItems"))
+    page["itemsPerPage"] = _int_or_none(md.get("itemsPerPage"))
+    current = _int_or_none(md.get("currentPage"))
+    if current is not None and page["itemsPerPage"]:
+        page["startIndex"] = (current - 1) * page["itemsPerPage"] + 1
+    items = page["items"]
+    for i, p in enumerate(_list(doc.get("publications"))):
+        items.append(_json_publication(p, base_url, i))
+    for i, n in enumerate(_list(doc.get("navigation"))):
+        items.append(_json_navigation(n, base_url, i))
+    for g, grp in enumerate(_list(doc.get("groups"))):
+        if not isinstance(grp, dict):
+            continue
+        gtitle = str((grp.get("metadata") or {}).get("title") or "") if isinstance(grp.get("metadata"), dict) else ""
+        for i, p in enumerate(_list(grp.get("publications"))):
+            rec = _json_publication(p, base_url, f"{g}_{i}")
+            if gtitle and not rec["summary"]:
+                rec["summary"] = gtitle
+            items.append(rec)
+        for i, n in enumerate(_list(grp.get("navigation"))):
+            items.append(_json_navigation(n, base_url, f"{g}_{i}"))
+    page["feedLinks"] = _json_links(doc.get("links"), base_url)
+    for ln in page["feedLinks"]:
+        if "next" in ln["rel"].split():
+            page["next"] = ln["href"]
+            break
+    return page
+
+
+# ========== HTML (fallback) ==========
+
+class _AnchorCollector(HTMLParser):
+    def __init__(self, base: str):
+        super().__init__(convert_charrefs=True)
+        self.base = base
+        self.title = ""
+        self.items = []
+        self._in_title = False
+        self._anchor = None  # [href, text parts, img]
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "title":
+            self._in_title = True
+        elif tag == "a" and a.get("href") and len(self.items) < _HTML_ITEMS_MAX:
+            href = _abs(self.base, a["href"])
+            if href:
+                self._anchor = [href, [], ""]
+        elif tag == "img" and self._anchor is not None and not self._anchor[2]:
+            self._anchor[2] = _abs(self.base, a.get("src"))
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "a" and self._anchor is not None:
+            href, parts, img = self._anchor
+            self._anchor = None
+            txt = _clean("".join(parts)) or href
+            if len(txt) > 180:
+                txt = txt[:180] + "…"
+            ln = {"href": href, "rel": "alternate", "type": "text/html", "title": txt}
+            self.items.append({
+                "id": f"html_{len(self.items)}", "kind": "navigation", "title": txt,
+                "authors": [], "series": "", "summary": "", "published": "", "updated": "",
+                "language": "", "cover": img, "thumbnail": img,
+                "navigationLinks": [ln], "acquisitionLinks": [], "externalLinks": [],
+            })
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._anchor is not None:
+            self._anchor[1].append(data)
+
+
+def parse_html(text: str, base_url: str) -> dict:
+    page = _new_page("html", base_url)
+    p = _AnchorCollector(base_url)
+    p.feed(text)
+    p.close()
+    page["title"] = _clean(p.title) or "Catalog"
+    page["items"] = p.items
+    return page
+
+
+# ========== ENTRY POINTS ==========
+
+def parse_feed(body: bytes, content_type: str, base_url: str) -> dict:
+    """Parse a catalog response body, choosing the format like parseOpdsPayload()."""
+    ct = str(content_type or "").lower()
+    head = body[:512].lstrip()
+    if not head:
+        raise ValueError("Empty response")
+    if "json" in ct or head[:1] == b"{":
+        return parse_json(body, base_url)
+    if "html" not in ct and head[:1] == b"<":
+        try:
+            return parse_atom(body, base_url)
+        except ET.ParseError:
+            pass
+    if "html" in ct or head[:1] == b"<":
+        return parse_html(body.decode("utf-8", errors="replace"), base_url)
+    raise ValueError("Unsupported catalog format")
+
+
+def iter_pages(load: Callable[[str], dict], url: str, max_pages: int = _MAX_PAGES) -> Iterator[dict]:
+    """Yield parsed pages from url onward, fetching each next page only when asked."""
+    seen = set()
+    while url and url not in seen and len(seen) < max_pages:
+        seen.add(url)
+        page = load(url)
+        yield page
+        url = page.get("next") or ""
+
+
+class PageCache:
+    """Parsed pages by (url, body digest), least recently used dropped first."""
+
+    def __init__(self, max_pages: int = 64):
+        self._max = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, url: str, body: bytes, content_type: str) -> dict:
+        key = (url, hashlib.sha1(body).digest())
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                return page
+        page = parse_feed(body, content_type, url)
+        with self._lock:
+            self._pages[key] = page
+            while len(self._pages) > self._max:
+                self._pages.popitem(last=False)
+        return page
+
+
+class FeedCursor:
+    """A feed plus everything reachable through its next links, as one list
+    that is only fetched as far as window() has been asked to read."""
+
+    def __init__(self, pages: Iterator[dict]):
+        self._pages = pages
+        self.first = None
+        self.items = []
+        self.done = False
+        self.error = ""
+        self.lock = threading.RLock()
+
+    def covers(self, end: int) -> bool:
+        return self.first is not None and (self.done or len(self.items) >= end)
+
+    def _pull(self, end: int):
+        while not self.done and (self.first is None or len(self.items) < end):
+            try:
+                page = next(self._pages)
+            except StopIteration:
+                self.done = True
+                break
+            except Exception as e:
+                if self.first is None:
+                    raise
+                # Keep what loaded; report the broken next page to the caller
+                self.error = str(e) or type(e).__name__
+                self.done = True
+                break
+            if self.first is None:
+                self.first = page
+            self.items.extend(page["items"])
+
+    def window(self, offset: int, limit: int) -> dict:
+        """Page metadata from the first page with items[offset:offset + limit]."""
+        with self.lock:
+            self._pull(offset + limit)
+            first = self.first
+            out = {k: v for k, v in first.items() if k not in ("items", "next")}
+            out["items"] = self.items[offset:offset + limit]
+            out["offset"] = offset
+            out["loaded"] = len(self.items)
+            out["hasMore"] = not self.done or len(self.items) > offset + limit
+            if self.error:
+                out["nextError"] = self.error
+            return out
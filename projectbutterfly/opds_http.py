@@ -0,0 +1,347 @@
+"""
+Project Butterfly — OPDS HTTP Client
+
+Fetch layer behind BooksOpdsBridge.fetchCatalog:
+  - Keep-alive connections pooled per (scheme, host, port), so paging through
+    a catalog reuses one TCP/TLS session instead of a handshake per page.
+  - Content-Encoding: gzip and deflate always, br when the `brotli` package
+    is installed (only advertised in Accept-Encoding if it is).
+  - Private HTTP cache on disk: honors Cache-Control (no-store, no-cache,
+    max-age), Expires and the Last-Modified heuristic for freshness, and
+    revalidates stale entries with If-None-Match / If-Modified-Since.
+
+Pure Python (http.client), no Qt; thread-safe, so the bridge can run fetches
+on a worker pool.
+"""
+
+import email.utils
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+USER_AGENT = "Tankoban-Max/OPDS (+Butterfly)"
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+_CACHEABLE_STATUS = (200, 203)
+_HEURISTIC_MAX_S = 3600
+
+
+# ========== CONNECTION POOL ==========
+
+class ConnectionPool:
+    """Idle keep-alive connections per origin. Connections are checked out for
+    one request/response at a time, then returned if the server kept them open."""
+
+    def __init__(self, max_idle_per_host: int = 4):
+        self._max_idle = max_idle_per_host
+        self._idle = {}  # (scheme, host, port) -> [HTTPConnection]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _origin(parts):
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return (parts.scheme, parts.hostname or "", port)
+
+    def _checkout(self, origin, timeout):
+        with self._lock:
+            idle = self._idle.get(origin)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        scheme, host, port = origin
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def _checkin(self, origin, conn):
+        with self._lock:
+            idle = self._idle.setdefault(origin, [])
+            if len(idle) < self._max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method: str, url: str, headers: dict, timeout: float):
+        """One round trip. Returns (status, reason, HTTPMessage, raw body bytes)."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        origin = self._origin(parts)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        while True:
+            conn, reused = self._checkout(origin, timeout)
+            try:
+                conn.request(method, target, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused:
+                    continue  # server dropped an idle connection; retry on a fresh one
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(origin, conn)
+            return resp.status, resp.reason, resp.headers, body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+def decode_body(body: bytes, content_encoding: str) -> bytes:
+    """Undo Content-Encoding (possibly stacked, e.g. "gzip, br")."""
+    for coding in reversed([c.strip().lower() for c in (content_encoding or "").split(",") if c.strip()]):
+        if coding in ("gzip", "x-gzip"):
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif coding == "deflate":
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                body = zlib.decompress(body, -zlib.MAX_WBITS)  # raw deflate, as some servers send
+        elif coding == "br" and brotli is not None:
+            body = brotli.decompress(body)
+        elif coding != "identity":
+            raise ValueError(f"Unsupported Content-Encoding: {coding}")
+    return body
+
+
+# ========== DISK CACHE ==========
+
+def _parse_cache_control(value: str) -> dict:
+    out = {}
+    for item in (value or "").split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        name, _, arg = item.partition("=")
+        out[name.strip()] = arg.strip().strip('"')
+    return out
+
+
+def _http_date(value: str) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def freshness_lifetime(headers: dict, stored_at: float) -> float:
+    """Seconds a stored response stays fresh; 0 means revalidate every time."""
+    cc = _parse_cache_control(headers.get("cache-control", ""))
+    if "no-cache" in cc or "no-store" in cc:
+        return 0
+    if "max-age" in cc:
+        try:
+            return max(0, int(cc["max-age"]))
+        except ValueError:
+            return 0
+    date = _http_date(headers.get("date", "")) or stored_at
+    expires = headers.get("expires")
+    if expires is not None:
+        exp = _http_date(expires)
+        return max(0, exp - date) if exp is not None else 0
+    last_mod = _http_date(headers.get("last-modified", ""))
+    if last_mod is not None and last_mod < date:
+        return min(_HEURISTIC_MAX_S, (date - last_mod) / 10)
+    return 0
+
+
+class HttpCache:
+    """One metadata JSON + one body file per URL under a directory.
+
+    Bodies are stored decoded. Only the headers that matter for freshness,
+    validation and the caller's result are kept.
+    """
+
+    _KEPT_HEADERS = ("cache-control", "expires", "date", "last-modified", "etag", "content-type")
+
+    def __init__(self, directory: str, max_entries: int = 2000):
+        self._dir = directory
+        self._max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self._dir, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def get(self, url: str) -> Optional[dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("url") != url:
+                return None
+            with open(body_path, "rb") as f:
+                meta["body"] = f.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: dict):
+        """entry: {"status", "reason", "finalUrl", "headers", "storedAt"} + "body" (bytes or None to keep)."""
+        meta_path, body_path = self._paths(url)
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        meta["url"] = url
+        meta["headers"] = {k: v for k, v in entry["headers"].items() if k in self._KEPT_HEADERS}
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            tag = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            if entry.get("body") is not None:
+                with open(body_path + tag, "wb") as f:
+                    f.write(entry["body"])
+                os.replace(body_path + tag, body_path)
+            with open(meta_path + tag, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(meta_path + tag, meta_path)
+        except OSError:
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 200 == 0
+        if prune:
+            self.prune()
+
+    def delete(self, url: str):
+        for p in self._paths(url):
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
+
+    def prune(self):
+        """Drop least recently stored entries beyond max_entries."""
+        metas = []
+        try:
+            for sub in os.scandir(self._dir):
+                if sub.is_dir():
+                    for e in os.scandir(sub.path):
+                        if e.name.endswith(".json"):
+                            metas.append((e.stat().st_mtime, e.path))
+        except OSError:
+            return
+        if len(metas) <= self._max_entries:
+            return
+        metas.sort()
+        for _, meta_path in metas[:len(metas) - self._max_entries]:
+            for p in (meta_path, meta_path[:-5] + ".body"):
+                try:
+                    os.unlink(p)
+                except OSError:
+                    pass
+
+
+# ========== CLIENT ==========
+
+class OpdsHttpClient:
+    """GET with pooling, decoding, redirects and the private cache."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_idle_per_host: int = 4):
+        self.pool = ConnectionPool(max_idle_per_host)
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+
+    def _get(self, url, headers, timeout):
+        """Follow redirects; returns (status, reason, final_url, lowercase headers, decoded body)."""
+        for _ in range(_MAX_REDIRECTS + 1):
+            status, reason, msg, body = self.pool.request("GET", url, headers, timeout)
+            hdrs = {k.lower(): v for k, v in msg.items()}
+            if status in _REDIRECTS and hdrs.get("location"):
+                url = urljoin(url, hdrs["location"])
+                continue
+            if body:
+                body = decode_body(body, hdrs.get("content-encoding", ""))
+            return status, reason, url, hdrs, body
+        raise http.client.HTTPException("Too many redirects")
+
+    @staticmethod
+    def _is_fresh(entry: dict, now: float) -> bool:
+        stored_at = entry.get("storedAt", 0)
+        return now - stored_at < freshness_lifetime(entry["headers"], stored_at)
+
+    def cached(self, url: str) -> Optional[dict]:
+        """The fetch() result for url if the cache can answer without the network."""
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and self._is_fresh(entry, time.time()):
+            return self._result(entry, "hit")
+        return None
+
+    def fetch(self, url: str, accept: str = "*/*", timeout: float = 30, force_refresh: bool = False,
+              text: bool = True) -> dict:
+        """Returns {"status", "statusText", "url", "contentType", "body",
+        "headers": {"etag", "lastModified"}, "cache": "hit"|"revalidated"|"miss"}.
+        body is str, or the raw bytes when text is False (for parsers that
+        honor the document's own encoding). Network errors raise; 4xx/5xx are
+        returned with their status."""
+        now = time.time()
+        cached = self.cache.get(url) if self.cache else None
+        if cached is not None and not force_refresh and self._is_fresh(cached, now):
+            return self._result(cached, "hit", text)
+
+        headers = {"Accept": accept, "Accept-Encoding": ACCEPT_ENCODING, "User-Agent": USER_AGENT}
+        if cached is not None:
+            if cached["headers"].get("etag"):
+                headers["If-None-Match"] = cached["headers"]["etag"]
+            if cached["headers"].get("last-modified"):
+                headers["If-Modified-Since"] = cached["headers"]["last-modified"]
+
+        status, reason, final_url, hdrs, body = self._get(url, headers, timeout)
+        if status == 304 and cached is not None:
+            merged = dict(cached["headers"])
+            merged.update({k: v for k, v in hdrs.items() if k in HttpCache._KEPT_HEADERS and k != "content-type"})
+            cached.update(headers=merged, storedAt=now)
+            self.cache.put(url, dict(cached, body=None))
+            return self._result(cached, "revalidated", text)
+
+        entry = {"status": status, "reason": reason or "", "finalUrl": final_url,
+                 "headers": hdrs, "storedAt": now, "body": body}
+        if self.cache is not None:
+            cc = _parse_cache_control(hdrs.get("cache-control", ""))
+            if status in _CACHEABLE_STATUS and "no-store" not in cc:
+                self.cache.put(url, entry)
+            elif cached is not None:
+                self.cache.delete(url)
+        return self._result(entry, "miss", text)
+
+    @staticmethod
+    def _result(entry: dict, cache_state: str, text: bool = True) -> dict:
+        hdrs = entry["headers"]
+        body = entry.get("body") or b""
+        return {
+            "status": entry["status"], "statusText": entry.get("reason", ""),
+            "url": entry.get("finalUrl") or entry.get("url", ""),
+            "contentType": hdrs.get("content-type", ""),
+            "body": body.decode("utf-8", errors="replace") if text else body,
+            "headers": {"etag": hdrs.get("etag", ""), "lastModified": hdrs.get("last-modified", "")},
+            "cache": cache_state,
+        }
+
+    def close(self):
+        self.pool.close()
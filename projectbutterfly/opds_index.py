@@ -0,0 +1,431 @@
+"""
+Project Butterfly — OPDS Crawler + Offline Search Index
+
+Walks the configured OPDS feeds in the background and keeps every
+publication it finds in a local SQLite database with an FTS5 index over
+title, authors and series, so searching all catalogs is one local query.
+
+  - Bounded concurrency: one worker pool shared by all feeds, at most
+    PER_HOST_IN_FLIGHT requests per host and MIN_INTERVAL_S between request
+    starts on the same host.
+  - Only the feed's own host is crawled, following rel="next" and the
+    navigation link of each navigation entry (not facets, search or "up").
+  - Incremental: a page whose feed-level <updated> is unchanged since the
+    previous crawl is not descended into again (its subtree is carried over),
+    and entries whose <updated> is unchanged are not rewritten. After a
+    cancelled or failed crawl every page is fetched again.
+  - Entries not seen by a completed crawl are pruned; a failed page keeps
+    what it indexed last time.
+
+Schema (opds_index.sqlite):
+  feeds(feed_id, url, gen, crawled_at, pages, entries, error)
+  pages(feed_id, url, parent, updated, gen)
+  entries(id, feed_id, entry_id, page_url, updated, gen, title, authors,
+          series, item)            item = opds_feed item JSON
+  entries_fts(title, authors, series)   external content on entries
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import opds_feed
+import opds_http
+
+SCHEMA_VERSION = 1
+
+WORKERS = 6
+PER_HOST_IN_FLIGHT = 2
+MIN_INTERVAL_S = 0.25
+MAX_PAGES_PER_FEED = 5000
+FETCH_TIMEOUT_S = 30
+
+_ACCEPT = "application/opds+json, application/atom+xml, application/xml;q=0.9, */*;q=0.5"
+_SYNTHETIC_ID_RE = re.compile(r"^(?:entry|pub|nav)_\d")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    feed_id TEXT PRIMARY KEY, url TEXT NOT NULL, gen INTEGER NOT NULL DEFAULT 0,
+    crawled_at INTEGER NOT NULL DEFAULT 0, pages INTEGER NOT NULL DEFAULT 0,
+    entries INTEGER NOT NULL DEFAULT 0, error TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS pages (
+    feed_id TEXT NOT NULL, url TEXT NOT NULL, parent TEXT NOT NULL DEFAULT '',
+    updated TEXT NOT NULL DEFAULT '', gen INTEGER NOT NULL,
+    PRIMARY KEY (feed_id, url)
+);
+CREATE INDEX IF NOT EXISTS pages_parent ON pages(feed_id, parent);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY, feed_id TEXT NOT NULL, entry_id TEXT NOT NULL,
+    page_url TEXT NOT NULL, updated TEXT NOT NULL DEFAULT '', gen INTEGER NOT NULL,
+    title TEXT NOT NULL, authors TEXT NOT NULL, series TEXT NOT NULL, item TEXT NOT NULL,
+    UNIQUE (feed_id, entry_id)
+);
+CREATE INDEX IF NOT EXISTS entries_page ON entries(feed_id, page_url);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, authors, series, content='entries', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, title, authors, series) VALUES (new.id, new.title, new.authors, new.series);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, authors, series) VALUES ('delete', old.id, old.title, old.authors, old.series);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF title, authors, series ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, authors, series) VALUES ('delete', old.id, old.title, old.authors, old.series);
+    INSERT INTO entries_fts(rowid, title, authors, series) VALUES (new.id, new.title, new.authors, new.series);
+END;
+"""
+
+# Pages below `url` in this feed, as last discovered (parent links)
+_SUBTREE = """
+WITH RECURSIVE sub(url) AS (
+    SELECT ? UNION SELECT p.url FROM pages p JOIN sub ON p.feed_id = ? AND p.parent = sub.url
+)
+"""
+
+
+def _entry_key(item: dict) -> str:
+    """Stable identity of a publication within its feed."""
+    item_id = item.get("id", "")
+    if item_id and not _SYNTHETIC_ID_RE.match(item_id):
+        return item_id
+    acq = item.get("acquisitionLinks") or []
+    if acq:
+        return acq[0]["href"]
+    return "t:" + item.get("title", "") + "|" + ",".join(item.get("authors", []))
+
+
+def fts_query(text: str) -> str:
+    """User text -> FTS5 MATCH expression: every word required, prefix-matched."""
+    return " ".join(f'"{tok}"*' for tok in _TOKEN_RE.findall(text or ""))
+
+
+# ========== INDEX ==========
+
+class OpdsIndex:
+    """One connection to the index database. SQLite connections are per
+    thread, so the crawler opens its own; WAL lets searches run during a crawl."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            with self.conn:
+                for table in ("entries_fts", "entries", "pages", "feeds"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.conn.executescript(_SCHEMA)
+                self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    # --- Reads ---
+
+    def search(self, query: str, limit: int = 50, offset: int = 0, feed_id: str = "") -> dict:
+        """{"items": [item + feedId], "total"} ranked by bm25, title weighted highest."""
+        match = fts_query(query)
+        if not match:
+            return {"items": [], "total": 0}
+        where = "entries_fts MATCH ?"
+        args = [match]
+        if feed_id:
+            where += " AND e.feed_id = ?"
+            args.append(feed_id)
+        base = f"FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid WHERE {where}"
+        total = self.conn.execute(f"SELECT count(*) {base}", args).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT e.feed_id, e.item {base} ORDER BY bm25(entries_fts, 10.0, 4.0, 2.0) LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+        items = []
+        for fid, raw in rows:
+            item = json.loads(raw)
+            item["feedId"] = fid
+            items.append(item)
+        return {"items": items, "total": total}
+
+    def feed_stats(self) -> list:
+        rows = self.conn.execute(
+            "SELECT feed_id, url, crawled_at, pages, entries, error FROM feeds ORDER BY feed_id"
+        ).fetchall()
+        return [{"feedId": r[0], "url": r[1], "crawledAt": r[2], "pages": r[3], "entries": r[4], "error": r[5]}
+                for r in rows]
+
+    # --- Writes ---
+
+    def remove_feed(self, feed_id: str):
+        with self.conn:
+            for table in ("entries", "pages", "feeds"):
+                self.conn.execute(f"DELETE FROM {table} WHERE feed_id = ?", (feed_id,))
+
+    def retain(self, feeds: dict):
+        """Drop every feed not in feeds ({feed_id: url}) or indexed under another URL."""
+        known = dict(self.conn.execute("SELECT feed_id, url FROM feeds").fetchall())
+        known.update((r[0], None) for r in self.conn.execute("SELECT DISTINCT feed_id FROM pages")
+                     if r[0] not in known)
+        for feed_id, url in known.items():
+            if feeds.get(feed_id) is None or feeds[feed_id] != url:
+                self.remove_feed(feed_id)
+
+    def begin_feed(self, feed_id: str, url: str) -> tuple:
+        """Start a crawl generation: (gen, whether the previous crawl completed).
+        A changed root URL starts the feed over."""
+        row = self.conn.execute("SELECT url, gen, error FROM feeds WHERE feed_id = ?", (feed_id,)).fetchone()
+        if row is not None and row[0] != url:
+            self.remove_feed(feed_id)
+            row = None
+        with self.conn:
+            if row is None:
+                self.conn.execute("INSERT INTO feeds(feed_id, url) VALUES (?, ?)", (feed_id, url))
+        return (row[1] if row else 0) + 1, row is not None and not row[2]
+
+    def page_unchanged(self, feed_id: str, url: str, updated: str, prev_gen: int) -> bool:
+        """True if the last completed crawl saw this page with the same <updated>."""
+        if not updated:
+            return False
+        row = self.conn.execute(
+            "SELECT updated, gen FROM pages WHERE feed_id = ? AND url = ?", (feed_id, url)
+        ).fetchone()
+        return row is not None and row[0] == updated and row[1] == prev_gen > 0
+
+    def keep_subtree(self, feed_id: str, url: str, gen: int) -> int:
+        """Carry a page, the pages under it and their entries into generation gen."""
+        with self.conn:
+            self.conn.execute(
+                _SUBTREE + "UPDATE pages SET gen = ? WHERE feed_id = ? AND url IN sub",
+                (url, feed_id, gen, feed_id))
+            before = self.conn.total_changes  # rowcount is -1 for WITH-prefixed DML
+            self.conn.execute(
+                _SUBTREE + "UPDATE entries SET gen = ? WHERE feed_id = ? AND page_url IN sub",
+                (url, feed_id, gen, feed_id))
+            return self.conn.total_changes - before
+
+    def store_page(self, feed_id: str, url: str, parent: str, page: dict, gen: int) -> int:
+        """Record a crawled page and upsert its publications; returns how many."""
+        count = 0
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO pages(feed_id, url, parent, updated, gen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(feed_id, url) DO UPDATE SET parent = excluded.parent, "
+                "updated = excluded.updated, gen = excluded.gen",
+                (feed_id, url, parent, page.get("updated", ""), gen))
+            for item in page["items"]:
+                if item["kind"] != "publication":
+                    continue
+                count += 1
+                key = _entry_key(item)
+                updated = item.get("updated", "")
+                if updated and self.conn.execute(
+                        "UPDATE entries SET gen = ?, page_url = ? WHERE feed_id = ? AND entry_id = ? AND updated = ?",
+                        (gen, url, feed_id, key, updated)).rowcount:
+                    continue
+                self.conn.execute(
+                    "INSERT INTO entries(feed_id, entry_id, page_url, updated, gen, title, authors, series, item) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(feed_id, entry_id) DO UPDATE SET "
+                    "page_url = excluded.page_url, updated = excluded.updated, gen = excluded.gen, "
+                    "title = excluded.title, authors = excluded.authors, series = excluded.series, item = excluded.item",
+                    (feed_id, key, url, updated, gen, item["title"], ", ".join(item["authors"]),
+                     item.get("series", ""), json.dumps(item, separators=(",", ":"))))
+        return count
+
+    def finish_feed(self, feed_id: str, gen: int, pages: int, error: str, prune: bool):
+        """Close a generation; prune what a complete crawl no longer reached.
+        An incomplete one still uses up gen, so the next crawl prunes its leftovers."""
+        with self.conn:
+            if prune:
+                self.conn.execute("DELETE FROM entries WHERE feed_id = ? AND gen < ?", (feed_id, gen))
+                self.conn.execute("DELETE FROM pages WHERE feed_id = ? AND gen < ?", (feed_id, gen))
+            entries = self.conn.execute("SELECT count(*) FROM entries WHERE feed_id = ?", (feed_id,)).fetchone()[0]
+            self.conn.execute(
+                "UPDATE feeds SET gen = ?, crawled_at = ?, pages = ?, entries = ?, error = ? WHERE feed_id = ?",
+                (gen, int(time.time() * 1000), pages, entries, error, feed_id))
+
+
+# ========== CRAWLER ==========
+
+class HostLimiter:
+    """Spaces request starts on the same host at least min_interval apart."""
+
+    def __init__(self, min_interval: float):
+        self._interval = min_interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str, cancelled: threading.Event):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next.get(host, 0.0))
+            self._next[host] = at + self._interval
+        if at > now:
+            cancelled.wait(at - now)
+
+
+class _FeedCrawl:
+    def __init__(self, feed_id, url, gen, full):
+        self.feed_id = feed_id
+        self.url = url
+        self.host = (urlsplit(url).hostname or "").lower()
+        self.gen = gen
+        self.full = full
+        self.seen = {url}
+        self.in_flight = 0
+        self.queued = 0
+        self.pages = 0
+        self.skipped = 0
+        self.entries = 0
+        self.failed = 0
+        self.error = ""
+
+
+class Crawler:
+    """Crawls feeds into an OpdsIndex. run() blocks; call it from a worker thread.
+
+    progress(dict) is called from that thread after every page.
+    """
+
+    def __init__(self, index_path: str, progress: Optional[Callable[[dict], None]] = None,
+                 workers: int = WORKERS, per_host: int = PER_HOST_IN_FLIGHT,
+                 min_interval: float = MIN_INTERVAL_S, max_pages: int = MAX_PAGES_PER_FEED):
+        self._index_path = index_path
+        self._progress = progress
+        self._workers = workers
+        self._per_host = per_host
+        self._max_pages = max_pages
+        self._limiter = HostLimiter(min_interval)
+        self._cancelled = threading.Event()
+        self._client = opds_http.OpdsHttpClient(None, max_idle_per_host=per_host)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _fetch(self, host, url):
+        self._limiter.wait(host, self._cancelled)
+        if self._cancelled.is_set():
+            raise InterruptedError("cancelled")
+        res = self._client.fetch(url, _ACCEPT, FETCH_TIMEOUT_S, text=False)
+        if not 200 <= res["status"] < 300:
+            raise ValueError(f"HTTP {res['status']}")
+        page = opds_feed.parse_feed(res["body"], res["contentType"], res["url"])
+        if page["type"] == "html":
+            raise ValueError("Not an OPDS catalog")
+        return page
+
+    def _children(self, crawl, page):
+        """Same-host next link + navigation entries' links, not yet seen."""
+        out = []
+        candidates = [page.get("next", "")]
+        for item in page["items"]:
+            if item["kind"] == "navigation" and item["navigationLinks"]:
+                candidates.append(item["navigationLinks"][0]["href"])
+        for href in candidates:
+            href = href.split("#", 1)[0]
+            if not href or "{" in href or href in crawl.seen:
+                continue
+            parts = urlsplit(href)
+            if parts.scheme not in ("http", "https") or (parts.hostname or "").lower() != crawl.host:
+                continue
+            crawl.seen.add(href)
+            out.append(href)
+        return out
+
+    def run(self, feeds: list, full: bool = False) -> dict:
+        """feeds: [{"id", "url"}]. Returns {"feeds": [per-feed report], "cancelled"}."""
+        index = OpdsIndex(self._index_path)
+        crawls = []
+        queues = {}    # host -> deque[(crawl, url, parent)]
+        in_flight = {}  # host -> count
+        futures = {}
+        try:
+            for f in feeds:
+                gen, complete = index.begin_feed(f["id"], f["url"])
+                # Pages of an incomplete crawl may have unvisited children: don't skip them
+                crawl = _FeedCrawl(f["id"], f["url"], gen, full or not complete)
+                crawls.append(crawl)
+                queues.setdefault(crawl.host, deque()).append((crawl, crawl.url, ""))
+                crawl.queued = 1
+            with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="opds-crawl") as pool:
+                while not self._cancelled.is_set():
+                    # Fill free workers round-robin over hosts under their in-flight cap
+                    progressed = True
+                    while progressed and len(futures) < self._workers:
+                        progressed = False
+                        for host, q in queues.items():
+                            if q and in_flight.get(host, 0) < self._per_host and len(futures) < self._workers:
+                                crawl, url, parent = q.popleft()
+                                crawl.queued -= 1
+                                crawl.in_flight += 1
+                                in_flight[host] = in_flight.get(host, 0) + 1
+                                futures[pool.submit(self._fetch, host, url)] = (crawl, url, parent)
+                                progressed = True
+                    if not futures:
+                        break
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        crawl, url, parent = futures.pop(fut)
+                        crawl.in_flight -= 1
+                        in_flight[crawl.host] -= 1
+                        self._handle(index, crawl, url, parent, fut, queues)
+                        if crawl.in_flight == 0 and crawl.queued == 0:
+                            self._finish(index, crawl)
+                        self._report(crawl)
+                if self._cancelled.is_set():
+                    for fut in futures:
+                        fut.cancel()
+            for crawl in crawls:
+                if crawl.in_flight or crawl.queued:
+                    crawl.error = crawl.error or "Cancelled"
+                    index.finish_feed(crawl.feed_id, crawl.gen, crawl.pages, crawl.error, prune=False)
+        finally:
+            index.close()
+            self._client.close()
+        return {"feeds": [self._summary(c) for c in crawls], "cancelled": self._cancelled.is_set()}
+
+    def _handle(self, index, crawl, url, parent, fut, queues):
+        try:
+            page = fut.result()
+        except Exception as e:
+            if self._cancelled.is_set():
+                return
+            crawl.failed += 1
+            if url == crawl.url:
+                crawl.error = str(e) or type(e).__name__
+            index.keep_subtree(crawl.feed_id, url, crawl.gen)  # keep last crawl's copy
+            return
+        crawl.pages += 1
+        if not crawl.full and index.page_unchanged(crawl.feed_id, url, page.get("updated", ""), crawl.gen - 1):
+            crawl.skipped += 1
+            crawl.entries += index.keep_subtree(crawl.feed_id, url, crawl.gen)
+            return
+        crawl.entries += index.store_page(crawl.feed_id, url, parent, page, crawl.gen)
+        if crawl.pages + crawl.queued + crawl.in_flight >= self._max_pages:
+            return
+        for child in self._children(crawl, page):
+            queues[crawl.host].append((crawl, child, url))
+            crawl.queued += 1
+
+    @staticmethod
+    def _finish(index, crawl):
+        # Without the root page nothing was walked; keep the previous index intact
+        index.finish_feed(crawl.feed_id, crawl.gen, crawl.pages, crawl.error, prune=not crawl.error)
+
+    @staticmethod
+    def _summary(crawl):
+        return {"feedId": crawl.feed_id, "pages": crawl.pages, "unchanged": crawl.skipped,
+                "entries": crawl.entries, "failed": crawl.failed, "error": crawl.error,
+                "done": crawl.in_flight == 0 and crawl.queued == 0}
+
+    def _report(self, crawl):
+        if self._progress is not None:
+            self._progress(self._summary(crawl))
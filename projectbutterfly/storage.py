@@ -75,15 +75,27 @@ async def read_json_async(p: str, fallback: Any = None) -> Any:
     return await loop.run_in_executor(None, read_json, p, fallback)
 
 
+def dump_json(obj: Any) -> str:
+    """The text write_json_sync() stores for obj."""
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
 def write_json_sync(p: str, obj: Any):
     """
     Synchronous atomic JSON write with retry logic.
     Used internally by read_json for .bak restore, and by debounce flush.
     """
+    write_text_sync(p, dump_json(obj))
+
+
+def write_text_sync(p: str, json_str: str):
+    """
+    write_json_sync() for text already serialized with dump_json(), for
+    callers that also need the text itself (e.g. to digest it).
+    """
     start = time.monotonic()
     os.makedirs(os.path.dirname(p), exist_ok=True)
 
-    json_str = json.dumps(obj, indent=2, ensure_ascii=False)
     dir_name = os.path.dirname(p)
     base_name = os.path.basename(p)
     tmp = os.path.join(dir_name, f".{base_name}.{os.getpid()}.{int(time.time() * 1000)}.tmp")
@@ -0,0 +1,46 @@
+"""Project Butterfly modules import each other by bare name (import storage),
+as app.py runs them from this folder; the tests do the same."""
+
+import copy
+import http.server
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LocalHandler(http.server.BaseHTTPRequestHandler):
+    """Base for a test module's _Handler: it adds do_GET, sets STATE (copied
+    onto each server as attributes) and default_path (what url() serves)."""
+
+    STATE = {}
+    default_path = "/"
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+        self.__dict__.update(copy.deepcopy(handler.STATE))
+
+    def url(self, path=None):
+        return f"http://127.0.0.1:{self.server_address[1]}{path or self.RequestHandlerClass.default_path}"
+
+
+@pytest.fixture
+def server(request):
+    """A LocalServer running the requesting module's _Handler."""
+    srv = LocalServer(request.module._Handler)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
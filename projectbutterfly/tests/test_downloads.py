@@ -0,0 +1,131 @@
+"""DownloadManager resume paths against a local HTTP server with injected faults."""
+
+import hashlib
+import os
+import threading
+
+import pytest
+
+import downloads
+from conftest import LocalHandler
+
+
+BODY = bytes(range(256)) * 4096  # 1 MiB
+
+
+class _Handler(LocalHandler):
+    default_path = "/book.cbz"
+    STATE = {
+        "body": BODY,
+        "etag": '"v1"',
+        "requests": [],  # (Range, If-Range) per GET
+        "faults": [],    # consumed in order: "cut" (drop mid-body), 503, "change"
+    }
+
+    def do_GET(self):
+        srv = self.server
+        rng, if_range = self.headers.get("Range"), self.headers.get("If-Range")
+        with srv.lock:
+            srv.requests.append((rng, if_range))
+            fault = srv.faults.pop(0) if srv.faults else None
+        if fault == 503:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if fault == "change":
+            srv.body, srv.etag = BODY[::-1], '"v2"'
+        body, start = srv.body, 0
+        end = len(body) - 1
+        if rng and (not if_range or if_range == srv.etag):
+            first, _, last = rng[len("bytes="):].partition("-")
+            start, end = int(first), int(last) if last else len(body) - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", srv.etag)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        part = body[start:end + 1]
+        if fault == "cut":
+            self.wfile.write(part[:len(part) // 3])
+            self.wfile.flush()
+            self.connection.shutdown(2)  # reset mid-body
+            return
+        self.wfile.write(part)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(downloads, "CHUNK_SIZE", 16 * 1024)
+
+
+def _download(tmp_path, url, timeout=30):
+    done = threading.Event()
+    events = []
+
+    def emit(kind, entry):
+        events.append((kind, entry))
+        if kind == "completed":
+            done.set()
+
+    def resolve(filename, request):
+        return {"ok": True, "destination": str(tmp_path / filename), "library": ""}
+
+    mgr = downloads.DownloadManager(str(tmp_path / "history.json"), emit, resolve)
+    mgr.add("d1", {"url": url})
+    assert done.wait(timeout), "download did not finish"
+    mgr.shutdown()
+    return [e for k, e in events if k == "completed"][-1]
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_dropped_stream_resumes_with_range_and_if_range(tmp_path, server):
+    server.faults = ["cut"]
+    entry = _download(tmp_path, server.url())
+    assert entry["state"] == "completed", entry["error"]
+    assert _digest(entry["destination"]) == hashlib.sha256(BODY).hexdigest()
+    rng, if_range = server.requests[1]
+    assert rng.startswith("bytes=") and rng != "bytes=0-"
+    assert if_range == '"v1"'
+    assert not os.path.exists(entry["destination"] + ".part")
+
+
+def test_failed_reopen_counts_as_attempt_and_retries(tmp_path, server):
+    # The range reopen itself fails once; that is a retry, not a failed download
+    server.faults = ["cut", 503]
+    entry = _download(tmp_path, server.url())
+    assert entry["state"] == "completed", entry["error"]
+    assert _digest(entry["destination"]) == hashlib.sha256(BODY).hexdigest()
+    assert len(server.requests) == 3
+
+
+def test_reopen_gives_up_after_retries(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(downloads, "RETRIES", 1)
+    server.faults = ["cut", 503, 503]
+    entry = _download(tmp_path, server.url())
+    assert entry["state"] == "failed"
+    assert "503" in entry["error"]
+
+
+def test_changed_file_starts_over(tmp_path, server):
+    # If-Range no longer matches: the server sends the whole new body, the part file restarts
+    server.faults = ["cut", "change"]
+    entry = _download(tmp_path, server.url())
+    assert entry["state"] == "completed", entry["error"]
+    assert _digest(entry["destination"]) == hashlib.sha256(BODY[::-1]).hexdigest()
+
+
+def test_segmented_download_matches_body(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(downloads, "SEGMENT_MIN_BYTES", 64 * 1024)
+    entry = _download(tmp_path, server.url())
+    assert entry["state"] == "completed", entry["error"]
+    assert _digest(entry["destination"]) == hashlib.sha256(BODY).hexdigest()
+    ranges = [r for r, _ in server.requests[1:]]
+    assert len(ranges) == downloads.SEGMENTS - 1 and all(r.startswith("bytes=") for r in ranges)
@@ -0,0 +1,170 @@
+"""Library scanners: directory cache reuse and invalidation."""
+
+import os
+import queue
+import threading
+import time
+
+import pytest
+
+import library_scan
+
+
+OLD_NS = (time.time_ns() - 3600 * 1_000_000_000)  # well past DIR_SETTLE_S
+
+
+def _age(*paths, ns=OLD_NS):
+    for p in paths:
+        os.utime(p, ns=(ns, ns))
+
+
+def _write(path, data=b"x" * 64):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = library_scan.DirCache(str(tmp_path / "cache" / library_scan.DIR_CACHE_FILE))
+    monkeypatch.setattr(library_scan, "_dir_cache", c)
+    return c
+
+
+def _run(build, job, restat=False, trusted=frozenset()):
+    """What ScanRunner._run does around a build, minus the thread and index file."""
+    scan = library_scan.Scan(threading.Event(), lambda *a: None)
+    scan.restat = restat
+    scan.trusted = trusted
+    cache = library_scan.dir_cache()
+    cache.acquire()
+    library_scan._local.scan = scan
+    try:
+        return build(job, scan)
+    finally:
+        library_scan._local.scan = None
+        cache.release()
+
+
+@pytest.fixture
+def shows(tmp_path):
+    root = tmp_path / "Videos"
+    ep1 = _write(str(root / "Show A" / "Show A - 01.mkv"))
+    ep2 = _write(str(root / "Show A" / "Show A - 02.mkv"))
+    _age(ep1, ep2, str(root / "Show A"), str(root))
+    return root, ep1, ep2
+
+
+def _video_job(root):
+    return {"videoFolders": [str(root)], "showFolders": [], "hiddenShowIds": [],
+            "rules": library_scan.IgnoreRules(), "indexPath": ""}
+
+
+def _episode_ids(idx):
+    return {os.path.basename(e["path"]): e["id"] for e in idx["episodes"]}
+
+
+def test_unchanged_directories_are_served_from_cache(cache, shows):
+    root, _, _ = shows
+    first = _run(library_scan.build_video_index, _video_job(root))
+    assert cache.misses == 2 and cache.hits == 0
+    second = _run(library_scan.build_video_index, _video_job(root))
+    assert cache.hits == 2
+    assert _episode_ids(second) == _episode_ids(first)
+    # Persisted and reloaded between scans
+    assert os.path.exists(cache._path)
+
+
+def test_added_file_relists_directory(cache, shows):
+    root, _, _ = shows
+    _run(library_scan.build_video_index, _video_job(root))
+    ep3 = _write(str(root / "Show A" / "Show A - 03.mkv"))
+    _age(ep3, str(root / "Show A"), ns=OLD_NS + 10**9)
+    idx = _run(library_scan.build_video_index, _video_job(root))
+    assert "Show A - 03.mkv" in _episode_ids(idx)
+
+
+def test_file_rewritten_in_place_gets_new_id_on_deep_scan(cache, shows):
+    root, ep1, _ = shows
+    before = _episode_ids(_run(library_scan.build_video_index, _video_job(root)))
+    dir_mtime = os.stat(os.path.dirname(ep1)).st_mtime_ns
+    _write(ep1, b"y" * 128)  # same name, new content: the directory mtime stays put
+    _age(ep1, ns=OLD_NS + 5 * 10**9)
+    assert os.stat(os.path.dirname(ep1)).st_mtime_ns == dir_mtime
+    # A normal scan trusts the recorded stat; only a deep one looks again
+    assert _episode_ids(_run(library_scan.build_video_index, _video_job(root))) == before
+
+    after = _episode_ids(_run(library_scan.build_video_index, _video_job(root), restat=True))
+    uncached = library_scan.video_id_for_path(ep1, 128, library_scan.mtime_ms(os.stat(ep1)))
+    assert after["Show A - 01.mkv"] == uncached != before["Show A - 01.mkv"]
+    assert after["Show A - 02.mkv"] == before["Show A - 02.mkv"]
+    # The record now carries the new stat, so a quiet refresh agrees too
+    quiet = _episode_ids(_run(library_scan.build_video_index, _video_job(root), restat=False))
+    assert quiet == after
+
+
+def test_recently_changed_listing_is_not_kept(cache, tmp_path):
+    root = tmp_path / "Fresh"
+    _write(str(root / "Show" / "Show - 01.mkv"))  # mtime now: still settling
+    _run(library_scan.build_video_index, _video_job(root))
+    cache.acquire()
+    try:
+        assert set(cache.unsettled([str(root), str(root / "Show")])) == {str(root), str(root / "Show")}
+    finally:
+        cache.release()
+
+
+def test_removed_file_on_cached_listing_is_dropped(cache, shows):
+    root, ep1, _ = shows
+    _run(library_scan.build_video_index, _video_job(root))
+    d = os.path.dirname(ep1)
+    dir_mtime = os.stat(d).st_mtime_ns
+    os.remove(ep1)
+    os.utime(d, ns=(dir_mtime, dir_mtime))  # e.g. coarse timestamps on a network share
+    idx = _run(library_scan.build_video_index, _video_job(root), restat=True)
+    assert "Show A - 01.mkv" not in _episode_ids(idx)
+
+
+def _runner_scan(runner, events, quiet=True):
+    runner.start({}, "k", force=True, quiet=quiet)
+    runner.handle(events.get(timeout=10))
+    return runner
+
+
+def test_scan_runner_reports_unchanged_index(cache, tmp_path):
+    events, done = queue.Queue(), []
+    index = {"roots": [], "shows": [], "episodes": [{"id": "a"}]}
+    path = str(tmp_path / "data" / "video_index.json")
+    runner = library_scan.ScanRunner(
+        "video", lambda job, scan: dict(index), path, post=events.put, status=lambda p: None,
+        done=lambda idx, meta: done.append(meta["changed"]), failed=lambda msg: None)
+    _runner_scan(runner, events)
+    first_write = os.stat(path).st_mtime_ns
+    _runner_scan(runner, events)
+    assert os.stat(path).st_mtime_ns == first_write  # unchanged: not rewritten
+    index["episodes"] = [{"id": "b"}]
+    _runner_scan(runner, events)
+    assert done == [True, False, True]
+    # A new runner (next session) compares against the file already on disk
+    fresh = library_scan.ScanRunner(
+        "video", lambda job, scan: dict(index), path, post=events.put, status=lambda p: None,
+        done=lambda idx, meta: done.append(meta["changed"]), failed=lambda msg: None)
+    _runner_scan(fresh, events)
+    assert done[-1] is False
+
+
+def test_only_deep_scans_restat(cache, tmp_path):
+    events, seen = queue.Queue(), []
+
+    def build(job, scan):
+        seen.append(scan.restat)
+        return {}
+
+    runner = library_scan.ScanRunner(
+        "video", build, str(tmp_path / "video_index.json"), post=events.put, status=lambda p: None,
+        done=lambda idx, meta: None, failed=lambda msg: None)
+    _runner_scan(runner, events, quiet=False)
+    runner.start({}, "k", force=True, deep=True)
+    runner.handle(events.get(timeout=10))
+    assert seen == [False, True]
@@ -0,0 +1,179 @@
+"""OPDS feed parsing (Atom, JSON, HTML fallback) and lazy paging."""
+
+import json
+
+import pytest
+
+import opds_feed
+
+
+BASE = "https://opds.example.org/catalog/"
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:dc="http://purl.org/dc/terms/">
+  <id>urn:cat</id>
+  <title>Catalog</title>
+  <subtitle>All books</subtitle>
+  <updated>2024-01-01T00:00:00Z</updated>
+  <opensearch:totalResults>3</opensearch:totalResults>
+  <opensearch:itemsPerPage>2</opensearch:itemsPerPage>
+  <link rel="next" href="page2.xml" type="application/atom+xml;profile=opds-catalog"/>
+  <link rel="start" href="/root.xml" type="application/atom+xml;profile=opds-catalog"/>
+  <entry>
+    <title>First Book</title>
+    <id>urn:book:1</id>
+    <updated>2023-05-01T00:00:00Z</updated>
+    <author><name>Ann Author</name></author>
+    <author><name>Bob Writer</name></author>
+    <dc:language>en</dc:language>
+    <summary type="html">&lt;p&gt;A  &lt;b&gt;bold&lt;/b&gt;
+      tale.&lt;/p&gt;</summary>
+    <link rel="http://opds-spec.org/acquisition" href="/get/1.epub" type="application/epub+zip"/>
+    <link rel="http://opds-spec.org/image/thumbnail" href="thumbs/1.jpg" type="image/jpeg"/>
+    <link rel="http://opds-spec.org/image" href="covers/1.jpg" type="image/jpeg"/>
+  </entry>
+  <entry>
+    <title>Science Fiction</title>
+    <id>urn:nav:sf</id>
+    <link rel="subsection" href="sf.xml" type="application/atom+xml;profile=opds-catalog"/>
+  </entry>
+</feed>
+"""
+
+
+def test_atom_feed():
+    page = opds_feed.parse_feed(ATOM, "application/atom+xml", BASE)
+    assert page["type"] == "atom"
+    assert (page["title"], page["subtitle"], page["updated"]) == ("Catalog", "All books", "2024-01-01T00:00:00Z")
+    assert (page["totalResults"], page["itemsPerPage"]) == (3, 2)
+    assert page["next"] == BASE + "page2.xml"
+    assert [ln["href"] for ln in page["feedLinks"]] == [BASE + "page2.xml", "https://opds.example.org/root.xml"]
+
+    book, nav = page["items"]
+    assert book["kind"] == "publication"
+    assert book["id"] == "urn:book:1"
+    assert book["authors"] == ["Ann Author", "Bob Writer"]
+    assert book["language"] == "en"
+    assert book["summary"] == "A bold tale."
+    assert book["cover"] == BASE + "covers/1.jpg"
+    assert book["thumbnail"] == BASE + "thumbs/1.jpg"
+    assert [ln["href"] for ln in book["acquisitionLinks"]] == ["https://opds.example.org/get/1.epub"]
+    assert nav["kind"] == "navigation"
+    assert nav["navigationLinks"][0]["href"] == BASE + "sf.xml"
+
+
+def test_large_atom_feed_streams_every_entry():
+    entries = "".join(
+        f'<entry><title>Book {i}</title><id>urn:{i}</id>'
+        f'<link rel="http://opds-spec.org/acquisition" href="/b/{i}.epub" type="application/epub+zip"/></entry>'
+        for i in range(5000)
+    )
+    data = f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Big</title>{entries}</feed>'.encode()
+    page = opds_feed.parse_atom(data, BASE)
+    assert len(page["items"]) == 5000
+    assert page["items"][-1]["title"] == "Book 4999"
+    assert page["items"][-1]["acquisitionLinks"][0]["href"] == "https://opds.example.org/b/4999.epub"
+
+
+def test_summaries_are_capped():
+    data = (f'<feed xmlns="http://www.w3.org/2005/Atom"><entry><title>T</title>'
+            f'<summary>{"word " * 200}</summary></entry></feed>').encode()
+    summary = opds_feed.parse_atom(data, BASE)["items"][0]["summary"]
+    assert len(summary) <= opds_feed._SUMMARY_MAX + 1
+    assert summary.endswith("…")
+
+
+def test_json_feed():
+    doc = {
+        "metadata": {"title": "JSON Catalog", "numberOfItems": 40, "itemsPerPage": 20, "currentPage": 2},
+        "links": [{"rel": ["next"], "href": "?page=3", "type": "application/opds+json"}],
+        "publications": [{
+            "metadata": {"title": {"en": "Localized"}, "identifier": "urn:p1",
+                         "author": [{"name": "Cleo"}, "Dan"], "language": ["fr"],
+                         "belongsTo": {"series": [{"name": "Saga"}]}},
+            "links": [{"rel": "http://opds-spec.org/acquisition/open-access", "href": "/p1.epub",
+                       "type": "application/epub+zip"}],
+            "images": [{"href": "/p1.jpg", "type": "image/jpeg"}],
+        }],
+        "navigation": [{"title": "New", "href": "new.json", "type": "application/opds+json"}],
+        "groups": [{"metadata": {"title": "Featured"}, "publications": [{"metadata": {"title": "G"}}]}],
+    }
+    page = opds_feed.parse_feed(json.dumps(doc).encode(), "application/opds+json", BASE)
+    assert page["type"] == "json"
+    assert page["startIndex"] == 21
+    assert page["next"] == BASE + "?page=3"
+    pub, nav, grouped = page["items"]
+    assert (pub["title"], pub["authors"], pub["series"], pub["language"]) == ("Localized", ["Cleo", "Dan"], "Saga", "fr")
+    assert pub["kind"] == "publication"
+    assert pub["cover"] == "https://opds.example.org/p1.jpg"
+    assert nav["kind"] == "navigation" and nav["acquisitionLinks"] == []
+    assert grouped["summary"] == "Featured"
+
+
+def test_html_fallback_and_errors():
+    page = opds_feed.parse_feed(b"<html><title> Index </title><a href='a.html'>A <img src='a.png'></a></html>",
+                                "text/html", BASE)
+    assert page["type"] == "html"
+    assert page["title"] == "Index"
+    assert page["items"][0]["cover"] == BASE + "a.png"
+    # Not Atom: falls back to scraping links rather than failing
+    assert opds_feed.parse_feed(b"<rss><a href='x'>x</a></rss>", "", BASE)["type"] == "html"
+    with pytest.raises(ValueError):
+        opds_feed.parse_feed(b"   ", "application/atom+xml", BASE)
+
+
+def _pages(count, per_page):
+    return {
+        f"p{n}": {"title": "T", "items": [{"id": f"{n}.{i}"} for i in range(per_page)],
+                  "next": f"p{n + 1}" if n + 1 < count else ""}
+        for n in range(count)
+    }
+
+
+def test_cursor_fetches_pages_only_as_far_as_read():
+    pages = _pages(4, 10)
+    loaded = []
+
+    def load(url):
+        loaded.append(url)
+        return pages[url]
+
+    cursor = opds_feed.FeedCursor(opds_feed.iter_pages(load, "p0"))
+    win = cursor.window(0, 5)
+    assert loaded == ["p0"]
+    assert [it["id"] for it in win["items"]] == [f"0.{i}" for i in range(5)]
+    assert win["hasMore"] and "next" not in win
+    win = cursor.window(15, 10)
+    assert loaded == ["p0", "p1", "p2"]
+    assert win["items"][0]["id"] == "1.5"
+    win = cursor.window(35, 10)
+    assert len(win["items"]) == 5 and not win["hasMore"]
+
+
+def test_cursor_keeps_loaded_items_when_a_next_page_fails():
+    pages = _pages(2, 3)
+
+    def load(url):
+        if url == "p1":
+            raise OSError("timed out")
+        return pages[url]
+
+    cursor = opds_feed.FeedCursor(opds_feed.iter_pages(load, "p0"))
+    win = cursor.window(0, 10)
+    assert len(win["items"]) == 3
+    assert win["nextError"] == "timed out"
+    assert not win["hasMore"]
+
+
+def test_iter_pages_stops_on_next_link_cycles():
+    pages = {"a": {"items": [], "next": "b"}, "b": {"items": [], "next": "a"}}
+    assert len(list(opds_feed.iter_pages(pages.__getitem__, "a"))) == 2
+
+
+def test_page_cache_reuses_parses_by_body():
+    cache = opds_feed.PageCache(max_pages=2)
+    first = cache.parse(BASE, ATOM, "application/atom+xml")
+    assert cache.parse(BASE, ATOM, "application/atom+xml") is first
+    changed = ATOM.replace(b"First Book", b"Renamed")
+    assert cache.parse(BASE, changed, "application/atom+xml")["items"][0]["title"] == "Renamed"
@@ -0,0 +1,129 @@
+"""OPDS HTTP client: pooled connections, decoding, redirects and the private cache."""
+
+import gzip
+
+import pytest
+
+import opds_http
+from conftest import LocalHandler
+
+
+FEED = b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Cat</title></feed>'
+
+
+class _Handler(LocalHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the pool can reuse connections
+    default_path = "/catalog"
+    STATE = {
+        "requests": [],  # (path, If-None-Match, If-Modified-Since, peer port)
+        "headers": {"ETag": '"v1"', "Cache-Control": "max-age=0"},
+    }
+
+    def do_GET(self):
+        srv = self.server
+        inm, ims = self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")
+        with srv.lock:
+            srv.requests.append((self.path, inm, ims, self.client_address[1]))
+            headers = dict(srv.headers)
+        if self.path == "/old":
+            self.send_response(302)
+            self.send_header("Location", "/catalog")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if inm and inm == headers.get("ETag"):
+            self.send_response(304)
+            self.send_header("ETag", headers["ETag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = FEED
+        self.send_response(200)
+        if self.path == "/gzip" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(FEED)
+            self.send_header("Content-Encoding", "gzip")
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def client(tmp_path):
+    c = opds_http.OpdsHttpClient(str(tmp_path / "cache"))
+    yield c
+    c.close()
+
+
+def test_fresh_responses_are_served_from_cache(server, client):
+    server.headers = {"Cache-Control": "max-age=600"}
+    first = client.fetch(server.url())
+    second = client.fetch(server.url())
+    assert (first["cache"], second["cache"]) == ("miss", "hit")
+    assert second["body"] == FEED.decode()
+    assert client.cached(server.url())["cache"] == "hit"
+    assert len(server.requests) == 1
+
+
+def test_stale_responses_are_revalidated(server, client):
+    client.fetch(server.url())
+    again = client.fetch(server.url())
+    assert again["cache"] == "revalidated"
+    assert again["body"] == FEED.decode()
+    assert again["headers"]["etag"] == '"v1"'
+    assert server.requests[1][1] == '"v1"'
+    # A changed resource replaces the stored body
+    server.headers = {"ETag": '"v2"', "Cache-Control": "max-age=0"}
+    assert client.fetch(server.url())["cache"] == "miss"
+    assert client.fetch(server.url())["headers"]["etag"] == '"v2"'
+
+
+def test_force_refresh_and_no_store(server, client):
+    server.headers = {"Cache-Control": "max-age=600", "ETag": '"v1"'}
+    client.fetch(server.url())
+    assert client.fetch(server.url(), force_refresh=True)["cache"] == "revalidated"
+    server.headers = {"Cache-Control": "no-store"}
+    client.fetch(server.url("/private"))
+    assert client.cache.get(server.url("/private")) is None
+
+
+def test_redirects_and_content_encoding(server, client):
+    res = client.fetch(server.url("/old"))
+    assert res["status"] == 200
+    assert res["url"] == server.url("/catalog")
+    gz = client.fetch(server.url("/gzip"), text=False)
+    assert gz["body"] == FEED
+    assert gz["contentType"] == "application/atom+xml"
+
+
+def test_connections_are_reused(server, client):
+    for path in ("/a", "/b", "/c"):
+        client.fetch(server.url(path), force_refresh=True)
+    assert len({port for *_, port in server.requests}) == 1
+
+
+def test_freshness_lifetime():
+    stored = 1_700_000_000.0
+    assert opds_http.freshness_lifetime({"cache-control": "max-age=60"}, stored) == 60
+    assert opds_http.freshness_lifetime({"cache-control": "no-cache, max-age=60"}, stored) == 0
+    assert opds_http.freshness_lifetime({
+        "date": "Tue, 14 Nov 2023 22:13:20 GMT",
+        "expires": "Tue, 14 Nov 2023 22:23:20 GMT",
+    }, stored) == 600
+    # Heuristic: a tenth of the time since Last-Modified, capped at an hour
+    assert opds_http.freshness_lifetime({
+        "date": "Tue, 14 Nov 2023 22:13:20 GMT",
+        "last-modified": "Tue, 14 Nov 2023 21:13:20 GMT",
+    }, stored) == 360
+    assert opds_http.freshness_lifetime({}, stored) == 0
+
+
+def test_cache_prune_caps_entries(tmp_path):
+    cache = opds_http.HttpCache(str(tmp_path), max_entries=2)
+    for i in range(4):
+        cache.put(f"http://x/{i}", {"status": 200, "headers": {}, "storedAt": i, "body": b"%d" % i})
+    cache.prune()
+    kept = [i for i in range(4) if cache.get(f"http://x/{i}") is not None]
+    assert len(kept) == 2
@@ -0,0 +1,145 @@
+"""OPDS crawler and offline search index against a local catalog server."""
+
+import pytest
+
+import opds_index
+from conftest import LocalHandler
+
+
+def _feed(updated, entries="", links=""):
+    return (f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Cat</title><updated>{updated}</updated>'
+            f'{links}{entries}</feed>').encode()
+
+
+def _book(n, title, author, updated="2024-01-01"):
+    return (f'<entry><title>{title}</title><id>urn:book:{n}</id><updated>{updated}</updated>'
+            f'<author><name>{author}</name></author>'
+            f'<link rel="http://opds-spec.org/acquisition" href="/get/{n}.epub" type="application/epub+zip"/></entry>')
+
+
+def _nav(title, href):
+    return (f'<entry><title>{title}</title><id>urn:nav:{href}</id>'
+            f'<link rel="subsection" href="{href}" type="application/atom+xml;profile=opds-catalog"/></entry>')
+
+
+class _Handler(LocalHandler):
+    STATE = {
+        "hits": [],
+        "pages": {
+            "/root.xml": _feed("r1", _nav("Fiction", "/fiction.xml") + _nav("Elsewhere", "http://other.invalid/x.xml")
+                               + _book(1, "Dune", "Frank Herbert")),
+            "/fiction.xml": _feed("f1", _book(2, "Foundation", "Isaac Asimov"),
+                                  '<link rel="next" href="/fiction2.xml" type="application/atom+xml"/>'),
+            "/fiction2.xml": _feed("f2", _book(3, "Hyperion", "Dan Simmons")),
+        },
+    }
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.hits.append(self.path)
+            body = srv.pages.get(self.path)
+        if body is None:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "opds_index.sqlite")
+
+
+def _crawl(db, server, **kw):
+    crawler = opds_index.Crawler(db, min_interval=0)
+    return crawler.run([{"id": "f1", "url": server.url("/root.xml")}], **kw)["feeds"][0]
+
+
+def _titles(db, query):
+    index = opds_index.OpdsIndex(db)
+    try:
+        return [it["title"] for it in index.search(query)["items"]]
+    finally:
+        index.close()
+
+
+def test_crawl_indexes_same_host_tree(server, db):
+    report = _crawl(db, server)
+    assert report["done"] and not report["error"]
+    assert (report["pages"], report["entries"]) == (3, 3)
+    assert sorted(server.hits) == ["/fiction.xml", "/fiction2.xml", "/root.xml"]
+    assert _titles(db, "asim") == ["Foundation"]
+    assert _titles(db, "dan hyper") == ["Hyperion"]
+    assert _titles(db, "") == []
+    index = opds_index.OpdsIndex(db)
+    try:
+        (stats,) = index.feed_stats()
+        assert (stats["feedId"], stats["pages"], stats["entries"]) == ("f1", 3, 3)
+        assert index.search("herbert")["items"][0]["feedId"] == "f1"
+    finally:
+        index.close()
+
+
+def test_unchanged_pages_are_not_descended_again(server, db):
+    _crawl(db, server)
+    server.hits.clear()
+    report = _crawl(db, server)
+    assert server.hits == ["/root.xml"]
+    assert report["unchanged"] == 1 and report["entries"] == 3
+    assert _titles(db, "foundation") == ["Foundation"]
+
+
+def test_complete_crawl_prunes_missing_entries(server, db):
+    _crawl(db, server)
+    server.pages["/root.xml"] = _feed("r2", _book(1, "Dune Messiah", "Frank Herbert", "2024-02-01"))
+    report = _crawl(db, server)
+    assert report["entries"] == 1
+    assert _titles(db, "dune") == ["Dune Messiah"]
+    assert _titles(db, "foundation") == []
+
+
+def test_failed_page_keeps_previous_copy(server, db):
+    _crawl(db, server)
+    server.pages["/root.xml"] = server.pages["/root.xml"].replace(b"r1", b"r2")
+    server.pages["/fiction.xml"] = server.pages["/fiction.xml"].replace(b"f1", b"f3")
+    del server.pages["/fiction2.xml"]
+    report = _crawl(db, server)
+    assert report["failed"] == 1 and not report["error"]
+    assert _titles(db, "hyperion") == ["Hyperion"]
+
+
+def test_cancelled_crawl_is_pruned_by_the_next_one(server, db):
+    _crawl(db, server)
+    server.pages["/root.xml"] = _feed("r2", _nav("Fiction", "/fiction.xml") + _book(4, "Neuromancer", "William Gibson"))
+    crawler = opds_index.Crawler(db, progress=lambda report: crawler.cancel(), min_interval=0)
+    report = crawler.run([{"id": "f1", "url": server.url("/root.xml")}])["feeds"][0]
+    assert report["error"] == "Cancelled"
+    assert _titles(db, "neuromancer") == ["Neuromancer"]
+    server.pages["/root.xml"] = _feed("r3", _nav("Fiction", "/fiction.xml"))
+    server.hits.clear()
+    report = _crawl(db, server)
+    assert report["done"] and report["unchanged"] == 0
+    assert sorted(server.hits) == ["/fiction.xml", "/fiction2.xml", "/root.xml"]
+    assert _titles(db, "neuromancer") == []
+    assert _titles(db, "dune") == []
+    assert _titles(db, "foundation") == ["Foundation"]
+
+
+def test_unreachable_root_keeps_index(server, db):
+    _crawl(db, server)
+    server.pages.clear()
+    report = _crawl(db, server, full=True)
+    assert report["error"] == "HTTP 500"
+    for title in ("Dune", "Foundation", "Hyperion"):
+        assert _titles(db, title) == [title]
+
+
+def test_fts_query_quotes_and_prefixes_words():
+    assert opds_index.fts_query('dune "messiah" OR') == '"dune"* "messiah"* "OR"*'
+    assert opds_index.fts_query("  ") == ""
@@ -0,0 +1,169 @@
+"""Library scanners: the Python ports produce the JS workers' indexes."""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+import library_scan
+
+
+WORKERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "workers")
+NODE = shutil.which("node")
+
+pytestmark = pytest.mark.skipif(NODE is None, reason="node is not installed")
+
+# Runs one worker and prints the idx of its done message
+_RUNNER = r"""
+const { Worker } = require('worker_threads');
+const [file, data] = process.argv.slice(1);
+const w = new Worker(file, { workerData: JSON.parse(data) });
+w.on('message', (m) => {
+  if (!m || m.type !== 'done') return;
+  if (m.error) { console.error(m.error); process.exit(1); }
+  process.stdout.write(JSON.stringify(m.idx));
+  process.exit(0);
+});
+w.on('error', (e) => { console.error(String(e && e.stack || e)); process.exit(1); });
+"""
+
+# Fractional milliseconds exercise the JS number formatting in the ids
+_MTIME_NS = 1_700_000_000_123_456_789
+
+
+def _tree(root, files):
+    """Create files (relative paths) under root, each with a distinct size and mtime."""
+    paths = []
+    for i, rel in enumerate(files):
+        p = os.path.join(str(root), *rel.split("/"))
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        with open(p, "wb") as f:
+            f.write(b"x" * (100 + i))
+        ns = _MTIME_NS + i * 1_000_000_007
+        os.utime(p, ns=(ns, ns))
+        paths.append(p)
+    return paths
+
+
+def _node(worker, data):
+    out = subprocess.run(
+        [NODE, "-e", _RUNNER, os.path.join(WORKERS_DIR, worker), json.dumps(data)],
+        capture_output=True, text=True, timeout=60,
+    )
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout)
+
+
+def _python(build, job):
+    scan = library_scan.Scan(threading.Event(), lambda *a: None)
+    library_scan._local.scan = scan
+    try:
+        idx = build(dict(job, rules=library_scan.IgnoreRules(substrings=job.get("ignore", {}).get("substrings", ()))), scan)
+    finally:
+        library_scan._local.scan = None
+    # Round-trip like the index file so tuples and key order don't matter
+    return json.loads(json.dumps(idx)), scan.meta
+
+
+def _ignore(*substrings):
+    return {"dirNames": list(library_scan.DEFAULT_SCAN_IGNORE_DIRNAMES), "substrings": list(substrings)}
+
+
+@pytest.fixture(autouse=True)
+def no_dir_cache(monkeypatch):
+    monkeypatch.setattr(library_scan, "_dir_cache", None)
+
+
+def test_comic_index_matches_worker(tmp_path):
+    root = tmp_path / "Comics"
+    _tree(root, [
+        "Alpha/Alpha 01.cbz",
+        "Alpha/Alpha 02.CBR",
+        "Alpha/Extras/Alpha 0.5.cbz",
+        "Alpha/.hidden/skip.cbz",
+        "Alpha/__MACOSX/skip.cbz",
+        "Beta/Beta 1.cbz",
+        "Beta/notes.txt",
+        "Gamma/skipme/Gamma 1.cbz",
+        "Gamma/Gamma 2.cbz",
+        "loose one.cbz",
+    ])
+    explicit = str(tmp_path / "Elsewhere" / "Delta")
+    _tree(tmp_path / "Elsewhere", ["Delta/Delta 1.cbz"])
+    job = {"seriesFolders": [explicit], "rootFolders": [str(root)], "ignoredSeries": [str(root / "Beta")],
+           "ignore": _ignore("skipme")}
+    py, meta = _python(library_scan.build_comic_index, job)
+    js = _node("library_scan_worker_impl.js", dict(job, seriesFolders=meta["effectiveSeriesFolders"]))
+    assert py == js
+    assert len(py["books"]) == 6
+
+
+def test_books_index_matches_worker(tmp_path):
+    root = tmp_path / "Books"
+    _tree(root, [
+        "Author A/Series 1/Book 1.epub",
+        "Author A/Series 1/Book 2.pdf",
+        "Author A/Series 2/Book 10.epub",
+        "Author A/Series 2/Book 9.epub",
+        "Author A/Standalone.mobi",
+        "Loose.fb2",
+        "Notes/readme.md",
+        ".git/objects.epub",
+    ])
+    outside = tmp_path / "Outside"
+    single = _tree(outside, ["Series X/One.epub", "single.txt"])[1]
+    job = {"bookRootFolders": [str(root)], "bookSeriesFolders": [str(outside / "Series X")],
+           "bookSingleFiles": [single], "ignore": _ignore()}
+    py, _ = _python(library_scan.build_books_index, job)
+    js = _node("books_scan_worker_impl.js", job)
+    assert py == js
+    assert py["books"]
+
+
+def test_video_index_matches_worker(tmp_path):
+    root = tmp_path / "Videos"
+    _tree(root, [
+        "Show A/Season 1/Show A - 01.mkv",
+        "Show A/Season 1/Show A - 02.mkv",
+        "Show A/Season 2/Show A - 10.mp4",
+        "Show A/poster.jpg",
+        "Show B/Show B - 01.avi",
+        "Show B/cover.png",
+        "Show B/subs/Show B - 01.srt",
+        "Movie.m4v",
+        "Extra.webm",
+        "folder.jpg",
+        "node_modules/skip.mkv",
+    ])
+    shows = tmp_path / "Shows"
+    _tree(shows, ["Solo/Solo 01.mkv", "Solo/Bonus/Solo SP.mkv"])
+    job = {"videoFolders": [str(root)], "showFolders": [str(shows / "Solo")],
+           "hiddenShowIds": [], "indexPath": "", "ignore": _ignore()}
+    py, _ = _python(library_scan.build_video_index, job)
+    js = _node("video_scan_worker_impl.js", job)
+    assert py == js
+    assert len(py["episodes"]) == 8
+
+
+def test_audiobook_index_matches_worker(tmp_path):
+    root = tmp_path / "Audiobooks"
+    _tree(root, [
+        "Book One/01 - Opening.mp3",
+        "Book One/02 - Middle.mp3",
+        "Book One/10 - End.mp3",
+        "Book One/cover.jpg",
+        "Author/Book Two/Part 1.m4b",
+        "Author/Book Two/Part 2.m4b",
+        "Author/Book Two/Disc 2/Track 1.mp3",
+        "Author/notes.txt",
+        ".hidden/Book/skip.mp3",
+    ])
+    job = {"audiobookRootFolders": [str(root)], "ignore": _ignore()}
+    py, _ = _python(library_scan.build_audiobook_index, job)
+    js = _node("audiobook_scan_worker_impl.js", job)
+    # Durations need music-metadata on the JS side; the port reports 0
+    assert py == js
+    assert len(py["audiobooks"]) == 3
@@ -0,0 +1,59 @@
+"""EpisodeIndex lookups over a loaded video index."""
+
+import video_index
+
+
+def _ep(eid, show, path, **kw):
+    return dict(id=eid, showId=show, path=path, title=path.rsplit("/", 1)[-1], **kw)
+
+
+IDX = {
+    "shows": [
+        {"id": "a", "rootId": "r1"},
+        {"id": "b", "rootId": "r1"},
+        {"id": "c", "rootId": "r2"},
+        {"rootId": "r1"},  # no id: not indexed
+        "junk",
+    ],
+    "episodes": [
+        _ep("a10", "a", "/v/A/A - 10.mkv"),
+        _ep("a2", "a", "/v/A/A - 2.mkv", aliasIds=["a2-old", ""]),
+        _ep("a1", "a", "/v/A/A - 1.mkv"),
+        _ep("b1", "b", "/v/B/B - 1.mkv"),
+        _ep("c1", "c", "/w/C/C - 1.mkv"),
+        _ep("a1", "a", "/v/A/dup.mkv"),  # duplicate id: the first one wins
+        None,
+    ],
+}
+
+
+def _ids(eps):
+    return [ep["id"] for ep in eps]
+
+
+def test_lookup_by_id_alias_and_path():
+    index = video_index.EpisodeIndex(IDX)
+    assert index.episode("a1")["path"] == "/v/A/A - 1.mkv"
+    assert index.episode("a2-old") is index.episode("a2")
+    assert index.episode("") is None and index.episode(None) is None
+    assert index.episode("missing") is None
+    assert index.by_path("/w/C/C - 1.mkv")["id"] == "c1"
+    assert index.show("b") == {"id": "b", "rootId": "r1"}
+    assert index.show(None) is None
+
+
+def test_show_episodes_in_natural_order():
+    index = video_index.EpisodeIndex(IDX)
+    eps = index.for_show("a")
+    assert [ep["path"] for ep in eps] == ["/v/A/A - 1.mkv", "/v/A/A - 2.mkv", "/v/A/A - 10.mkv", "/v/A/dup.mkv"]
+    assert index.for_show("a") is eps
+    assert index.for_show("none") == []
+
+
+def test_for_root_skips_hidden_shows():
+    index = video_index.EpisodeIndex(IDX)
+    assert index.shows_for_root("r1") == ["a", "b"]
+    assert _ids(index.for_root("r1")) == ["a1", "a2", "a10", "a1", "b1"]
+    assert _ids(index.for_root("r1", skip=["a"])) == ["b1"]
+    assert _ids(index.for_root("r2", skip=("a", "b"))) == ["c1"]
+    assert index.for_root("r3") == []
@@ -0,0 +1,54 @@
+"""PosterService job queue: one job per show, failures and re-requests."""
+
+import queue
+import threading
+
+import pytest
+
+import video_posters
+
+
+@pytest.fixture
+def service():
+    done = queue.Queue()
+    svc = video_posters.PosterService(lambda show_id, path, generated: done.put((show_id, path, generated)))
+    yield svc, done
+    svc.shutdown()
+
+
+def test_unexpected_error_keeps_the_worker_alive(service, monkeypatch):
+    svc, done = service
+    monkeypatch.setattr(video_posters, "WORKERS", 1)
+
+    def make(show_id, job):
+        if show_id == "bad":
+            raise ValueError("broken file")
+        return f"/posters/{show_id}.jpg", True
+
+    monkeypatch.setattr(svc, "_make", make)
+    svc.request("bad", ["a.mkv"])
+    assert done.get(timeout=10) == ("bad", None, False)
+    svc.request("good", ["b.mkv"])
+    assert done.get(timeout=10) == ("good", "/posters/good.jpg", True)
+
+
+def test_forced_request_during_a_grab_runs_again(service, monkeypatch):
+    svc, done = service
+    started, release, runs = threading.Event(), threading.Event(), []
+
+    def make(show_id, job):
+        runs.append((job["force"], job["episodes"]))
+        started.set()
+        release.wait(10)
+        return "/posters/s.jpg", job["force"]
+
+    monkeypatch.setattr(svc, "_make", make)
+    svc.request("s", ["old.mkv"])
+    assert started.wait(10)
+    svc.request("s", ["new.mkv"], priority=video_posters.PRIORITY_USER, force=True)
+    svc.request("s", ["new.mkv"])  # nothing more than the queued rerun
+    release.set()
+    assert done.get(timeout=10) == ("s", "/posters/s.jpg", False)
+    assert done.get(timeout=10) == ("s", "/posters/s.jpg", True)
+    assert runs == [(False, ["old.mkv"]), (True, ["new.mkv"])]
+    assert done.empty()
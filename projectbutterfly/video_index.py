@@ -0,0 +1,81 @@
+"""
+Project Butterfly — Video Index Lookups
+
+Hash indexes over the in-memory video index (roots/shows/episodes as the
+scan writes them) so VideoBridge's on-demand queries cost O(result):
+
+  - episodes by id (and by the aliasIds a rename carries), show, root, path
+  - shows by id and per root, in index order
+  - each show's episodes in natural path order, sorted the first time the
+    show is asked for and kept, so opening one show never sorts the others
+
+Built in one pass over the index, once per loaded index; the episode dicts
+are shared with the index, not copied. Pure Python, no Qt.
+"""
+
+from typing import Iterable, Optional
+
+import library_scan
+
+
+class EpisodeIndex:
+    def __init__(self, idx: dict):
+        self._shows = {}
+        self._root_shows = {}
+        self._by_id = {}
+        self._by_alias = {}
+        self._by_path = {}
+        self._show_eps = {}
+        self._sorted = set()
+
+        for show in idx.get("shows") or ():
+            if isinstance(show, dict) and show.get("id"):
+                sid = str(show["id"])
+                self._shows[sid] = show
+                self._root_shows.setdefault(str(show.get("rootId") or ""), []).append(sid)
+        for ep in idx.get("episodes") or ():
+            if not isinstance(ep, dict):
+                continue
+            eid = str(ep.get("id") or "")
+            if eid:
+                self._by_id.setdefault(eid, ep)
+            for alias in ep.get("aliasIds") or ():
+                if alias:
+                    self._by_alias.setdefault(str(alias), ep)
+            if ep.get("path"):
+                self._by_path.setdefault(ep["path"], ep)
+            self._show_eps.setdefault(str(ep.get("showId") or ""), []).append(ep)
+
+    def show(self, show_id) -> Optional[dict]:
+        return self._shows.get(str(show_id or ""))
+
+    def episode(self, ep_id) -> Optional[dict]:
+        """By id, else by an alias id (an episode renamed since the id was saved)."""
+        key = str(ep_id or "")
+        return self._by_id.get(key) or self._by_alias.get(key)
+
+    def by_path(self, path) -> Optional[dict]:
+        return self._by_path.get(path)
+
+    def for_show(self, show_id) -> list:
+        """The show's episodes in natural path order (a shared list: don't mutate)."""
+        sid = str(show_id or "")
+        eps = self._show_eps.get(sid)
+        if not eps:
+            return []
+        if sid not in self._sorted:
+            eps.sort(key=lambda ep: library_scan.natural_key(ep.get("path") or ep.get("title")))
+            self._sorted.add(sid)
+        return eps
+
+    def shows_for_root(self, root_id) -> list:
+        return self._root_shows.get(str(root_id or ""), [])
+
+    def for_root(self, root_id, skip: Iterable[str] = ()) -> list:
+        """Episodes of the root's shows, show by show, leaving out skip."""
+        skip = set(skip)
+        out = []
+        for sid in self.shows_for_root(root_id):
+            if sid not in skip:
+                out.extend(self.for_show(sid))
+        return out
@@ -0,0 +1,262 @@
+"""
+Project Butterfly — Show Poster Service
+
+Backs VideoBridge.generateShowThumbnail and the post-scan poster sweep:
+
+  - A poster image in the show folder (what the scan finds as thumbPath)
+    or one the user already saved always wins; nothing is generated.
+  - Otherwise a frame is taken from the show's middle episode: ffmpeg's
+    thumbnail filter picks the most representative of a short run of
+    frames at half the runtime, scales it to POSTER_WIDTH and, from the
+    same process, a 16x9 grey copy whose mean brightness rejects black or
+    fade frames; other offsets are tried before giving up. Without ffmpeg,
+    mpv --vo=image grabs one filtered frame (no black check).
+  - The JPEG lands in video_posters/<id>.jpg, the layout VideoPosterBridge
+    serves, so get/has/delete work on generated posters unchanged.
+  - Jobs run on WORKERS threads in priority order (an explicit request
+    ahead of the sweep backlog) and one job per show however often it is
+    asked for, so adding a 300-show folder queues 300 jobs the UI never
+    waits on.
+
+Pure Python (subprocess), no Qt. Callbacks run on worker threads.
+"""
+
+import heapq
+import itertools
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from typing import Callable, Optional
+
+import media_probe
+import storage
+
+WORKERS = 2
+POSTER_WIDTH = 480
+GRAB_TIMEOUT_S = 30
+BLACK_LUMA = 24
+OFFSET_FRACTIONS = (0.5, 0.35, 0.65, 0.2)
+OFFSET_SECONDS = (90, 30, 300, 8)  # runtime unknown
+
+PRIORITY_USER = 0
+PRIORITY_SWEEP = 10
+
+
+def safe_id(show_id) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", str(show_id or "unknown"))
+
+
+def poster_paths(show_id) -> dict:
+    d = storage.data_path("video_posters")
+    sid = safe_id(show_id)
+    return {"dir": d, "jpg": os.path.join(d, f"{sid}.jpg"), "png": os.path.join(d, f"{sid}.png")}
+
+
+def non_empty(p: str) -> bool:
+    try:
+        return os.path.isfile(p) and os.path.getsize(p) > 0
+    except OSError:
+        return False
+
+
+def existing_poster(show_id) -> Optional[str]:
+    p = poster_paths(show_id)
+    return next((x for x in (p["jpg"], p["png"]) if non_empty(x)), None)
+
+
+def mpv_path() -> Optional[str]:
+    found = shutil.which("mpv")
+    if found:
+        return found
+    if sys.platform == "win32":
+        bundled = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "resources", "mpv", "windows", "mpv.exe")
+        if os.path.isfile(bundled):
+            return bundled
+    return None
+
+
+def _offsets(duration: Optional[float]) -> list:
+    if duration and duration > 0:
+        return [round(duration * f, 3) for f in OFFSET_FRACTIONS]
+    return list(OFFSET_SECONDS)
+
+
+class PosterService:
+    """
+    request(show_id, episodes, duration, priority, force) queues a poster
+    for show_id from the first usable of episodes (paths, best first);
+    done(show_id, path, generated) follows on a worker thread, path None
+    when no frame could be taken. Without force an existing poster is
+    reported as is (generated False).
+    """
+
+    def __init__(self, done: Callable[[str, Optional[str], bool], None]):
+        self._done = done
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}  # show_id -> job (the latest request wins, at its best priority)
+        self._procs = set()
+        self._threads = []
+        self._closed = False
+
+    def request(self, show_id: str, episodes: list, duration: Optional[float] = None,
+                priority: int = PRIORITY_SWEEP, force: bool = False):
+        with self._cond:
+            if self._closed:
+                return
+            job = self._jobs.get(show_id)
+            if job is not None and job.get("running"):
+                # The running grab won't see this request, so it runs again
+                # after it (only if it asks for more than that grab delivers)
+                again = job.get("again")
+                if again is not None:
+                    again.update(episodes=episodes, duration=duration, force=again["force"] or force,
+                                 priority=min(again["priority"], priority))
+                elif (force and not job["force"]) or priority < job["priority"]:
+                    job["again"] = {"episodes": episodes, "duration": duration, "force": force,
+                                    "priority": priority}
+                return
+            if job is not None:
+                job.update(episodes=episodes, duration=duration, force=job["force"] or force)
+                if priority >= job["priority"]:
+                    return
+            else:
+                job = self._jobs[show_id] = {"episodes": episodes, "duration": duration, "force": force}
+            job["priority"] = priority
+            heapq.heappush(self._heap, (priority, next(self._seq), show_id))
+            if len(self._threads) < WORKERS:
+                t = threading.Thread(target=self._worker, name="video-posters", daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                priority, _, show_id = heapq.heappop(self._heap)
+                job = self._jobs.get(show_id)
+                if job is None or job.get("running") or job["priority"] != priority:
+                    continue  # superseded by a higher-priority push
+                job["running"] = True
+            path, generated = None, False
+            try:
+                path, generated = self._make(show_id, job)
+            except Exception:
+                pass  # an unexpected error must not take the worker (and the queue) down
+            finally:
+                with self._cond:
+                    again = job.pop("again", None)
+                    if again is not None and not self._closed:
+                        self._jobs[show_id] = again
+                        heapq.heappush(self._heap, (again["priority"], next(self._seq), show_id))
+                    else:
+                        self._jobs.pop(show_id, None)
+                if not self._closed:
+                    try:
+                        self._done(show_id, path, generated)
+                    except Exception:
+                        pass
+
+    def _make(self, show_id: str, job: dict):
+        if not job["force"]:
+            existing = existing_poster(show_id)
+            if existing:
+                return existing, False
+        episode = next((p for p in job["episodes"] if non_empty(p)), None)
+        if not episode:
+            return None, False
+        paths = poster_paths(show_id)
+        os.makedirs(paths["dir"], exist_ok=True)
+        tmp = os.path.join(paths["dir"], f".{safe_id(show_id)}.{os.getpid()}.grab.jpg")
+        try:
+            if not self._grab(episode, job["duration"], tmp):
+                return None, False
+            os.replace(tmp, paths["jpg"])
+        finally:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        try:
+            os.unlink(paths["png"])
+        except OSError:
+            pass
+        return paths["jpg"], True
+
+    def _run(self, args: list, capture: bool = False) -> Optional[bytes]:
+        """Run a grabber process; its stdout (b"" unless capture), None on failure."""
+        if self._closed:
+            return None
+        try:
+            proc = subprocess.Popen(args, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL,
+                                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except OSError:
+            return None
+        with self._cond:
+            self._procs.add(proc)
+        try:
+            out, _ = proc.communicate(timeout=GRAB_TIMEOUT_S)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return None
+        finally:
+            with self._cond:
+                self._procs.discard(proc)
+        return (out or b"") if proc.returncode == 0 else None
+
+    def _grab(self, episode: str, duration: Optional[float], out: str) -> bool:
+        ffmpeg = media_probe.ffmpeg_path()
+        if ffmpeg:
+            graph = (f"[0:v:0]thumbnail=24,split=2[a][b];"
+                     f"[a]scale='min({POSTER_WIDTH},iw)':-2[p];[b]scale=16:9,format=gray[g]")
+            for at in _offsets(duration):
+                luma = self._run([ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+                                  "-ss", str(at), "-i", episode, "-filter_complex", graph,
+                                  "-map", "[p]", "-frames:v", "1", "-q:v", "3", out,
+                                  "-map", "[g]", "-frames:v", "1", "-f", "rawvideo", "pipe:1"], capture=True)
+                if luma and non_empty(out) and sum(luma) / len(luma) >= BLACK_LUMA:
+                    return True
+            return False
+        mpv = mpv_path()
+        if not mpv:
+            return False
+        outdir = out + ".d"
+        try:
+            os.makedirs(outdir, exist_ok=True)
+            ok = self._run([mpv, "--no-config", "--no-terminal", "--msg-level=all=no", "--ao=null",
+                            "--vo=image", "--frames=1", f"--start={_offsets(duration)[0]}",
+                            "--vo-image-format=jpg", f"--vo-image-outdir={outdir}",
+                            f"--vf=lavfi=[thumbnail=24,scale='min({POSTER_WIDTH},iw)':-2]", episode])
+            shots = sorted(f for f in os.listdir(outdir) if f.lower().endswith(".jpg"))
+            if ok is None or not shots:
+                return False
+            os.replace(os.path.join(outdir, shots[-1]), out)
+            return non_empty(out)
+        finally:
+            shutil.rmtree(outdir, ignore_errors=True)
+
+    def shutdown(self):
+        """Drop queued jobs and kill running grabs (window close)."""
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._jobs.clear()
+            procs = list(self._procs)
+            self._cond.notify_all()
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
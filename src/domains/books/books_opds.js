@@ -16,6 +16,7 @@
 
   // ---- OPDS browser in Books sidebar ----
   var _booksOpdsFeeds = [];
+  var OPDS_PAGE_WINDOW = 200;
   var _booksOpdsUi = {
     inited: false,
     open: false,
@@ -51,6 +52,7 @@
       header: document.getElementById('booksOpdsHeader'),
       items: document.getElementById('booksOpdsItems'),
       addBtn: document.getElementById('booksAddOpdsBtn'),
+      searchBtn: document.getElementById('booksSearchOpdsBtn'),
       overlay: document.getElementById('booksOpdsOverlay'),
       title: document.getElementById('booksOpdsTitle'),
       subtitle: document.getElementById('booksOpdsSubtitle'),
@@ -118,6 +120,7 @@
         + '<div id="booksOpdsItems" class="sidebarSectionItems">'
         + '  <div style="display:flex; gap:8px; margin-bottom:8px;">'
         + '    <button type="button" id="booksAddOpdsBtn" class="iconBtn" title="Add OPDS feed">+</button>'
+        + '    <button type="button" id="booksSearchOpdsBtn" class="iconBtn hidden" title="Search all OPDS feeds">\u2315</button>'
         + '  </div>'
         + '  <div id="booksOpdsFeedsList" class="folderList"></div>'
         + '  <div id="booksOpdsFeedsEmpty" class="smallMuted" style="padding:8px 4px;">No OPDS feeds yet</div>'
@@ -162,6 +165,12 @@
       ui.addBtn.__opdsBound = true;
       ui.addBtn.addEventListener('click', function () { addOpdsFeedPrompt(); });
     }
+    if (ui.searchBtn && !ui.searchBtn.__opdsBound) {
+      ui.searchBtn.__opdsBound = true;
+      // Offline index only exists where the main process crawls feeds (Butterfly)
+      if (api.booksOpds && api.booksOpds.searchIndex) ui.searchBtn.classList.remove('hidden');
+      ui.searchBtn.addEventListener('click', function () { searchBooksOpdsPrompt(); });
+    }
     if (ui.closeBtn && !ui.closeBtn.__opdsBound) {
       ui.closeBtn.__opdsBound = true;
       ui.closeBtn.addEventListener('click', function () { closeBooksOpdsOverlay(); });
@@ -173,7 +182,8 @@
     if (ui.refreshBtn && !ui.refreshBtn.__opdsBound) {
       ui.refreshBtn.__opdsBound = true;
       ui.refreshBtn.addEventListener('click', function () {
-        if (_booksOpdsUi.current && _booksOpdsUi.current.url) openBooksOpdsUrl(_booksOpdsUi.current.url, { replace: true });
+        var cur = _booksOpdsUi.current;
+        if (cur && (cur.cursorUrl || cur.url)) openBooksOpdsUrl(cur.cursorUrl || cur.url, { replace: true, refresh: true });
       });
     }
     if (ui.addFeedBtnOverlay && !ui.addFeedBtnOverlay.__opdsBound) {
@@ -193,6 +203,8 @@
           openBooksOpdsUrl(href, { titleHint: title });
         } else if (action === 'download' && href) {
           downloadOpdsAcquisition({ href: href, title: title, type: type });
+        } else if (action === 'more') {
+          loadMoreBooksOpds();
         } else if (action === 'open-ext' && href) {
           if (api.shell && api.shell.openExternal) api.shell.openExternal(href).catch(function () {});
           else window.open(href, '_blank');
@@ -645,6 +657,13 @@
         loadBooksOpdsFeeds();
       }).catch(function () { toast('Could not update feed'); });
     }});
+    if (api.booksOpds && api.booksOpds.crawlFeeds) {
+      items.push({ label: 'Update search index', onClick: function () {
+        api.booksOpds.crawlFeeds({ feedIds: [feed.id] }).then(function (res) {
+          toast(res && res.ok ? 'Indexing OPDS feed\u2026' : ((res && res.error) || 'Could not index feed'));
+        }).catch(function () { toast('Could not index feed'); });
+      }});
+    }
     items.push({ label: 'Remove', onClick: function () {
       if (!window.confirm('Remove this OPDS feed?')) return;
       if (!api.booksOpds || !api.booksOpds.removeFeed) return;
@@ -736,6 +755,7 @@
       if (item.language) infoParts.push(String(item.language).toUpperCase());
       if (item.published) infoParts.push(item.published.replace(/^(.{10}).*$/, '$1'));
       if (item.kind) infoParts.push(item.kind);
+      if (item.feedName) infoParts.push(item.feedName);
       var infoLine = infoParts.join(' \u2022 ');
       var desc = String(item.summary || '').replace(/<[^>]+>/g, ' ').replace(/\s+/g, ' ').trim();
       if (desc.length > 180) desc = desc.slice(0, 180) + '\u2026';
@@ -764,9 +784,31 @@
       }
       html += '</div></div></div>';
     }
+    if (page.hasMore) {
+      html += '<div class="booksOpdsState"><button type="button" data-opds-action="more"' + (page.loadingMore ? ' disabled' : '') + '>'
+        + (page.loadingMore ? 'Loading\u2026' : 'Load more') + '</button></div>';
+    }
     ui.body.innerHTML = html;
   }
 
+  // Next window of a parsed catalog (main process keeps the cursor and follows next links)
+  async function loadMoreBooksOpds() {
+    var page = _booksOpdsUi.current;
+    if (!page || !page.hasMore || page.loadingMore || !page.cursorUrl) return;
+    page.loadingMore = true;
+    renderBooksOpdsCatalog();
+    try {
+      var res = await api.booksOpds.fetchCatalog({ url: page.cursorUrl, parse: true, offset: page.items.length, limit: OPDS_PAGE_WINDOW });
+      if (!res || !res.ok || !res.page) throw new Error((res && res.error) || 'Request failed');
+      page.items = page.items.concat(Array.isArray(res.page.items) ? res.page.items : []);
+      page.hasMore = !!res.page.hasMore;
+    } catch (err) {
+      toast('OPDS load failed');
+    }
+    page.loadingMore = false;
+    if (_booksOpdsUi.current === page) renderBooksOpdsCatalog();
+  }
+
   async function openBooksOpdsUrl(url, opts) {
     opts = opts || {};
     if (!api.booksOpds || !api.booksOpds.fetchCatalog) {
@@ -786,16 +828,19 @@
     renderBooksOpdsCatalog();
 
     try {
-      var res = await api.booksOpds.fetchCatalog({ url: url });
+      var res = await api.booksOpds.fetchCatalog({ url: url, parse: true, limit: OPDS_PAGE_WINDOW, refresh: !!opts.refresh });
       if (!res || !res.ok) throw new Error((res && (res.error || (res.status ? ('HTTP ' + res.status) : 'Request failed'))) || 'Request failed');
-      var parsed = parseOpdsPayload(res);
+      // Butterfly parses in Python and returns a page window; Electron returns the raw body
+      var parsed = res.page || parseOpdsPayload(res);
       var page = {
         url: res.url || url,
+        cursorUrl: res.page ? url : '',
         title: parsed.title || opts.titleHint || 'OPDS Catalog',
         subtitle: parsed.subtitle || _opdsHost(res.url || url),
         items: Array.isArray(parsed.items) ? parsed.items : [],
         feedLinks: Array.isArray(parsed.feedLinks) ? parsed.feedLinks : [],
         type: parsed.type || '',
+        hasMore: !!parsed.hasMore,
       };
       if (opts.replace && _booksOpdsUi.stack.length) {
         _booksOpdsUi.stack[_booksOpdsUi.stack.length - 1] = page;
@@ -823,6 +868,48 @@
     }
   }
 
+  // Local full-text search over every crawled feed (see BooksOpdsBridge.searchIndex)
+  async function searchBooksOpdsPrompt() {
+    if (!api.booksOpds || !api.booksOpds.searchIndex) return;
+    var query = window.prompt('Search all OPDS feeds');
+    if (query == null) return;
+    query = String(query || '').trim();
+    if (!query) return;
+    var res;
+    try {
+      res = await api.booksOpds.searchIndex({ query: query, limit: OPDS_PAGE_WINDOW });
+    } catch (e) {
+      res = null;
+    }
+    if (!res || !res.ok) {
+      toast((res && res.error) || 'OPDS search failed');
+      return;
+    }
+    if (!res.indexedFeeds && !res.running) {
+      if (api.booksOpds.crawlFeeds) api.booksOpds.crawlFeeds({}).catch(function () {});
+      toast('Indexing OPDS feeds\u2026 search again when it finishes');
+      return;
+    }
+    ensureBooksOpdsUi();
+    openBooksOpdsOverlay();
+    _booksOpdsUi.selectedFeedId = null;
+    var items = Array.isArray(res.items) ? res.items : [];
+    var page = {
+      url: '',
+      title: 'Search: ' + query,
+      subtitle: (res.total || 0) + ' result' + (res.total === 1 ? '' : 's')
+        + (res.total > items.length ? ' (showing ' + items.length + ')' : '')
+        + (res.running ? ' \u2022 indexing\u2026' : ''),
+      items: items,
+      feedLinks: [],
+      type: 'search',
+      hasMore: false,
+    };
+    _booksOpdsUi.stack = [page];
+    _booksOpdsUi.current = page;
+    renderBooksOpdsCatalog();
+  }
+
   function openBooksOpdsFeed(feed) {
     if (!feed || !feed.url) return;
     _booksOpdsUi.selectedFeedId = feed.id || null;
@@ -867,10 +954,10 @@
     var name = '';
     try {
       if (api.booksOpds.fetchCatalog) {
-        var probe = await api.booksOpds.fetchCatalog({ url: url });
+        var probe = await api.booksOpds.fetchCatalog({ url: url, parse: true, limit: 1 });
         if (probe && probe.ok) {
           try {
-            var parsed = parseOpdsPayload(probe);
+            var parsed = probe.page || parseOpdsPayload(probe);
             if (parsed && parsed.title) name = String(parsed.title || '').trim();
             url = probe.url || url;
           } catch (e) {}
@@ -913,5 +1000,20 @@
       });
     }
   } catch (e) {}
+  try {
+    if (api && api.booksOpds && typeof api.booksOpds.onCrawlProgress === 'function') {
+      api.booksOpds.onCrawlProgress(function (data) {
+        if (!data || data.running) return;
+        if (data.cancelled) toast('OPDS indexing cancelled');
+        else if (!data.ok) toast('OPDS indexing failed');
+        else {
+          var n = 0;
+          var feeds = Array.isArray(data.feeds) ? data.feeds : [];
+          for (var i = 0; i < feeds.length; i++) n += Number(feeds[i].entries || 0);
+          toast('OPDS search index updated (' + n + ' books)');
+        }
+      });
+    }
+  } catch (e) {}
 
 })();
@@ -5077,11 +5077,18 @@
     if (el.hubAdblockUpdateBtn) el.hubAdblockUpdateBtn.addEventListener('click', function () {
       if (!api.webAdblock || !api.webAdblock.updateLists) return;
       showToast('Updating ad blocker lists...');
-      api.webAdblock.updateLists().then(function () {
+      api.webAdblock.updateLists().then(function (res) {
+        if (res && res.pending) return; // finishes in the background, reported via onUpdated
         showToast('Ad blocker lists updated');
         if (hub.loadAdblockState) hub.loadAdblockState();
       }).catch(function () { showToast('Failed to update lists'); });
     });
+    if (api.webAdblock && typeof api.webAdblock.onUpdated === 'function') {
+      api.webAdblock.onUpdated(function (info) {
+        if (info && info.update) showToast(info.update.ok ? 'Ad blocker lists updated' : 'Failed to update lists');
+        if (hub.loadAdblockState) hub.loadAdblockState();
+      });
+    }
     if (el.hubAdblockStatsBtn) el.hubAdblockStatsBtn.addEventListener('click', function () {
       if (!api.webAdblock || !api.webAdblock.stats) return;
       api.webAdblock.stats().then(function (res) {